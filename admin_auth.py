@@ -0,0 +1,12 @@
+import hmac
+
+
+# Admin endpoint authentication shared by web_app and async_web_app
+def is_admin_request(config, token) -> bool:
+    """True if token (the X-Admin-Token header) is config.ADMIN_TOKEN - compared in constant time.
+
+    Admin endpoints are disabled while ADMIN_TOKEN is unset.
+    """
+    if not config.ADMIN_TOKEN or not token:
+        return False
+    return hmac.compare_digest(token.encode('utf-8'), config.ADMIN_TOKEN.encode('utf-8'))
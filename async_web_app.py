@@ -0,0 +1,375 @@
+"""Asyncio entry point for the chatbot.
+
+Serves the same Teams tab and /chat contract as web_app.py, but awaits the
+LLM and MCP round trips so one process can hold hundreds of conversations
+waiting on I/O. Run with:
+
+    python async_web_app.py
+    gunicorn async_web_app:create_app --worker-class aiohttp.GunicornWebWorker --bind 0.0.0.0:$PORT
+"""
+import asyncio
+import logging
+import os
+import time
+
+import aiohttp
+import jinja2
+from aiohttp import web
+
+from admin_auth import is_admin_request
+from config import Config
+from llm.router_api_llm import RouterAPILLM, sse_frame
+from teams_headers import add_teams_headers
+from tools.deadline import Deadline
+from tools.http_pool import pool_stats
+
+logging.basicConfig(
+    level=logging.INFO,
+    format='%(asctime)s - %(name)s - %(levelname)s - %(message)s'
+)
+logger = logging.getLogger(__name__)
+
+TEMPLATES = jinja2.Environment(
+    loader=jinja2.FileSystemLoader(os.path.join(os.path.dirname(os.path.abspath(__file__)), 'templates')),
+    autoescape=jinja2.select_autoescape(['html'])
+)
+
+CONFIG_KEY = web.AppKey('config', object)
+LLM_KEY = web.AppKey('llm', object)
+
+
+@web.middleware
+async def teams_headers_middleware(request, handler):
+    response = await handler(request)
+    return add_teams_headers(response)
+
+
+async def index(request):
+    """Main chatbot interface - Teams compatible"""
+    html = TEMPLATES.get_template('teams_index.html').render(timestamp=int(time.time()))
+    return web.Response(text=html, content_type='text/html')
+
+
+async def chat(request):
+    """Handle chat messages without blocking the event loop"""
+    # The whole answer - LLM, MCP and rendering - has to fit in CHAT_DEADLINE_SECONDS
+    deadline = Deadline(request.app[CONFIG_KEY].CHAT_DEADLINE_SECONDS)
+    llm = request.app[LLM_KEY]
+    try:
+        if not llm:
+            return web.json_response({
+                'response': '❌ Chatbot is not properly initialized. Please check the configuration.',
+                'error': True
+            })
+
+        try:
+            data = await request.json()
+        except ValueError:
+            data = None
+        if not data:
+            return web.json_response({
+                'response': '❌ No data received',
+                'error': True
+            })
+
+        user_message = data.get('message', '').strip()
+
+        if not user_message:
+            return web.json_response({
+                'response': '⚠️ Please enter a message.',
+                'error': True
+            })
+
+        logger.info(f"📝 Processing user message: {user_message}")
+
+        try:
+            reply = await llm.process_query_paged_async(user_message, deadline=deadline)
+            logger.info(f"✅ Generated response: {reply['response'][:100]}...")
+
+            return web.json_response({
+                'response': reply['response'],
+                'next_cursor': reply['next_cursor'],
+                'total_count': reply['total_count'],
+                'error': False
+            })
+
+        except Exception as llm_error:
+            logger.error(f"❌ LLM Error: {str(llm_error)}")
+            return web.json_response({
+                'response': f'❌ I encountered an error processing your request. Please try a simpler question or try again later.',
+                'error': True
+            })
+
+    except Exception as e:
+        logger.error(f"❌ Error in chat endpoint: {str(e)}")
+        return web.json_response({
+            'response': f'❌ Server error. Please try again.',
+            'error': True
+        }, status=500)
+
+
+async def chat_stream(request):
+    """Streaming /chat: Server-Sent Events with progress, then the table and its rows in rendered batches"""
+    deadline = Deadline(request.app[CONFIG_KEY].CHAT_DEADLINE_SECONDS)
+    llm = request.app[LLM_KEY]
+    try:
+        data = await request.json()
+    except ValueError:
+        data = None
+    user_message = str((data or {}).get('message', '')).strip()
+
+    response = web.StreamResponse(headers={
+        'Content-Type': 'text/event-stream',
+        'Cache-Control': 'no-cache',
+        'X-Accel-Buffering': 'no'
+    })
+    add_teams_headers(response)
+    await response.prepare(request)
+
+    if not llm:
+        await response.write(sse_frame({'event': 'message', 'html': '❌ Chatbot is not properly initialized. Please check the configuration.', 'error': True}).encode('utf-8'))
+    elif not user_message:
+        await response.write(sse_frame({'event': 'message', 'html': '⚠️ Please enter a message.', 'error': True}).encode('utf-8'))
+    else:
+        logger.info(f"📝 Streaming response to user message: {user_message}")
+        try:
+            async for event in llm.stream_query_async(user_message, deadline=deadline):
+                await response.write(sse_frame(event).encode('utf-8'))
+            return response
+        except (ConnectionResetError, asyncio.CancelledError):
+            raise
+        except Exception as e:
+            logger.error(f"❌ Error in chat stream: {str(e)}")
+            await response.write(sse_frame({'event': 'message', 'html': '❌ Server error. Please try again.', 'error': True}).encode('utf-8'))
+    await response.write(sse_frame({'event': 'done', 'html': '', 'total_count': None}).encode('utf-8'))
+    return response
+
+
+async def chat_page(request):
+    """Fetch a further page of patient rows for an earlier answer (no LLM call)"""
+    deadline = Deadline(request.app[CONFIG_KEY].CHAT_DEADLINE_SECONDS)
+    llm = request.app[LLM_KEY]
+    try:
+        if not llm:
+            return web.json_response({
+                'response': '❌ Chatbot is not properly initialized. Please check the configuration.',
+                'error': True
+            })
+
+        try:
+            data = await request.json()
+        except ValueError:
+            data = None
+        cursor = str((data or {}).get('cursor', '')).strip()
+        if not cursor:
+            return web.json_response({
+                'response': '❌ No page cursor received',
+                'error': True
+            })
+
+        reply = await llm.get_page_async(cursor, deadline=deadline)
+        return web.json_response({
+            'response': reply['response'],
+            'next_cursor': reply['next_cursor'],
+            'total_count': reply['total_count'],
+            'error': reply['total_count'] is None
+        })
+
+    except Exception as e:
+        logger.error(f"❌ Error in chat page endpoint: {str(e)}")
+        return web.json_response({
+            'response': f'❌ Server error. Please try again.',
+            'error': True
+        }, status=500)
+
+
+async def _probe(url: str, timeout: float) -> dict:
+    """GET url; status code and the start of the body"""
+    async with aiohttp.ClientSession(timeout=aiohttp.ClientTimeout(total=timeout)) as session:
+        async with session.get(url) as response:
+            return {"status": response.status, "response": (await response.text())[:200]}
+
+
+async def health(request):
+    """Enhanced health check endpoint"""
+    config = request.app[CONFIG_KEY]
+    llm = request.app[LLM_KEY]
+    try:
+        breaker = llm.patient_tool.circuit_breaker if llm else None
+
+        # Test MCP server connection (skip the probe while the breaker is open)
+        mcp_status = "unknown"
+        if breaker and breaker.state == breaker.OPEN:
+            mcp_status = "circuit_open"
+        else:
+            try:
+                probe = await _probe(f"{config.MCP_SERVER_URL}/health", 5)
+                mcp_status = "healthy" if probe["status"] == 200 else "unhealthy"
+            except Exception:
+                mcp_status = "unreachable"
+
+        return web.json_response({
+            'status': 'healthy',
+            'service': 'MCP Medical Assistant Chatbot',
+            'mode': 'asyncio',
+            'mcp_server_url': config.MCP_SERVER_URL,
+            'mcp_server_status': mcp_status,
+            'mcp_circuit_breaker': breaker.snapshot() if breaker else None,
+            'llm_initialized': llm is not None,
+            'environment': 'production' if os.getenv('RENDER_SERVICE_NAME') else 'development',
+            'timestamp': int(time.time())
+        })
+    except Exception as e:
+        return web.json_response({
+            'status': 'error',
+            'error': str(e)
+        }, status=500)
+
+
+async def debug_mcp(request):
+    """Debug MCP server connection"""
+    config = request.app[CONFIG_KEY]
+    llm = request.app[LLM_KEY]
+    debug_info = {
+        "mcp_server_url": config.MCP_SERVER_URL,
+        "health_check": "unknown",
+        "patients_endpoint": "unknown",
+        "circuit_breaker": llm.patient_tool.circuit_breaker.snapshot() if llm else None,
+        "error": None
+    }
+    try:
+        debug_info["health_check"] = await _probe(f"{config.MCP_SERVER_URL}/health", 10)
+    except Exception as e:
+        debug_info["health_check"] = f"Error: {str(e)}"
+    try:
+        debug_info["patients_endpoint"] = await _probe(f"{config.MCP_SERVER_URL}/patients", 10)
+    except Exception as e:
+        debug_info["patients_endpoint"] = f"Error: {str(e)}"
+    return web.json_response(debug_info)
+
+
+async def status(request):
+    """Detailed status endpoint"""
+    config = request.app[CONFIG_KEY]
+    llm = request.app[LLM_KEY]
+    return web.json_response({
+        'chatbot_status': 'running',
+        'mode': 'asyncio',
+        'mcp_server': config.MCP_SERVER_URL,
+        'model': config.MODEL_NAME,
+        'max_tokens': config.MAX_TOKENS,
+        'temperature': config.TEMPERATURE,
+        'llm_ready': llm is not None,
+        'mcp_connection_pool': pool_stats(),
+        'mcp_request_coalescing': llm.patient_tool.singleflight.stats() if llm else None,
+        'patient_result_cache': llm.patient_tool.result_cache.stats() if llm and llm.patient_tool.result_cache else None,
+        'patient_data_mode': llm.patient_tool.data_mode if llm else None,
+        'patient_mirror': llm.patient_tool.mirror.stats() if llm else None,
+        'patient_mirror_sync': llm.patient_tool.mirror_sync.stats() if llm else None,
+        'query_routing': llm.route_metrics.stats() if llm else None,
+        'decision_cache': llm.decision_cache.stats() if llm and llm.decision_cache else None,
+        'speculative_prefetch': llm.speculation.metrics.stats() if llm and llm.speculation else None,
+        'chat_stream': llm.stream_metrics.stats()['paths'] if llm else None
+    })
+
+
+async def flush_cache(request):
+    """Flush the patient result cache - all entries, or only keys starting with 'prefix'"""
+    config = request.app[CONFIG_KEY]
+    llm = request.app[LLM_KEY]
+    if not is_admin_request(config, request.headers.get('X-Admin-Token')):
+        return web.json_response({'error': 'Forbidden'}, status=403)
+
+    if not llm or not llm.patient_tool.result_cache:
+        return web.json_response({'flushed': 0, 'message': 'Patient result cache is disabled'})
+
+    try:
+        data = await request.json()
+    except ValueError:
+        data = {}
+    prefix = (data or {}).get('prefix')
+    flushed = llm.patient_tool.result_cache.flush(prefix)
+    logger.info(f"🧹 Flushed {flushed} cache entries (prefix={prefix!r})")
+
+    return web.json_response({
+        'flushed': flushed,
+        'prefix': prefix,
+        'cache': llm.patient_tool.result_cache.stats()
+    })
+
+
+async def admin_mirror(request):
+    """Switch the patient data mode ('mirror' / 'passthrough'), run an incremental 'sync' or a forced full 'reload'"""
+    config = request.app[CONFIG_KEY]
+    llm = request.app[LLM_KEY]
+    if not is_admin_request(config, request.headers.get('X-Admin-Token')):
+        return web.json_response({'error': 'Forbidden'}, status=403)
+
+    if not llm:
+        return web.json_response({'error': 'Chatbot is not properly initialized'}, status=503)
+
+    try:
+        data = await request.json()
+    except ValueError:
+        data = {}
+    data = data or {}
+    mode = data.get('mode')
+    if mode:
+        try:
+            llm.patient_tool.set_data_mode(mode)
+        except ValueError as e:
+            return web.json_response({'error': str(e)}, status=400)
+
+    # Loads and syncs are blocking stream reads - keep them off the event loop
+    result = None
+    if data.get('reload'):
+        result = await asyncio.to_thread(llm.patient_tool.load_mirror)
+    elif data.get('sync'):
+        result = await asyncio.to_thread(llm.patient_tool.sync_mirror)
+    logger.info(f"🪞 Mirror admin: mode={llm.patient_tool.data_mode}, reload={bool(data.get('reload'))}, sync={bool(data.get('sync'))}")
+
+    return web.json_response({
+        'mode': llm.patient_tool.data_mode,
+        'result': result,
+        'mirror': llm.patient_tool.mirror.stats(),
+        'sync': llm.patient_tool.mirror_sync.stats()
+    })
+
+
+async def _close_llm(app):
+    if app[LLM_KEY] is not None:
+        await app[LLM_KEY].aclose()
+
+
+def create_app(config: Config = None) -> web.Application:
+    """Build the aiohttp application (also the gunicorn worker factory)"""
+    config = config or Config()
+
+    app = web.Application(middlewares=[teams_headers_middleware])
+    app[CONFIG_KEY] = config
+    try:
+        app[LLM_KEY] = RouterAPILLM(config)
+        logger.info("✅ LLM initialized successfully")
+    except Exception as e:
+        logger.error(f"❌ Failed to initialize LLM: {str(e)}")
+        app[LLM_KEY] = None
+
+    app.router.add_get('/', index)
+    app.router.add_get('/teams', index)
+    app.router.add_post('/chat', chat)
+    app.router.add_post('/chat/stream', chat_stream)
+    app.router.add_post('/chat/page', chat_page)
+    app.router.add_get('/health', health)
+    app.router.add_get('/status', status)
+    app.router.add_get('/debug/mcp', debug_mcp)
+    app.router.add_post('/admin/cache/flush', flush_cache)
+    app.router.add_post('/admin/mirror', admin_mirror)
+    app.router.add_static('/static', os.path.join(os.path.dirname(os.path.abspath(__file__)), 'static'))
+    app.on_cleanup.append(_close_llm)
+    return app
+
+
+if __name__ == '__main__':
+    port = int(os.environ.get('PORT', 3000))
+    print(f"🚀 Starting async MCP Chatbot on port {port}")
+    web.run_app(create_app(), host='0.0.0.0', port=port)
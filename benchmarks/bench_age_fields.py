@@ -0,0 +1,86 @@
+"""Benchmark: per-row DOB parsing / age calculation vs the batch add_age_fields routine.
+
+The per-row version is the loop the formatting code used before (fromisoformat
+or strptime plus datetime.now() for every patient). Both run on the same
+rows - ISO datetimes, date-only values and some malformed or missing DOBs -
+and must produce identical fields.
+
+    python -m benchmarks.bench_age_fields --rows 10000 100000
+"""
+import argparse
+import copy
+import random
+import time
+from datetime import datetime
+
+from benchmarks.stand_in_mcp import generate_patients
+from tools.patient_table import add_age_fields
+
+
+def per_row_age_fields(patients):
+    for patient in patients:
+        dob_value = patient.get('PatientDOB') or patient.get('patientDOB')
+        if dob_value:
+            try:
+                dob_str = str(dob_value)
+                if 'T' in dob_str:
+                    dob = datetime.fromisoformat(dob_str.replace('Z', '+00:00'))
+                else:
+                    dob = datetime.strptime(dob_str[:10], '%Y-%m-%d')
+                today = datetime.now()
+                age = today.year - dob.year - ((today.month, today.day) < (dob.month, dob.day))
+                patient['calculatedAge'] = age
+                patient['formattedDOB'] = dob.strftime('%Y-%m-%d')
+            except Exception:
+                patient['calculatedAge'] = 'Unknown'
+                patient['formattedDOB'] = str(dob_value)[:10]
+        else:
+            patient['calculatedAge'] = 'Unknown'
+            patient['formattedDOB'] = 'Unknown'
+    return patients
+
+
+def sample_rows(count: int):
+    rng = random.Random(5)
+    rows = generate_patients(count)
+    for row in rows:
+        roll = rng.random()
+        if roll < 0.3:
+            row['PatientDOB'] = row['PatientDOB'][:10]
+        elif roll < 0.32:
+            row['PatientDOB'] = rng.choice(['', None, 'unknown', '31/12/1980'])
+    return rows
+
+
+def _best(call, rows, repeat: int = 3) -> float:
+    best = float('inf')
+    for _ in range(repeat):
+        batch = copy.copy(rows)
+        start = time.perf_counter()
+        call(batch)
+        best = min(best, time.perf_counter() - start)
+    return best * 1000
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__.splitlines()[0])
+    parser.add_argument('--rows', type=int, nargs='+', default=[10000, 100000])
+    args = parser.parse_args()
+
+    for count in args.rows:
+        rows = sample_rows(count)
+        expected = per_row_age_fields(copy.deepcopy(rows))
+        actual = add_age_fields(copy.deepcopy(rows))
+        same = all(a['calculatedAge'] == b['calculatedAge'] and a['formattedDOB'] == b['formattedDOB']
+                   for a, b in zip(expected, actual))
+
+        per_row = _best(per_row_age_fields, [dict(row) for row in rows])
+        batch = _best(add_age_fields, [dict(row) for row in rows])
+        print(f"{count:>7} rows  per-row {per_row:9.1f} ms   batch {batch:8.1f} ms   "
+              f"{per_row / batch:5.1f}x   identical: {same}")
+        if not same:
+            raise SystemExit(1)
+
+
+if __name__ == '__main__':
+    main()
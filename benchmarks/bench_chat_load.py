@@ -0,0 +1,389 @@
+"""Benchmark: load test of web_app's /chat under waitress and gunicorn at increasing concurrency.
+
+Starts a stand-in LLM and a stand-in MCP server, each in its own process,
+then serves web_app.app with each server configuration in turn, pointed at
+them through the environment. Closed-loop clients (one keep-alive session
+each) send a weighted mix of questions to /chat: repeated fast-path
+searches, one-off name lookups that miss the caches, questions the model
+routes, and small talk. Each concurrency level runs for a fixed time.
+Reports throughput, latency percentiles, error rate and peak RSS per
+worker, and writes everything to JSON. Pass an earlier file to --compare to
+see the change per server and concurrency.
+
+    python -m benchmarks.bench_chat_load --concurrency 1,4,16,32 --duration 10
+    python -m benchmarks.bench_chat_load --servers waitress --compare chat_load_1a2b3c4.json
+    python -m benchmarks.bench_chat_load --env MCP_CACHE_TTL_SECONDS=0 --llm-latency lognormal:0.8,0.4
+"""
+import argparse
+import json
+import os
+import platform
+import random
+import socket
+import subprocess
+import sys
+import tempfile
+import threading
+import time
+from datetime import datetime, timezone
+from typing import Any, Dict, List, Optional
+
+import requests
+
+from benchmarks.common import print_summary, summarize
+from benchmarks.stand_in_mcp import generate_patients
+
+REPO_ROOT = os.path.dirname(os.path.dirname(os.path.abspath(__file__)))
+
+# /chat answers starting with these are failures even with HTTP 200 (same as main.ERROR_PREFIXES)
+ERROR_PREFIXES = ('❌', '⏰')
+
+# Question -> what the model answers, with the question's share of the traffic
+QUERY_MIX = [
+    ("show male patients", {"GenderName": "male"}, 15),
+    ("Show me all female patients", {"GenderName": "female"}, 10),
+    ("patients by Dr Smith", {"ProviderName": "Smith"}, 10),
+    ("patients born in 1985", {"PatientDOB": "1985"}, 5),
+    ("which patients does dr patel look after", {"ProviderName": "Patel"}, 10),
+    ("how many male patients are there?", {"GenderName": "male"}, 10),
+    ("show patients who are not enrolled", {"EnrollmentStatus": "not enrolled"}, 5),
+    ("what can you do", "I can search patients by name, NHI, provider and more.", 5),
+    ("hello", "Hello! Ask me about patients.", 5),
+]
+# Share of the traffic that looks up a patient by name - a different one most of the time
+NAME_LOOKUP_WEIGHT = 25
+
+SERVERS = ('waitress', 'gunicorn', 'gunicorn-gthread')
+
+
+def _server_command(name: str, port: int, args) -> List[str]:
+    bind = f"127.0.0.1:{port}"
+    if name == 'waitress':
+        # start_production.py: waitress.serve(app) with its default thread pool
+        return [sys.executable, '-m', 'waitress', f'--listen={bind}', f'--threads={args.waitress_threads}',
+                'web_app:app']
+    if name == 'gunicorn':
+        # Procfile: sync workers
+        return [sys.executable, '-m', 'gunicorn', '--bind', bind, '--workers', str(args.gunicorn_workers),
+                '--timeout', '120', 'web_app:app']
+    if name == 'gunicorn-gthread':
+        return [sys.executable, '-m', 'gunicorn', '--bind', bind, '--workers', str(args.gunicorn_workers),
+                '--worker-class', 'gthread', '--threads', str(args.gunicorn_threads), '--timeout', '120',
+                'web_app:app']
+    raise ValueError(f"Unknown server configuration {name!r} (expected one of {', '.join(SERVERS)})")
+
+
+def _free_port() -> int:
+    with socket.socket() as s:
+        s.bind(('127.0.0.1', 0))
+        return s.getsockname()[1]
+
+
+def _rss_kib(pid: int) -> int:
+    try:
+        with open(f'/proc/{pid}/status') as status:
+            for line in status:
+                if line.startswith('VmRSS:'):
+                    return int(line.split()[1])
+    except OSError:
+        pass
+    return 0
+
+
+def _children(pid: int) -> List[int]:
+    children = []
+    try:
+        entries = os.listdir('/proc')
+    except OSError:
+        return children
+    for entry in entries:
+        if entry.isdigit():
+            try:
+                with open(f'/proc/{entry}/stat') as stat:
+                    # pid (comm) state ppid ... - comm may contain spaces
+                    if int(stat.read().rsplit(')', 1)[1].split()[1]) == pid:
+                        children.append(int(entry))
+            except (OSError, IndexError, ValueError):
+                continue
+    return children
+
+
+class RSSSampler:
+    """Peak RSS of each worker process of a server, sampled on a background thread"""
+
+    def __init__(self, pid: int, interval: float = 0.25):
+        self.pid = pid
+        self.interval = interval
+        self.peaks: Dict[int, int] = {}
+        self._stop = threading.Event()
+        self._thread = None
+
+    def workers(self) -> List[int]:
+        # gunicorn's master only supervises; waitress serves from the process itself
+        return _children(self.pid) or [self.pid]
+
+    def sample(self):
+        for pid in self.workers():
+            self.peaks[pid] = max(self.peaks.get(pid, 0), _rss_kib(pid))
+
+    def _run(self):
+        while not self._stop.wait(self.interval):
+            self.sample()
+
+    def __enter__(self):
+        self.sample()
+        self._thread = threading.Thread(target=self._run, daemon=True)
+        self._thread.start()
+        return self
+
+    def __exit__(self, *exc):
+        self._stop.set()
+        self._thread.join()
+        self.sample()
+
+    def stats(self) -> Dict[str, Any]:
+        peaks = sorted((kib / 1024 for kib in self.peaks.values() if kib), reverse=True)
+        return {
+            'workers': len(peaks),
+            'per_worker_mb': [round(mb, 1) for mb in peaks],
+            'max_mb': round(peaks[0], 1) if peaks else 0.0,
+            'total_mb': round(sum(peaks), 1)
+        }
+
+
+class Process:
+    """A subprocess with its output in a log file, stopped on exit"""
+
+    def __init__(self, command: List[str], log_path: str, env: Optional[Dict[str, str]] = None):
+        self.command = command
+        self.log_path = log_path
+        self.env = env
+        self.process = None
+
+    def __enter__(self):
+        self._log = open(self.log_path, 'w')
+        self.process = subprocess.Popen(self.command, cwd=REPO_ROOT, env=self.env, stdout=self._log,
+                                        stderr=subprocess.STDOUT)
+        return self
+
+    def __exit__(self, *exc):
+        self.process.terminate()
+        try:
+            self.process.wait(timeout=15)
+        except subprocess.TimeoutExpired:
+            self.process.kill()
+            self.process.wait()
+        self._log.close()
+
+    def wait_until_ready(self, url: str, timeout: float = 60.0):
+        """Poll url until it answers 200; raise with the end of the log if the process dies or it takes too long"""
+        give_up = time.monotonic() + timeout
+        while time.monotonic() < give_up:
+            if self.process.poll() is not None:
+                break
+            try:
+                if requests.get(url, timeout=2).status_code == 200:
+                    return
+            except requests.exceptions.RequestException:
+                pass
+            time.sleep(0.2)
+        with open(self.log_path, errors='replace') as log:
+            tail = ''.join(log.readlines()[-20:])
+        raise RuntimeError(f"{' '.join(self.command)} did not become ready at {url}:\n{tail}")
+
+
+def _questions(args) -> List[str]:
+    """Name lookups: mostly distinct patients, so they miss the result and decision caches"""
+    names = [p['PatientFullName'] for p in generate_patients(min(args.patients, 5000), args.seed)]
+    return [f"find {name}" for name in names]
+
+
+def _pick(rng: random.Random, names: List[str]) -> str:
+    total = sum(weight for _, _, weight in QUERY_MIX) + NAME_LOOKUP_WEIGHT
+    roll = rng.uniform(0, total)
+    for question, _, weight in QUERY_MIX:
+        roll -= weight
+        if roll < 0:
+            return question
+    return rng.choice(names)
+
+
+def _client(base_url: str, deadline: float, seed: int, names: List[str], timeout: float, samples: list, lock):
+    rng = random.Random(seed)
+    session = requests.Session()
+    while time.monotonic() < deadline:
+        question = _pick(rng, names)
+        start = time.perf_counter()
+        try:
+            response = session.post(f"{base_url}/chat", json={'message': question}, timeout=timeout)
+            body = response.json()
+            error = (response.status_code != 200 or bool(body.get('error'))
+                     or str(body.get('response', '')).startswith(ERROR_PREFIXES))
+        except (requests.exceptions.RequestException, ValueError):
+            error = True
+        with lock:
+            samples.append((time.perf_counter() - start, error))
+    session.close()
+
+
+def run_level(base_url: str, server_pid: int, concurrency: int, duration: float, names: List[str],
+              seed: int, timeout: float) -> Dict[str, Any]:
+    """Drive /chat with `concurrency` closed-loop clients for `duration` seconds"""
+    samples, lock = [], threading.Lock()
+    with RSSSampler(server_pid) as rss:
+        start = time.perf_counter()
+        deadline = time.monotonic() + duration
+        clients = [threading.Thread(target=_client, args=(base_url, deadline, seed + i, names, timeout, samples, lock))
+                   for i in range(concurrency)]
+        for client in clients:
+            client.start()
+        for client in clients:
+            client.join()
+        elapsed = time.perf_counter() - start
+    errors = sum(error for _, error in samples)
+    return {
+        'concurrency': concurrency,
+        'requests': len(samples),
+        'errors': errors,
+        'error_rate': round(errors / len(samples), 4) if samples else 0.0,
+        'elapsed_seconds': round(elapsed, 2),
+        'throughput_per_second': round(len(samples) / elapsed, 2) if elapsed else 0.0,
+        'latency': summarize([seconds for seconds, error in samples if not error]),
+        'rss': rss.stats()
+    }
+
+
+def _git_revision() -> Dict[str, Any]:
+    def git(*command):
+        return subprocess.run(['git', *command], cwd=REPO_ROOT, capture_output=True, text=True).stdout.strip()
+    try:
+        return {'commit': git('rev-parse', '--short', 'HEAD') or 'unknown',
+                'dirty': bool(git('status', '--porcelain', '--untracked-files=no'))}
+    except OSError:
+        return {'commit': 'unknown', 'dirty': False}
+
+
+def compare(results: Dict[str, Any], baseline: Dict[str, Any], threshold: float) -> int:
+    """Print the change per server and concurrency against an earlier run; returns how many regressed"""
+    before = {(run['server'], level['concurrency']): level
+              for run in baseline.get('runs', []) for level in run['levels']}
+    print(f"\nCompared with {baseline.get('revision', {}).get('commit', '?')} (regression = over {threshold:.0%} worse):")
+    regressions = 0
+    for run in results['runs']:
+        for level in run['levels']:
+            old = before.get((run['server'], level['concurrency']))
+            if old is None:
+                continue
+            changes = {
+                'throughput': (level['throughput_per_second'], old['throughput_per_second'], True),
+                'p90': (level['latency']['p90_ms'], old['latency']['p90_ms'], False),
+                'rss': (level['rss']['max_mb'], old['rss']['max_mb'], False),
+            }
+            cells, regressed = [], False
+            for label, (new, previous, higher_is_better) in changes.items():
+                change = (new - previous) / previous if previous else 0.0
+                worse = -change if higher_is_better else change
+                regressed |= worse > threshold
+                cells.append(f"{label} {change:+.1%}")
+            error_change = level['error_rate'] - old['error_rate']
+            regressed |= error_change > 0.01
+            cells.append(f"errors {error_change:+.2%}")
+            regressions += regressed
+            print(f"  {'⚠️' if regressed else '✅'} {run['server']:<18} c={level['concurrency']:<4} " + '  '.join(cells))
+    return regressions
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__.splitlines()[0])
+    parser.add_argument('--servers', default=','.join(SERVERS), help=f"comma-separated, from {', '.join(SERVERS)}")
+    parser.add_argument('--concurrency', default='1,4,16,32', help='comma-separated client counts')
+    parser.add_argument('--duration', type=float, default=10.0, help='seconds per concurrency level')
+    parser.add_argument('--warmup', type=float, default=2.0, help='seconds of traffic before the first level')
+    parser.add_argument('--timeout', type=float, default=60.0, help='client timeout per request (s)')
+    parser.add_argument('--waitress-threads', type=int, default=4)
+    parser.add_argument('--gunicorn-workers', type=int, default=2)
+    parser.add_argument('--gunicorn-threads', type=int, default=4)
+    parser.add_argument('--patients', type=int, default=5000)
+    parser.add_argument('--llm-latency', default='lognormal:0.6,0.3', help='stand-in completion time (s or distribution)')
+    parser.add_argument('--mcp-latency', default='normal:0.15,0.05', help='stand-in stored procedure time (s or distribution)')
+    parser.add_argument('--seed', type=int, default=42)
+    parser.add_argument('--env', action='append', default=[], metavar='KEY=VALUE',
+                        help="extra environment for web_app (Config settings), e.g. MCP_CACHE_TTL_SECONDS=0")
+    parser.add_argument('--out', help='results JSON (default chat_load_<commit>.json)')
+    parser.add_argument('--compare', metavar='FILE', help='earlier results JSON to compare against')
+    parser.add_argument('--regression-threshold', type=float, default=0.1,
+                        help='relative change counted as a regression by --compare (default 0.1)')
+    args = parser.parse_args()
+
+    servers = [name.strip() for name in args.servers.split(',') if name.strip()]
+    for name in servers:
+        if name not in SERVERS:
+            parser.error(f"unknown server {name!r} (expected one of {', '.join(SERVERS)})")
+    levels = [int(level) for level in args.concurrency.split(',')]
+    names = _questions(args)
+    revision = _git_revision()
+    results = {
+        'benchmark': 'chat_load',
+        'revision': revision,
+        'timestamp': datetime.now(timezone.utc).isoformat(timespec='seconds'),
+        'host': {'python': platform.python_version(), 'platform': platform.platform(), 'cpus': os.cpu_count()},
+        'settings': vars(args),
+        'runs': []
+    }
+
+    with tempfile.TemporaryDirectory() as tmp:
+        decisions_path = os.path.join(tmp, 'decisions.json')
+        with open(decisions_path, 'w', encoding='utf-8') as f:
+            json.dump({question: decision for question, decision, _ in QUERY_MIX}, f)
+        mcp_port, llm_port = _free_port(), _free_port()
+        mcp_command = [sys.executable, '-m', 'benchmarks.stand_in_mcp', '--port', str(mcp_port),
+                       '--patients', str(args.patients), '--latency', args.mcp_latency, '--seed', str(args.seed)]
+        llm_command = [sys.executable, '-m', 'benchmarks.stand_in_llm', '--port', str(llm_port),
+                       '--latency', args.llm_latency, '--seed', str(args.seed), '--decisions', decisions_path]
+
+        with Process(mcp_command, os.path.join(tmp, 'mcp.log')) as mcp, \
+                Process(llm_command, os.path.join(tmp, 'llm.log')):
+            mcp_url = f"http://127.0.0.1:{mcp_port}/api/mcp"
+            mcp.wait_until_ready(f"{mcp_url}/health")
+            env = dict(os.environ, OPENAI_BASE_URL=f"http://127.0.0.1:{llm_port}/v1", MCP_SERVER_URL=mcp_url,
+                       OPENROUTER_API_KEY='sk-benchmark', OPENROUTER_MODEL='benchmark/stand-in',
+                       PYTHONPATH=os.pathsep.join(filter(None, [os.environ.get('PYTHONPATH'), REPO_ROOT])))
+            for setting in args.env:
+                key, _, value = setting.partition('=')
+                env[key] = value
+
+            for name in servers:
+                port = _free_port()
+                base_url = f"http://127.0.0.1:{port}"
+                command = _server_command(name, port, args)
+                print(f"🚀 {name}: {' '.join(command[1:])}")
+                with Process(command, os.path.join(tmp, f'{name}.log'), env) as server:
+                    server.wait_until_ready(f"{base_url}/health")
+                    if args.warmup:
+                        run_level(base_url, server.process.pid, max(levels), args.warmup, names, args.seed, args.timeout)
+                    run = {'server': name, 'command': command[1:], 'levels': []}
+                    for concurrency in levels:
+                        level = run_level(base_url, server.process.pid, concurrency, args.duration, names,
+                                          args.seed + concurrency * 1000, args.timeout)
+                        run['levels'].append(level)
+                        print_summary(f"  c={concurrency:<4} {level['throughput_per_second']:>7.1f} req/s", {
+                            **level['latency'], 'count': level['requests']})
+                        rss = level['rss']
+                        print(f"{'':<30}errors {level['error_rate']:.2%}  RSS max {rss['max_mb']:.1f} MB "
+                              f"over {rss['workers']} worker(s) ({rss['total_mb']:.1f} MB total)")
+                    results['runs'].append(run)
+
+    out = args.out or f"chat_load_{revision['commit']}.json"
+    with open(out, 'w', encoding='utf-8') as f:
+        json.dump(results, f, indent=2)
+    print(f"💾 Results written to {out}")
+
+    if args.compare:
+        with open(args.compare, encoding='utf-8') as f:
+            baseline = json.load(f)
+        if compare(results, baseline, args.regression_threshold):
+            raise SystemExit(1)
+
+
+if __name__ == '__main__':
+    main()
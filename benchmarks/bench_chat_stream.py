@@ -0,0 +1,98 @@
+"""Benchmark: time to first content of RouterAPILLM.stream_query (/chat/stream) against the buffered /chat answer.
+
+Runs patient searches with large result sets against a stand-in LLM and a
+stand-in MCP server (result cache off, so rows come from MCP every time):
+one routed by the fast path, one the model has to decide, and a text reply.
+For /chat the first content is the whole reply; for the stream it is the
+first 'table' or 'message' event. Also checks that the streamed rows are
+exactly the rows of the buffered answer.
+
+    python -m benchmarks.bench_chat_stream --patients 20000 --llm-latency 0.8
+"""
+import argparse
+import contextlib
+import io
+import re
+import time
+
+from benchmarks.common import bench_config, print_summary, summarize
+from benchmarks.stand_in_llm import StandInLLMServer
+from benchmarks.stand_in_mcp import StandInMCPServer, generate_patients
+from llm.router_api_llm import RouterAPILLM
+
+# Query -> what the model answers (only asked when the fast path passes)
+DECISIONS = {
+    "show all patients": {},
+    "who is looked after in dunedin or christchurch": {"FullAddress": "d"},
+    "what can you do": "I can search patients by name, NHI, provider and more.",
+}
+
+_TBODY = re.compile(r'<tbody>\n(.*)</tbody>', re.S)
+
+
+def _buffered(llm, query: str, paged: bool):
+    start = time.perf_counter()
+    reply = llm.process_query_paged(query) if paged else llm.process_query(query)
+    return time.perf_counter() - start, reply
+
+
+def _streamed(llm, query: str):
+    start = time.perf_counter()
+    first_content = first_rows = None
+    rows = []
+    for event in llm.stream_query(query):
+        if first_content is None and event['event'] in ('table', 'message'):
+            first_content = time.perf_counter() - start
+        if event['event'] == 'rows':
+            if first_rows is None:
+                first_rows = time.perf_counter() - start
+            rows.append(event['html'])
+    return first_content, first_rows, time.perf_counter() - start, ''.join(rows)
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__.splitlines()[0])
+    parser.add_argument('--patients', type=int, default=20000)
+    parser.add_argument('--rounds', type=int, default=5)
+    parser.add_argument('--llm-latency', type=float, default=0.8, help='simulated completion time (s)')
+    parser.add_argument('--mcp-latency', type=float, default=0.05, help='simulated stored procedure time (s)')
+    args = parser.parse_args()
+
+    mismatches = 0
+    with StandInMCPServer(generate_patients(args.patients), latency=args.mcp_latency) as mcp, \
+            StandInLLMServer(DECISIONS, latency=args.llm_latency) as stand_in_llm:
+        with contextlib.redirect_stdout(io.StringIO()):
+            llm = RouterAPILLM(bench_config(mcp.base_url, stand_in_llm.base_url, MCP_CACHE_TTL_SECONDS=0,
+                                            DECISION_CACHE_TTL_SECONDS=0))
+
+        for query in DECISIONS:
+            timings = {'paged': [], 'full': [], 'first': [], 'rows': [], 'total': []}
+            for _ in range(args.rounds):
+                with contextlib.redirect_stdout(io.StringIO()):
+                    paged, _ = _buffered(llm, query, paged=True)
+                    full, reply = _buffered(llm, query, paged=False)
+                    first, first_rows, total, rows = _streamed(llm, query)
+                timings['paged'].append(paged)
+                timings['full'].append(full)
+                timings['first'].append(first)
+                timings['total'].append(total)
+                if first_rows is not None:
+                    timings['rows'].append(first_rows)
+                body = _TBODY.search(reply)
+                mismatches += (body.group(1) if body else '') != rows
+
+            print(f"{query!r}")
+            print_summary('  /chat (first page)', summarize(timings['paged']))
+            print_summary('  /chat (all rows)', summarize(timings['full']))
+            print_summary('  stream first content', summarize(timings['first']))
+            if timings['rows']:
+                print_summary('  stream first rows', summarize(timings['rows']))
+            print_summary('  stream complete', summarize(timings['total']))
+
+    print(f"Streamed rows differing from the buffered answer: {mismatches}")
+    if mismatches:
+        raise SystemExit(1)
+
+
+if __name__ == '__main__':
+    main()
@@ -0,0 +1,75 @@
+"""Benchmark: patient result cache with containment hits (narrow LIKE filters served from cached supersets).
+
+Replays a drill-down workload - a broad search followed by narrower ones
+('jo' -> 'john' -> 'john smith', then adding GenderName) - against a
+stand-in MCP server, checks every cached answer against an uncached tool
+and reports exact / containment hit rates and latency.
+
+    python -m benchmarks.bench_containment_cache --patients 20000 --sessions 200
+"""
+import argparse
+import contextlib
+import io
+import random
+import time
+
+from benchmarks.common import summarize, print_summary
+from benchmarks.stand_in_mcp import StandInMCPServer, generate_patients, FIRST_NAMES, LAST_NAMES, PROVIDERS
+from tools.patient_api_tool import PatientAPITool
+
+
+def drill_downs(sessions: int, seed: int):
+    """Lists of filter dicts, each going from broad to narrow"""
+    rng = random.Random(seed)
+    for _ in range(sessions):
+        first, last = rng.choice(FIRST_NAMES), rng.choice(LAST_NAMES)
+        name = f"{first} {last}"
+        steps = [{'PatientFullName': name[:2]}, {'PatientFullName': first}, {'PatientFullName': name}]
+        if rng.random() < 0.5:
+            steps.append({'PatientFullName': name, 'GenderName': rng.choice(['male', 'female'])})
+        if rng.random() < 0.3:
+            provider = rng.choice(PROVIDERS)
+            steps = [{'ProviderName': provider[:5]}, {'ProviderName': provider},
+                     {'ProviderName': provider, 'PatientFullName': first}]
+        yield steps
+
+
+def _ids(result):
+    assert result['Success'], result['Message']
+    return [row['PatientId'] for row in result['Data']]
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__.splitlines()[0])
+    parser.add_argument('--patients', type=int, default=20000)
+    parser.add_argument('--sessions', type=int, default=200)
+    parser.add_argument('--latency', type=float, default=0.05, help='simulated stored procedure time (s)')
+    args = parser.parse_args()
+
+    with StandInMCPServer(generate_patients(args.patients), latency=args.latency) as server, \
+            contextlib.redirect_stdout(io.StringIO()):
+        reference = PatientAPITool(server.base_url)
+        cached = PatientAPITool(server.base_url, cache_ttl_seconds=600)
+
+        samples, mismatches = [], 0
+        for steps in drill_downs(args.sessions, seed=3):
+            for filters in steps:
+                start = time.perf_counter()
+                result = cached.get_patients(**filters)
+                samples.append(time.perf_counter() - start)
+                if _ids(result) != _ids(reference.get_patients(**filters)):
+                    mismatches += 1
+
+        stats = cached.result_cache.stats()
+
+    print(f"Queries: {len(samples)}, mismatches vs MCP: {mismatches}")
+    print(f"Exact hits: {stats['hits']} ({stats['exact_hit_rate']:.1%}), "
+          f"containment hits: {stats['containment_hits']} ({stats['containment_hit_rate']:.1%}), "
+          f"misses: {stats['misses']}")
+    print_summary('Cached get_patients', summarize(samples))
+    if mismatches:
+        raise SystemExit(1)
+
+
+if __name__ == '__main__':
+    main()
@@ -0,0 +1,104 @@
+"""Benchmark: /chat latency against CHAT_DEADLINE_SECONDS when the LLM or the MCP server is slow.
+
+Runs RouterAPILLM.process_query_paged from a pool of worker threads (like
+waitress' request threads, where the old SIGALRM timeout could not be used)
+against a stand-in LLM and a stand-in MCP server, once without a deadline
+and once with it, for a healthy setup, a slow MCP server and a slow model.
+Reports the latency percentiles, the share of answers within the SLA and how
+the answers ended (table, timeout message, error).
+
+    python -m benchmarks.bench_deadline --deadline 1.0 --slow 3.0 --workers 8 --requests 48
+"""
+import argparse
+import contextlib
+import io
+import time
+from concurrent.futures import ThreadPoolExecutor
+
+from benchmarks.common import bench_config, print_summary, summarize
+from benchmarks.stand_in_llm import StandInLLMServer
+from benchmarks.stand_in_mcp import StandInMCPServer, generate_patients
+from llm.router_api_llm import RouterAPILLM
+
+# Fast-path searches and questions the model has to route
+QUERIES = [
+    "show male patients",
+    "patients of dr patel",
+    "who is looked after in dunedin or christchurch",
+    "show all patients",
+]
+DECISIONS = {
+    "who is looked after in dunedin or christchurch": {"FullAddress": "d"},
+    "show all patients": {},
+}
+
+# Answers this much past the deadline still count as within it (thread scheduling, JSON, rendering)
+SLA_GRACE_SECONDS = 0.1
+
+
+def _outcome(reply) -> str:
+    if reply['response'].startswith('⏰'):
+        return 'timeout'
+    if reply['total_count'] is not None:
+        return 'table'
+    return 'error' if reply['response'].startswith('❌') else 'text'
+
+
+def _run(llm, requests: int, workers: int):
+    def one(query):
+        start = time.perf_counter()
+        reply = llm.process_query_paged(query)
+        return time.perf_counter() - start, _outcome(reply)
+
+    queries = [QUERIES[i % len(QUERIES)] for i in range(requests)]
+    with contextlib.redirect_stdout(io.StringIO()), ThreadPoolExecutor(workers) as pool:
+        return list(pool.map(one, queries))
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__.splitlines()[0])
+    parser.add_argument('--deadline', type=float, default=1.0, help='CHAT_DEADLINE_SECONDS of the deadline runs (s)')
+    parser.add_argument('--slow', type=float, default=3.0, help='latency of the slow LLM / MCP server (s)')
+    parser.add_argument('--llm-latency', type=float, default=0.2, help='healthy completion time (s)')
+    parser.add_argument('--mcp-latency', type=float, default=0.05, help='healthy stored procedure time (s)')
+    parser.add_argument('--patients', type=int, default=5000)
+    parser.add_argument('--workers', type=int, default=8, help='concurrent request threads')
+    parser.add_argument('--requests', type=int, default=48)
+    args = parser.parse_args()
+
+    scenarios = [
+        ('healthy', args.llm_latency, args.mcp_latency),
+        ('slow MCP', args.llm_latency, args.slow),
+        ('slow LLM', args.slow, args.mcp_latency),
+    ]
+    sla = args.deadline + SLA_GRACE_SECONDS
+    late = 0
+    for name, llm_latency, mcp_latency in scenarios:
+        print(f"{name} (LLM {llm_latency:g}s, MCP {mcp_latency:g}s):")
+        for deadline in (0, args.deadline):
+            with StandInMCPServer(generate_patients(args.patients), latency=mcp_latency) as mcp, \
+                    StandInLLMServer(DECISIONS, latency=llm_latency) as stand_in_llm:
+                with contextlib.redirect_stdout(io.StringIO()):
+                    llm = RouterAPILLM(bench_config(mcp.base_url, stand_in_llm.base_url, CHAT_DEADLINE_SECONDS=deadline,
+                                                    MCP_CACHE_TTL_SECONDS=0, DECISION_CACHE_TTL_SECONDS=0))
+                results = _run(llm, args.requests, args.workers)
+
+            latencies = [elapsed for elapsed, _ in results]
+            outcomes = {}
+            for _, outcome in results:
+                outcomes[outcome] = outcomes.get(outcome, 0) + 1
+            within = sum(elapsed <= sla for elapsed in latencies)
+            label = f"  deadline {deadline:g}s" if deadline else "  no deadline"
+            print_summary(label, summarize(latencies))
+            print(f"{'':<30}max={max(latencies) * 1000:.0f}ms  within {args.deadline:g}s SLA: "
+                  f"{within}/{len(results)}  outcomes: {outcomes}")
+            if deadline:
+                late += len(results) - within
+
+    print(f"Answers past the SLA with the deadline on: {late}")
+    if late:
+        raise SystemExit(1)
+
+
+if __name__ == '__main__':
+    main()
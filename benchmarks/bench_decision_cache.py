@@ -0,0 +1,106 @@
+"""Benchmark: RouterAPILLM with and without the decision cache that reuses the model's function call.
+
+Replays questions phrased several ways ('Show me male patients?',
+'male patients please', ...) against a stand-in LLM (fixed latency) and a
+stand-in MCP server, with the fast path off so every question would
+otherwise go to the model. Reports the cache hit rate, LLM completions
+saved, per-path latency, answers that differ from the uncached run, and
+checks that changing the system prompt or model drops the cached decisions.
+
+    python -m benchmarks.bench_decision_cache --llm-latency 0.8 --rounds 4
+"""
+import argparse
+import contextlib
+import io
+import random
+
+from benchmarks.common import bench_config
+from benchmarks.stand_in_llm import StandInLLMServer
+from benchmarks.stand_in_mcp import StandInMCPServer, generate_patients
+from llm.router_api_llm import RouterAPILLM
+
+# Model decision -> ways the same question is asked
+PARAPHRASES = [
+    ({"GenderName": "male"}, ["show male patients", "Show me male patients?", "male patients please",
+                              "list all male patients"]),
+    ({"ProviderName": "Smith"}, ["patients of dr smith", "Patients of Dr Smith!", "show me patients of dr smith"]),
+    ({"GenderName": "female", "ProviderName": "Patel"}, ["female patients of dr patel",
+                                                         "Female patients of Dr. Patel",
+                                                         "can you show female patients of dr patel"]),
+    ({"EnrollmentStatus": "not enrolled"}, ["patients who are not enrolled", "Patients who are NOT enrolled?"]),
+    ({"PatientDOB": "1985"}, ["patients born in 1985", "Patients born in 1985, please"]),
+    ({"FullAddress": "Dunedin"}, ["who lives in dunedin", "Who lives in Dunedin?"]),
+    ("I can search patients by name, NHI, provider and more.", ["what can you do", "What can you do?"]),
+]
+DECISIONS = {query: decision for decision, queries in PARAPHRASES for query in queries}
+
+
+def _run(llm, queries):
+    with contextlib.redirect_stdout(io.StringIO()):
+        return {query: llm.process_query_paged(query) for query in queries}
+
+
+def _rows_html(reply) -> str:
+    return reply['response'].replace(reply['next_cursor'] or '\0', '')
+
+
+def _print_paths(label: str, stats):
+    print(f"{label}: {stats['requests']} queries")
+    for path, path_stats in sorted(stats['paths'].items()):
+        print(f"  {path:<6} n={path_stats['requests']:<5} p50={path_stats['p50_ms']:>8.1f}ms  "
+              f"p90={path_stats['p90_ms']:>8.1f}ms  mean={path_stats['mean_ms']:>8.1f}ms")
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__.splitlines()[0])
+    parser.add_argument('--patients', type=int, default=5000)
+    parser.add_argument('--rounds', type=int, default=4)
+    parser.add_argument('--llm-latency', type=float, default=0.8, help='simulated completion time (s)')
+    parser.add_argument('--mcp-latency', type=float, default=0.05, help='simulated stored procedure time (s)')
+    args = parser.parse_args()
+
+    queries = list(DECISIONS) * args.rounds
+    random.Random(7).shuffle(queries)
+
+    with StandInMCPServer(generate_patients(args.patients), latency=args.mcp_latency) as mcp, \
+            StandInLLMServer(DECISIONS, latency=args.llm_latency) as stand_in_llm:
+        common = dict(FAST_PATH_ENABLED=False, MCP_CACHE_TTL_SECONDS=0)
+        with contextlib.redirect_stdout(io.StringIO()):
+            baseline = RouterAPILLM(bench_config(mcp.base_url, stand_in_llm.base_url,
+                                                 DECISION_CACHE_TTL_SECONDS=0, **common))
+            cached = RouterAPILLM(bench_config(mcp.base_url, stand_in_llm.base_url, **common))
+
+        expected = _run(baseline, queries)
+        completions = stand_in_llm.completions
+        actual = _run(cached, queries)
+        cached_completions = stand_in_llm.completions - completions
+
+        _print_paths('No decision cache', baseline.route_metrics.stats())
+        _print_paths('Decision cache', cached.route_metrics.stats())
+        cache_stats = cached.decision_cache.stats()
+        print(f"LLM completions: {completions} -> {cached_completions} "
+              f"(hit rate {cache_stats['hit_rate']:.0%}, {cache_stats['entries']} decisions cached)")
+
+        differing = [query for query in DECISIONS
+                     if actual[query]['total_count'] != expected[query]['total_count']
+                     or _rows_html(actual[query]) != _rows_html(expected[query])]
+        print(f"Answers differing from the uncached run: {len(differing)}")
+        for query in differing:
+            print(f"  {query!r}: {expected[query]['total_count']} -> {actual[query]['total_count']} rows")
+
+        failures = len(differing)
+        for label, change in (('system prompt', lambda: setattr(cached, 'system_prompt', cached.system_prompt + ' ')),
+                              ('model', lambda: setattr(cached, 'model', cached.model + '-next'))):
+            change()
+            before = stand_in_llm.completions
+            _run(cached, ["show male patients"])
+            invalidated = stand_in_llm.completions - before == 1 and cached.decision_cache.stats()['entries'] == 1
+            failures += not invalidated
+            print(f"{label.capitalize()} change drops cached decisions: {'yes' if invalidated else 'NO'}")
+
+    if failures:
+        raise SystemExit(1)
+
+
+if __name__ == '__main__':
+    main()
@@ -0,0 +1,69 @@
+"""Benchmark: per-query cost of the get_patients parameter extraction, checked against a golden corpus.
+
+benchmarks/extraction_golden.jsonl holds questions and the parameters the
+original extractor produced for them; every one must come out identical.
+Timings compare the engine (compiled rules, one trigger pass) with running
+every rule on every query and with the previous style of calling
+re.search() on each raw pattern string.
+
+    python -m benchmarks.bench_extraction
+"""
+import argparse
+import json
+import os
+import re
+import time
+
+from llm.parameter_extraction import FIELD_RULES, extract_parameters
+
+GOLDEN_PATH = os.path.join(os.path.dirname(__file__), 'extraction_golden.jsonl')
+
+
+def load_golden(path: str = GOLDEN_PATH):
+    with open(path, encoding='utf-8') as handle:
+        return [json.loads(line) for line in handle if line.strip()]
+
+
+def every_rule(user_input: str):
+    text = user_input.lower()
+    return [rule.apply(text) for rule in FIELD_RULES]
+
+
+def every_raw_pattern(user_input: str):
+    text = user_input.lower()
+    return [re.search(pattern.pattern, text) for rule in FIELD_RULES for pattern in rule.patterns]
+
+
+def _per_query_us(call, queries, repeat: int) -> float:
+    best = float('inf')
+    for _ in range(repeat):
+        start = time.perf_counter()
+        for query in queries:
+            call(query)
+        best = min(best, time.perf_counter() - start)
+    return best / len(queries) * 1e6
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__.splitlines()[0])
+    parser.add_argument('--repeat', type=int, default=20)
+    args = parser.parse_args()
+
+    golden = load_golden()
+    failures = [case for case in golden if extract_parameters(case['query']) != case['params']]
+    print(f"Golden corpus: {len(golden)} queries, {len(failures)} differences")
+    for case in failures:
+        print(f"  {case['query']!r}: expected {case['params']}, got {extract_parameters(case['query'])}")
+
+    queries = [case['query'] for case in golden]
+    patterns = sum(len(rule.patterns) for rule in FIELD_RULES)
+    print(f"  engine (trigger pass + compiled rules)  {_per_query_us(extract_parameters, queries, args.repeat):7.1f} us/query")
+    print(f"  every compiled rule                     {_per_query_us(every_rule, queries, args.repeat):7.1f} us/query")
+    print(f"  re.search on all {patterns} raw patterns      "
+          f"{_per_query_us(every_raw_pattern, queries, args.repeat):7.1f} us/query")
+    if failures:
+        raise SystemExit(1)
+
+
+if __name__ == '__main__':
+    main()
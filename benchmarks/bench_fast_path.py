@@ -0,0 +1,104 @@
+"""Benchmark: RouterAPILLM with and without the fast path that skips the LLM for confidently parsed queries.
+
+Replays a mix of simple searches and questions only the model can handle
+against a stand-in LLM (fixed latency, scripted function calls) and a
+stand-in MCP server. Reports the share of traffic served by the fast path,
+per-path latency and how many fast-path answers differ from the answer the
+model's own function call gives.
+
+    python -m benchmarks.bench_fast_path --llm-latency 0.8 --rounds 5
+"""
+import argparse
+import contextlib
+import io
+import random
+
+from benchmarks.common import bench_config
+from benchmarks.stand_in_llm import StandInLLMServer
+from benchmarks.stand_in_mcp import StandInMCPServer, generate_patients
+from llm.router_api_llm import RouterAPILLM
+
+# Query -> what the model answers (get_patients arguments, or a text reply)
+CORPUS = {
+    "show male patients": {"GenderName": "male"},
+    "male patients": {"GenderName": "male"},
+    "show all patients": {},
+    "patients by Dr Smith": {"ProviderName": "Smith"},
+    "list patients under dr chen": {"ProviderName": "Chen"},
+    "male patients by dr williams": {"GenderName": "male", "ProviderName": "Williams"},
+    "patient with NHI BXK1936": {"PatientNHI": "BXK1936"},
+    "patient with nhi bxk1936 please": {"PatientNHI": "BXK1936"},
+    "find patient by id 100017": {"PatientId": "100017"},
+    "patients with chart number 786": {"ChartNumber": "786"},
+    "patients born in 1985": {"PatientDOB": "1985"},
+    "patients enrolled in 2022": {"EnrollmentDate": "2022"},
+    "find John Smith": {"PatientFullName": "John Smith"},
+    "search for patient Aroha Ngata": {"PatientFullName": "Aroha Ngata"},
+    "patients with phone 0219910817": {"PhoneNumber": "0219910817"},
+    "Show me all female patients": {"GenderName": "female"},
+    "patients named john smith": {"PatientFullName": "john smith"},
+    "patients with enrollment status enrolled": {"EnrollmentStatus": "enrolled"},
+    "female patients of dr patel": {"GenderName": "female", "ProviderName": "Patel"},
+    "patients living in dunedin": {"FullAddress": "Dunedin"},
+    "how many male patients are there?": {"GenderName": "male"},
+    "show female patients older than 60": {"GenderName": "female"},
+    "show patients who are not enrolled": {"EnrollmentStatus": "not enrolled"},
+    "what can you do": "I can search patients by name, NHI, provider and more.",
+    "hello": "Hello! Ask me about patients.",
+}
+
+
+def _run(config, queries):
+    with contextlib.redirect_stdout(io.StringIO()):
+        llm = RouterAPILLM(config)
+        replies = {}
+        for query in queries:
+            replies[query] = llm.process_query_paged(query)
+    return llm, replies
+
+
+def _rows_html(reply) -> str:
+    """Reply HTML without the 'show more' cursor (it encodes the argument spelling)"""
+    return reply['response'].replace(reply['next_cursor'] or '\0', '')
+
+
+def _print_paths(label: str, stats):
+    print(f"{label}: {stats['requests']} queries, fast path share {stats['fast_path_share']:.0%}")
+    for path, path_stats in sorted(stats['paths'].items()):
+        print(f"  {path:<5} n={path_stats['requests']:<5} p50={path_stats['p50_ms']:>8.1f}ms  "
+              f"p90={path_stats['p90_ms']:>8.1f}ms  mean={path_stats['mean_ms']:>8.1f}ms")
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__.splitlines()[0])
+    parser.add_argument('--patients', type=int, default=5000)
+    parser.add_argument('--rounds', type=int, default=5)
+    parser.add_argument('--llm-latency', type=float, default=0.8, help='simulated completion time (s)')
+    parser.add_argument('--mcp-latency', type=float, default=0.05, help='simulated stored procedure time (s)')
+    args = parser.parse_args()
+
+    queries = list(CORPUS) * args.rounds
+    random.Random(7).shuffle(queries)
+
+    with StandInMCPServer(generate_patients(args.patients), latency=args.mcp_latency) as mcp, \
+            StandInLLMServer(CORPUS, latency=args.llm_latency) as stand_in_llm:
+        baseline, expected = _run(bench_config(mcp.base_url, stand_in_llm.base_url,
+                                               FAST_PATH_ENABLED=False, MCP_CACHE_TTL_SECONDS=0), queries)
+        completions = stand_in_llm.completions
+        fast, actual = _run(bench_config(mcp.base_url, stand_in_llm.base_url, MCP_CACHE_TTL_SECONDS=0), queries)
+        fast_completions = stand_in_llm.completions - completions
+
+    _print_paths('LLM only', baseline.route_metrics.stats())
+    _print_paths('Fast path', fast.route_metrics.stats())
+    print(f"LLM completions: {completions} -> {fast_completions}")
+
+    differing = [query for query in CORPUS
+                 if actual[query]['total_count'] != expected[query]['total_count']
+                 or _rows_html(actual[query]) != _rows_html(expected[query])]
+    print(f"Answers differing from the model's function call: {len(differing)}")
+    for query in differing:
+        print(f"  {query!r}: {expected[query]['total_count']} -> {actual[query]['total_count']} rows")
+
+
+if __name__ == '__main__':
+    main()
@@ -0,0 +1,78 @@
+"""Benchmark: bare requests.post vs the pooled keep-alive MCP session.
+
+Runs both against a local stand-in MCP server. --handshake-delay simulates
+the per-connection TCP/TLS cost of the ngrok tunnel.
+
+    python -m benchmarks.bench_http_pool --requests 300 --threads 8 --handshake-delay 0.02
+"""
+import argparse
+import contextlib
+import io
+import time
+from concurrent.futures import ThreadPoolExecutor
+
+import requests
+
+from benchmarks.common import summarize, print_summary
+from benchmarks.stand_in_mcp import StandInMCPServer, generate_patients
+from tools.http_pool import close_all_sessions
+from tools.patient_api_tool import PatientAPITool
+
+HEADERS = {'Content-Type': 'application/json', 'Accept': 'application/json'}
+
+
+def _run(call, total: int, threads: int):
+    durations = []
+
+    def timed(_):
+        start = time.perf_counter()
+        call()
+        return time.perf_counter() - start
+
+    with ThreadPoolExecutor(max_workers=threads) as pool:
+        durations.extend(pool.map(timed, range(total)))
+    return durations
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__.splitlines()[0])
+    parser.add_argument('--requests', type=int, default=300)
+    parser.add_argument('--threads', type=int, default=8)
+    parser.add_argument('--patients', type=int, default=50)
+    parser.add_argument('--latency', type=float, default=0.002, help='simulated stored procedure time (s)')
+    parser.add_argument('--handshake-delay', type=float, default=0.02, help='simulated TCP/TLS handshake (s)')
+    parser.add_argument('--pool-maxsize', type=int, default=16)
+    args = parser.parse_args()
+
+    with StandInMCPServer(generate_patients(args.patients), latency=args.latency,
+                          handshake_delay=args.handshake_delay) as server:
+        url = f"{server.base_url}/patients"
+
+        def bare():
+            requests.post(url, json={'GenderName': 'male'}, headers=HEADERS, timeout=30).json()
+
+        before = server.connections_opened
+        bare_samples = _run(bare, args.requests, args.threads)
+        bare_conns = server.connections_opened - before
+
+        tool = PatientAPITool(server.base_url, pool_maxsize=args.pool_maxsize)
+
+        def pooled():
+            tool.get_patients(GenderName='male')
+
+        before = server.connections_opened
+        # The tool logs every call; keep the report readable
+        with contextlib.redirect_stdout(io.StringIO()):
+            pooled_samples = _run(pooled, args.requests, args.threads)
+        pooled_conns = server.connections_opened - before
+
+    close_all_sessions()
+
+    print(f"\n📊 {args.requests} requests, {args.threads} threads, handshake {args.handshake_delay * 1000:.0f}ms, "
+          f"server latency {args.latency * 1000:.0f}ms")
+    print_summary(f"requests.post ({bare_conns} conns)", summarize(bare_samples))
+    print_summary(f"pooled session ({pooled_conns} conns)", summarize(pooled_samples))
+
+
+if __name__ == '__main__':
+    main()
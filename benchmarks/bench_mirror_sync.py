@@ -0,0 +1,86 @@
+"""Benchmark: full mirror reload vs incremental sync (ETag and row hashes).
+
+Loads the mirror from a stand-in MCP server, then changes, adds and removes
+a few patients and times a sync pass, checking the mirror matches the server
+afterwards. Runs with and without ETag support on the server. Without ETags,
+also shows the poll interval backing off over unchanged passes.
+
+    python -m benchmarks.bench_mirror_sync --patients 50000 --changes 25
+"""
+import argparse
+import contextlib
+import io
+import random
+import time
+
+from benchmarks.stand_in_mcp import StandInMCPServer, generate_patients
+from tools.patient_api_tool import PatientAPITool
+
+
+def _timed(call):
+    start = time.perf_counter()
+    result = call()
+    return result, (time.perf_counter() - start) * 1000
+
+
+def _mutate(patients, changes: int, rng: random.Random):
+    for row in rng.sample(patients, changes):
+        row['PhoneNumber'] = f"022{rng.randint(1000000, 9999999)}"
+    for _ in range(changes // 5):
+        patients.remove(rng.choice(patients))
+    next_id = max(row['PatientId'] for row in patients) + 1
+    for i, row in enumerate(generate_patients(changes // 5, seed=rng.randint(0, 10 ** 6))):
+        row['PatientId'] = next_id + i
+        patients.append(row)
+
+
+def run(patients_count: int, changes: int, etags: bool):
+    rng = random.Random(11)
+    patients = generate_patients(patients_count)
+    with StandInMCPServer(patients, etags=etags) as server, contextlib.redirect_stdout(io.StringIO()):
+        tool = PatientAPITool(server.base_url)
+        _, full_ms = _timed(tool.load_mirror)
+
+        sent = server.bytes_sent
+        unchanged, unchanged_ms = _timed(tool.sync_mirror)
+        unchanged_bytes = server.bytes_sent - sent
+
+        _mutate(server.patients, changes, rng)
+        sent = server.bytes_sent
+        synced, synced_ms = _timed(tool.sync_mirror)
+        synced_bytes = server.bytes_sent - sent
+
+        mirror_rows = tool.mirror.query({})
+        in_sync = mirror_rows == server.patients
+        stats = tool.mirror_sync.stats()
+
+        intervals = []
+        if not etags:
+            for _ in range(4):
+                tool.sync_mirror()
+                intervals.append(tool.mirror_sync.stats()['current_interval_seconds'])
+
+    label = 'ETag' if etags else 'no ETag'
+    print(f"[{label}] full reload: {full_ms:8.1f}ms")
+    print(f"[{label}] sync, unchanged: {unchanged_ms:8.1f}ms  {unchanged_bytes:>10} bytes  -> {unchanged['Message']}")
+    print(f"[{label}] sync, {changes} edits: {synced_ms:8.1f}ms  {synced_bytes:>10} bytes  -> {synced['Message']}")
+    print(f"[{label}] rows merged {stats['rows_added'] + stats['rows_changed'] + stats['rows_removed']}, "
+          f"mirror matches server: {in_sync}")
+    if intervals:
+        print(f"[{label}] poll interval over 4 unchanged passes: {' -> '.join(f'{s:.0f}s' for s in intervals)}")
+    return in_sync
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__.splitlines()[0])
+    parser.add_argument('--patients', type=int, default=50000)
+    parser.add_argument('--changes', type=int, default=25)
+    args = parser.parse_args()
+
+    ok = all([run(args.patients, args.changes, True), run(args.patients, args.changes, False)])
+    if not ok:
+        raise SystemExit(1)
+
+
+if __name__ == '__main__':
+    main()
@@ -0,0 +1,93 @@
+"""Benchmark: list-of-dicts patient rows vs the columnar PatientTable.
+
+Measures retained memory (tracemalloc) for rows decoded from a /patients
+JSON body, and the time to filter, compute ages and render the HTML table
+with both representations.
+
+    python -m benchmarks.bench_patient_table --rows 10000 100000
+"""
+import argparse
+import gc
+import json
+import time
+import tracemalloc
+from datetime import datetime
+
+from benchmarks.stand_in_mcp import generate_patients
+from llm.router_api_llm import RouterAPILLM
+from tools.patient_table import PatientTable
+
+
+def _retained(build):
+    """Bytes still allocated after build() returns (its result kept alive)"""
+    gc.collect()
+    tracemalloc.start()
+    value = build()
+    gc.collect()
+    current, _ = tracemalloc.get_traced_memory()
+    tracemalloc.stop()
+    return value, current
+
+
+def _timed(call, repeat: int = 3) -> float:
+    best = float('inf')
+    for _ in range(repeat):
+        start = time.perf_counter()
+        call()
+        best = min(best, time.perf_counter() - start)
+    return best * 1000
+
+
+def _dict_filter(rows, field, needle):
+    return [row for row in rows if needle in str(row.get(field) or '').casefold()]
+
+
+def _dict_ages(rows):
+    ages = []
+    for row in rows:
+        dob = str(row.get('PatientDOB') or row.get('patientDOB'))
+        today = datetime.now()
+        born = datetime.strptime(dob[:10], '%Y-%m-%d')
+        ages.append(today.year - born.year - ((today.month, today.day) < (born.month, born.day)))
+    return ages
+
+
+def run(count: int):
+    body = json.dumps(generate_patients(count)).encode('utf-8')
+
+    rows, dict_bytes = _retained(lambda: json.loads(body))
+
+    def build_table():
+        decoded = json.loads(body)
+        return PatientTable.from_rows(decoded)
+
+    table, table_bytes = _retained(build_table)
+
+    renderer = RouterAPILLM.__new__(RouterAPILLM)
+    rows_result = {'Success': True, 'Data': rows}
+    table_result = {'Success': True, 'Data': table}
+
+    print(f"\n{count} patients ({len(body) / 1024 / 1024:.1f} MiB JSON)")
+    print(f"  memory   dicts {dict_bytes / 1024 / 1024:8.2f} MiB   table {table_bytes / 1024 / 1024:8.2f} MiB   "
+          f"({dict_bytes / max(table_bytes, 1):.1f}x smaller)")
+    print(f"  ingest   table.from_rows {_timed(lambda: PatientTable.from_rows(rows)):9.1f} ms")
+    print(f"  filter   dicts {_timed(lambda: _dict_filter(rows, 'PatientFullName', 'john')):9.1f} ms   "
+          f"table {_timed(lambda: table.filter({'PatientFullName': 'john'})):9.1f} ms")
+    print(f"  filter   dicts {_timed(lambda: _dict_filter(rows, 'ProviderName', 'smith')):9.1f} ms   "
+          f"table {_timed(lambda: table.filter({'ProviderName': 'smith'})):9.1f} ms   (dictionary-encoded)")
+    print(f"  ages     dicts {_timed(lambda: _dict_ages(rows)):9.1f} ms   table {_timed(lambda: table.ages()):9.1f} ms")
+    print(f"  page     render 50 rows from table   {_timed(lambda: renderer._format_patients_as_html_table(table_result, 0, 50)):9.1f} ms")
+    print(f"  render   dicts {_timed(lambda: renderer._format_patients_as_html_table(rows_result), 1):9.1f} ms   "
+          f"table {_timed(lambda: renderer._format_patients_as_html_table(table_result), 1):9.1f} ms   (all rows)")
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__.splitlines()[0])
+    parser.add_argument('--rows', type=int, nargs='+', default=[10000, 100000])
+    args = parser.parse_args()
+    for count in args.rows:
+        run(count)
+
+
+if __name__ == '__main__':
+    main()
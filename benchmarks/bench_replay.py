@@ -0,0 +1,105 @@
+"""Benchmark: record /chat traffic once, then replay it offline, deterministically.
+
+Records a set of questions through benchmarks.recorder, with stand-in
+servers playing the real LLM and MCP services (latency drawn from a
+distribution). Then replays them twice from the recorded file alone: the
+stand-ins answer from the fixtures and sleep the recorded durations. The
+replays must give the recorded answers. Also records once with synthetic
+patient rows (the recorder's default) and checks that the replayed row
+counts match. Prints the recorded and replayed latency of each run.
+
+    python -m benchmarks.bench_replay --llm-latency lognormal:0.3,0.4 --mcp-latency normal:0.15,0.05
+"""
+import argparse
+import contextlib
+import io
+import os
+import tempfile
+import time
+
+from benchmarks.common import bench_config, print_summary, summarize
+from benchmarks.recorder import RecordingProxy
+from benchmarks.replay import ReplayFixtures
+from benchmarks.stand_in_llm import StandInLLMServer
+from benchmarks.stand_in_mcp import StandInMCPServer, generate_patients
+from llm.router_api_llm import RouterAPILLM
+
+DECISIONS = {
+    "which patients does dr patel look after": {"ProviderName": "Patel"},
+    "how many patients are named john smith": {"PatientFullName": "John Smith"},
+    "list the female patients": {"GenderName": "Female"},
+    "what can you do": "I can search patients by name, NHI, provider and more.",
+}
+
+
+def _ask(llm_base_url: str, mcp_base_url: str, rounds: int):
+    """Answers and latencies of every question, asked rounds times in a fixed order"""
+    with contextlib.redirect_stdout(io.StringIO()):
+        llm = RouterAPILLM(bench_config(mcp_base_url, llm_base_url, MCP_CACHE_TTL_SECONDS=0,
+                                        DECISION_CACHE_TTL_SECONDS=0, SPECULATIVE_PREFETCH_ENABLED=False))
+        replies, timings = [], []
+        for _ in range(rounds):
+            for query in DECISIONS:
+                start = time.perf_counter()
+                replies.append(llm.process_query(query))
+                timings.append(time.perf_counter() - start)
+    return replies, timings
+
+
+def _record(path: str, args, keep_patient_data: bool):
+    with StandInMCPServer(generate_patients(args.patients), latency=args.mcp_latency) as mcp, \
+            StandInLLMServer(DECISIONS, latency=args.llm_latency) as llm, \
+            RecordingProxy(llm.base_url, mcp.base_url, path, keep_patient_data=keep_patient_data) as proxy:
+        replies, timings = _ask(proxy.llm_base_url, proxy.mcp_base_url, args.rounds)
+        recorded = proxy.recorded
+    return replies, timings, recorded
+
+
+def _replay(path: str, args):
+    fixtures = ReplayFixtures.load(path)
+    with StandInMCPServer([], latency=f'replay:{args.replay_scale}', fixtures=fixtures) as mcp, \
+            StandInLLMServer(latency=f'replay:{args.replay_scale}', fixtures=fixtures) as llm:
+        replies, timings = _ask(llm.base_url, mcp.base_url, args.rounds)
+    return replies, timings, fixtures.stats()
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__.splitlines()[0])
+    parser.add_argument('--patients', type=int, default=5000)
+    parser.add_argument('--rounds', type=int, default=3)
+    parser.add_argument('--llm-latency', default='lognormal:0.3,0.4', help='recorded LLM latency (seconds or distribution)')
+    parser.add_argument('--mcp-latency', default='normal:0.15,0.05', help='recorded MCP latency (seconds or distribution)')
+    parser.add_argument('--replay-scale', type=float, default=1.0, help='replayed durations = recorded x scale')
+    args = parser.parse_args()
+
+    failures = 0
+    with tempfile.TemporaryDirectory() as tmp:
+        path = os.path.join(tmp, 'recorded.jsonl')
+        recorded, timings, count = _record(path, args, keep_patient_data=True)
+        print(f"Recorded {count} exchanges ({len(recorded)} questions)")
+        print_summary("  recording", summarize(timings))
+
+        for run in (1, 2):
+            replies, timings, stats = _replay(path, args)
+            mismatches = sum(reply != expected for reply, expected in zip(replies, recorded))
+            failures += mismatches + stats['misses']
+            print_summary(f"  replay {run}", summarize(timings))
+            print(f"    {stats['hits']} fixture hits, {stats['misses']} misses, {mismatches} answers differ from the recording")
+
+        path = os.path.join(tmp, 'synthetic.jsonl')
+        recorded, _, count = _record(path, args, keep_patient_data=False)
+        replies, timings, stats = _replay(path, args)
+        # Same rows counts, different (synthetic) people
+        differing = sum(reply.split('\n', 1)[0] != expected.split('\n', 1)[0] for reply, expected in zip(replies, recorded))
+        failures += differing + stats['misses']
+        print(f"Recorded {count} exchanges with synthetic patient rows")
+        print_summary("  replay", summarize(timings))
+        print(f"    {stats['hits']} fixture hits, {stats['misses']} misses, {differing} answers with a different headline")
+
+    print(f"Replay failures: {failures}")
+    if failures:
+        raise SystemExit(1)
+
+
+if __name__ == '__main__':
+    main()
@@ -0,0 +1,98 @@
+"""Benchmark: size of the search result PatientSearchLLM sends back to the model, full JSON vs compacted.
+
+Part one compacts synthetic results of growing size offline and reports
+estimated tokens, bytes and compaction time per format. Part two runs
+PatientSearchLLM.process_query end to end against a stand-in LLM and a
+stand-in MCP server and reports the bytes of the second completion request
+and the tokens saved per request. Also checks that camelCase rows (as the
+search API returns them) compact to the same text as PascalCase rows.
+
+    python -m benchmarks.bench_result_compaction --sizes 5 50 200 1000 5000
+"""
+import argparse
+import contextlib
+import io
+import json
+import time
+
+from benchmarks.common import bench_config
+from benchmarks.stand_in_llm import StandInLLMServer
+from benchmarks.stand_in_mcp import StandInMCPServer, camel_case_patients, generate_patients
+from llm.patient_search_llm import PatientSearchLLM
+from llm.result_compaction import ResultCompactor, estimate_json_tokens, estimate_tokens
+from tools.patient_table import add_age_fields
+
+QUERIES = {
+    "find patients of dr patel": {"provider_name": "Patel"},
+    "patients named john smith": {"patient_name": "John Smith"},
+    "show all male patients": {"gender": "male"},
+}
+
+
+def _offline(sizes):
+    print(f"{'rows':>6}  {'format':<6} {'~tokens':>9} {'bytes':>10} {'rows sent':>10} {'ms':>8}")
+    for size in sizes:
+        rows = add_age_fields(generate_patients(size))
+        result = {'Success': True, 'Message': f"{size} patients", 'Data': rows}
+        start = time.perf_counter()
+        text = json.dumps(result)
+        elapsed = time.perf_counter() - start
+        print(f"{size:>6}  {'json':<6} {estimate_json_tokens(result):>9} {len(text.encode()):>10} {size:>10} {elapsed * 1000:>8.2f}")
+        for result_format in ('tsv', 'csv'):
+            compactor = ResultCompactor(result_format)
+            start = time.perf_counter()
+            text = compactor.compact(result)
+            elapsed = time.perf_counter() - start
+            print(f"{size:>6}  {result_format:<6} {estimate_tokens(text):>9} {len(text.encode()):>10} "
+                  f"{compactor.metrics.last['rows_sent']:>10} {elapsed * 1000:>8.2f}")
+
+
+def _camel_case_check(size: int) -> bool:
+    """camelCase rows compact to the same text (names, NHIs, genders, summary counts) as PascalCase rows"""
+    rows = generate_patients(size)
+    pascal = {'Success': True, 'Message': f"{size} patients", 'Data': add_age_fields(rows)}
+    camel = dict(pascal, Data=add_age_fields(camel_case_patients(rows)))
+    compactor = ResultCompactor('tsv', max_rows=50)
+    return compactor.compact(camel) == compactor.compact(pascal)
+
+
+def _end_to_end(patients: int, llm_latency: float):
+    with StandInMCPServer(generate_patients(patients)) as mcp, \
+            StandInLLMServer(QUERIES, latency=llm_latency, function_name='search_patients') as stand_in_llm:
+        for result_format in ('json', 'tsv'):
+            with contextlib.redirect_stdout(io.StringIO()):
+                llm = PatientSearchLLM(bench_config(mcp.base_url, stand_in_llm.base_url,
+                                                    SEARCH_RESPONSE_MODE='llm', SEARCH_RESULT_FORMAT=result_format))
+            received = stand_in_llm.bytes_received
+            start = time.perf_counter()
+            with contextlib.redirect_stdout(io.StringIO()):
+                replies = [llm.process_query(query) for query in QUERIES]
+            elapsed = time.perf_counter() - start
+            per_query = (stand_in_llm.bytes_received - received) / len(QUERIES)
+            print(f"  {result_format:<5} {per_query / 1024:>9.1f} KiB of completion requests per query, "
+                  f"{elapsed / len(QUERIES) * 1000:>7.1f} ms per query, replies ok: "
+                  f"{all(reply == stand_in_llm.follow_up_reply for reply in replies)}")
+            if llm.result_compactor is not None:
+                stats = llm.result_compactor.metrics.stats()
+                print(f"        ~{stats['tokens_saved_per_request']:.0f} tokens saved per request "
+                      f"({stats['saved_ratio']:.0%}), {stats['truncated_requests']} of {stats['requests']} capped")
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__.splitlines()[0])
+    parser.add_argument('--sizes', type=int, nargs='+', default=[5, 50, 200, 1000, 5000])
+    parser.add_argument('--patients', type=int, default=2000, help='stand-in MCP rows for the end-to-end run')
+    parser.add_argument('--llm-latency', type=float, default=0.0, help='simulated completion time (s)')
+    args = parser.parse_args()
+
+    _offline(args.sizes)
+    same = _camel_case_check(500)
+    print(f"\ncamelCase rows compact like PascalCase rows: {same}")
+    print(f"\nEnd to end, {args.patients} patients:")
+    _end_to_end(args.patients, args.llm_latency)
+    if not same:
+        raise SystemExit(1)
+
+
+if __name__ == '__main__':
+    main()
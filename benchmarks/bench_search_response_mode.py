@@ -0,0 +1,77 @@
+"""Benchmark: PatientSearchLLM with the model formatting results ('llm') vs server-side rendering ('server').
+
+Replays patient searches against a stand-in LLM (fixed latency per
+completion) and a stand-in MCP server. Reports per-query latency,
+completions and request bytes per mode, and checks that every server-side
+answer lists exactly the rows the search returned, and that camelCase rows
+(as the search API returns them) render the same table as PascalCase rows.
+
+    python -m benchmarks.bench_search_response_mode --llm-latency 0.8 --rounds 3
+"""
+import argparse
+import contextlib
+import io
+import time
+
+from benchmarks.common import bench_config, print_summary, summarize
+from benchmarks.stand_in_llm import StandInLLMServer
+from benchmarks.stand_in_mcp import StandInMCPServer, camel_case_patients, filter_patients, generate_patients
+from llm.patient_search_llm import PatientSearchLLM
+from tools.patient_search_tool import PARAM_MAPPING
+
+QUERIES = {
+    "find patients of dr patel": {"provider_name": "Patel"},
+    "patients named john smith": {"patient_name": "John Smith"},
+    "show male patients born in 1985": {"gender": "male", "dob": "1985"},
+    "patient with nhi abc1234": {"patient_nhi": "ABC1234"},
+}
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__.splitlines()[0])
+    parser.add_argument('--patients', type=int, default=2000)
+    parser.add_argument('--rounds', type=int, default=3)
+    parser.add_argument('--llm-latency', type=float, default=0.8, help='simulated completion time (s)')
+    args = parser.parse_args()
+
+    patients = generate_patients(args.patients)
+    mismatches = 0
+    with StandInMCPServer(patients) as mcp, \
+            StandInLLMServer(QUERIES, latency=args.llm_latency, function_name='search_patients') as stand_in_llm:
+        for mode in ('llm', 'server'):
+            with contextlib.redirect_stdout(io.StringIO()):
+                llm = PatientSearchLLM(bench_config(mcp.base_url, stand_in_llm.base_url, SEARCH_RESPONSE_MODE=mode))
+            completions, received = stand_in_llm.completions, stand_in_llm.bytes_received
+            timings = []
+            for _ in range(args.rounds):
+                for query, arguments in QUERIES.items():
+                    start = time.perf_counter()
+                    with contextlib.redirect_stdout(io.StringIO()):
+                        reply = llm.process_query(query)
+                    timings.append(time.perf_counter() - start)
+                    if mode == 'server':
+                        # Same filters the tool sends, applied to the stand-in's rows
+                        filters = {PARAM_MAPPING.get(k, k): v for k, v in arguments.items()}
+                        expected = len(filter_patients(patients, filters))
+                        mismatches += reply.count('<tr><td>') != expected
+            queries = len(timings)
+            print_summary(f"{mode} mode", summarize(timings))
+            print(f"  {(stand_in_llm.completions - completions) / queries:.1f} completions and "
+                  f"{(stand_in_llm.bytes_received - received) / queries / 1024:.1f} KiB of requests per query")
+
+    print(f"Server-rendered answers with the wrong number of rows: {mismatches}")
+
+    with StandInMCPServer(patients) as pascal_mcp, StandInMCPServer(camel_case_patients(patients)) as camel_mcp, \
+            StandInLLMServer(QUERIES, function_name='search_patients') as stand_in_llm:
+        with contextlib.redirect_stdout(io.StringIO()):
+            pascal = PatientSearchLLM(bench_config(pascal_mcp.base_url, stand_in_llm.base_url, SEARCH_RESPONSE_MODE='server'))
+            camel = PatientSearchLLM(bench_config(camel_mcp.base_url, stand_in_llm.base_url, SEARCH_RESPONSE_MODE='server'))
+            differing = sum(camel.process_query(query) != pascal.process_query(query) for query in QUERIES)
+    print(f"camelCase answers differing from PascalCase answers: {differing}")
+    mismatches += differing
+    if mismatches:
+        raise SystemExit(1)
+
+
+if __name__ == '__main__':
+    main()
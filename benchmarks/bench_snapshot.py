@@ -0,0 +1,122 @@
+"""Benchmark: cold-start worker answering from an mmap'd patient snapshot vs waiting for the mirror load.
+
+A mirror-mode tool syncs from a stand-in MCP server and writes the snapshot.
+Fresh worker processes then start in mirror mode, with and without
+MCP_SNAPSHOT_PATH, and time their first locally answered lookup. Snapshot
+answers are checked against the stand-in server's own filtering.
+
+    python -m benchmarks.bench_snapshot --patients 100000
+"""
+import argparse
+import contextlib
+import io
+import json
+import os
+import subprocess
+import sys
+import tempfile
+import time
+
+from benchmarks.stand_in_mcp import StandInMCPServer, generate_patients, filter_patients
+from tools.patient_api_tool import PatientAPITool
+from tools.patient_snapshot import PatientSnapshot
+
+LOOKUPS = [
+    {'PatientFullName': 'john smith'},
+    {'PatientFullName': 'aroha', 'GenderName': 'female'},
+    {'ProviderName': 'patel', 'EnrollmentStatus': 'enrolled'},
+    {'PatientNHI': 'BX'},
+    {'PatientId': '1234'},
+    {'PatientDOB': '1985-03'},
+    {'Email': 'wiremu.ngata'}
+]
+
+
+def _rss_kib() -> int:
+    try:
+        with open('/proc/self/status') as status:
+            for line in status:
+                if line.startswith('VmRSS:'):
+                    return int(line.split()[1])
+    except OSError:
+        pass
+    return 0
+
+
+def worker(base_url: str, snapshot_path: str, filters):
+    """Runs in a fresh process: time until the first lookup is answered locally, and until the index is built"""
+    start = time.perf_counter()
+    with contextlib.redirect_stdout(io.StringIO()):
+        tool = PatientAPITool(base_url, data_mode='mirror', snapshot_path=snapshot_path)
+        while True:
+            result = tool.get_patients(**filters)
+            if result.get('Source') == 'mirror':
+                break
+            time.sleep(0.005)
+        first = time.perf_counter() - start
+        serving_from = tool.mirror.stats()['serving_from']
+        first_rss = _rss_kib()
+        while not tool.mirror.loaded:
+            time.sleep(0.005)
+        indexed = time.perf_counter() - start
+        tool.mirror_sync.stop()
+    print(json.dumps({'first_local_ms': first * 1000, 'indexed_ms': indexed * 1000, 'rows': len(result['Data']),
+                      'rss_kib': first_rss, 'serving_from': serving_from}))
+
+
+def _spawn(base_url: str, snapshot_path: str):
+    command = [sys.executable, '-m', 'benchmarks.bench_snapshot', '--worker', base_url, snapshot_path]
+    output = subprocess.run(command, capture_output=True, text=True, check=True).stdout
+    return json.loads(output.strip().splitlines()[-1])
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__.splitlines()[0])
+    parser.add_argument('--patients', type=int, default=100000)
+    parser.add_argument('--workers', type=int, default=3, help='cold starts per configuration')
+    parser.add_argument('--worker', nargs=2, metavar=('URL', 'SNAPSHOT'), help=argparse.SUPPRESS)
+    args = parser.parse_args()
+
+    if args.worker:
+        worker(args.worker[0], args.worker[1], LOOKUPS[0])
+        return
+
+    patients = generate_patients(args.patients)
+    with tempfile.TemporaryDirectory() as directory, StandInMCPServer(patients) as server:
+        path = os.path.join(directory, 'patients.snapshot')
+        with contextlib.redirect_stdout(io.StringIO()):
+            writer = PatientAPITool(server.base_url, mirror_sync_seconds=0, snapshot_path=path)
+            writer.load_mirror()
+        sync = writer.mirror_sync.stats()
+        print(f"{args.patients} patients: snapshot {os.path.getsize(path) / 1024 / 1024:.1f} MiB, "
+              f"written in {sync['last_snapshot_seconds'] * 1000:.0f} ms")
+
+        start = time.perf_counter()
+        snapshot = PatientSnapshot(path)
+        print(f"  open (mmap + directory)     {(time.perf_counter() - start) * 1000:8.2f} ms")
+
+        mismatches = 0
+        for filters in LOOKUPS:
+            start = time.perf_counter()
+            table = snapshot.table
+            rows = table.to_rows(table.filter({field: value.casefold() for field, value in filters.items()}))
+            elapsed = (time.perf_counter() - start) * 1000
+            expected = [row['PatientId'] for row in filter_patients(patients, filters)]
+            same = [row['PatientId'] for row in rows] == expected
+            mismatches += not same
+            print(f"  lookup {json.dumps(filters):55} {len(rows):6} rows {elapsed:8.2f} ms"
+                  f"{'' if same else '   MISMATCH'}")
+
+        for label, snapshot_path in (('with snapshot', path), ('without snapshot', '')):
+            runs = [_spawn(server.base_url, snapshot_path) for _ in range(args.workers)]
+            best = min(runs, key=lambda run: run['first_local_ms'])
+            print(f"  cold worker {label:17} first local answer {best['first_local_ms']:9.1f} ms "
+                  f"from {best['serving_from']} (RSS {best['rss_kib'] / 1024:.0f} MiB), "
+                  f"index ready {best['indexed_ms']:9.1f} ms")
+
+    if mismatches:
+        raise SystemExit(1)
+
+
+if __name__ == '__main__':
+    main()
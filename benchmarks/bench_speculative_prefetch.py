@@ -0,0 +1,96 @@
+"""Benchmark: /chat latency of questions the model routes, with and without speculative MCP prefetch.
+
+Every question here needs the model (the fast path declines it). For some,
+the model's get_patients arguments match what the manual extractor finds,
+so the prefetched result is used. For others they differ, or the model
+answers in text, so the prefetch is wasted. Runs against a stand-in LLM and
+a stand-in MCP server with the result and decision caches off. Reports
+latency per question, the speculation hit rate, the MCP time saved and the
+extra MCP calls, and checks that both runs give the same answers.
+
+    python -m benchmarks.bench_speculative_prefetch --llm-latency 0.8 --mcp-latency 0.4
+"""
+import argparse
+import asyncio
+import contextlib
+import io
+import time
+
+from benchmarks.common import bench_config, print_summary, summarize
+from benchmarks.stand_in_llm import StandInLLMServer
+from benchmarks.stand_in_mcp import StandInMCPServer, generate_patients
+from llm.router_api_llm import RouterAPILLM
+
+# Question -> what the model answers; the comment is the manual extractor's guess
+DECISIONS = {
+    "how many male patients are there": {"GenderName": "Male"},                 # GenderName=male: hit
+    "which male patients see dr patel": {"gender": "male", "provider_name": "Patel"},  # same, snake_case: hit
+    "which patients does dr patel look after": {"ProviderName": "Patel"},       # 'patel look after': miss
+    "how many patients are named john smith": {"PatientFullName": "John Smith"},  # GenderName=male: miss
+    "what can you do": "I can search patients by name, NHI, provider and more.",  # nothing extracted: skipped
+}
+
+
+def _run(llm, rounds: int, use_async: bool):
+    timings = {query: [] for query in DECISIONS}
+    replies = {}
+
+    async def run_async():
+        for _ in range(rounds):
+            for query in DECISIONS:
+                start = time.perf_counter()
+                replies[query] = await llm.process_query_async(query)
+                timings[query].append(time.perf_counter() - start)
+        await llm.aclose()
+
+    with contextlib.redirect_stdout(io.StringIO()):
+        if use_async:
+            asyncio.run(run_async())
+        else:
+            for _ in range(rounds):
+                for query in DECISIONS:
+                    start = time.perf_counter()
+                    replies[query] = llm.process_query(query)
+                    timings[query].append(time.perf_counter() - start)
+    return timings, replies
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__.splitlines()[0])
+    parser.add_argument('--patients', type=int, default=5000)
+    parser.add_argument('--rounds', type=int, default=5)
+    parser.add_argument('--llm-latency', type=float, default=0.8, help='simulated completion time (s)')
+    parser.add_argument('--mcp-latency', type=float, default=0.4, help='simulated stored procedure time (s)')
+    args = parser.parse_args()
+
+    mismatches = 0
+    for use_async in (False, True):
+        print(f"{'async' if use_async else 'sync'} path:")
+        baseline = None
+        for enabled in (False, True):
+            with StandInMCPServer(generate_patients(args.patients), latency=args.mcp_latency) as mcp, \
+                    StandInLLMServer(DECISIONS, latency=args.llm_latency) as stand_in_llm:
+                with contextlib.redirect_stdout(io.StringIO()):
+                    llm = RouterAPILLM(bench_config(mcp.base_url, stand_in_llm.base_url, SPECULATIVE_PREFETCH_ENABLED=enabled,
+                                                    MCP_CACHE_TTL_SECONDS=0, DECISION_CACHE_TTL_SECONDS=0))
+                timings, replies = _run(llm, args.rounds, use_async)
+                mcp_calls = mcp.requests_served
+
+            print(f"  speculation {'on' if enabled else 'off'}: {mcp_calls / args.rounds:.1f} MCP calls per round")
+            for query, samples in timings.items():
+                print_summary(f"    {query[:24]}", summarize(samples))
+            if enabled:
+                stats = llm.speculation.metrics.stats()
+                print(f"    hit rate {stats['hit_rate']:.0%} ({stats['hits']} hits, {stats['misses']} misses, "
+                      f"{stats['skipped']} skipped), {stats['saved_ms_per_hit']:.0f} ms saved per hit, "
+                      f"{stats['wasted_mcp_calls']} wasted MCP calls")
+                mismatches += sum(replies[query] != baseline[query] for query in DECISIONS)
+            baseline = replies
+
+    print(f"Answers differing from the run without speculation: {mismatches}")
+    if mismatches:
+        raise SystemExit(1)
+
+
+if __name__ == '__main__':
+    main()
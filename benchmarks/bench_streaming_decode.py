@@ -0,0 +1,105 @@
+"""Benchmark: buffered response.json() vs streaming decode of a large /patients response.
+
+Starts the stand-in MCP server in a separate process (so its own memory does
+not count), then measures peak Python memory (tracemalloc), time to first
+rendered row and total time for:
+
+  buffered  - response.json() then render the whole HTML table
+  streaming - PatientAPITool.stream_patients() piped through iter_patients_html()
+
+    python -m benchmarks.bench_streaming_decode --patients 50000
+"""
+import argparse
+import contextlib
+import io
+import socket
+import subprocess
+import sys
+import time
+import tracemalloc
+
+import requests
+
+from benchmarks.common import bench_config
+from llm.router_api_llm import RouterAPILLM
+from tools.http_pool import close_all_sessions
+
+
+def _free_port() -> int:
+    with socket.socket() as sock:
+        sock.bind(('127.0.0.1', 0))
+        return sock.getsockname()[1]
+
+
+def _start_stand_in(patients: int):
+    port = _free_port()
+    process = subprocess.Popen(
+        [sys.executable, '-m', 'benchmarks.stand_in_mcp', '--port', str(port), '--patients', str(patients)],
+        stdout=subprocess.DEVNULL
+    )
+    base_url = f"http://127.0.0.1:{port}/api/mcp"
+    for _ in range(100):
+        try:
+            requests.get(f"{base_url}/health", timeout=1)
+            return process, base_url
+        except requests.exceptions.ConnectionError:
+            time.sleep(0.1)
+    process.kill()
+    raise RuntimeError("Stand-in MCP server did not start")
+
+
+def _measure(label: str, render):
+    """Run render(sink) under tracemalloc; sink receives each HTML fragment"""
+    first_row_at = []
+    written = [0]
+    start = time.perf_counter()
+
+    def sink(fragment: str):
+        if not first_row_at and '<td>' in fragment:
+            first_row_at.append(time.perf_counter() - start)
+        written[0] += len(fragment)
+
+    tracemalloc.start()
+    with contextlib.redirect_stdout(io.StringIO()):
+        render(sink)
+    _, peak = tracemalloc.get_traced_memory()
+    tracemalloc.stop()
+    total = time.perf_counter() - start
+
+    print(f"{label:<10} peak={peak / 1024 / 1024:>8.2f} MiB  first_row={first_row_at[0] * 1000 if first_row_at else 0:>8.1f} ms  "
+          f"total={total * 1000:>8.1f} ms  html={written[0] / 1024 / 1024:.1f} MiB")
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__.splitlines()[0])
+    parser.add_argument('--patients', type=int, default=50000)
+    args = parser.parse_args()
+
+    process, base_url = _start_stand_in(args.patients)
+    try:
+        with contextlib.redirect_stdout(io.StringIO()):
+            llm = RouterAPILLM(bench_config(base_url, MCP_CACHE_TTL_SECONDS=0))
+        tool = llm.patient_tool
+
+        # Warm the keep-alive connection so both runs pay the same setup
+        tool.session.get(f"{base_url}/health", timeout=5)
+
+        def buffered(sink):
+            response = tool.session.post(f"{base_url}/patients", json={}, headers=tool.headers, timeout=120)
+            sink(llm._format_patients_as_html_table(response.json()))
+
+        def streaming(sink):
+            for fragment in llm.iter_patients_html(tool.stream_patients()):
+                sink(fragment)
+
+        print(f"\n📊 {args.patients} patient rows")
+        _measure('buffered', buffered)
+        _measure('streaming', streaming)
+    finally:
+        close_all_sessions()
+        process.terminate()
+        process.wait()
+
+
+if __name__ == '__main__':
+    main()
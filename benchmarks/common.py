@@ -0,0 +1,57 @@
+"""Shared helpers for the benchmark scripts"""
+import math
+from typing import Dict, List
+
+
+def percentile(samples: List[float], pct: float) -> float:
+    """Nearest-rank percentile of a list of samples"""
+    if not samples:
+        return 0.0
+    ordered = sorted(samples)
+    rank = max(1, math.ceil(pct / 100.0 * len(ordered)))
+    return ordered[rank - 1]
+
+
+def summarize(samples: List[float]) -> Dict[str, float]:
+    """p50/p90/p99/mean in milliseconds for a list of durations in seconds"""
+    if not samples:
+        return {'count': 0, 'p50_ms': 0.0, 'p90_ms': 0.0, 'p99_ms': 0.0, 'mean_ms': 0.0}
+    return {
+        'count': len(samples),
+        'p50_ms': round(percentile(samples, 50) * 1000, 3),
+        'p90_ms': round(percentile(samples, 90) * 1000, 3),
+        'p99_ms': round(percentile(samples, 99) * 1000, 3),
+        'mean_ms': round(sum(samples) / len(samples) * 1000, 3)
+    }
+
+
+def print_summary(label: str, stats: Dict[str, float]):
+    print(f"{label:<28} n={stats['count']:<6} p50={stats['p50_ms']:>9.3f}ms  "
+          f"p90={stats['p90_ms']:>9.3f}ms  p99={stats['p99_ms']:>9.3f}ms  mean={stats['mean_ms']:>9.3f}ms")
+
+
+def bench_config(mcp_server_url: str, llm_base_url: str = 'http://127.0.0.1:9/v1', **overrides):
+    """config.Config pointed at the stand-in servers, with benchmark overrides of its settings"""
+    import contextlib
+    import io
+    import os
+    from config import Config
+
+    connection = {'OPENAI_BASE_URL': llm_base_url, 'MCP_SERVER_URL': mcp_server_url,
+                  'OPENROUTER_API_KEY': 'sk-benchmark', 'OPENROUTER_MODEL': 'benchmark/stand-in'}
+    saved = {key: os.environ.get(key) for key in connection}
+    os.environ.update(connection)
+    try:
+        with contextlib.redirect_stdout(io.StringIO()):
+            config = Config()
+    finally:
+        for key, value in saved.items():
+            if value is None:
+                os.environ.pop(key, None)
+            else:
+                os.environ[key] = value
+    for key, value in overrides.items():
+        if not hasattr(config, key):
+            raise TypeError(f"Config has no setting {key!r}")
+        setattr(config, key, value)
+    return config
@@ -0,0 +1,73 @@
+"""Latency distributions for the stand-in servers.
+
+A spec string picks the distribution, so it can come straight from a
+command line:
+
+    0.3                      fixed 300 ms (a bare number, as before)
+    uniform:0.2,0.6          uniform between 200 and 600 ms
+    normal:0.5,0.1           mean 500 ms, sd 100 ms (never below 0)
+    lognormal:0.8,0.4        median 800 ms, sigma 0.4 - the long tail of real LLM calls
+    replay                   the duration recorded with the replayed exchange
+    replay:0.5               ... scaled (here: twice as fast)
+
+Draws come from a seeded generator, so a run issuing the same requests in
+the same order sleeps the same amounts.
+"""
+import math
+import random
+import threading
+from typing import Optional, Union
+
+KINDS = ('fixed', 'uniform', 'normal', 'lognormal', 'replay')
+
+
+class LatencyModel:
+    """Thread-safe sampler for one latency spec (seconds)"""
+
+    def __init__(self, spec: Union[str, float, None] = 0.0, seed: int = 42):
+        self.spec = str(spec if spec is not None else 0.0)
+        kind, _, params = self.spec.partition(':')
+        try:
+            float(kind)
+            kind, params = 'fixed', kind
+        except ValueError:
+            pass
+        if kind not in KINDS:
+            raise ValueError(f"Unknown latency distribution {kind!r} (expected a number or one of {', '.join(KINDS[1:])})")
+        try:
+            self.params = [float(value) for value in params.split(',')] if params else []
+        except ValueError:
+            raise ValueError(f"Invalid latency parameters in {self.spec!r}")
+        expected = {'fixed': (1,), 'uniform': (2,), 'normal': (2,), 'lognormal': (2,), 'replay': (0, 1)}[kind]
+        if len(self.params) not in expected:
+            raise ValueError(f"Latency {kind!r} takes {' or '.join(map(str, expected))} parameters, got {self.spec!r}")
+        self.kind = kind
+        self._rng = random.Random(seed)
+        self._lock = threading.Lock()
+
+    def __bool__(self) -> bool:
+        """False when every draw is 0 (nothing to sleep)"""
+        return not (self.kind == 'fixed' and self.params[0] <= 0)
+
+    def sample(self, recorded: Optional[float] = None) -> float:
+        """One delay in seconds; recorded is the replayed exchange's duration (used by 'replay')"""
+        if self.kind == 'fixed':
+            return max(0.0, self.params[0])
+        if self.kind == 'replay':
+            scale = self.params[0] if self.params else 1.0
+            return max(0.0, (recorded or 0.0) * scale)
+        with self._lock:
+            if self.kind == 'uniform':
+                return self._rng.uniform(*self.params)
+            if self.kind == 'normal':
+                return max(0.0, self._rng.gauss(*self.params))
+            median, sigma = self.params
+            return self._rng.lognormvariate(math.log(median), sigma) if median > 0 else 0.0
+
+    def __repr__(self) -> str:
+        return f"LatencyModel({self.spec!r})"
+
+
+def latency_model(latency: Union[LatencyModel, str, float, None], seed: int = 42) -> LatencyModel:
+    """LatencyModel for a number, a spec string or an existing model"""
+    return latency if isinstance(latency, LatencyModel) else LatencyModel(latency, seed)
@@ -0,0 +1,228 @@
+"""Recording proxy: captures real LLM and MCP exchanges to a replay file.
+
+Point the app at the proxy instead of the real services. Requests under
+/v1/ go to the LLM upstream, requests under /mcp/ go to the MCP upstream,
+and answers come back unchanged. Every chat completion and /patients
+exchange is appended to the replay file (see benchmarks.replay) with the
+time the upstream took. The stand-in servers serve the file back with
+--fixtures.
+
+    python -m benchmarks.recorder --llm-upstream https://openrouter.ai/api/v1 \\
+        --mcp-upstream https://example.ngrok.app/api/mcp --out recorded.jsonl
+    OPENAI_BASE_URL=http://127.0.0.1:8780/v1 MCP_SERVER_URL=http://127.0.0.1:8780/mcp python main.py
+
+The Authorization header is forwarded but never written. Unless
+keep_patient_data is set, recorded patient rows are swapped for synthetic
+ones (same count and fields) and function results sent to the model are
+replaced by a placeholder. The questions and the model's replies are
+recorded as they are.
+"""
+import json
+import socket
+import threading
+import time
+from http.server import BaseHTTPRequestHandler, ThreadingHTTPServer
+from typing import Any, Dict, Optional
+from urllib.parse import urlparse, parse_qs
+
+import requests
+
+from benchmarks.replay import llm_exchange, mcp_exchange
+from benchmarks.stand_in_mcp import generate_patients
+
+# Request headers passed on to the upstreams; If-None-Match is dropped so every recorded answer has a body
+FORWARDED_HEADERS = ('Content-Type', 'Accept', 'Authorization', 'HTTP-Referer', 'X-Title')
+
+
+def redact_llm_request(request: Dict[str, Any]) -> Dict[str, Any]:
+    """Copy of a chat completion request without the function results (patient rows) it carries"""
+    messages = []
+    for message in request.get('messages') or []:
+        if message.get('role') == 'function' and message.get('content'):
+            message = dict(message, content=f"[{len(message['content'])} characters of patient data not recorded]")
+        messages.append(message)
+    return dict(request, messages=messages)
+
+
+def synthetic_rows(response: Any, seed: int) -> Any:
+    """Copy of a /patients response with its rows replaced by synthetic patients"""
+    if not isinstance(response, dict) or not isinstance(response.get('Data'), list) or not response['Data']:
+        return response
+    return dict(response, Data=generate_patients(len(response['Data']), seed))
+
+
+class RecordingProxy:
+    """Threaded forwarding proxy that appends each LLM / MCP exchange to a JSONL replay file"""
+
+    def __init__(self, llm_upstream: str, mcp_upstream: str, out: str, host: str = '127.0.0.1', port: int = 0,
+                 keep_patient_data: bool = False, timeout: float = 120.0, seed: int = 42):
+        self.llm_upstream = llm_upstream.rstrip('/')
+        self.mcp_upstream = mcp_upstream.rstrip('/')
+        self.out = out
+        self.keep_patient_data = keep_patient_data
+        self.timeout = timeout
+        self.seed = seed
+        self.recorded = 0
+        self.failures = 0
+        self._lock = threading.Lock()
+        self._file = open(out, 'a', encoding='utf-8')
+        self._server = ThreadingHTTPServer((host, port), self._make_handler())
+        self._server.daemon_threads = True
+        self._thread = None
+
+    @property
+    def llm_base_url(self) -> str:
+        host, port = self._server.server_address[:2]
+        return f"http://{host}:{port}/v1"
+
+    @property
+    def mcp_base_url(self) -> str:
+        host, port = self._server.server_address[:2]
+        return f"http://{host}:{port}/mcp"
+
+    def record(self, exchange: Dict[str, Any]):
+        with self._lock:
+            self._file.write(json.dumps(exchange, ensure_ascii=False) + '\n')
+            self._file.flush()
+            self.recorded += 1
+
+    def _capture(self, path: str, query: str, request_body: bytes, status: int, response_body: bytes, elapsed: float):
+        """Replay-file entry for a forwarded exchange, or None if it is not one the stand-ins replay"""
+        try:
+            response = json.loads(response_body) if response_body else None
+        except ValueError:
+            return None
+        if path.endswith('/chat/completions'):
+            request = json.loads(request_body or b'{}')
+            exchange = llm_exchange(request, status, response, elapsed)
+            if not self.keep_patient_data:
+                exchange['request'] = redact_llm_request(request)
+            return exchange
+        if path.endswith('/patients'):
+            if request_body:
+                filters = json.loads(request_body)
+            else:
+                filters = {k: v[0] for k, v in parse_qs(query).items()}
+            if not self.keep_patient_data:
+                response = synthetic_rows(response, self.seed)
+            return mcp_exchange(filters, status, response, elapsed)
+        return None
+
+    def _make_handler(self):
+        proxy = self
+
+        class Handler(BaseHTTPRequestHandler):
+            protocol_version = 'HTTP/1.1'
+
+            def setup(self):
+                super().setup()
+                self.connection.setsockopt(socket.IPPROTO_TCP, socket.TCP_NODELAY, 1)
+
+            def log_message(self, format, *args):
+                pass
+
+            def handle(self):
+                try:
+                    super().handle()
+                except ConnectionError:
+                    pass
+
+            def _send(self, status: int, body: bytes, content_type: str = 'application/json'):
+                self.send_response(status)
+                self.send_header('Content-Type', content_type)
+                self.send_header('Content-Length', str(len(body)))
+                self.end_headers()
+                self.wfile.write(body)
+
+            def _upstream_url(self, path: str) -> Optional[str]:
+                if path.startswith('/v1/'):
+                    return proxy.llm_upstream + path[len('/v1'):]
+                if path.startswith('/mcp/'):
+                    return proxy.mcp_upstream + path[len('/mcp'):]
+                return None
+
+            def _forward(self):
+                parsed = urlparse(self.path)
+                url = self._upstream_url(parsed.path)
+                if url is None:
+                    self._send(404, json.dumps({'Success': False, 'Message': 'Not found', 'Data': None}).encode())
+                    return
+                if parsed.query:
+                    url = f"{url}?{parsed.query}"
+                length = int(self.headers.get('Content-Length') or 0)
+                body = self.rfile.read(length) if length else b''
+                headers = {name: self.headers[name] for name in FORWARDED_HEADERS if self.headers.get(name)}
+
+                start = time.perf_counter()
+                try:
+                    response = requests.request(self.command, url, data=body or None, headers=headers,
+                                                timeout=proxy.timeout)
+                except requests.exceptions.RequestException as e:
+                    with proxy._lock:
+                        proxy.failures += 1
+                    print(f"❌ Upstream request failed: {url}: {str(e)}")
+                    self._send(502, json.dumps({'Success': False, 'Message': f"Upstream error: {str(e)}",
+                                                'Data': None}).encode())
+                    return
+                elapsed = time.perf_counter() - start
+
+                # Written before answering, so the file is complete once the client has its answer
+                try:
+                    exchange = proxy._capture(parsed.path, parsed.query, body, response.status_code,
+                                              response.content, elapsed)
+                except ValueError as e:
+                    exchange = None
+                    print(f"⚠️ Not recorded: {parsed.path}: {str(e)}")
+                if exchange is not None:
+                    proxy.record(exchange)
+                    print(f"📼 Recorded {exchange['kind']} exchange ({exchange['elapsed_ms']:.0f} ms)")
+                self._send(response.status_code, response.content,
+                           response.headers.get('Content-Type', 'application/json'))
+
+            do_GET = _forward
+            do_POST = _forward
+
+        return Handler
+
+    def start(self) -> 'RecordingProxy':
+        self._thread = threading.Thread(target=self._server.serve_forever, daemon=True)
+        self._thread.start()
+        return self
+
+    def stop(self):
+        self._server.shutdown()
+        self._server.server_close()
+        with self._lock:
+            self._file.close()
+
+    def __enter__(self):
+        return self.start()
+
+    def __exit__(self, *exc):
+        self.stop()
+
+
+if __name__ == '__main__':
+    import argparse
+
+    parser = argparse.ArgumentParser(description='Record LLM and MCP exchanges to a replay file')
+    parser.add_argument('--llm-upstream', required=True, help='OpenAI-compatible base URL, e.g. https://openrouter.ai/api/v1')
+    parser.add_argument('--mcp-upstream', required=True, help='MCP base URL (the app\'s MCP_SERVER_URL)')
+    parser.add_argument('--out', default='recorded.jsonl', help='replay file (appended to)')
+    parser.add_argument('--port', type=int, default=8780)
+    parser.add_argument('--keep-patient-data', action='store_true',
+                        help='record real patient rows and function results instead of synthetic / placeholder ones')
+    args = parser.parse_args()
+
+    recorder = RecordingProxy(args.llm_upstream, args.mcp_upstream, args.out, port=args.port,
+                              keep_patient_data=args.keep_patient_data)
+    print(f"📼 Recording to {args.out}")
+    print(f"   OPENAI_BASE_URL={recorder.llm_base_url}")
+    print(f"   MCP_SERVER_URL={recorder.mcp_base_url}")
+    recorder.start()
+    try:
+        while True:
+            time.sleep(1)
+    except KeyboardInterrupt:
+        recorder.stop()
+        print(f"💾 {recorder.recorded} exchanges recorded")
@@ -0,0 +1,112 @@
+"""Recorded LLM and MCP exchanges that the stand-in servers replay.
+
+A replay file is JSONL, one exchange per line:
+
+    {"kind": "llm", "key": ..., "loose_key": ..., "request": {...}, "status": 200,
+     "response": {...}, "elapsed_ms": 812.4}
+    {"kind": "mcp", "key": "GenderName=male", "request": {"GenderName": "male"}, ...}
+
+benchmarks.recorder writes these files from real traffic. An LLM request
+first matches on its whole conversation and function schemas, ignoring the
+model name and sampling settings. If that fails it matches on the last user
+message and the last role. An MCP request matches on its canonical filters.
+Exchanges recorded more than once under the same key are replayed in
+recorded order, then from the start again.
+"""
+import hashlib
+import json
+import threading
+from typing import Any, Dict, List, Optional
+
+from llm.decision_cache import normalize_query
+from tools.filter_keys import filters_key
+
+
+def _conversation(messages: List[Dict[str, Any]]) -> List[List[Any]]:
+    return [[message.get('role'), message.get('content'), message.get('name'), message.get('function_call')]
+            for message in messages]
+
+
+def llm_keys(request: Dict[str, Any]):
+    """(key, loose_key) of a chat completion request"""
+    messages = request.get('messages') or []
+    functions = sorted(function.get('name', '') for function in request.get('functions') or [])
+    payload = json.dumps([_conversation(messages), functions], sort_keys=True, default=str)
+    key = hashlib.sha1(payload.encode('utf-8')).hexdigest()
+    user = next((m.get('content') or '' for m in reversed(messages) if m.get('role') == 'user'), '')
+    last_role = messages[-1].get('role') if messages else ''
+    return key, f"{last_role}:{bool(functions)}:{normalize_query(str(user))}"
+
+
+def mcp_key(filters: Dict[str, Any]) -> str:
+    return filters_key(filters)
+
+
+class ReplayFixtures:
+    """Recorded exchanges by key; thread-safe lookups for the stand-in servers"""
+
+    def __init__(self, exchanges: Optional[List[Dict[str, Any]]] = None):
+        self._lock = threading.Lock()
+        self._by_key: Dict[str, List[Dict[str, Any]]] = {}
+        self._next: Dict[str, int] = {}
+        self.count = 0
+        self.hits = 0
+        self.misses = 0
+        for exchange in exchanges or []:
+            self.add(exchange)
+
+    @classmethod
+    def load(cls, path: str) -> 'ReplayFixtures':
+        exchanges = []
+        with open(path, encoding='utf-8') as f:
+            for line_number, line in enumerate(f, 1):
+                if line.strip():
+                    try:
+                        exchanges.append(json.loads(line))
+                    except json.JSONDecodeError as e:
+                        raise ValueError(f"{path}:{line_number}: invalid exchange ({e})")
+        return cls(exchanges)
+
+    def add(self, exchange: Dict[str, Any]):
+        with self._lock:
+            keys = [exchange['key']]
+            if exchange.get('loose_key'):
+                keys.append(exchange['loose_key'])
+            for key in keys:
+                self._by_key.setdefault(f"{exchange['kind']}|{key}", []).append(exchange)
+            self.count += 1
+
+    def _lookup(self, kind: str, keys) -> Optional[Dict[str, Any]]:
+        with self._lock:
+            for key in keys:
+                recorded = self._by_key.get(f"{kind}|{key}")
+                if recorded:
+                    index = self._next.get(f"{kind}|{key}", 0)
+                    self._next[f"{kind}|{key}"] = (index + 1) % len(recorded)
+                    self.hits += 1
+                    return recorded[index]
+            self.misses += 1
+            return None
+
+    def llm_exchange(self, request: Dict[str, Any]) -> Optional[Dict[str, Any]]:
+        """Recorded exchange answering a chat completion request, or None"""
+        return self._lookup('llm', llm_keys(request))
+
+    def mcp_exchange(self, filters: Dict[str, Any]) -> Optional[Dict[str, Any]]:
+        """Recorded /patients exchange for these filters, or None"""
+        return self._lookup('mcp', [mcp_key(filters)])
+
+    def stats(self) -> Dict[str, Any]:
+        with self._lock:
+            return {'exchanges': self.count, 'hits': self.hits, 'misses': self.misses}
+
+
+def llm_exchange(request: Dict[str, Any], status: int, response: Any, elapsed: float) -> Dict[str, Any]:
+    key, loose_key = llm_keys(request)
+    return {'kind': 'llm', 'key': key, 'loose_key': loose_key, 'request': request, 'status': status,
+            'response': response, 'elapsed_ms': round(elapsed * 1000, 1)}
+
+
+def mcp_exchange(filters: Dict[str, Any], status: int, response: Any, elapsed: float) -> Dict[str, Any]:
+    return {'kind': 'mcp', 'key': mcp_key(filters), 'request': filters, 'status': status,
+            'response': response, 'elapsed_ms': round(elapsed * 1000, 1)}
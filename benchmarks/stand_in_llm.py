@@ -0,0 +1,166 @@
+"""Local stand-in for an OpenAI-compatible /v1/chat/completions endpoint, used by the benchmarks.
+
+Replies come from recorded fixtures (benchmarks.replay) when one matches the
+request. Otherwise they come from a decisions table keyed on the last user
+message: a dict of arguments becomes a call of function_name, and a string
+becomes a plain assistant message. Unknown messages get default_reply. A
+conversation ending in a function result gets follow_up_reply.
+
+latency is a delay per completion, standing in for the OpenRouter round
+trip. It is a number of seconds or a distribution spec (see
+benchmarks.latency), e.g. 'lognormal:0.8,0.4', or 'replay' to use the
+recorded durations.
+
+    python -m benchmarks.stand_in_llm --port 8766 --fixtures recorded.jsonl --latency replay
+"""
+import json
+import socket
+import threading
+import time
+from http.server import BaseHTTPRequestHandler, ThreadingHTTPServer
+from typing import Any, Dict, Optional, Union
+
+from benchmarks.latency import LatencyModel, latency_model
+from benchmarks.replay import ReplayFixtures
+
+Decision = Union[str, Dict[str, Any]]
+
+
+class StandInLLMServer:
+    """Threaded stand-in chat completion server running on a background thread"""
+
+    def __init__(self, decisions: Optional[Dict[str, Decision]] = None, host: str = '127.0.0.1', port: int = 0,
+                 latency: Union[LatencyModel, str, float] = 0.0, default_reply: Decision = "I can help you search for patients.",
+                 function_name: str = 'get_patients', follow_up_reply: str = "Here are the matching patients.",
+                 fixtures: Optional[ReplayFixtures] = None, seed: int = 42):
+        self.decisions = decisions or {}
+        self.latency = latency_model(latency, seed)
+        self.fixtures = fixtures
+        self.default_reply = default_reply
+        self.function_name = function_name
+        self.follow_up_reply = follow_up_reply
+        self.completions = 0
+        self.replayed = 0
+        self.bytes_received = 0
+        self._lock = threading.Lock()
+        self._server = ThreadingHTTPServer((host, port), self._make_handler())
+        self._server.daemon_threads = True
+        self._thread = None
+
+    @property
+    def base_url(self) -> str:
+        host, port = self._server.server_address[:2]
+        return f"http://{host}:{port}/v1"
+
+    def completion(self, request: Dict[str, Any], completion_id: int) -> Dict[str, Any]:
+        """Chat completion body for a request decided from the decisions table"""
+        decision = self.decide(request.get('messages') or [])
+        if isinstance(decision, dict) and request.get('functions'):
+            message = {'role': 'assistant', 'content': None,
+                       'function_call': {'name': self.function_name, 'arguments': json.dumps(decision)}}
+        else:
+            message = {'role': 'assistant', 'content': decision if isinstance(decision, str) else ''}
+        return {
+            'id': f"chatcmpl-standin-{completion_id}",
+            'object': 'chat.completion',
+            'created': int(time.time()),
+            'model': request.get('model', 'stand-in'),
+            'choices': [{'index': 0, 'message': message, 'finish_reason': 'stop'}],
+            'usage': {'prompt_tokens': 0, 'completion_tokens': 0, 'total_tokens': 0}
+        }
+
+    def decide(self, messages) -> Decision:
+        if messages and messages[-1].get('role') == 'function':
+            return self.follow_up_reply
+        user = next((m.get('content') or '' for m in reversed(messages) if m.get('role') == 'user'), '')
+        return self.decisions.get(user, self.default_reply)
+
+    def _make_handler(self):
+        server = self
+
+        class Handler(BaseHTTPRequestHandler):
+            protocol_version = 'HTTP/1.1'
+
+            def setup(self):
+                super().setup()
+                self.connection.setsockopt(socket.IPPROTO_TCP, socket.TCP_NODELAY, 1)
+
+            def log_message(self, format, *args):
+                pass
+
+            def handle(self):
+                try:
+                    super().handle()
+                except ConnectionError:
+                    # The client gave up (e.g. its deadline ran out) before the answer was written
+                    pass
+
+            def do_POST(self):
+                length = int(self.headers.get('Content-Length') or 0)
+                request = json.loads(self.rfile.read(length) or b'{}')
+                exchange = server.fixtures.llm_exchange(request) if server.fixtures is not None else None
+                with server._lock:
+                    server.completions += 1
+                    server.replayed += exchange is not None
+                    server.bytes_received += length
+                    completion_id = server.completions
+                delay = server.latency.sample(exchange['elapsed_ms'] / 1000 if exchange else None)
+                if delay:
+                    time.sleep(delay)
+
+                if exchange is not None:
+                    status, payload = exchange.get('status', 200), exchange['response']
+                else:
+                    status, payload = 200, server.completion(request, completion_id)
+                body = json.dumps(payload).encode('utf-8')
+                self.send_response(status)
+                self.send_header('Content-Type', 'application/json')
+                self.send_header('Content-Length', str(len(body)))
+                self.end_headers()
+                self.wfile.write(body)
+
+        return Handler
+
+    def start(self) -> 'StandInLLMServer':
+        self._thread = threading.Thread(target=self._server.serve_forever, daemon=True)
+        self._thread.start()
+        return self
+
+    def stop(self):
+        self._server.shutdown()
+        self._server.server_close()
+
+    def __enter__(self):
+        return self.start()
+
+    def __exit__(self, *exc):
+        self.stop()
+
+
+if __name__ == '__main__':
+    import argparse
+
+    parser = argparse.ArgumentParser(description='Run a local stand-in OpenAI-compatible chat completion server')
+    parser.add_argument('--port', type=int, default=8766)
+    parser.add_argument('--latency', default='0', help="seconds or a distribution, e.g. 'lognormal:0.8,0.4' or 'replay'")
+    parser.add_argument('--seed', type=int, default=42, help='latency draws are reproducible for a given seed')
+    parser.add_argument('--fixtures', help='replay file written by benchmarks.recorder')
+    parser.add_argument('--decisions', help='JSON object: question -> get_patients arguments (object) or reply (string)')
+    parser.add_argument('--function-name', default='get_patients')
+    args = parser.parse_args()
+
+    decisions = None
+    if args.decisions:
+        with open(args.decisions, encoding='utf-8') as f:
+            decisions = json.load(f)
+    fixtures = ReplayFixtures.load(args.fixtures) if args.fixtures else None
+    stand_in = StandInLLMServer(decisions, port=args.port, latency=args.latency, seed=args.seed,
+                                function_name=args.function_name, fixtures=fixtures)
+    print(f"🧪 Stand-in LLM server on {stand_in.base_url}"
+          + (f" replaying {fixtures.count} recorded exchanges" if fixtures else ""))
+    stand_in.start()
+    try:
+        while True:
+            time.sleep(1)
+    except KeyboardInterrupt:
+        stand_in.stop()
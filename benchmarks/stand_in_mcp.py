@@ -0,0 +1,296 @@
+"""Local stand-in for the MCP server's /api/mcp endpoints, used by the benchmarks.
+
+Serves /health and /patients (POST with JSON filters, GET with query params)
+from a synthetic patient list, applying the same LIKE '%value%' / exact gender
+rules as [AI].[uspGetPatientDetailsMCP]. Filters with a recorded exchange
+(benchmarks.replay fixtures) get the recorded answer instead. /patients
+responses carry an ETag and honour If-None-Match unless etags=False.
+latency is seconds or a distribution spec (see benchmarks.latency).
+
+    python -m benchmarks.stand_in_mcp --patients 100000 --latency normal:0.4,0.1
+    python -m benchmarks.stand_in_mcp --write-dataset patients.jsonl --patients 1000000
+    python -m benchmarks.stand_in_mcp --dataset patients.jsonl --fixtures recorded.jsonl --latency replay
+"""
+import hashlib
+import json
+import random
+import socket
+import threading
+import time
+from datetime import date, datetime, timedelta
+from http.server import BaseHTTPRequestHandler, ThreadingHTTPServer
+from typing import Dict, Any, List, Optional, Union
+from urllib.parse import urlparse, parse_qs
+
+from benchmarks.latency import LatencyModel, latency_model
+from benchmarks.replay import ReplayFixtures
+
+FIRST_NAMES = ['John', 'Jane', 'Aroha', 'Wiremu', 'Mere', 'David', 'Sarah', 'Tama', 'Emma', 'Liam']
+LAST_NAMES = ['Smith', 'Johnson', 'Ngata', 'Brown', 'Walker', 'Taylor', 'Wilson', 'Parata', 'Lee', 'King']
+PROVIDERS = ['Dr Smith', 'Dr Johnson', 'Dr Patel', 'Dr Chen', 'Dr Williams']
+STREETS = ['Queen Street', 'Victoria Road', 'Main Road', 'Park Avenue', 'Beach Road']
+CITIES = ['Auckland', 'Wellington', 'Hamilton', 'Dunedin', 'Tauranga']
+FUNDING = ['Funded', 'Not Funded', 'Pending']
+ENROLLMENT = ['Enrolled', 'Not Enrolled', 'Casual', '']
+
+# The stored procedure's rules, kept independent of tools/ so the mirror is checked against them:
+# date columns are converted to yyyy-MM-dd before LIKE, GenderName is compared with =, and the
+# collation is case-insensitive
+SQL_DATE_COLUMNS = ('PatientDOB', 'EnrollmentDate')
+SQL_EXACT_COLUMNS = ('GenderName',)
+
+
+def generate_patients(count: int, seed: int = 42) -> List[Dict[str, Any]]:
+    """Build a deterministic synthetic patient list shaped like the MCP 'Data' rows"""
+    rng = random.Random(seed)
+    patients = []
+    for i in range(count):
+        first = rng.choice(FIRST_NAMES)
+        last = rng.choice(LAST_NAMES)
+        dob = date(1940, 1, 1) + timedelta(days=rng.randint(0, 30000))
+        enrolled = date(2010, 1, 1) + timedelta(days=rng.randint(0, 5000))
+        patients.append({
+            'PatientId': 100000 + i,
+            'PatientNHI': f"{chr(65 + rng.randint(0, 25))}{chr(65 + rng.randint(0, 25))}{chr(65 + rng.randint(0, 25))}{rng.randint(1000, 9999)}",
+            'PatientFullName': f"{first} {last}",
+            'PatientDOB': f"{dob.isoformat()}T00:00:00",
+            'FullAddress': f"{rng.randint(1, 999)} {rng.choice(STREETS)}, {rng.choice(CITIES)}",
+            'ProviderName': rng.choice(PROVIDERS),
+            'Email': f"{first.lower()}.{last.lower()}{i}@example.com",
+            'PhoneNumber': f"021{rng.randint(1000000, 9999999)}",
+            'ChartNumber': str(rng.randint(100, 99999)),
+            'EnrollmentDate': enrolled.isoformat(),
+            'FundingStatus': rng.choice(FUNDING),
+            'EnrollmentStatus': rng.choice(ENROLLMENT),
+            'GenderName': rng.choice(['male', 'female'])
+        })
+    return patients
+
+
+def camel_case_patients(patients: List[Dict[str, Any]]) -> List[Dict[str, Any]]:
+    """The same rows with camelCase keys ('patientFullName'), as the search API returns them"""
+    return [{key[:1].lower() + key[1:]: value for key, value in patient.items()} for patient in patients]
+
+
+def write_patients(path: str, patients: List[Dict[str, Any]]):
+    """Save a dataset as JSONL, one patient row per line"""
+    with open(path, 'w', encoding='utf-8') as f:
+        for patient in patients:
+            f.write(json.dumps(patient) + '\n')
+
+
+def load_patients(path: str) -> List[Dict[str, Any]]:
+    """Load a dataset: JSONL rows, a JSON list, or a JSON MCP response ({"Data": [...]})"""
+    with open(path, encoding='utf-8') as f:
+        text = f.read()
+    if text.lstrip().startswith('['):
+        return json.loads(text)
+    if text.lstrip().startswith('{') and '\n{' not in text.strip():
+        payload = json.loads(text)
+        return payload.get('Data') or payload.get('patients') or []
+    return [json.loads(line) for line in text.splitlines() if line.strip()]
+
+
+def _sql_text(field: str, value: Any) -> str:
+    """A column's text as the stored procedure compares it, lower-cased for the case-insensitive collation"""
+    if value is None:
+        return ''
+    text = str(value)
+    if field in SQL_DATE_COLUMNS and text:
+        try:
+            text = datetime.fromisoformat(text).strftime('%Y-%m-%d')
+        except ValueError:
+            pass
+    return text.lower()
+
+
+def filter_patients(patients: List[Dict[str, Any]], filters: Dict[str, Any]) -> List[Dict[str, Any]]:
+    """Apply the stored procedure matching rules to the synthetic rows (LIKE '%value%', GenderName =)"""
+    active = {k: str(v).lower() for k, v in filters.items() if v is not None and str(v).strip()}
+    if not active:
+        return list(patients)
+
+    matched = []
+    for patient in patients:
+        ok = True
+        for field, value in active.items():
+            cell = _sql_text(field, patient.get(field, patient.get(field[:1].lower() + field[1:])))
+            if field in SQL_EXACT_COLUMNS:
+                ok = cell == value
+            else:
+                ok = value in cell
+            if not ok:
+                break
+        if ok:
+            matched.append(patient)
+    return matched
+
+
+class StandInMCPServer:
+    """Threaded HTTP/1.1 stand-in MCP server running on a background thread.
+
+    latency adds a delay per request (the stored procedure cost) and
+    handshake_delay is paid once per new TCP connection, standing in for the
+    TCP + TLS handshake to the ngrok tunnel. patients may be mutated while
+    running to simulate data changes.
+    """
+
+    def __init__(self, patients: List[Dict[str, Any]] = None, host: str = '127.0.0.1', port: int = 0,
+                 latency: Union[LatencyModel, str, float] = 0.0, handshake_delay: float = 0.0, etags: bool = True,
+                 fixtures: Optional[ReplayFixtures] = None, seed: int = 42):
+        self.patients = patients if patients is not None else generate_patients(200)
+        self.latency = latency_model(latency, seed)
+        self.fixtures = fixtures
+        self.handshake_delay = handshake_delay
+        self.etags = etags
+        self.requests_served = 0
+        self.replayed = 0
+        self.bytes_sent = 0
+        self.not_modified = 0
+        self.connections_opened = 0
+        self._lock = threading.Lock()
+        self._server = ThreadingHTTPServer((host, port), self._make_handler())
+        self._server.daemon_threads = True
+        self._thread = None
+
+    @property
+    def base_url(self) -> str:
+        host, port = self._server.server_address[:2]
+        return f"http://{host}:{port}/api/mcp"
+
+    def _make_handler(self):
+        server = self
+
+        class Handler(BaseHTTPRequestHandler):
+            protocol_version = 'HTTP/1.1'
+
+            def setup(self):
+                super().setup()
+                # Headers and body go out in separate writes; avoid Nagle/delayed-ACK stalls on keep-alive
+                self.connection.setsockopt(socket.IPPROTO_TCP, socket.TCP_NODELAY, 1)
+                with server._lock:
+                    server.connections_opened += 1
+                if server.handshake_delay:
+                    time.sleep(server.handshake_delay)
+
+            def log_message(self, format, *args):
+                pass
+
+            def handle(self):
+                try:
+                    super().handle()
+                except ConnectionError:
+                    # The client gave up (e.g. its deadline ran out) before the answer was written
+                    pass
+
+            def _send_json(self, status: int, payload: Dict[str, Any], etag: bool = False):
+                body = json.dumps(payload).encode('utf-8')
+                tag = f'"{hashlib.sha1(body).hexdigest()[:20]}"' if etag else None
+                if tag and self.headers.get('If-None-Match') == tag:
+                    with server._lock:
+                        server.not_modified += 1
+                    self.send_response(304)
+                    self.send_header('ETag', tag)
+                    self.send_header('Content-Length', '0')
+                    self.end_headers()
+                    return
+                self.send_response(status)
+                self.send_header('Content-Type', 'application/json')
+                self.send_header('Content-Length', str(len(body)))
+                if tag:
+                    self.send_header('ETag', tag)
+                self.end_headers()
+                self.wfile.write(body)
+                with server._lock:
+                    server.bytes_sent += len(body)
+
+            def _serve_patients(self, filters: Dict[str, Any]):
+                exchange = server.fixtures.mcp_exchange(filters) if server.fixtures is not None else None
+                with server._lock:
+                    server.requests_served += 1
+                    server.replayed += exchange is not None
+                delay = server.latency.sample(exchange['elapsed_ms'] / 1000 if exchange else None)
+                if delay:
+                    time.sleep(delay)
+                if exchange is not None:
+                    self._send_json(exchange.get('status', 200), exchange['response'], etag=server.etags)
+                    return
+                data = filter_patients(server.patients, filters)
+                self._send_json(200, {'Success': True, 'Message': f"{len(data)} patients", 'Data': data},
+                                etag=server.etags)
+
+            def do_GET(self):
+                parsed = urlparse(self.path)
+                if parsed.path.endswith('/health'):
+                    self._send_json(200, {'status': 'healthy'})
+                elif parsed.path.endswith('/patients'):
+                    filters = {k: v[0] for k, v in parse_qs(parsed.query).items()}
+                    self._serve_patients(filters)
+                else:
+                    self._send_json(404, {'Success': False, 'Message': 'Not found', 'Data': None})
+
+            def do_POST(self):
+                parsed = urlparse(self.path)
+                length = int(self.headers.get('Content-Length') or 0)
+                raw = self.rfile.read(length) if length else b''
+                if parsed.path.endswith('/patients'):
+                    try:
+                        filters = json.loads(raw or b'{}')
+                    except ValueError:
+                        self._send_json(400, {'Success': False, 'Message': 'Invalid JSON', 'Data': None})
+                        return
+                    self._serve_patients(filters)
+                else:
+                    self._send_json(404, {'Success': False, 'Message': 'Not found', 'Data': None})
+
+        return Handler
+
+    def start(self) -> 'StandInMCPServer':
+        self._thread = threading.Thread(target=self._server.serve_forever, daemon=True)
+        self._thread.start()
+        return self
+
+    def stop(self):
+        self._server.shutdown()
+        self._server.server_close()
+
+    def __enter__(self):
+        return self.start()
+
+    def __exit__(self, *exc):
+        self.stop()
+
+
+if __name__ == '__main__':
+    import argparse
+
+    parser = argparse.ArgumentParser(description='Run a local stand-in MCP server')
+    parser.add_argument('--port', type=int, default=8765)
+    parser.add_argument('--patients', type=int, default=200, help='synthetic rows to generate (any size)')
+    parser.add_argument('--seed', type=int, default=42, help='seed of the synthetic rows and the latency draws')
+    parser.add_argument('--dataset', help='serve rows from this file (JSONL or JSON) instead of generating them')
+    parser.add_argument('--write-dataset', metavar='FILE', help='write the generated rows as JSONL and exit')
+    parser.add_argument('--fixtures', help='replay file written by benchmarks.recorder')
+    parser.add_argument('--latency', default='0', help="seconds or a distribution, e.g. 'normal:0.4,0.1' or 'replay'")
+    parser.add_argument('--handshake-delay', type=float, default=0.0)
+    parser.add_argument('--no-etags', action='store_true', help='omit ETag / ignore If-None-Match')
+    args = parser.parse_args()
+
+    if args.write_dataset:
+        write_patients(args.write_dataset, generate_patients(args.patients, args.seed))
+        print(f"💾 Wrote {args.patients} synthetic patients to {args.write_dataset}")
+        raise SystemExit(0)
+
+    patients = load_patients(args.dataset) if args.dataset else generate_patients(args.patients, args.seed)
+    fixtures = ReplayFixtures.load(args.fixtures) if args.fixtures else None
+    stand_in = StandInMCPServer(patients, port=args.port,
+                                latency=args.latency, handshake_delay=args.handshake_delay,
+                                etags=not args.no_etags, fixtures=fixtures, seed=args.seed)
+    print(f"🧪 Stand-in MCP server on {stand_in.base_url} with {len(patients)} patients"
+          + (f", replaying {fixtures.count} recorded exchanges" if fixtures else ""))
+    stand_in.start()
+    try:
+        while True:
+            time.sleep(1)
+    except KeyboardInterrupt:
+        stand_in.stop()
@@ -0,0 +1,98 @@
+"""Verify the local patient mirror against the (stand-in) MCP server and time both.
+
+Loads the mirror from /patients, then runs randomized single- and multi-field
+filters through PatientAPITool in passthrough and mirror mode, asserting the
+same patients come back in the same order.
+
+    python -m benchmarks.verify_patient_mirror --patients 20000 --queries 500
+"""
+import argparse
+import contextlib
+import io
+import random
+import time
+
+from benchmarks.common import summarize, print_summary
+from benchmarks.stand_in_mcp import StandInMCPServer, generate_patients
+from tools.patient_api_tool import PatientAPITool
+from tools.patient_mirror import LIKE_FIELDS, DATE_FIELDS
+
+
+def _substring(rng: random.Random, value: str) -> str:
+    length = rng.randint(1, min(8, len(value)))
+    start = rng.randint(0, len(value) - length)
+    needle = value[start:start + length]
+    return needle.upper() if rng.random() < 0.3 else needle
+
+
+def build_filters(patients, count: int, seed: int):
+    """Random filters drawn from real row values, plus a few that match nothing"""
+    rng = random.Random(seed)
+    cases = [{}, {'GenderName': 'male'}, {'GenderName': 'FEMALE'}, {'PatientFullName': 'zzz-nobody'},
+             # Dates match as yyyy-MM-dd: the 'T00:00:00' time part of PatientDOB must not match
+             {'PatientDOB': 'T00'}, {'PatientDOB': '0', 'EnrollmentStatus': 'T ENROL'}]
+    while len(cases) < count:
+        row = rng.choice(patients)
+        filters = {}
+        for field in rng.sample(LIKE_FIELDS, rng.choice([1, 1, 1, 2, 3])):
+            value = str(row[field])
+            if field in DATE_FIELDS:
+                value = value[:10]
+            if value:
+                filters[field] = _substring(rng, value)
+        if rng.random() < 0.25:
+            filters['GenderName'] = row['GenderName']
+        if filters:
+            cases.append(filters)
+    return cases
+
+
+def _ids(result):
+    assert result['Success'], result['Message']
+    return [row['PatientId'] for row in result['Data']]
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__.splitlines()[0])
+    parser.add_argument('--patients', type=int, default=20000)
+    parser.add_argument('--queries', type=int, default=500)
+    parser.add_argument('--seed', type=int, default=7)
+    args = parser.parse_args()
+
+    patients = generate_patients(args.patients, seed=args.seed)
+    cases = build_filters(patients, args.queries, args.seed)
+
+    with StandInMCPServer(patients) as server, contextlib.redirect_stdout(io.StringIO()):
+        upstream = PatientAPITool(server.base_url, coalesce_requests=False)
+        mirrored = PatientAPITool(server.base_url, coalesce_requests=False)
+        load = mirrored.load_mirror()
+        mirrored.data_mode = 'mirror'
+
+        upstream_samples, mirror_samples = [], []
+        mismatches, fallbacks = [], 0
+        for filters in cases:
+            start = time.perf_counter()
+            expected = _ids(upstream.get_patients(**filters))
+            upstream_samples.append(time.perf_counter() - start)
+
+            start = time.perf_counter()
+            result = mirrored.get_patients(**filters)
+            mirror_samples.append(time.perf_counter() - start)
+
+            if result.get('Source') != 'mirror':
+                fallbacks += 1
+            if _ids(result) != expected:
+                mismatches.append(filters)
+
+    print(f"Mirror load: {load['Message']} ({load['Mirror']['load_seconds']}s to index)")
+    print(f"Checked {len(cases)} filters: {len(mismatches)} mismatches, {fallbacks} fell back to MCP")
+    print_summary('MCP passthrough', summarize(upstream_samples))
+    print_summary('Local mirror', summarize(mirror_samples))
+    for filters in mismatches[:10]:
+        print(f"  ❌ mismatch for {filters}")
+    if mismatches:
+        raise SystemExit(1)
+
+
+if __name__ == '__main__':
+    main()
@@ -27,6 +27,70 @@ class Config:
         self.MAX_TOKENS = int(os.getenv('MAX_TOKENS', '1000'))
         self.TEMPERATURE = float(os.getenv('TEMPERATURE', '0.7'))
         
+        # Patient rows per /chat page; further pages come from /chat/page (0 = send every row at once)
+        self.CHAT_PAGE_SIZE = int(os.getenv('CHAT_PAGE_SIZE', '50'))
+        # Total time budget of one chat request, shared by the LLM call, the MCP call and rendering;
+        # past it the answer is a partial table or a timeout message (0 = no limit)
+        self.CHAT_DEADLINE_SECONDS = float(os.getenv('CHAT_DEADLINE_SECONDS', '25'))
+        
+        # PatientSearchLLM: 'server' renders search results locally (one completion per query),
+        # 'llm' has the model format them in a second completion
+        self.SEARCH_RESPONSE_MODE = os.getenv('SEARCH_RESPONSE_MODE', 'server').lower()
+        # PatientSearchLLM ('llm' mode): search results sent back to the model as 'tsv' / 'csv' rows ('json' = full payload),
+        # at most this many rows or estimated tokens - counts over all rows replace the ones left out
+        self.SEARCH_RESULT_FORMAT = os.getenv('SEARCH_RESULT_FORMAT', 'tsv').lower()
+        self.SEARCH_RESULT_MAX_ROWS = int(os.getenv('SEARCH_RESULT_MAX_ROWS', '200'))
+        self.SEARCH_RESULT_TOKEN_BUDGET = int(os.getenv('SEARCH_RESULT_TOKEN_BUDGET', '6000'))
+        
+        # MCP HTTP connection pool (shared keep-alive sessions per MCP base URL)
+        self.MCP_POOL_CONNECTIONS = int(os.getenv('MCP_POOL_CONNECTIONS', '4'))
+        self.MCP_POOL_MAXSIZE = int(os.getenv('MCP_POOL_MAXSIZE', '16'))
+        self.MCP_POOL_BLOCK = os.getenv('MCP_POOL_BLOCK', 'false').lower() == 'true'
+        self.MCP_KEEP_ALIVE = os.getenv('MCP_KEEP_ALIVE', 'true').lower() == 'true'
+        
+        # Share one upstream request between concurrent identical get_patients calls
+        self.MCP_COALESCE_REQUESTS = os.getenv('MCP_COALESCE_REQUESTS', 'true').lower() == 'true'
+        
+        # Patient result cache (TTL in seconds, 0 disables; LRU bound on total payload bytes)
+        self.MCP_CACHE_TTL_SECONDS = float(os.getenv('MCP_CACHE_TTL_SECONDS', '120'))
+        self.MCP_CACHE_MAX_BYTES = int(os.getenv('MCP_CACHE_MAX_BYTES', str(50 * 1024 * 1024)))
+        # Stale-while-revalidate: serve expired entries this long while refreshing in the background (0 disables)
+        self.MCP_CACHE_STALE_GRACE_SECONDS = float(os.getenv('MCP_CACHE_STALE_GRACE_SECONDS', '600'))
+        
+        # MCP circuit breaker - trip on consecutive failures or a high error rate, probe after the reset timeout
+        self.MCP_BREAKER_FAILURE_THRESHOLD = int(os.getenv('MCP_BREAKER_FAILURE_THRESHOLD', '5'))
+        self.MCP_BREAKER_ERROR_RATE = float(os.getenv('MCP_BREAKER_ERROR_RATE', '0.5'))
+        self.MCP_BREAKER_WINDOW = int(os.getenv('MCP_BREAKER_WINDOW', '20'))
+        self.MCP_BREAKER_MIN_CALLS = int(os.getenv('MCP_BREAKER_MIN_CALLS', '10'))
+        self.MCP_BREAKER_RESET_SECONDS = float(os.getenv('MCP_BREAKER_RESET_SECONDS', '30'))
+        
+        # 'mirror' answers patient searches from a local indexed copy; 'passthrough' always queries MCP
+        self.MCP_DATA_MODE = os.getenv('MCP_DATA_MODE', 'passthrough').lower()
+        # Background mirror sync interval (0 = load once)
+        self.MCP_MIRROR_SYNC_SECONDS = float(os.getenv('MCP_MIRROR_SYNC_SECONDS', '300'))
+        # Without ETags, unchanged passes double the interval up to this ceiling
+        self.MCP_MIRROR_SYNC_MAX_SECONDS = float(os.getenv('MCP_MIRROR_SYNC_MAX_SECONDS', '2400'))
+        # mmap'd patient snapshot shared by workers: rewritten after each sync, served until the first load
+        # (empty path disables; snapshots older than the max age are ignored, 0 = any age)
+        self.MCP_SNAPSHOT_PATH = os.getenv('MCP_SNAPSHOT_PATH', '')
+        self.MCP_SNAPSHOT_MAX_AGE_SECONDS = float(os.getenv('MCP_SNAPSHOT_MAX_AGE_SECONDS', '86400'))
+        
+        # Answer confidently parsed patient searches without the LLM round trip (confidence 0-1)
+        self.FAST_PATH_ENABLED = os.getenv('FAST_PATH_ENABLED', 'true').lower() == 'true'
+        self.FAST_PATH_MIN_CONFIDENCE = float(os.getenv('FAST_PATH_MIN_CONFIDENCE', '0.9'))
+        
+        # Reuse the LLM's function call for repeated questions (keyed on the normalized question,
+        # dropped when the model or system prompt changes; TTL 0 disables)
+        self.DECISION_CACHE_TTL_SECONDS = float(os.getenv('DECISION_CACHE_TTL_SECONDS', '3600'))
+        self.DECISION_CACHE_MAX_ENTRIES = int(os.getenv('DECISION_CACHE_MAX_ENTRIES', '1000'))
+        
+        # Start get_patients with the manually extracted filters while the model decides; the result
+        # is used when the model's arguments match, dropped otherwise (costs an MCP call per miss)
+        self.SPECULATIVE_PREFETCH_ENABLED = os.getenv('SPECULATIVE_PREFETCH_ENABLED', 'true').lower() == 'true'
+        
+        # Token required by /admin endpoints (admin endpoints are disabled when unset)
+        self.ADMIN_TOKEN = os.getenv('ADMIN_TOKEN', '')
+        
         # Load system prompt from file or use default
         self.SYSTEM_PROMPT = self._load_system_prompt()
         
@@ -103,1266 +167,3 @@ Always format patient results in clear HTML tables with all available columns an
         except Exception as e:
             print(f"❌ MCP Server connection failed: {str(e)}")
             print(f"🔧 Please check if {self.MCP_SERVER_URL} is accessible")
-
-def __init__(self):
-    # OpenRouter Configuration
-    self.OPENROUTER_API_KEY = os.getenv('OPENROUTER_API_KEY', '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')
-    self.OPENAI_BASE_URL = os.getenv('OPENAI_BASE_URL', 'https://openrouter.ai/api/v1')
-    self.MODEL_NAME = os.getenv('OPENROUTER_MODEL', 'openai/gpt-3.5-turbo')
-    
-    # MCP Server Configuration - Check if URL is accessible
-    self.MCP_SERVER_URL = os.getenv('MCP_SERVER_URL')
-    
-    # Test MCP server connectivity at startup
-    self._test_mcp_connection()
-    
-    # Production environment detection
-    if os.getenv('RENDER_SERVICE_NAME') or os.getenv('RENDER'):
-        print("🚀 Production environment detected (Render)")
-    
-    # Debug logging
-    print(f"🔧 Config - OpenRouter API Key: {self.OPENROUTER_API_KEY[:20]}...")
-    print(f"🔧 Config - Base URL: {self.OPENAI_BASE_URL}")
-    print(f"🔧 Config - Model: {self.MODEL_NAME}")
-    print(f"🔧 Config - MCP Server URL: {self.MCP_SERVER_URL}")
-    
-    # Chatbot Configuration
-    self.MAX_TOKENS = int(os.getenv('MAX_TOKENS', '1000'))
-    self.TEMPERATURE = float(os.getenv('TEMPERATURE', '0.7'))
-    
-    # Load system prompt from file or use default
-    self.SYSTEM_PROMPT = self._load_system_prompt()
-    
-    print(f"✅ Config initialized successfully")
-    print(f"📝 System prompt loaded: {len(self.SYSTEM_PROMPT)} characters")
-
-def _load_system_prompt(self):
-    """Load system prompt from file or return default"""
-    prompt_file = 'prompts/mcp_prompt.txt'
-    
-    try:
-        # Try to load from file
-        with open(prompt_file, 'r', encoding='utf-8') as f:
-            content = f.read().strip()
-            print(f"✅ Loaded system prompt from: {prompt_file}")
-            return content
-    except FileNotFoundError:
-        print(f"⚠️  Prompt file not found at: {prompt_file}")
-        print(f"🔄 Using stored procedure-based system prompt")
-        
-        # Return stored procedure-based system prompt
-        return """You are a medical assistant chatbot that translates user questions into calls to a stored procedure `[AI].[uspGetPatientDetailsMCP]` via an MCP server and .NET WebAPI.
-
-This stored procedure supports filtering patient records using multiple parameters. All fields (except gender) are handled using `LIKE '%value%'` search inside the stored procedure.
-
-### Stored Procedure Parameters and Behavior
-
-You can filter by the following fields (all are optional):
-
-| Field             | Parameter Name       | Type     | Matching Type     |
-|------------------|----------------------|----------|--------------------|
-| Patient ID       | @pPatientId          | INT      | LIKE as string     |
-| NHI Number       | @pPatientNHI         | NVARCHAR | LIKE               |
-| Full Name        | @pPatientFullName    | NVARCHAR | LIKE               |
-| Date of Birth    | @pPatientDOB         | NVARCHAR | LIKE (yyyy-MM-dd)  |
-| Address          | @pFullAddress        | NVARCHAR | LIKE               |
-| Provider Name    | @pProviderName       | NVARCHAR | LIKE               |
-| Email            | @pEmail              | NVARCHAR | LIKE               |
-| Phone Number     | @pPhoneNunmber       | NVARCHAR | LIKE               |
-| Chart Number     | @pChartNumber        | NVARCHAR | LIKE               |
-| Enrollment Date  | @pEnrollmentDate     | NVARCHAR | LIKE (yyyy-MM-dd)  |
-| Funding Status   | @pFundingStatus      | NVARCHAR | LIKE               |
-| Enrollment Status| @pEnrollmentStatus   | NVARCHAR | LIKE               |
-| Gender           | @pGenderName         | NVARCHAR | EXACT MATCH        |
-
-For all fields except `Gender`, the backend handles `LIKE '%value%'`. Gender must match exactly (e.g., 'male', 'female').
-
-### Interpretation Rules
-
-1. Parse all filters mentioned in the user's query.
-2. Combine filters if more than one field is mentioned.
-3. Use the value in `LIKE '%value%'` for all fields except Gender.
-4. For Gender, the value must be an exact match.
-5. If no filters are mentioned, fetch all patients (pass empty or null for all fields).
-6. Return structured results or say: "No matching patient records found."
-
-IMPORTANT: For ANY patient-related query, you MUST use the get_patients function. Never provide general responses about patients without calling the function first.
-
-Always format patient results in clear HTML tables with all available columns and show total count.
-"""
-    except Exception as e:
-        print(f"❌ Error loading prompt file: {str(e)}")
-        return "You are a helpful medical assistant AI that can access patient information through the MCP server."
-    
-    def _test_mcp_connection(self):
-        """Test MCP server connection at startup"""
-        try:
-            import requests
-            response = requests.get(f"{self.MCP_SERVER_URL}/health", timeout=5)
-            if response.status_code == 200:
-                print(f"✅ MCP Server is reachable")
-            else:
-                print(f"⚠️ MCP Server returned status: {response.status_code}")
-        except Exception as e:
-            print(f"❌ MCP Server connection failed: {str(e)}")
-            print(f"🔧 Please check if {self.MCP_SERVER_URL} is accessible")
-
-def __init__(self):
-    # OpenRouter Configuration
-    self.OPENROUTER_API_KEY = os.getenv('OPENROUTER_API_KEY', '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')
-    self.OPENAI_BASE_URL = os.getenv('OPENAI_BASE_URL', 'https://openrouter.ai/api/v1')
-    self.MODEL_NAME = os.getenv('OPENROUTER_MODEL', 'openai/gpt-3.5-turbo')
-    
-    # MCP Server Configuration - Check if URL is accessible
-    self.MCP_SERVER_URL = os.getenv('MCP_SERVER_URL', 'https://4ff78e0c0217.ngrok-free.app/api/mcp')
-    
-    # Test MCP server connectivity at startup
-    self._test_mcp_connection()
-    
-    # Production environment detection
-    if os.getenv('RENDER_SERVICE_NAME') or os.getenv('RENDER'):
-        print("🚀 Production environment detected (Render)")
-    
-    # Debug logging
-    print(f"🔧 Config - OpenRouter API Key: {self.OPENROUTER_API_KEY[:20]}...")
-    print(f"🔧 Config - Base URL: {self.OPENAI_BASE_URL}")
-    print(f"🔧 Config - Model: {self.MODEL_NAME}")
-    print(f"🔧 Config - MCP Server URL: {self.MCP_SERVER_URL}")
-    
-    # Chatbot Configuration
-    self.MAX_TOKENS = int(os.getenv('MAX_TOKENS', '1000'))
-    self.TEMPERATURE = float(os.getenv('TEMPERATURE', '0.7'))
-    
-    # Load system prompt from file or use default
-    self.SYSTEM_PROMPT = self._load_system_prompt()
-    
-    print(f"✅ Config initialized successfully")
-    print(f"📝 System prompt loaded: {len(self.SYSTEM_PROMPT)} characters")
-
-def _load_system_prompt(self):
-    """Load system prompt from file or return default"""
-    prompt_file = 'prompts/mcp_prompt.txt'
-    
-    try:
-        # Try to load from file
-        with open(prompt_file, 'r', encoding='utf-8') as f:
-            content = f.read().strip()
-            print(f"✅ Loaded system prompt from: {prompt_file}")
-            return content
-    except FileNotFoundError:
-        print(f"⚠️  Prompt file not found at: {prompt_file}")
-        print(f"🔄 Using stored procedure-based system prompt")
-        
-        # Return stored procedure-based system prompt
-        return """You are a medical assistant chatbot that translates user questions into calls to a stored procedure `[AI].[uspGetPatientDetailsMCP]` via an MCP server and .NET WebAPI.
-
-This stored procedure supports filtering patient records using multiple parameters. All fields (except gender) are handled using `LIKE '%value%'` search inside the stored procedure.
-
-### Stored Procedure Parameters and Behavior
-
-You can filter by the following fields (all are optional):
-
-| Field             | Parameter Name       | Type     | Matching Type     |
-|------------------|----------------------|----------|--------------------|
-| Patient ID       | @pPatientId          | INT      | LIKE as string     |
-| NHI Number       | @pPatientNHI         | NVARCHAR | LIKE               |
-| Full Name        | @pPatientFullName    | NVARCHAR | LIKE               |
-| Date of Birth    | @pPatientDOB         | NVARCHAR | LIKE (yyyy-MM-dd)  |
-| Address          | @pFullAddress        | NVARCHAR | LIKE               |
-| Provider Name    | @pProviderName       | NVARCHAR | LIKE               |
-| Email            | @pEmail              | NVARCHAR | LIKE               |
-| Phone Number     | @pPhoneNunmber       | NVARCHAR | LIKE               |
-| Chart Number     | @pChartNumber        | NVARCHAR | LIKE               |
-| Enrollment Date  | @pEnrollmentDate     | NVARCHAR | LIKE (yyyy-MM-dd)  |
-| Funding Status   | @pFundingStatus      | NVARCHAR | LIKE               |
-| Enrollment Status| @pEnrollmentStatus   | NVARCHAR | LIKE               |
-| Gender           | @pGenderName         | NVARCHAR | EXACT MATCH        |
-
-For all fields except `Gender`, the backend handles `LIKE '%value%'`. Gender must match exactly (e.g., 'male', 'female').
-
-### Interpretation Rules
-
-1. Parse all filters mentioned in the user's query.
-2. Combine filters if more than one field is mentioned.
-3. Use the value in `LIKE '%value%'` for all fields except Gender.
-4. For Gender, the value must be an exact match.
-5. If no filters are mentioned, fetch all patients (pass empty or null for all fields).
-6. Return structured results or say: "No matching patient records found."
-
-IMPORTANT: For ANY patient-related query, you MUST use the get_patients function. Never provide general responses about patients without calling the function first.
-
-Always format patient results in clear HTML tables with all available columns and show total count.
-"""
-    except Exception as e:
-        print(f"❌ Error loading prompt file: {str(e)}")
-        return "You are a helpful medical assistant AI that can access patient information through the MCP server."
-    
-    def _test_mcp_connection(self):
-        """Test MCP server connection at startup"""
-        try:
-            import requests
-            response = requests.get(f"{self.MCP_SERVER_URL}/health", timeout=5)
-            if response.status_code == 200:
-                print(f"✅ MCP Server is reachable")
-            else:
-                print(f"⚠️ MCP Server returned status: {response.status_code}")
-        except Exception as e:
-            print(f"❌ MCP Server connection failed: {str(e)}")
-            print(f"🔧 Please check if {self.MCP_SERVER_URL} is accessible")
-
-def __init__(self):
-    # OpenRouter Configuration
-    self.OPENROUTER_API_KEY = os.getenv('OPENROUTER_API_KEY', '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')
-    self.OPENAI_BASE_URL = os.getenv('OPENAI_BASE_URL', 'https://openrouter.ai/api/v1')
-    self.MODEL_NAME = os.getenv('OPENROUTER_MODEL', 'openai/gpt-3.5-turbo')
-    
-    # MCP Server Configuration - Check if URL is accessible
-    self.MCP_SERVER_URL = os.getenv('MCP_SERVER_URL', 'https://4ff78e0c0217.ngrok-free.app/api/mcp')
-    
-    # Test MCP server connectivity at startup
-    self._test_mcp_connection()
-    
-    # Production environment detection
-    if os.getenv('RENDER_SERVICE_NAME') or os.getenv('RENDER'):
-        print("🚀 Production environment detected (Render)")
-    
-    # Debug logging
-    print(f"🔧 Config - OpenRouter API Key: {self.OPENROUTER_API_KEY[:20]}...")
-    print(f"🔧 Config - Base URL: {self.OPENAI_BASE_URL}")
-    print(f"🔧 Config - Model: {self.MODEL_NAME}")
-    print(f"🔧 Config - MCP Server URL: {self.MCP_SERVER_URL}")
-    
-    # Chatbot Configuration
-    self.MAX_TOKENS = int(os.getenv('MAX_TOKENS', '1000'))
-    self.TEMPERATURE = float(os.getenv('TEMPERATURE', '0.7'))
-    
-    # Load system prompt from file or use default
-    self.SYSTEM_PROMPT = self._load_system_prompt()
-    
-    print(f"✅ Config initialized successfully")
-    print(f"📝 System prompt loaded: {len(self.SYSTEM_PROMPT)} characters")
-
-def _load_system_prompt(self):
-    """Load system prompt from file or return default"""
-    prompt_file = 'prompts/mcp_prompt.txt'
-    
-    try:
-        # Try to load from file
-        with open(prompt_file, 'r', encoding='utf-8') as f:
-            content = f.read().strip()
-            print(f"✅ Loaded system prompt from: {prompt_file}")
-            return content
-    except FileNotFoundError:
-        print(f"⚠️  Prompt file not found at: {prompt_file}")
-        print(f"🔄 Using stored procedure-based system prompt")
-        
-        # Return stored procedure-based system prompt
-        return """You are a medical assistant chatbot that translates user questions into calls to a stored procedure `[AI].[uspGetPatientDetailsMCP]` via an MCP server and .NET WebAPI.
-
-This stored procedure supports filtering patient records using multiple parameters. All fields (except gender) are handled using `LIKE '%value%'` search inside the stored procedure.
-
-### Stored Procedure Parameters and Behavior
-
-You can filter by the following fields (all are optional):
-
-| Field             | Parameter Name       | Type     | Matching Type     |
-|------------------|----------------------|----------|--------------------|
-| Patient ID       | @pPatientId          | INT      | LIKE as string     |
-| NHI Number       | @pPatientNHI         | NVARCHAR | LIKE               |
-| Full Name        | @pPatientFullName    | NVARCHAR | LIKE               |
-| Date of Birth    | @pPatientDOB         | NVARCHAR | LIKE (yyyy-MM-dd)  |
-| Address          | @pFullAddress        | NVARCHAR | LIKE               |
-| Provider Name    | @pProviderName       | NVARCHAR | LIKE               |
-| Email            | @pEmail              | NVARCHAR | LIKE               |
-| Phone Number     | @pPhoneNunmber       | NVARCHAR | LIKE               |
-| Chart Number     | @pChartNumber        | NVARCHAR | LIKE               |
-| Enrollment Date  | @pEnrollmentDate     | NVARCHAR | LIKE (yyyy-MM-dd)  |
-| Funding Status   | @pFundingStatus      | NVARCHAR | LIKE               |
-| Enrollment Status| @pEnrollmentStatus   | NVARCHAR | LIKE               |
-| Gender           | @pGenderName         | NVARCHAR | EXACT MATCH        |
-
-For all fields except `Gender`, the backend handles `LIKE '%value%'`. Gender must match exactly (e.g., 'male', 'female').
-
-### Interpretation Rules
-
-1. Parse all filters mentioned in the user's query.
-2. Combine filters if more than one field is mentioned.
-3. Use the value in `LIKE '%value%'` for all fields except Gender.
-4. For Gender, the value must be an exact match.
-5. If no filters are mentioned, fetch all patients (pass empty or null for all fields).
-6. Return structured results or say: "No matching patient records found."
-
-IMPORTANT: For ANY patient-related query, you MUST use the get_patients function. Never provide general responses about patients without calling the function first.
-
-Always format patient results in clear HTML tables with all available columns and show total count.
-"""
-    except Exception as e:
-        print(f"❌ Error loading prompt file: {str(e)}")
-        return "You are a helpful medical assistant AI that can access patient information through the MCP server."
-    
-    def _test_mcp_connection(self):
-        """Test MCP server connection at startup"""
-        try:
-            import requests
-            response = requests.get(f"{self.MCP_SERVER_URL}/health", timeout=5)
-            if response.status_code == 200:
-                print(f"✅ MCP Server is reachable")
-            else:
-                print(f"⚠️ MCP Server returned status: {response.status_code}")
-        except Exception as e:
-            print(f"❌ MCP Server connection failed: {str(e)}")
-            print(f"🔧 Please check if {self.MCP_SERVER_URL} is accessible")
-
-def __init__(self):
-    # OpenRouter Configuration
-    self.OPENROUTER_API_KEY = os.getenv('OPENROUTER_API_KEY', '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')
-    self.OPENAI_BASE_URL = os.getenv('OPENAI_BASE_URL', 'https://openrouter.ai/api/v1')
-    self.MODEL_NAME = os.getenv('OPENROUTER_MODEL', 'openai/gpt-3.5-turbo')
-    
-    # MCP Server Configuration - Check if URL is accessible
-    self.MCP_SERVER_URL = os.getenv('MCP_SERVER_URL', 'https://4ff78e0c0217.ngrok-free.app/api/mcp')
-    
-    # Test MCP server connectivity at startup
-    self._test_mcp_connection()
-    
-    # Production environment detection
-    if os.getenv('RENDER_SERVICE_NAME') or os.getenv('RENDER'):
-        print("🚀 Production environment detected (Render)")
-    
-    # Debug logging
-    print(f"🔧 Config - OpenRouter API Key: {self.OPENROUTER_API_KEY[:20]}...")
-    print(f"🔧 Config - Base URL: {self.OPENAI_BASE_URL}")
-    print(f"🔧 Config - Model: {self.MODEL_NAME}")
-    print(f"🔧 Config - MCP Server URL: {self.MCP_SERVER_URL}")
-    
-    # Chatbot Configuration
-    self.MAX_TOKENS = int(os.getenv('MAX_TOKENS', '1000'))
-    self.TEMPERATURE = float(os.getenv('TEMPERATURE', '0.7'))
-    
-    # Load system prompt from file or use default
-    self.SYSTEM_PROMPT = self._load_system_prompt()
-    
-    print(f"✅ Config initialized successfully")
-    print(f"📝 System prompt loaded: {len(self.SYSTEM_PROMPT)} characters")
-
-def _load_system_prompt(self):
-    """Load system prompt from file or return default"""
-    prompt_file = 'prompts/mcp_prompt.txt'
-    
-    try:
-        # Try to load from file
-        with open(prompt_file, 'r', encoding='utf-8') as f:
-            content = f.read().strip()
-            print(f"✅ Loaded system prompt from: {prompt_file}")
-            return content
-    except FileNotFoundError:
-        print(f"⚠️  Prompt file not found at: {prompt_file}")
-        print(f"🔄 Using stored procedure-based system prompt")
-        
-        # Return stored procedure-based system prompt
-        return """You are a medical assistant chatbot that translates user questions into calls to a stored procedure `[AI].[uspGetPatientDetailsMCP]` via an MCP server and .NET WebAPI.
-
-This stored procedure supports filtering patient records using multiple parameters. All fields (except gender) are handled using `LIKE '%value%'` search inside the stored procedure.
-
-### Stored Procedure Parameters and Behavior
-
-You can filter by the following fields (all are optional):
-
-| Field             | Parameter Name       | Type     | Matching Type     |
-|------------------|----------------------|----------|--------------------|
-| Patient ID       | @pPatientId          | INT      | LIKE as string     |
-| NHI Number       | @pPatientNHI         | NVARCHAR | LIKE               |
-| Full Name        | @pPatientFullName    | NVARCHAR | LIKE               |
-| Date of Birth    | @pPatientDOB         | NVARCHAR | LIKE (yyyy-MM-dd)  |
-| Address          | @pFullAddress        | NVARCHAR | LIKE               |
-| Provider Name    | @pProviderName       | NVARCHAR | LIKE               |
-| Email            | @pEmail              | NVARCHAR | LIKE               |
-| Phone Number     | @pPhoneNunmber       | NVARCHAR | LIKE               |
-| Chart Number     | @pChartNumber        | NVARCHAR | LIKE               |
-| Enrollment Date  | @pEnrollmentDate     | NVARCHAR | LIKE (yyyy-MM-dd)  |
-| Funding Status   | @pFundingStatus      | NVARCHAR | LIKE               |
-| Enrollment Status| @pEnrollmentStatus   | NVARCHAR | LIKE               |
-| Gender           | @pGenderName         | NVARCHAR | EXACT MATCH        |
-
-For all fields except `Gender`, the backend handles `LIKE '%value%'`. Gender must match exactly (e.g., 'male', 'female').
-
-### Interpretation Rules
-
-1. Parse all filters mentioned in the user's query.
-2. Combine filters if more than one field is mentioned.
-3. Use the value in `LIKE '%value%'` for all fields except Gender.
-4. For Gender, the value must be an exact match.
-5. If no filters are mentioned, fetch all patients (pass empty or null for all fields).
-6. Return structured results or say: "No matching patient records found."
-
-IMPORTANT: For ANY patient-related query, you MUST use the get_patients function. Never provide general responses about patients without calling the function first.
-
-Always format patient results in clear HTML tables with all available columns and show total count.
-"""
-    except Exception as e:
-        print(f"❌ Error loading prompt file: {str(e)}")
-        return "You are a helpful medical assistant AI that can access patient information through the MCP server."
-    
-    def _test_mcp_connection(self):
-        """Test MCP server connection at startup"""
-        try:
-            import requests
-            response = requests.get(f"{self.MCP_SERVER_URL}/health", timeout=5)
-            if response.status_code == 200:
-                print(f"✅ MCP Server is reachable")
-            else:
-                print(f"⚠️ MCP Server returned status: {response.status_code}")
-        except Exception as e:
-            print(f"❌ MCP Server connection failed: {str(e)}")
-            print(f"🔧 Please check if {self.MCP_SERVER_URL} is accessible")
-
-def __init__(self):
-    # OpenRouter Configuration
-    self.OPENROUTER_API_KEY = os.getenv('OPENROUTER_API_KEY', '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')
-    self.OPENAI_BASE_URL = os.getenv('OPENAI_BASE_URL', 'https://openrouter.ai/api/v1')
-    self.MODEL_NAME = os.getenv('OPENROUTER_MODEL', 'openai/gpt-3.5-turbo')
-    
-    # MCP Server Configuration - Check if URL is accessible
-    self.MCP_SERVER_URL = os.getenv('MCP_SERVER_URL', 'https://4ff78e0c0217.ngrok-free.app/api/mcp')
-    
-    # Test MCP server connectivity at startup
-    self._test_mcp_connection()
-    
-    # Production environment detection
-    if os.getenv('RENDER_SERVICE_NAME') or os.getenv('RENDER'):
-        print("🚀 Production environment detected (Render)")
-    
-    # Debug logging
-    print(f"🔧 Config - OpenRouter API Key: {self.OPENROUTER_API_KEY[:20]}...")
-    print(f"🔧 Config - Base URL: {self.OPENAI_BASE_URL}")
-    print(f"🔧 Config - Model: {self.MODEL_NAME}")
-    print(f"🔧 Config - MCP Server URL: {self.MCP_SERVER_URL}")
-    
-    # Chatbot Configuration
-    self.MAX_TOKENS = int(os.getenv('MAX_TOKENS', '1000'))
-    self.TEMPERATURE = float(os.getenv('TEMPERATURE', '0.7'))
-    
-    # Load system prompt from file or use default
-    self.SYSTEM_PROMPT = self._load_system_prompt()
-    
-    print(f"✅ Config initialized successfully")
-    print(f"📝 System prompt loaded: {len(self.SYSTEM_PROMPT)} characters")
-
-def _load_system_prompt(self):
-    """Load system prompt from file or return default"""
-    prompt_file = 'prompts/mcp_prompt.txt'
-    
-    try:
-        # Try to load from file
-        with open(prompt_file, 'r', encoding='utf-8') as f:
-            content = f.read().strip()
-            print(f"✅ Loaded system prompt from: {prompt_file}")
-            return content
-    except FileNotFoundError:
-        print(f"⚠️  Prompt file not found at: {prompt_file}")
-        print(f"🔄 Using stored procedure-based system prompt")
-        
-        # Return stored procedure-based system prompt
-        return """You are a medical assistant chatbot that translates user questions into calls to a stored procedure `[AI].[uspGetPatientDetailsMCP]` via an MCP server and .NET WebAPI.
-
-This stored procedure supports filtering patient records using multiple parameters. All fields (except gender) are handled using `LIKE '%value%'` search inside the stored procedure.
-
-### Stored Procedure Parameters and Behavior
-
-You can filter by the following fields (all are optional):
-
-| Field             | Parameter Name       | Type     | Matching Type     |
-|------------------|----------------------|----------|--------------------|
-| Patient ID       | @pPatientId          | INT      | LIKE as string     |
-| NHI Number       | @pPatientNHI         | NVARCHAR | LIKE               |
-| Full Name        | @pPatientFullName    | NVARCHAR | LIKE               |
-| Date of Birth    | @pPatientDOB         | NVARCHAR | LIKE (yyyy-MM-dd)  |
-| Address          | @pFullAddress        | NVARCHAR | LIKE               |
-| Provider Name    | @pProviderName       | NVARCHAR | LIKE               |
-| Email            | @pEmail              | NVARCHAR | LIKE               |
-| Phone Number     | @pPhoneNunmber       | NVARCHAR | LIKE               |
-| Chart Number     | @pChartNumber        | NVARCHAR | LIKE               |
-| Enrollment Date  | @pEnrollmentDate     | NVARCHAR | LIKE (yyyy-MM-dd)  |
-| Funding Status   | @pFundingStatus      | NVARCHAR | LIKE               |
-| Enrollment Status| @pEnrollmentStatus   | NVARCHAR | LIKE               |
-| Gender           | @pGenderName         | NVARCHAR | EXACT MATCH        |
-
-For all fields except `Gender`, the backend handles `LIKE '%value%'`. Gender must match exactly (e.g., 'male', 'female').
-
-### Interpretation Rules
-
-1. Parse all filters mentioned in the user's query.
-2. Combine filters if more than one field is mentioned.
-3. Use the value in `LIKE '%value%'` for all fields except Gender.
-4. For Gender, the value must be an exact match.
-5. If no filters are mentioned, fetch all patients (pass empty or null for all fields).
-6. Return structured results or say: "No matching patient records found."
-
-IMPORTANT: For ANY patient-related query, you MUST use the get_patients function. Never provide general responses about patients without calling the function first.
-
-Always format patient results in clear HTML tables with all available columns and show total count.
-"""
-    except Exception as e:
-        print(f"❌ Error loading prompt file: {str(e)}")
-        return "You are a helpful medical assistant AI that can access patient information through the MCP server."
-    
-    def _test_mcp_connection(self):
-        """Test MCP server connection at startup"""
-        try:
-            import requests
-            response = requests.get(f"{self.MCP_SERVER_URL}/health", timeout=5)
-            if response.status_code == 200:
-                print(f"✅ MCP Server is reachable")
-            else:
-                print(f"⚠️ MCP Server returned status: {response.status_code}")
-        except Exception as e:
-            print(f"❌ MCP Server connection failed: {str(e)}")
-            print(f"🔧 Please check if {self.MCP_SERVER_URL} is accessible")
-
-def __init__(self):
-    # OpenRouter Configuration
-    self.OPENROUTER_API_KEY = os.getenv('OPENROUTER_API_KEY', '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')
-    self.OPENAI_BASE_URL = os.getenv('OPENAI_BASE_URL', 'https://openrouter.ai/api/v1')
-    self.MODEL_NAME = os.getenv('OPENROUTER_MODEL', 'openai/gpt-3.5-turbo')
-    
-    # MCP Server Configuration - Check if URL is accessible
-    self.MCP_SERVER_URL = os.getenv('MCP_SERVER_URL', 'https://4ff78e0c0217.ngrok-free.app/api/mcp')
-    
-    # Test MCP server connectivity at startup
-    self._test_mcp_connection()
-    
-    # Production environment detection
-    if os.getenv('RENDER_SERVICE_NAME') or os.getenv('RENDER'):
-        print("🚀 Production environment detected (Render)")
-    
-    # Debug logging
-    print(f"🔧 Config - OpenRouter API Key: {self.OPENROUTER_API_KEY[:20]}...")
-    print(f"🔧 Config - Base URL: {self.OPENAI_BASE_URL}")
-    print(f"🔧 Config - Model: {self.MODEL_NAME}")
-    print(f"🔧 Config - MCP Server URL: {self.MCP_SERVER_URL}")
-    
-    # Chatbot Configuration
-    self.MAX_TOKENS = int(os.getenv('MAX_TOKENS', '1000'))
-    self.TEMPERATURE = float(os.getenv('TEMPERATURE', '0.7'))
-    
-    # Load system prompt from file or use default
-    self.SYSTEM_PROMPT = self._load_system_prompt()
-    
-    print(f"✅ Config initialized successfully")
-    print(f"📝 System prompt loaded: {len(self.SYSTEM_PROMPT)} characters")
-
-def _load_system_prompt(self):
-    """Load system prompt from file or return default"""
-    prompt_file = 'prompts/mcp_prompt.txt'
-    
-    try:
-        # Try to load from file
-        with open(prompt_file, 'r', encoding='utf-8') as f:
-            content = f.read().strip()
-            print(f"✅ Loaded system prompt from: {prompt_file}")
-            return content
-    except FileNotFoundError:
-        print(f"⚠️  Prompt file not found at: {prompt_file}")
-        print(f"🔄 Using stored procedure-based system prompt")
-        
-        # Return stored procedure-based system prompt
-        return """You are a medical assistant chatbot that translates user questions into calls to a stored procedure `[AI].[uspGetPatientDetailsMCP]` via an MCP server and .NET WebAPI.
-
-This stored procedure supports filtering patient records using multiple parameters. All fields (except gender) are handled using `LIKE '%value%'` search inside the stored procedure.
-
-### Stored Procedure Parameters and Behavior
-
-You can filter by the following fields (all are optional):
-
-| Field             | Parameter Name       | Type     | Matching Type     |
-|------------------|----------------------|----------|--------------------|
-| Patient ID       | @pPatientId          | INT      | LIKE as string     |
-| NHI Number       | @pPatientNHI         | NVARCHAR | LIKE               |
-| Full Name        | @pPatientFullName    | NVARCHAR | LIKE               |
-| Date of Birth    | @pPatientDOB         | NVARCHAR | LIKE (yyyy-MM-dd)  |
-| Address          | @pFullAddress        | NVARCHAR | LIKE               |
-| Provider Name    | @pProviderName       | NVARCHAR | LIKE               |
-| Email            | @pEmail              | NVARCHAR | LIKE               |
-| Phone Number     | @pPhoneNunmber       | NVARCHAR | LIKE               |
-| Chart Number     | @pChartNumber        | NVARCHAR | LIKE               |
-| Enrollment Date  | @pEnrollmentDate     | NVARCHAR | LIKE (yyyy-MM-dd)  |
-| Funding Status   | @pFundingStatus      | NVARCHAR | LIKE               |
-| Enrollment Status| @pEnrollmentStatus   | NVARCHAR | LIKE               |
-| Gender           | @pGenderName         | NVARCHAR | EXACT MATCH        |
-
-For all fields except `Gender`, the backend handles `LIKE '%value%'`. Gender must match exactly (e.g., 'male', 'female').
-
-### Interpretation Rules
-
-1. Parse all filters mentioned in the user's query.
-2. Combine filters if more than one field is mentioned.
-3. Use the value in `LIKE '%value%'` for all fields except Gender.
-4. For Gender, the value must be an exact match.
-5. If no filters are mentioned, fetch all patients (pass empty or null for all fields).
-6. Return structured results or say: "No matching patient records found."
-
-IMPORTANT: For ANY patient-related query, you MUST use the get_patients function. Never provide general responses about patients without calling the function first.
-
-Always format patient results in clear HTML tables with all available columns and show total count.
-"""
-    except Exception as e:
-        print(f"❌ Error loading prompt file: {str(e)}")
-        return "You are a helpful medical assistant AI that can access patient information through the MCP server."
-    
-    def _test_mcp_connection(self):
-        """Test MCP server connection at startup"""
-        try:
-            import requests
-            response = requests.get(f"{self.MCP_SERVER_URL}/health", timeout=5)
-            if response.status_code == 200:
-                print(f"✅ MCP Server is reachable")
-            else:
-                print(f"⚠️ MCP Server returned status: {response.status_code}")
-        except Exception as e:
-            print(f"❌ MCP Server connection failed: {str(e)}")
-            print(f"🔧 Please check if {self.MCP_SERVER_URL} is accessible")
-
-def __init__(self):
-    # OpenRouter Configuration
-    self.OPENROUTER_API_KEY = os.getenv('OPENROUTER_API_KEY', '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')
-    self.OPENAI_BASE_URL = os.getenv('OPENAI_BASE_URL', 'https://openrouter.ai/api/v1')
-    self.MODEL_NAME = os.getenv('OPENROUTER_MODEL', 'openai/gpt-3.5-turbo')
-    
-    # MCP Server Configuration - Check if URL is accessible
-    self.MCP_SERVER_URL = os.getenv('MCP_SERVER_URL', 'https://4ff78e0c0217.ngrok-free.app/api/mcp')
-    
-    # Test MCP server connectivity at startup
-    self._test_mcp_connection()
-    
-    # Production environment detection
-    if os.getenv('RENDER_SERVICE_NAME') or os.getenv('RENDER'):
-        print("🚀 Production environment detected (Render)")
-    
-    # Debug logging
-    print(f"🔧 Config - OpenRouter API Key: {self.OPENROUTER_API_KEY[:20]}...")
-    print(f"🔧 Config - Base URL: {self.OPENAI_BASE_URL}")
-    print(f"🔧 Config - Model: {self.MODEL_NAME}")
-    print(f"🔧 Config - MCP Server URL: {self.MCP_SERVER_URL}")
-    
-    # Chatbot Configuration
-    self.MAX_TOKENS = int(os.getenv('MAX_TOKENS', '1000'))
-    self.TEMPERATURE = float(os.getenv('TEMPERATURE', '0.7'))
-    
-    # Load system prompt from file or use default
-    self.SYSTEM_PROMPT = self._load_system_prompt()
-    
-    print(f"✅ Config initialized successfully")
-    print(f"📝 System prompt loaded: {len(self.SYSTEM_PROMPT)} characters")
-
-def _load_system_prompt(self):
-    """Load system prompt from file or return default"""
-    prompt_file = 'prompts/mcp_prompt.txt'
-    
-    try:
-        # Try to load from file
-        with open(prompt_file, 'r', encoding='utf-8') as f:
-            content = f.read().strip()
-            print(f"✅ Loaded system prompt from: {prompt_file}")
-            return content
-    except FileNotFoundError:
-        print(f"⚠️  Prompt file not found at: {prompt_file}")
-        print(f"🔄 Using stored procedure-based system prompt")
-        
-        # Return stored procedure-based system prompt
-        return """You are a medical assistant chatbot that translates user questions into calls to a stored procedure `[AI].[uspGetPatientDetailsMCP]` via an MCP server and .NET WebAPI.
-
-This stored procedure supports filtering patient records using multiple parameters. All fields (except gender) are handled using `LIKE '%value%'` search inside the stored procedure.
-
-### Stored Procedure Parameters and Behavior
-
-You can filter by the following fields (all are optional):
-
-| Field             | Parameter Name       | Type     | Matching Type     |
-|------------------|----------------------|----------|--------------------|
-| Patient ID       | @pPatientId          | INT      | LIKE as string     |
-| NHI Number       | @pPatientNHI         | NVARCHAR | LIKE               |
-| Full Name        | @pPatientFullName    | NVARCHAR | LIKE               |
-| Date of Birth    | @pPatientDOB         | NVARCHAR | LIKE (yyyy-MM-dd)  |
-| Address          | @pFullAddress        | NVARCHAR | LIKE               |
-| Provider Name    | @pProviderName       | NVARCHAR | LIKE               |
-| Email            | @pEmail              | NVARCHAR | LIKE               |
-| Phone Number     | @pPhoneNunmber       | NVARCHAR | LIKE               |
-| Chart Number     | @pChartNumber        | NVARCHAR | LIKE               |
-| Enrollment Date  | @pEnrollmentDate     | NVARCHAR | LIKE (yyyy-MM-dd)  |
-| Funding Status   | @pFundingStatus      | NVARCHAR | LIKE               |
-| Enrollment Status| @pEnrollmentStatus   | NVARCHAR | LIKE               |
-| Gender           | @pGenderName         | NVARCHAR | EXACT MATCH        |
-
-For all fields except `Gender`, the backend handles `LIKE '%value%'`. Gender must match exactly (e.g., 'male', 'female').
-
-### Interpretation Rules
-
-1. Parse all filters mentioned in the user's query.
-2. Combine filters if more than one field is mentioned.
-3. Use the value in `LIKE '%value%'` for all fields except Gender.
-4. For Gender, the value must be an exact match.
-5. If no filters are mentioned, fetch all patients (pass empty or null for all fields).
-6. Return structured results or say: "No matching patient records found."
-
-IMPORTANT: For ANY patient-related query, you MUST use the get_patients function. Never provide general responses about patients without calling the function first.
-
-Always format patient results in clear HTML tables with all available columns and show total count.
-"""
-    except Exception as e:
-        print(f"❌ Error loading prompt file: {str(e)}")
-        return "You are a helpful medical assistant AI that can access patient information through the MCP server."
-    
-    def _test_mcp_connection(self):
-        """Test MCP server connection at startup"""
-        try:
-            import requests
-            response = requests.get(f"{self.MCP_SERVER_URL}/health", timeout=5)
-            if response.status_code == 200:
-                print(f"✅ MCP Server is reachable")
-            else:
-                print(f"⚠️ MCP Server returned status: {response.status_code}")
-        except Exception as e:
-            print(f"❌ MCP Server connection failed: {str(e)}")
-            print(f"🔧 Please check if {self.MCP_SERVER_URL} is accessible")
-
-def __init__(self):
-    # OpenRouter Configuration
-    self.OPENROUTER_API_KEY = os.getenv('OPENROUTER_API_KEY', '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')
-    self.OPENAI_BASE_URL = os.getenv('OPENAI_BASE_URL', 'https://openrouter.ai/api/v1')
-    self.MODEL_NAME = os.getenv('OPENROUTER_MODEL', 'openai/gpt-3.5-turbo')
-    
-    # MCP Server Configuration - Check if URL is accessible
-    self.MCP_SERVER_URL = os.getenv('MCP_SERVER_URL', 'https://4ff78e0c0217.ngrok-free.app/api/mcp')
-    
-    # Test MCP server connectivity at startup
-    self._test_mcp_connection()
-    
-    # Production environment detection
-    if os.getenv('RENDER_SERVICE_NAME') or os.getenv('RENDER'):
-        print("🚀 Production environment detected (Render)")
-    
-    # Debug logging
-    print(f"🔧 Config - OpenRouter API Key: {self.OPENROUTER_API_KEY[:20]}...")
-    print(f"🔧 Config - Base URL: {self.OPENAI_BASE_URL}")
-    print(f"🔧 Config - Model: {self.MODEL_NAME}")
-    print(f"🔧 Config - MCP Server URL: {self.MCP_SERVER_URL}")
-    
-    # Chatbot Configuration
-    self.MAX_TOKENS = int(os.getenv('MAX_TOKENS', '1000'))
-    self.TEMPERATURE = float(os.getenv('TEMPERATURE', '0.7'))
-    
-    # Load system prompt from file or use default
-    self.SYSTEM_PROMPT = self._load_system_prompt()
-    
-    print(f"✅ Config initialized successfully")
-    print(f"📝 System prompt loaded: {len(self.SYSTEM_PROMPT)} characters")
-
-def _load_system_prompt(self):
-    """Load system prompt from file or return default"""
-    prompt_file = 'prompts/mcp_prompt.txt'
-    
-    try:
-        # Try to load from file
-        with open(prompt_file, 'r', encoding='utf-8') as f:
-            content = f.read().strip()
-            print(f"✅ Loaded system prompt from: {prompt_file}")
-            return content
-    except FileNotFoundError:
-        print(f"⚠️  Prompt file not found at: {prompt_file}")
-        print(f"🔄 Using stored procedure-based system prompt")
-        
-        # Return stored procedure-based system prompt
-        return """You are a medical assistant chatbot that translates user questions into calls to a stored procedure `[AI].[uspGetPatientDetailsMCP]` via an MCP server and .NET WebAPI.
-
-This stored procedure supports filtering patient records using multiple parameters. All fields (except gender) are handled using `LIKE '%value%'` search inside the stored procedure.
-
-### Stored Procedure Parameters and Behavior
-
-You can filter by the following fields (all are optional):
-
-| Field             | Parameter Name       | Type     | Matching Type     |
-|------------------|----------------------|----------|--------------------|
-| Patient ID       | @pPatientId          | INT      | LIKE as string     |
-| NHI Number       | @pPatientNHI         | NVARCHAR | LIKE               |
-| Full Name        | @pPatientFullName    | NVARCHAR | LIKE               |
-| Date of Birth    | @pPatientDOB         | NVARCHAR | LIKE (yyyy-MM-dd)  |
-| Address          | @pFullAddress        | NVARCHAR | LIKE               |
-| Provider Name    | @pProviderName       | NVARCHAR | LIKE               |
-| Email            | @pEmail              | NVARCHAR | LIKE               |
-| Phone Number     | @pPhoneNunmber       | NVARCHAR | LIKE               |
-| Chart Number     | @pChartNumber        | NVARCHAR | LIKE               |
-| Enrollment Date  | @pEnrollmentDate     | NVARCHAR | LIKE (yyyy-MM-dd)  |
-| Funding Status   | @pFundingStatus      | NVARCHAR | LIKE               |
-| Enrollment Status| @pEnrollmentStatus   | NVARCHAR | LIKE               |
-| Gender           | @pGenderName         | NVARCHAR | EXACT MATCH        |
-
-For all fields except `Gender`, the backend handles `LIKE '%value%'`. Gender must match exactly (e.g., 'male', 'female').
-
-### Interpretation Rules
-
-1. Parse all filters mentioned in the user's query.
-2. Combine filters if more than one field is mentioned.
-3. Use the value in `LIKE '%value%'` for all fields except Gender.
-4. For Gender, the value must be an exact match.
-5. If no filters are mentioned, fetch all patients (pass empty or null for all fields).
-6. Return structured results or say: "No matching patient records found."
-
-IMPORTANT: For ANY patient-related query, you MUST use the get_patients function. Never provide general responses about patients without calling the function first.
-
-Always format patient results in clear HTML tables with all available columns and show total count.
-"""
-    except Exception as e:
-        print(f"❌ Error loading prompt file: {str(e)}")
-        return "You are a helpful medical assistant AI that can access patient information through the MCP server."
-    
-    def _test_mcp_connection(self):
-        """Test MCP server connection at startup"""
-        try:
-            import requests
-            response = requests.get(f"{self.MCP_SERVER_URL}/health", timeout=5)
-            if response.status_code == 200:
-                print(f"✅ MCP Server is reachable")
-            else:
-                print(f"⚠️ MCP Server returned status: {response.status_code}")
-        except Exception as e:
-            print(f"❌ MCP Server connection failed: {str(e)}")
-            print(f"🔧 Please check if {self.MCP_SERVER_URL} is accessible")
-
-def __init__(self):
-    # OpenRouter Configuration
-    self.OPENROUTER_API_KEY = os.getenv('OPENROUTER_API_KEY', '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')
-    self.OPENAI_BASE_URL = os.getenv('OPENAI_BASE_URL', 'https://openrouter.ai/api/v1')
-    self.MODEL_NAME = os.getenv('OPENROUTER_MODEL', 'openai/gpt-3.5-turbo')
-    
-    # MCP Server Configuration - Check if URL is accessible
-    self.MCP_SERVER_URL = os.getenv('MCP_SERVER_URL', 'https://4ff78e0c0217.ngrok-free.app/api/mcp')
-    
-    # Test MCP server connectivity at startup
-    self._test_mcp_connection()
-    
-    # Production environment detection
-    if os.getenv('RENDER_SERVICE_NAME') or os.getenv('RENDER'):
-        print("🚀 Production environment detected (Render)")
-    
-    # Debug logging
-    print(f"🔧 Config - OpenRouter API Key: {self.OPENROUTER_API_KEY[:20]}...")
-    print(f"🔧 Config - Base URL: {self.OPENAI_BASE_URL}")
-    print(f"🔧 Config - Model: {self.MODEL_NAME}")
-    print(f"🔧 Config - MCP Server URL: {self.MCP_SERVER_URL}")
-    
-    # Chatbot Configuration
-    self.MAX_TOKENS = int(os.getenv('MAX_TOKENS', '1000'))
-    self.TEMPERATURE = float(os.getenv('TEMPERATURE', '0.7'))
-    
-    # Load system prompt from file or use default
-    self.SYSTEM_PROMPT = self._load_system_prompt()
-    
-    print(f"✅ Config initialized successfully")
-    print(f"📝 System prompt loaded: {len(self.SYSTEM_PROMPT)} characters")
-
-def _load_system_prompt(self):
-    """Load system prompt from file or return default"""
-    prompt_file = 'prompts/mcp_prompt.txt'
-    
-    try:
-        # Try to load from file
-        with open(prompt_file, 'r', encoding='utf-8') as f:
-            content = f.read().strip()
-            print(f"✅ Loaded system prompt from: {prompt_file}")
-            return content
-    except FileNotFoundError:
-        print(f"⚠️  Prompt file not found at: {prompt_file}")
-        print(f"🔄 Using stored procedure-based system prompt")
-        
-        # Return stored procedure-based system prompt
-        return """You are a medical assistant chatbot that translates user questions into calls to a stored procedure `[AI].[uspGetPatientDetailsMCP]` via an MCP server and .NET WebAPI.
-
-This stored procedure supports filtering patient records using multiple parameters. All fields (except gender) are handled using `LIKE '%value%'` search inside the stored procedure.
-
-### Stored Procedure Parameters and Behavior
-
-You can filter by the following fields (all are optional):
-
-| Field             | Parameter Name       | Type     | Matching Type     |
-|------------------|----------------------|----------|--------------------|
-| Patient ID       | @pPatientId          | INT      | LIKE as string     |
-| NHI Number       | @pPatientNHI         | NVARCHAR | LIKE               |
-| Full Name        | @pPatientFullName    | NVARCHAR | LIKE               |
-| Date of Birth    | @pPatientDOB         | NVARCHAR | LIKE (yyyy-MM-dd)  |
-| Address          | @pFullAddress        | NVARCHAR | LIKE               |
-| Provider Name    | @pProviderName       | NVARCHAR | LIKE               |
-| Email            | @pEmail              | NVARCHAR | LIKE               |
-| Phone Number     | @pPhoneNunmber       | NVARCHAR | LIKE               |
-| Chart Number     | @pChartNumber        | NVARCHAR | LIKE               |
-| Enrollment Date  | @pEnrollmentDate     | NVARCHAR | LIKE (yyyy-MM-dd)  |
-| Funding Status   | @pFundingStatus      | NVARCHAR | LIKE               |
-| Enrollment Status| @pEnrollmentStatus   | NVARCHAR | LIKE               |
-| Gender           | @pGenderName         | NVARCHAR | EXACT MATCH        |
-
-For all fields except `Gender`, the backend handles `LIKE '%value%'`. Gender must match exactly (e.g., 'male', 'female').
-
-### Interpretation Rules
-
-1. Parse all filters mentioned in the user's query.
-2. Combine filters if more than one field is mentioned.
-3. Use the value in `LIKE '%value%'` for all fields except Gender.
-4. For Gender, the value must be an exact match.
-5. If no filters are mentioned, fetch all patients (pass empty or null for all fields).
-6. Return structured results or say: "No matching patient records found."
-
-IMPORTANT: For ANY patient-related query, you MUST use the get_patients function. Never provide general responses about patients without calling the function first.
-
-Always format patient results in clear HTML tables with all available columns and show total count.
-"""
-    except Exception as e:
-        print(f"❌ Error loading prompt file: {str(e)}")
-        return "You are a helpful medical assistant AI that can access patient information through the MCP server."
-    
-    def _test_mcp_connection(self):
-        """Test MCP server connection at startup"""
-        try:
-            import requests
-            response = requests.get(f"{self.MCP_SERVER_URL}/health", timeout=5)
-            if response.status_code == 200:
-                print(f"✅ MCP Server is reachable")
-            else:
-                print(f"⚠️ MCP Server returned status: {response.status_code}")
-        except Exception as e:
-            print(f"❌ MCP Server connection failed: {str(e)}")
-            print(f"🔧 Please check if {self.MCP_SERVER_URL} is accessible")
-
-def __init__(self):
-    # OpenRouter Configuration
-    self.OPENROUTER_API_KEY = os.getenv('OPENROUTER_API_KEY', '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')
-    self.OPENAI_BASE_URL = os.getenv('OPENAI_BASE_URL', 'https://openrouter.ai/api/v1')
-    self.MODEL_NAME = os.getenv('OPENROUTER_MODEL', 'openai/gpt-3.5-turbo')
-    
-    # MCP Server Configuration - Check if URL is accessible
-    self.MCP_SERVER_URL = os.getenv('MCP_SERVER_URL', 'https://4ff78e0c0217.ngrok-free.app/api/mcp')
-    
-    # Test MCP server connectivity at startup
-    self._test_mcp_connection()
-    
-    # Production environment detection
-    if os.getenv('RENDER_SERVICE_NAME') or os.getenv('RENDER'):
-        print("🚀 Production environment detected (Render)")
-    
-    # Debug logging
-    print(f"🔧 Config - OpenRouter API Key: {self.OPENROUTER_API_KEY[:20]}...")
-    print(f"🔧 Config - Base URL: {self.OPENAI_BASE_URL}")
-    print(f"🔧 Config - Model: {self.MODEL_NAME}")
-    print(f"🔧 Config - MCP Server URL: {self.MCP_SERVER_URL}")
-    
-    # Chatbot Configuration
-    self.MAX_TOKENS = int(os.getenv('MAX_TOKENS', '1000'))
-    self.TEMPERATURE = float(os.getenv('TEMPERATURE', '0.7'))
-    
-    # Load system prompt from file or use default
-    self.SYSTEM_PROMPT = self._load_system_prompt()
-    
-    print(f"✅ Config initialized successfully")
-    print(f"📝 System prompt loaded: {len(self.SYSTEM_PROMPT)} characters")
-
-def _load_system_prompt(self):
-    """Load system prompt from file or return default"""
-    prompt_file = 'prompts/mcp_prompt.txt'
-    
-    try:
-        # Try to load from file
-        with open(prompt_file, 'r', encoding='utf-8') as f:
-            content = f.read().strip()
-            print(f"✅ Loaded system prompt from: {prompt_file}")
-            return content
-    except FileNotFoundError:
-        print(f"⚠️  Prompt file not found at: {prompt_file}")
-        print(f"🔄 Using stored procedure-based system prompt")
-        
-        # Return stored procedure-based system prompt
-        return """You are a medical assistant chatbot that translates user questions into calls to a stored procedure `[AI].[uspGetPatientDetailsMCP]` via an MCP server and .NET WebAPI.
-
-This stored procedure supports filtering patient records using multiple parameters. All fields (except gender) are handled using `LIKE '%value%'` search inside the stored procedure.
-
-### Stored Procedure Parameters and Behavior
-
-You can filter by the following fields (all are optional):
-
-| Field             | Parameter Name       | Type     | Matching Type     |
-|------------------|----------------------|----------|--------------------|
-| Patient ID       | @pPatientId          | INT      | LIKE as string     |
-| NHI Number       | @pPatientNHI         | NVARCHAR | LIKE               |
-| Full Name        | @pPatientFullName    | NVARCHAR | LIKE               |
-| Date of Birth    | @pPatientDOB         | NVARCHAR | LIKE (yyyy-MM-dd)  |
-| Address          | @pFullAddress        | NVARCHAR | LIKE               |
-| Provider Name    | @pProviderName       | NVARCHAR | LIKE               |
-| Email            | @pEmail              | NVARCHAR | LIKE               |
-| Phone Number     | @pPhoneNunmber       | NVARCHAR | LIKE               |
-| Chart Number     | @pChartNumber        | NVARCHAR | LIKE               |
-| Enrollment Date  | @pEnrollmentDate     | NVARCHAR | LIKE (yyyy-MM-dd)  |
-| Funding Status   | @pFundingStatus      | NVARCHAR | LIKE               |
-| Enrollment Status| @pEnrollmentStatus   | NVARCHAR | LIKE               |
-| Gender           | @pGenderName         | NVARCHAR | EXACT MATCH        |
-
-For all fields except `Gender`, the backend handles `LIKE '%value%'`. Gender must match exactly (e.g., 'male', 'female').
-
-### Interpretation Rules
-
-1. Parse all filters mentioned in the user's query.
-2. Combine filters if more than one field is mentioned.
-3. Use the value in `LIKE '%value%'` for all fields except Gender.
-4. For Gender, the value must be an exact match.
-5. If no filters are mentioned, fetch all patients (pass empty or null for all fields).
-6. Return structured results or say: "No matching patient records found."
-
-IMPORTANT: For ANY patient-related query, you MUST use the get_patients function. Never provide general responses about patients without calling the function first.
-
-Always format patient results in clear HTML tables with all available columns and show total count.
-"""
-    except Exception as e:
-        print(f"❌ Error loading prompt file: {str(e)}")
-        return "You are a helpful medical assistant AI that can access patient information through the MCP server."
-    
-    def _test_mcp_connection(self):
-        """Test MCP server connection at startup"""
-        try:
-            import requests
-            response = requests.get(f"{self.MCP_SERVER_URL}/health", timeout=5)
-            if response.status_code == 200:
-                print(f"✅ MCP Server is reachable")
-            else:
-                print(f"⚠️ MCP Server returned status: {response.status_code}")
-        except Exception as e:
-            print(f"❌ MCP Server connection failed: {str(e)}")
-            print(f"🔧 Please check if {self.MCP_SERVER_URL} is accessible")
-
-def __init__(self):
-    # OpenRouter Configuration
-    self.OPENROUTER_API_KEY = os.getenv('OPENROUTER_API_KEY', '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')
-    self.OPENAI_BASE_URL = os.getenv('OPENAI_BASE_URL', 'https://openrouter.ai/api/v1')
-    self.MODEL_NAME = os.getenv('OPENROUTER_MODEL', 'openai/gpt-3.5-turbo')
-    
-    # MCP Server Configuration - Check if URL is accessible
-    self.MCP_SERVER_URL = os.getenv('MCP_SERVER_URL', 'https://4ff78e0c0217.ngrok-free.app/api/mcp')
-    
-    # Test MCP server connectivity at startup
-    self._test_mcp_connection()
-    
-    # Production environment detection
-    if os.getenv('RENDER_SERVICE_NAME') or os.getenv('RENDER'):
-        print("🚀 Production environment detected (Render)")
-    
-    # Debug logging
-    print(f"🔧 Config - OpenRouter API Key: {self.OPENROUTER_API_KEY[:20]}...")
-    print(f"🔧 Config - Base URL: {self.OPENAI_BASE_URL}")
-    print(f"🔧 Config - Model: {self.MODEL_NAME}")
-    print(f"🔧 Config - MCP Server URL: {self.MCP_SERVER_URL}")
-    
-    # Chatbot Configuration
-    self.MAX_TOKENS = int(os.getenv('MAX_TOKENS', '1000'))
-    self.TEMPERATURE = float(os.getenv('TEMPERATURE', '0.7'))
-    
-    # Load system prompt from file or use default
-    self.SYSTEM_PROMPT = self._load_system_prompt()
-    
-    print(f"✅ Config initialized successfully")
-    print(f"📝 System prompt loaded: {len(self.SYSTEM_PROMPT)} characters")
-
-def _load_system_prompt(self):
-    """Load system prompt from file or return default"""
-    prompt_file = 'prompts/mcp_prompt.txt'
-    
-    try:
-        # Try to load from file
-        with open(prompt_file, 'r', encoding='utf-8') as f:
-            content = f.read().strip()
-            print(f"✅ Loaded system prompt from: {prompt_file}")
-            return content
-    except FileNotFoundError:
-        print(f"⚠️  Prompt file not found at: {prompt_file}")
-        print(f"🔄 Using stored procedure-based system prompt")
-        
-        # Return stored procedure-based system prompt
-        return """You are a medical assistant chatbot that translates user questions into calls to a stored procedure `[AI].[uspGetPatientDetailsMCP]` via an MCP server and .NET WebAPI.
-
-This stored procedure supports filtering patient records using multiple parameters. All fields (except gender) are handled using `LIKE '%value%'` search inside the stored procedure.
-
-### Stored Procedure Parameters and Behavior
-
-You can filter by the following fields (all are optional):
-
-| Field             | Parameter Name       | Type     | Matching Type     |
-|------------------|----------------------|----------|--------------------|
-| Patient ID       | @pPatientId          | INT      | LIKE as string     |
-| NHI Number       | @pPatientNHI         | NVARCHAR | LIKE               |
-| Full Name        | @pPatientFullName    | NVARCHAR | LIKE               |
-| Date of Birth    | @pPatientDOB         | NVARCHAR | LIKE (yyyy-MM-dd)  |
-| Address          | @pFullAddress        | NVARCHAR | LIKE               |
-| Provider Name    | @pProviderName       | NVARCHAR | LIKE               |
-| Email            | @pEmail              | NVARCHAR | LIKE               |
-| Phone Number     | @pPhoneNunmber       | NVARCHAR | LIKE               |
-| Chart Number     | @pChartNumber        | NVARCHAR | LIKE               |
-| Enrollment Date  | @pEnrollmentDate     | NVARCHAR | LIKE (yyyy-MM-dd)  |
-| Funding Status   | @pFundingStatus      | NVARCHAR | LIKE               |
-| Enrollment Status| @pEnrollmentStatus   | NVARCHAR | LIKE               |
-| Gender           | @pGenderName         | NVARCHAR | EXACT MATCH        |
-
-For all fields except `Gender`, the backend handles `LIKE '%value%'`. Gender must match exactly (e.g., 'male', 'female').
-
-### Interpretation Rules
-
-1. Parse all filters mentioned in the user's query.
-2. Combine filters if more than one field is mentioned.
-3. Use the value in `LIKE '%value%'` for all fields except Gender.
-4. For Gender, the value must be an exact match.
-5. If no filters are mentioned, fetch all patients (pass empty or null for all fields).
-6. Return structured results or say: "No matching patient records found."
-
-IMPORTANT: For ANY patient-related query, you MUST use the get_patients function. Never provide general responses about patients without calling the function first.
-
-Always format patient results in clear HTML tables with all available columns and show total count.
-"""
-    except Exception as e:
-        print(f"❌ Error loading prompt file: {str(e)}")
-        return "You are a helpful medical assistant AI that can access patient information through the MCP server."
-    
-    def _test_mcp_connection(self):
-        """Test MCP server connection at startup"""
-        try:
-            import requests
-            response = requests.get(f"{self.MCP_SERVER_URL}/health", timeout=5)
-            if response.status_code == 200:
-                print(f"✅ MCP Server is reachable")
-            else:
-                print(f"⚠️ MCP Server returned status: {response.status_code}")
-        except Exception as e:
-            print(f"❌ MCP Server connection failed: {str(e)}")
-            print(f"🔧 Please check if {self.MCP_SERVER_URL} is accessible")
-
-def __init__(self):
-    # OpenRouter Configuration
-    self.OPENROUTER_API_KEY = os.getenv('OPENROUTER_API_KEY', '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')
-    self.OPENAI_BASE_URL = os.getenv('OPENAI_BASE_URL', 'https://openrouter.ai/api/v1')
-    self.MODEL_NAME = os.getenv('OPENROUTER_MODEL', 'openai/gpt-3.5-turbo')
-    
-    # MCP Server Configuration - Check if URL is accessible
-    self.MCP_SERVER_URL = os.getenv('MCP_SERVER_URL', 'https://4ff78e0c0217.ngrok-free.app/api/mcp')
-    
-    # Test MCP server connectivity at startup
-    self._test_mcp_connection()
-    
-    # Production environment detection
-    if os.getenv('RENDER_SERVICE_NAME') or os.getenv('RENDER'):
-        print("🚀 Production environment detected (Render)")
-    
-    # Debug logging
-    print(f"🔧 Config - OpenRouter API Key: {self.OPENROUTER_API_KEY[:20]}...")
-    print(f"🔧 Config - Base URL: {self.OPENAI_BASE_URL}")
-    print(f"🔧 Config - Model: {self.MODEL_NAME}")
-    print(f"🔧 Config - MCP Server URL: {self.MCP_SERVER_URL}")
-    
-    # Chatbot Configuration
-    self.MAX_TOKENS = int(os.getenv('MAX_TOKENS', '1000'))
-    self.TEMPERATURE = float(os.getenv('TEMPERATURE', '0.7'))
-    
-    # Load system prompt from file or use default
-    self.SYSTEM_PROMPT = self._load_system_prompt()
-    
-    print(f"✅ Config initialized successfully")
-    print(f"📝 System prompt loaded: {len(self.SYSTEM_PROMPT)} characters")
-
-def _load_system_prompt(self):
-    """Load system prompt from file or return default"""
-    prompt_file = 'prompts/mcp_prompt.txt'
-    
-    try:
-        # Try to load from file
-        with open(prompt_file, 'r', encoding='utf-8') as f:
-            content = f.read().strip()
-            print(f"✅ Loaded system prompt from: {prompt_file}")
-            return content
-    except FileNotFoundError:
-        print(f"⚠️  Prompt file not found at: {prompt_file}")
-        print(f"🔄 Using stored procedure-based system prompt")
-        
-        # Return stored procedure-based system prompt
-        return """You are a medical assistant chatbot that translates user questions into calls to a stored procedure `[AI].[uspGetPatientDetailsMCP]` via an MCP server and .NET WebAPI.
-
-This stored procedure supports filtering patient records using multiple parameters. All fields (except gender) are handled using `LIKE '%value%'` search inside the stored procedure.
-
-### Stored Procedure Parameters and Behavior
-
-You can filter by the following fields (all are optional):
-
-| Field             | Parameter Name       | Type     | Matching Type     |
-|------------------|----------------------|----------|--------------------|
-| Patient ID       | @pPatientId          | INT      | LIKE as string     |
-| NHI Number       | @pPatientNHI         | NVARCHAR | LIKE               |
-| Full Name        | @pPatientFullName    | NVARCHAR | LIKE               |
-| Date of Birth    | @pPatientDOB         | NVARCHAR | LIKE (yyyy-MM-dd)  |
-| Address          | @pFullAddress        | NVARCHAR | LIKE               |
-| Provider Name    | @pProviderName       | NVARCHAR | LIKE               |
-| Email            | @pEmail              | NVARCHAR | LIKE               |
-| Phone Number     | @pPhoneNunmber       | NVARCHAR | LIKE               |
-| Chart Number     | @pChartNumber        | NVARCHAR | LIKE               |
-| Enrollment Date  | @pEnrollmentDate     | NVARCHAR | LIKE (yyyy-MM-dd)  |
-| Funding Status   | @pFundingStatus      | NVARCHAR | LIKE               |
-| Enrollment Status| @pEnrollmentStatus   | NVARCHAR | LIKE               |
-| Gender           | @pGenderName         | NVARCHAR | EXACT MATCH        |
-
-For all fields except `Gender`, the backend handles `LIKE '%value%'`. Gender must match exactly (e.g., 'male', 'female').
-
-### Interpretation Rules
-
-1. Parse all filters mentioned in the user's query.
-2. Combine filters if more than one field is mentioned.
-3. Use the value in `LIKE '%value%'` for all fields except Gender.
-4. For Gender, the value must be an exact match.
-5. If no filters are mentioned, fetch all patients (pass empty or null for all fields).
-6. Return structured results or say: "No matching patient records found."
-
-IMPORTANT: For ANY patient-related query, you MUST use the get_patients function. Never provide general responses about patients without calling the function first.
-
-Always format patient results in clear HTML tables with all available columns and show total count.
-"""
-    except Exception as e:
-        print(f"❌ Error loading prompt file: {str(e)}")
-        return "You are a helpful medical assistant AI that can access patient information through the MCP server."
-    
-    def _test_mcp_connection(self):
-        """Test MCP server connection at startup"""
-        try:
-            import requests
-            response = requests.get(f"{self.MCP_SERVER_URL}/health", timeout=5)
-            if response.status_code == 200:
-                print(f"✅ MCP Server is reachable")
-            else:
-                print(f"⚠️ MCP Server returned status: {response.status_code}")
-        except Exception as e:
-            print(f"❌ MCP Server connection failed: {str(e)}")
-            print(f"🔧 Please check if {self.MCP_SERVER_URL} is accessible")
-
-def __init__(self):
-    # OpenRouter Configuration
-    self.OPENROUTER_API_KEY = os.getenv('OPENROUTER_API_KEY', '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')
-    self.OPENAI_BASE_URL = os.getenv('OPENAI_BASE_URL', 'https://openrouter.ai/api/v1')
-    self.MODEL_NAME = os.getenv('OPENROUTER_MODEL', 'openai/gpt-3.5-turbo')
-    
-    # MCP Server Configuration - Check if URL is accessible
-    self.MCP_SERVER_URL =
-            if response.status_code == 200:
-                print(f"✅ MCP Server is reachable")
-            else:
-                print(f"⚠️ MCP Server returned status: {response.status_code}")
-        except Exception as e:
-            print(f"❌ MCP Server connection failed: {str(e)}")
-            print(f"🔧 Please check if {self.MCP_SERVER_URL} is accessible")
-
-def __init__(self):
-    # OpenRouter Configuration
-    self.OPENROUTER_API_KEY = os.getenv('OPENROUTER_API_KEY', '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')
-    self.OPENAI_BASE_URL = os.getenv('OPENAI_BASE_URL', 'https://openrouter.ai/api/v1')
-    self.MODEL_NAME = os.getenv('OPENROUTER_MODEL', 'openai/gpt-3.5-turbo')
-    
-    # MCP Server Configuration - Check if URL is accessible
-    self.MCP_SERVER_URL =
-
-
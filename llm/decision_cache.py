@@ -0,0 +1,111 @@
+import copy
+import hashlib
+import json
+import re
+import threading
+import time
+from collections import OrderedDict
+from typing import Any, Dict, Optional, Tuple
+
+# Words that don't change which function call a question gets ("show me ...", "... please")
+STOP_WORDS = {
+    'show', 'me', 'us', 'list', 'find', 'get', 'give', 'display', 'fetch', 'please', 'can', 'could', 'would',
+    'you', 'i', 'want', 'to', 'see', 'the', 'a', 'an', 'all', 'some', 'for', 'of', 'kindly', 'just'
+}
+
+# Punctuation that never belongs to a value; '.', '@', '-' and '/' stay inside tokens (emails, dates)
+_PUNCTUATION = re.compile(r"[?!,;:\"'()\[\]{}]+")
+
+
+def normalize_query(user_input: str) -> str:
+    """'Show me male patients?' -> 'male patients' (case-folded, punctuation and stop words removed)"""
+    words = _PUNCTUATION.sub(' ', user_input.casefold()).split()
+    return ' '.join(word for word in (word.strip('.') for word in words) if word and word not in STOP_WORDS)
+
+
+def decision_fingerprint(model: str, system_prompt: str, functions: Any) -> str:
+    """Identifies what a cached decision was made with - a different model, prompt or schema invalidates it"""
+    payload = json.dumps([model, system_prompt, functions], sort_keys=True, default=str)
+    return hashlib.sha1(payload.encode('utf-8')).hexdigest()
+
+
+class DecisionCache:
+    """TTL + LRU cache of the model's function-call decision per normalized question.
+
+    Only function calls are stored (name and arguments), never their results,
+    so answers still come from live data. Entries belong to the fingerprint
+    they were stored under; a lookup or store with a different fingerprint
+    (model, system prompt or function schemas changed) flushes the cache.
+    Thread-safe.
+    """
+
+    def __init__(self, max_entries: int = 1000, ttl_seconds: float = 3600):
+        self.max_entries = max_entries
+        self.ttl_seconds = ttl_seconds
+        self._entries: 'OrderedDict[str, Tuple[str, Dict[str, Any], float]]' = OrderedDict()
+        self._lock = threading.Lock()
+        self._fingerprint: Optional[str] = None
+        self.hits = 0
+        self.misses = 0
+        self.evictions = 0
+        self.expirations = 0
+        self.invalidations = 0
+
+    def _check_fingerprint(self, fingerprint: str):
+        if fingerprint != self._fingerprint:
+            if self._entries:
+                self.invalidations += 1
+                print(f"🧠 Model or prompt changed - dropping {len(self._entries)} cached decisions")
+            self._entries.clear()
+            self._fingerprint = fingerprint
+
+    def get(self, user_input: str, fingerprint: str) -> Optional[Tuple[str, Dict[str, Any]]]:
+        """(function name, arguments) decided for an equivalent question, or None"""
+        key = normalize_query(user_input)
+        now = time.monotonic()
+        with self._lock:
+            self._check_fingerprint(fingerprint)
+            entry = self._entries.get(key)
+            if entry is not None and entry[2] <= now:
+                del self._entries[key]
+                self.expirations += 1
+                entry = None
+            if entry is None:
+                self.misses += 1
+                return None
+            self._entries.move_to_end(key)
+            self.hits += 1
+            return entry[0], copy.deepcopy(entry[1])
+
+    def put(self, user_input: str, fingerprint: str, function_name: str, function_args: Dict[str, Any]):
+        key = normalize_query(user_input)
+        if not key:
+            return
+        with self._lock:
+            self._check_fingerprint(fingerprint)
+            self._entries[key] = (function_name, copy.deepcopy(function_args), time.monotonic() + self.ttl_seconds)
+            self._entries.move_to_end(key)
+            while len(self._entries) > self.max_entries:
+                self._entries.popitem(last=False)
+                self.evictions += 1
+
+    def flush(self) -> int:
+        with self._lock:
+            flushed = len(self._entries)
+            self._entries.clear()
+            return flushed
+
+    def stats(self) -> Dict[str, Any]:
+        with self._lock:
+            lookups = self.hits + self.misses
+            return {
+                'entries': len(self._entries),
+                'max_entries': self.max_entries,
+                'ttl_seconds': self.ttl_seconds,
+                'hits': self.hits,
+                'misses': self.misses,
+                'hit_rate': round(self.hits / lookups, 3) if lookups else 0.0,
+                'evictions': self.evictions,
+                'expirations': self.expirations,
+                'invalidations': self.invalidations
+            }
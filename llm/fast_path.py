@@ -0,0 +1,129 @@
+import re
+import threading
+from collections import deque
+from typing import Any, Callable, Dict, Optional, Tuple
+
+# Words that carry no filter of their own ("show me all the patients please")
+FILLER_WORDS = {
+    'show', 'me', 'list', 'find', 'get', 'search', 'display', 'give', 'fetch', 'lookup', 'look', 'up', 'for',
+    'all', 'the', 'a', 'an', 'any', 'patient', 'patients', 'record', 'records', 'details', 'please', 'with',
+    'who', 'whose', 'are', 'is', 'has', 'have', 'of', 'can', 'you', 'i', 'want', 'to', 'see', 'need', 'our'
+}
+
+# Words the manual extractor keys on - explained once their field was extracted
+FIELD_KEYWORDS = {
+    'PatientId': {'id', 'number', 'patient', 'by'},
+    'PatientFullName': {'name', 'named', 'full', 'called'},
+    'PatientNHI': {'nhi', 'number', 'starting'},
+    'ChartNumber': {'chart', 'number', 'no', 'num', 'medical', 'like'},
+    'GenderName': {'male', 'female', 'men', 'women', 'man', 'woman'},
+    'PatientDOB': {'born', 'on', 'in', 'dob', 'date', 'birth', 'includes', 'include'},
+    'ProviderName': {'dr', 'doctor', 'provider', 'name', 'by', 'assigned', 'to', 'under'},
+    'Email': {'email', 'address', 'like', 'containing'},
+    'PhoneNumber': {'phone', 'number', 'contact', 'like', 'containing'},
+    'FullAddress': {'address', 'at', 'from', 'lives', 'live', 'like'},
+    'EnrollmentDate': {'enrolled', 'enrollment', 'date', 'on', 'in'},
+    'FundingStatus': {'funding', 'status', 'funded', 'by'},
+    'EnrollmentStatus': {'enrollment', 'status', 'empty'}
+}
+
+GENDER_WORDS = {'male': {'male', 'men', 'man'}, 'female': {'female', 'women', 'woman'}}
+
+# Phrasings only the model handles well: aggregates, comparisons, negation, alternatives, follow-ups
+NEEDS_MODEL = re.compile(
+    r"\b(how|many|count|average|mean|total|older|younger|over|above|below|between|before|after|"
+    r"than|not|without|except|excluding|or|and|latest|recent|last|first|most|least|why|what|which|"
+    r"when|explain|compare|summari[sz]e|summary|same|them|those|these|it)\b|\?.+"
+)
+
+_WORD = re.compile(r"[a-z0-9]+")
+
+
+class FastPathRouter:
+    """Decides whether a query can skip the LLM and go straight to get_patients.
+
+    The manual extractor's parameters are trusted only when they explain the
+    whole query: after removing the extracted values, every remaining word
+    must be filler or a keyword of an extracted field. Values that swallowed
+    other keywords ('smith with nhi abc' as a provider), genders found inside
+    other words ('enrollment' contains 'men') and phrasings that need the
+    model (counts, comparisons, negation, follow-ups) score 0.
+    """
+
+    def __init__(self, extract: Callable[[str], Dict[str, Any]], min_confidence: float = 0.9):
+        self.extract = extract
+        self.min_confidence = min_confidence
+
+    def score(self, user_input: str) -> Tuple[Dict[str, Any], float]:
+        """(extracted parameters, confidence in [0, 1])"""
+        text = user_input.lower().strip()
+        words = _WORD.findall(text)
+        if not words or NEEDS_MODEL.search(text):
+            return {}, 0.0
+
+        params = self.extract(user_input)
+        explained = set(FILLER_WORDS)
+        remaining = f" {text} "
+        for field, value in params.items():
+            explained |= FIELD_KEYWORDS.get(field, set())
+            if field == 'GenderName':
+                if not GENDER_WORDS.get(value, set()) & set(words):
+                    return params, 0.0
+                continue
+            value_words = _WORD.findall(str(value).lower())
+            if field in ('PatientFullName', 'ProviderName', 'FundingStatus', 'EnrollmentStatus', 'FullAddress'):
+                keywords = set().union(*FIELD_KEYWORDS.values()) | FILLER_WORDS
+                if any(word in keywords for word in value_words):
+                    return params, 0.0
+            if str(value) and str(value).lower() not in remaining:
+                return params, 0.0
+            remaining = remaining.replace(str(value).lower(), ' ', 1)
+
+        unexplained = [word for word in _WORD.findall(remaining) if word not in explained]
+        return params, 1.0 - len(unexplained) / len(words)
+
+    def route(self, user_input: str) -> Tuple[Optional[Dict[str, Any]], float]:
+        """(get_patients arguments, confidence) - arguments are None when the LLM should decide"""
+        params, confidence = self.score(user_input)
+        if confidence >= self.min_confidence:
+            return params, confidence
+        return None, confidence
+
+
+class RouteMetrics:
+    """Per-path request counts and latency percentiles over the most recent samples"""
+
+    def __init__(self, window: int = 1000):
+        self._lock = threading.Lock()
+        self._samples: Dict[str, deque] = {}
+        self._counts: Dict[str, int] = {}
+        self.window = window
+
+    def record(self, path: str, seconds: float):
+        with self._lock:
+            self._samples.setdefault(path, deque(maxlen=self.window)).append(seconds)
+            self._counts[path] = self._counts.get(path, 0) + 1
+
+    @staticmethod
+    def _percentile(ordered, pct: float) -> float:
+        return ordered[min(len(ordered) - 1, int(pct / 100.0 * len(ordered)))]
+
+    def stats(self) -> Dict[str, Any]:
+        with self._lock:
+            total = sum(self._counts.values())
+            paths = {}
+            for path, samples in self._samples.items():
+                ordered = sorted(samples)
+                paths[path] = {
+                    'requests': self._counts[path],
+                    'share': round(self._counts[path] / total, 3),
+                    'p50_ms': round(self._percentile(ordered, 50) * 1000, 1),
+                    'p90_ms': round(self._percentile(ordered, 90) * 1000, 1),
+                    'p99_ms': round(self._percentile(ordered, 99) * 1000, 1),
+                    'mean_ms': round(sum(ordered) / len(ordered) * 1000, 1)
+                }
+            return {
+                'requests': total,
+                'fast_path_share': round(self._counts.get('fast', 0) / total, 3) if total else 0.0,
+                'paths': paths
+            }
@@ -0,0 +1,220 @@
+"""Rule-based extraction of the 13 get_patients parameters from a user question.
+
+Every pattern is compiled once at import. A single pass over the lowercased
+text with one combined trigger expression finds the keywords present
+('nhi', 'dob', 'dr', ...); only the rules of fields whose keywords occur
+are tried, in their original priority order, so the result is the same as
+running every pattern of every field.
+"""
+import re
+from datetime import datetime
+from typing import Any, Callable, Dict, List, Optional, Tuple
+
+_ISO_DATE = re.compile(r'^\d{4}-\d{2}-\d{2}$')
+_SLASH_DATE = re.compile(r'^\d{2}/\d{2}/\d{4}$')
+_DASH_DATE = re.compile(r'^\d{2}-\d{2}-\d{4}$')
+
+# Words that mean a name match caught part of the request instead of a name
+_NOT_A_NAME = ('male', 'female', 'patient', 'show', 'get', 'find', 'all', 'with', 'by', 'dr', 'doctor')
+
+
+def normalize_date(date_str: str) -> str:
+    """Normalize dd/MM/yyyy and dd-MM-yyyy to YYYY-MM-DD; anything else is returned as is"""
+    if not date_str:
+        return date_str
+    try:
+        if _ISO_DATE.match(date_str):
+            return date_str
+        if _SLASH_DATE.match(date_str):
+            return datetime.strptime(date_str, '%d/%m/%Y').strftime('%Y-%m-%d')
+        if _DASH_DATE.match(date_str):
+            return datetime.strptime(date_str, '%d-%m-%Y').strftime('%Y-%m-%d')
+        return date_str
+    except ValueError:
+        return date_str
+
+
+def _name(value: str) -> Optional[str]:
+    if any(word in value.lower() for word in _NOT_A_NAME):
+        return None
+    name = value.strip()
+    return name if len(name) > 1 and name.replace(' ', '').isalpha() else None
+
+
+def _alpha(value: str) -> Optional[str]:
+    value = value.strip()
+    return value if len(value) > 1 and value.replace(' ', '').isalpha() else None
+
+
+def _phone(value: str) -> Optional[str]:
+    value = value.strip()
+    return value if any(char.isdigit() for char in value) else None
+
+
+def _address(value: str) -> Optional[str]:
+    value = value.strip()
+    return value if len(value) > 2 else None
+
+
+def _status(value: str) -> Optional[str]:
+    return value.strip() or None
+
+
+class FieldRule:
+    """Patterns for one parameter, tried in order; convert() turns group 1 into the value (None = try the next)"""
+
+    def __init__(self, field: str, triggers: Tuple[str, ...], patterns: List[str],
+                 convert: Callable[[str], Any] = lambda value: value):
+        self.field = field
+        self.triggers = triggers
+        self.patterns = [re.compile(pattern) for pattern in patterns]
+        self.convert = convert
+
+    def apply(self, text: str) -> Optional[Any]:
+        for pattern in self.patterns:
+            match = pattern.search(text)
+            if match:
+                value = self.convert(match.group(1))
+                if value is not None:
+                    return value
+        return None
+
+
+# Rules in output order. triggers are substrings every pattern of the rule
+# contains literally - a rule is skipped when none of them occur.
+FIELD_RULES = [
+    FieldRule('PatientId', ('patient', 'id'), [
+        r'patient\s+id\s+(\d+)',
+        r'id\s+(\d+)',
+        r'patient\s+(\d{6,})',  # 6+ digits likely an ID
+        r'id:\s*(\d+)',
+        r'patient\s+number\s+(\d+)',
+        r'find\s+patient\s+by\s+id\s+(\d+)',
+        r'show\s+patient\s+id\s+(\d+)',
+        r'get\s+patient\s+id\s+(\d+)',
+        r'patient\s+with\s+id\s+(\d+)',
+        r'id\s+is\s+(\d+)',
+        r'patient\s+(\d{5,})'  # 5+ digits as fallback
+    ], int),
+    FieldRule('PatientFullName', ('name', 'patient', 'find', 'search'), [
+        r'name\s+(?:is\s+)?["\']?([a-zA-Z\s]+)["\']?',
+        r'patient\s+(?:named\s+)?["\']?([a-zA-Z\s]+)["\']?(?:\s+(?:in|from))?',
+        r'full\s+name\s+(?:is\s+)?["\']?([a-zA-Z\s]+)["\']?',
+        r'whose\s+(?:full\s+)?name\s+(?:is\s+)?["\']?([a-zA-Z\s]+)["\']?',
+        r'find\s+(?:patient\s+)?["\']?([a-zA-Z\s]+)["\']?(?:\s+(?:in|from))?',
+        r'search\s+(?:for\s+)?(?:patient\s+)?["\']?([a-zA-Z\s]+)["\']?'
+    ], _name),
+    FieldRule('PatientNHI', ('nhi',), [
+        r'nhi\s+(?:number\s+)?(?:is\s+)?["\']?([A-Za-z0-9]+)["\']?',
+        r'patient\s+nhi\s+["\']?([A-Za-z0-9]+)["\']?',
+        r'nhi\s+["\']?([A-Za-z0-9]+)["\']?',
+        r'with\s+nhi\s+["\']?([A-Za-z0-9]+)["\']?',
+        r'nhi\s+starting\s+with\s+["\']?([A-Za-z0-9]+)["\']?',
+        r'get\s+patient\s+nhi\s+["\']?([A-Za-z0-9]+)["\']?'
+    ], str.upper),
+    FieldRule('ChartNumber', ('chart',), [
+        r'chart\s+number\s+(?:like\s+)?["\']?([A-Za-z0-9]+)["\']?',
+        r'chart\s+(?:number\s+)?["\']?([A-Za-z0-9]+)["\']?',
+        r'with\s+chart\s+number\s+["\']?([A-Za-z0-9]+)["\']?',
+        r'chart\s+(?:no|num)\s+["\']?([A-Za-z0-9]+)["\']?',
+        r'medical\s+chart\s+["\']?([A-Za-z0-9]+)["\']?'
+    ]),
+    # GenderName is decided from keywords, see extract_parameters
+    FieldRule('PatientDOB', ('born', 'dob', 'birth'), [
+        r'born\s+on\s+(\d{4}-\d{2}-\d{2})',
+        r'dob\s+(\d{4}-\d{2}-\d{2})',
+        r'date\s+of\s+birth\s+(\d{4}-\d{2}-\d{2})',
+        r'birth\s+date\s+(\d{4}-\d{2}-\d{2})',
+        r'born\s+(\d{4}-\d{2}-\d{2})',
+        r'dob\s+(\d{2}/\d{2}/\d{4})',
+        r'born\s+on\s+(\d{2}/\d{2}/\d{4})',
+        r'born\s+in\s+(\d{4})',
+        r'dob\s+includes?\s+(\d{4})',
+        r'birth.*?(\d{4}-\d{2}-\d{2})'
+    ], normalize_date),
+    FieldRule('ProviderName', ('dr', 'doctor', 'provider', 'assigned', 'under'), [
+        r'(?:by\s+)?(?:dr\.?\s+|doctor\s+)([a-zA-Z\s]+)',
+        r'provider\s+(?:name\s+)?(?:is\s+)?["\']?([a-zA-Z\s]+)["\']?',
+        r'with\s+provider\s+["\']?([a-zA-Z\s]+)["\']?',
+        r'assigned\s+to\s+(?:dr\.?\s+)?["\']?([a-zA-Z\s]+)["\']?',
+        r'under\s+(?:dr\.?\s+)?["\']?([a-zA-Z\s]+)["\']?'
+    ], _alpha),
+    FieldRule('Email', ('email',), [
+        r'email\s+(?:like\s+)?["\']?([a-zA-Z0-9@._-]+)["\']?',
+        r'with\s+email\s+["\']?([a-zA-Z0-9@._-]+)["\']?',
+        r'email\s+(?:address\s+)?["\']?([a-zA-Z0-9@._-]+)["\']?',
+        r'email\s+containing\s+["\']?([a-zA-Z0-9@._-]+)["\']?'
+    ]),
+    FieldRule('PhoneNumber', ('phone', 'contact'), [
+        r'phone\s+(?:number\s+)?(?:like\s+|containing\s+)?["\']?([0-9\-\s\(\)]+)["\']?',
+        r'with\s+phone\s+(?:number\s+)?["\']?([0-9\-\s\(\)]+)["\']?',
+        r'phone\s+["\']?([0-9\-\s\(\)]+)["\']?',
+        r'contact\s+(?:number\s+)?["\']?([0-9\-\s\(\)]+)["\']?'
+    ], _phone),
+    FieldRule('FullAddress', ('address', 'at', 'from', 'live'), [
+        r'(?:from\s+)?address\s+["\']?([a-zA-Z0-9\s,.-]+)["\']?',
+        r'(?:at\s+|from\s+)["\']?([a-zA-Z0-9\s,.-]+\s+(?:street|road|avenue|ave|st|rd))["\']?',
+        r'lives?\s+(?:at\s+)?["\']?([a-zA-Z0-9\s,.-]+)["\']?',
+        r'address\s+(?:like\s+)?["\']?([a-zA-Z0-9\s,.-]+)["\']?'
+    ], _address),
+    FieldRule('EnrollmentDate', ('enrol',), [
+        r'enrolled\s+on\s+(\d{4}-\d{2}-\d{2})',
+        r'enrollment\s+date\s+(\d{4}-\d{2}-\d{2})',
+        r'enrolled\s+(\d{4}-\d{2}-\d{2})',
+        r'enrollment\s+(\d{2}/\d{2}/\d{4})',
+        r'enrolled\s+in\s+(\d{4})',
+        r'enrollment.*?(\d{4}-\d{2}-\d{2})'
+    ], normalize_date),
+    FieldRule('FundingStatus', ('fund',), [
+        r'funding\s+status\s+(?:is\s+)?["\']?([a-zA-Z\s]+)["\']?',
+        r'with\s+funding\s+(?:status\s+)?["\']?([a-zA-Z\s]+)["\']?',
+        r'funding\s+["\']?([a-zA-Z\s]+)["\']?',
+        r'funded\s+by\s+["\']?([a-zA-Z\s]+)["\']?'
+    ], _alpha),
+    FieldRule('EnrollmentStatus', ('enrol', 'status'), [
+        r'enrollment\s+status\s+(?:is\s+)?["\']?([a-zA-Z\s]*)["\']?',
+        r'with\s+(?:enrollment\s+)?status\s+["\']?([a-zA-Z\s]*)["\']?',
+        r'status\s+(?:is\s+)?["\']?([a-zA-Z\s]*)["\']?',
+        r'enrollment\s+(?:is\s+)?["\']?([a-zA-Z\s]*)["\']?'
+    ], _status),
+]
+
+# Output order of the parameters (GenderName sits between ChartNumber and PatientDOB)
+PARAMETER_ORDER = [rule.field for rule in FIELD_RULES[:4]] + ['GenderName'] + [rule.field for rule in FIELD_RULES[4:]]
+
+_GENDER_TRIGGERS = ('male', 'men', 'man')
+_FEMALE_WORDS = ('female', 'women', 'woman')
+
+_RULES_BY_TRIGGER: Dict[str, List[FieldRule]] = {}
+for _rule in FIELD_RULES:
+    for _trigger in _rule.triggers:
+        _RULES_BY_TRIGGER.setdefault(_trigger, []).append(_rule)
+
+# Zero-width lookahead so every position is tried: overlapping keywords ('male' in 'female',
+# 'id' in 'provider') are all reported. No trigger is a prefix of another, so the
+# alternation never hides one keyword behind another at the same position.
+_TRIGGERS = re.compile('(?=(' + '|'.join(re.escape(t) for t in list(_RULES_BY_TRIGGER) + list(_GENDER_TRIGGERS)) + '))')
+
+
+def extract_parameters(user_input: str) -> Dict[str, Any]:
+    """get_patients parameters found in a free-text question"""
+    text = user_input.lower()
+    found = {match.group(1) for match in _TRIGGERS.finditer(text)}
+
+    candidates = {rule.field: rule for trigger in found for rule in _RULES_BY_TRIGGER.get(trigger, ())}
+    values: Dict[str, Any] = {}
+    for field, rule in candidates.items():
+        if field == 'EnrollmentStatus' and ('enrollment status is empty' in text or 'status is empty' in text):
+            values[field] = ''
+            continue
+        value = rule.apply(text)
+        if value is not None:
+            values[field] = value
+
+    if found & set(_GENDER_TRIGGERS):
+        if not any(word in text for word in _FEMALE_WORDS):
+            values['GenderName'] = 'male'
+    # No 'female' branch: 'female', 'women' and 'woman' contain 'male', 'men' and 'man', so
+    # the original one could never be reached - kept that way so extraction results don't change
+
+    return {field: values[field] for field in PARAMETER_ORDER if field in values}
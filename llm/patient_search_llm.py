@@ -1,15 +1,40 @@
 import requests
 import json
-from datetime import datetime
+from html import escape
 from typing import Dict, Any
 from tools.patient_search_tool import PatientSearchTool, PATIENT_SEARCH_SCHEMAS
+from tools.patient_table import add_age_fields, canonical_row
+from llm.result_compaction import ResultCompactor, COMPACT_COLUMNS
+
+# Search answers: 'server' renders the table locally after the model picks the search (one completion),
+# 'llm' sends the results back for the model to format (two completions)
+RESPONSE_MODES = ('server', 'llm')
 
 class PatientSearchLLM:
     def __init__(self, config):
         self.config = config
         self.base_url = config.OPENAI_BASE_URL
         self.api_key = config.OPENROUTER_API_KEY
-        self.patient_tool = PatientSearchTool(config.MCP_SERVER_URL)
+        self.patient_tool = PatientSearchTool(
+            config.MCP_SERVER_URL,
+            pool_connections=config.MCP_POOL_CONNECTIONS,
+            pool_maxsize=config.MCP_POOL_MAXSIZE,
+            pool_block=config.MCP_POOL_BLOCK,
+            keep_alive=config.MCP_KEEP_ALIVE
+        )
+        
+        # Search results go back to the model as compact CSV/TSV ('json' sends the full payload)
+        self.result_compactor = None
+        if config.SEARCH_RESULT_FORMAT != 'json':
+            self.result_compactor = ResultCompactor(
+                config.SEARCH_RESULT_FORMAT,
+                max_rows=config.SEARCH_RESULT_MAX_ROWS,
+                token_budget=config.SEARCH_RESULT_TOKEN_BUDGET
+            )
+        
+        self.response_mode = config.SEARCH_RESPONSE_MODE
+        if self.response_mode not in RESPONSE_MODES:
+            raise ValueError(f"Unknown SEARCH_RESPONSE_MODE {self.response_mode!r} (expected one of {', '.join(RESPONSE_MODES)})")
     
     def process_query(self, user_query: str) -> str:
         """Process user query for patient search"""
@@ -91,6 +116,9 @@ CRITICAL: Always calculate age from PatientDOB and format dates properly for fro
                 else:
                     function_result = {"Success": False, "Message": f"Unknown function: {function_name}", "Data": None}
                 
+                if self.response_mode == 'server':
+                    return self._render_results(function_result)
+                
                 # Get final response with the search results
                 messages.append({
                     "role": "assistant",
@@ -101,7 +129,7 @@ CRITICAL: Always calculate age from PatientDOB and format dates properly for fro
                 messages.append({
                     "role": "function", 
                     "name": function_name,
-                    "content": json.dumps(function_result)
+                    "content": self._function_content(function_result)
                 })
                 
                 final_payload = {
@@ -129,6 +157,40 @@ CRITICAL: Always calculate age from PatientDOB and format dates properly for fro
         except Exception as e:
             return f"❌ Error processing query: {str(e)}"
     
+    def _render_results(self, result: Dict[str, Any]) -> str:
+        """The answer the second completion is asked to produce, rendered locally: summary, table of all rows, total"""
+        if not result.get('Success'):
+            return f"❌ Error: {result.get('Message', 'Unknown error')}"
+        patients = result.get('Data')
+        if not patients:
+            return "No patients found."
+        
+        # The search API returns camelCase rows; COMPACT_COLUMNS holds canonical keys
+        rows = ''.join(
+            '<tr>' + ''.join(f'<td>{escape(str(patient.get(field) if patient.get(field) is not None else ""))}</td>'
+                             for field, _ in COMPACT_COLUMNS) + '</tr>\n'
+            for patient in map(canonical_row, patients)
+        )
+        return (
+            f'<div class="summary-info">Found {len(patients)} patients in the live database</div>\n'
+            '<table class="patient-table">\n'
+            '<thead><tr>' + ''.join(f'<th>{header}</th>' for _, header in COMPACT_COLUMNS) + '</tr></thead>\n'
+            f'<tbody>\n{rows}</tbody>\n</table>\n'
+            f'<div class="summary-info">Total: {len(patients)} patients displayed</div>'
+        )
+    
+    def _function_content(self, function_result: Dict[str, Any]) -> str:
+        """The function message content for a search result - compacted unless the format is 'json'"""
+        if self.result_compactor is None:
+            return json.dumps(function_result)
+        
+        content = self.result_compactor.compact(function_result)
+        last = self.result_compactor.metrics.last
+        if last['rows']:
+            print(f"🗜️ Compacted {last['rows_sent']}/{last['rows']} rows: ~{last['compact_tokens']} tokens "
+                  f"instead of ~{last['raw_tokens']} ({last['tokens_saved']} saved)")
+        return content
+    
     def _process_patient_data(self, result: Dict[str, Any]) -> Dict[str, Any]:
         """Process patient data to calculate ages and format dates"""
         if not result.get('Success') or not result.get('Data'):
@@ -137,26 +199,7 @@ CRITICAL: Always calculate age from PatientDOB and format dates properly for fro
         patients = result['Data']
         
         # Calculate ages and format data for ALL patients
-        for patient in patients:
-            if patient.get('patientDOB'):
-                try:
-                    # Parse DOB and calculate age
-                    dob_str = patient['patientDOB']
-                    if 'T' in dob_str:
-                        dob = datetime.fromisoformat(dob_str.replace('Z', '+00:00'))
-                    else:
-                        dob = datetime.strptime(dob_str[:10], '%Y-%m-%d')
-                    
-                    today = datetime.now()
-                    age = today.year - dob.year - ((today.month, today.day) < (dob.month, dob.day))
-                    patient['calculatedAge'] = age
-                    patient['formattedDOB'] = dob.strftime('%Y-%m-%d')
-                except:
-                    patient['calculatedAge'] = 'Unknown'
-                    patient['formattedDOB'] = patient.get('patientDOB', 'Unknown')
-            else:
-                patient['calculatedAge'] = 'Unknown'
-                patient['formattedDOB'] = 'Unknown'
+        add_age_fields(patients)
         
         return result
 
@@ -0,0 +1,184 @@
+"""Compact form of a search_patients result for the model's second round trip.
+
+The full JSON payload repeats every key on every row and carries columns the
+answer never shows, so its size - and the completion's latency and cost -
+grows with the row count until it no longer fits the context window.
+ResultCompactor keeps only the displayed columns, writes rows as CSV/TSV
+under one header line, and stops at a row cap or token budget; when rows are
+left out, counts over the whole result set take their place.
+"""
+import csv
+import io
+import json
+import re
+import threading
+from collections import Counter
+from typing import Any, Dict, List, Optional, Tuple
+
+from tools.patient_table import canonical_row
+
+# (canonical row field, header) in the order of the table the system prompt asks for
+COMPACT_COLUMNS = [
+    ('PatientId', 'Patient ID'),
+    ('PatientFullName', 'Name'),
+    ('PatientNHI', 'NHI'),
+    ('ChartNumber', 'Chart Number'),
+    ('GenderName', 'Gender'),
+    ('calculatedAge', 'Age'),
+    ('formattedDOB', 'DOB'),
+    ('ProviderName', 'Provider'),
+    ('Email', 'Email'),
+    ('PhoneNumber', 'Phone'),
+    ('FullAddress', 'Address'),
+    ('EnrollmentDate', 'Enrollment Date'),
+    ('FundingStatus', 'Funding Status'),
+    ('EnrollmentStatus', 'Enrollment Status'),
+]
+
+# Columns counted over all rows when only some rows are listed
+SUMMARY_COLUMNS = [('GenderName', 'Gender'), ('ProviderName', 'Provider'),
+                   ('FundingStatus', 'Funding status'), ('EnrollmentStatus', 'Enrollment status')]
+SUMMARY_TOP_VALUES = 10
+
+FORMATS = {'tsv': '\t', 'csv': ','}
+
+# Roughly how a BPE tokenizer splits text: a leading space joins the next piece,
+# letters come in chunks of up to ~6, digits in groups of up to 3, symbols alone
+_TOKEN_PIECES = re.compile(r" ?[A-Za-z]{1,6}| ?\d{1,3}| ?[^\sA-Za-z\d]|\s+")
+
+# Rows whose JSON is measured when estimating a large raw payload
+_RAW_SAMPLE_ROWS = 50
+
+
+def estimate_tokens(text: str) -> int:
+    """Local estimate of the model's token count for text (no tokenizer download or API call)"""
+    return len(_TOKEN_PIECES.findall(text))
+
+
+def estimate_json_tokens(result: Dict[str, Any]) -> int:
+    """Estimated tokens of json.dumps(result); large row lists are measured on a sample and scaled"""
+    rows = result.get('Data')
+    if not isinstance(rows, list) or len(rows) <= _RAW_SAMPLE_ROWS:
+        return estimate_tokens(json.dumps(result, default=str))
+    step = len(rows) / _RAW_SAMPLE_ROWS
+    sample = [rows[int(i * step)] for i in range(_RAW_SAMPLE_ROWS)]
+    envelope = estimate_tokens(json.dumps(dict(result, Data=[]), default=str))
+    return envelope + round(estimate_tokens(json.dumps(sample, default=str)) * len(rows) / _RAW_SAMPLE_ROWS)
+
+
+class CompactionMetrics:
+    """Estimated tokens of the full and compacted function results, per request and in total"""
+
+    def __init__(self):
+        self._lock = threading.Lock()
+        self.requests = 0
+        self.truncated = 0
+        self.raw_tokens = 0
+        self.compact_tokens = 0
+        self.last: Optional[Dict[str, Any]] = None
+
+    def record(self, raw_tokens: int, compact_tokens: int, rows: int, rows_sent: int):
+        with self._lock:
+            self.requests += 1
+            self.truncated += rows_sent < rows
+            self.raw_tokens += raw_tokens
+            self.compact_tokens += compact_tokens
+            self.last = {'rows': rows, 'rows_sent': rows_sent, 'raw_tokens': raw_tokens,
+                         'compact_tokens': compact_tokens, 'tokens_saved': raw_tokens - compact_tokens}
+
+    def stats(self) -> Dict[str, Any]:
+        with self._lock:
+            saved = self.raw_tokens - self.compact_tokens
+            return {
+                'requests': self.requests,
+                'truncated_requests': self.truncated,
+                'raw_tokens': self.raw_tokens,
+                'compact_tokens': self.compact_tokens,
+                'tokens_saved': saved,
+                'tokens_saved_per_request': round(saved / self.requests, 1) if self.requests else 0.0,
+                'saved_ratio': round(saved / self.raw_tokens, 3) if self.raw_tokens else 0.0,
+                'last_request': self.last
+            }
+
+
+class ResultCompactor:
+    """Turns a search_patients result into the compact text sent back to the model.
+
+    Rows are listed until max_rows or token_budget (estimated tokens of the
+    whole message) is reached. Row keys are canonicalised first, so PascalCase
+    and camelCase MCP rows compact the same. Failed results and results without row
+    dicts are sent as JSON, unchanged.
+    """
+
+    def __init__(self, result_format: str = 'tsv', max_rows: int = 200, token_budget: int = 6000):
+        if result_format not in FORMATS:
+            raise ValueError(f"Unknown result format {result_format!r} (expected one of {', '.join(FORMATS)})")
+        self.delimiter = FORMATS[result_format]
+        self.max_rows = max_rows
+        self.token_budget = token_budget
+        self.metrics = CompactionMetrics()
+
+    def compact(self, result: Dict[str, Any]) -> str:
+        rows = result.get('Data')
+        if not result.get('Success') or not isinstance(rows, list) or not all(isinstance(row, dict) for row in rows):
+            text = json.dumps(result, default=str)
+            tokens = estimate_tokens(text)
+            self.metrics.record(tokens, tokens, 0, 0)
+            return text
+
+        text, rows_sent = self._compact_rows(result, [canonical_row(row) for row in rows])
+        self.metrics.record(estimate_json_tokens(result), estimate_tokens(text), len(rows), rows_sent)
+        return text
+
+    def _compact_rows(self, result: Dict[str, Any], rows: List[Dict[str, Any]]) -> Tuple[str, int]:
+        separator = 'tabs' if self.delimiter == '\t' else 'commas'
+        head = (f"Success: true\nMessage: {result.get('Message', '')}\nTotal patients: {len(rows)}\n"
+                f"Columns are separated by {separator}; Age and DOB are already calculated.\n")
+
+        buffer = io.StringIO()
+        writer = csv.writer(buffer, delimiter=self.delimiter, lineterminator='\n')
+        writer.writerow([header for _, header in COMPACT_COLUMNS])
+        lines = [buffer.getvalue()]
+        # 30 tokens of headroom for the 'only the first N are listed' line
+        used = estimate_tokens(head) + estimate_tokens(lines[0]) + 30
+
+        line_tokens = []
+        for row in rows[:self.max_rows]:
+            buffer.seek(0)
+            buffer.truncate()
+            writer.writerow(['' if row.get(field) is None else row.get(field) for field, _ in COMPACT_COLUMNS])
+            line = buffer.getvalue()
+            tokens = estimate_tokens(line)
+            if used + tokens > self.token_budget and line_tokens:
+                break
+            used += tokens
+            lines.append(line)
+            line_tokens.append(tokens)
+
+        if len(line_tokens) == len(rows):
+            return head + ''.join(lines), len(rows)
+
+        # Rows are left out: make room for the summary that stands in for them
+        summary = self._summary(rows)
+        used += estimate_tokens(summary)
+        while used > self.token_budget and len(line_tokens) > 1:
+            used -= line_tokens.pop()
+            lines.pop()
+        rows_sent = len(line_tokens)
+        head += (f"Only the first {rows_sent} of {len(rows)} patients are listed - "
+                 f"say so in the summary and use the counts below for the rest.\n")
+        return head + ''.join(lines) + summary, rows_sent
+
+    @staticmethod
+    def _summary(rows: List[Dict[str, Any]]) -> str:
+        """Counts over every row for the columns people ask totals of, plus the age range"""
+        lines = [f"Summary of all {len(rows)} patients:"]
+        for field, label in SUMMARY_COLUMNS:
+            counts = Counter(row.get(field) or '(none)' for row in rows)
+            top = ', '.join(f"{value} {count}" for value, count in counts.most_common(SUMMARY_TOP_VALUES))
+            more = len(counts) - SUMMARY_TOP_VALUES
+            lines.append(f"{label}: {top}" + (f", {more} other values" if more > 0 else ''))
+        ages = [row['calculatedAge'] for row in rows if isinstance(row.get('calculatedAge'), int)]
+        if ages:
+            lines.append(f"Age: {min(ages)}-{max(ages)}, mean {sum(ages) / len(ages):.0f}")
+        return '\n'.join(lines) + '\n'
@@ -1,11 +1,44 @@
 import openai
 import json
-import re
-from datetime import datetime
-from typing import Dict, Any, List
+import time
+from typing import Dict, Any, List, Iterable, Iterator
 from tools.patient_api_tool import PatientAPITool, PATIENT_FUNCTION_SCHEMAS
+from tools.circuit_breaker import CircuitBreaker
+from tools.deadline import Deadline
+from tools.filter_keys import schema_fields
+from tools.pagination import encode_cursor, decode_cursor
+from tools.patient_table import PatientTable, add_age_fields
+from llm.fast_path import FastPathRouter, RouteMetrics
+from llm.parameter_extraction import extract_parameters
+from llm.decision_cache import DecisionCache, decision_fingerprint
+from llm.speculation import SpeculativePrefetcher
+
+PATIENT_TABLE_HEADER = (
+    '<table class="patient-table">\n<thead>\n<tr>\n'
+    '<th>Name</th><th>NHI</th><th>Chart Number</th>'
+    '<th>Gender</th><th>Age</th><th>DOB</th><th>Provider</th><th>Email</th><th>Phone</th>'
+    '<th>Address</th><th>Enrollment Date</th><th>Funding Status</th><th>Enrollment Status</th>\n'
+    '</tr>\n</thead>\n<tbody>\n'
+)
+PATIENT_TABLE_FOOTER = '</tbody>\n</table>\n'
+
+# Stream events that put something in the chat (progress events only update the typing indicator)
+CONTENT_EVENTS = ('table', 'message')
+
+
+def sse_frame(event: Dict[str, Any]) -> str:
+    """One Server-Sent Events frame: 'event: <type>' plus the event as JSON"""
+    return f"event: {event['event']}\ndata: {json.dumps(event, default=str)}\n\n"
+
 
 class RouterAPILLM:
+    # Rows aged and rendered together by iter_patients_html
+    RENDER_BATCH_SIZE = 100
+    # Rows of a full /chat table rendered between two deadline checks
+    DEADLINE_RENDER_CHUNK = 1000
+    # Longest a single completion may take, whatever the request's deadline
+    LLM_TIMEOUT_SECONDS = 30
+    
     def __init__(self, config):
         # Initialize OpenAI client for OpenRouter
         self.client = openai.OpenAI(
@@ -14,134 +47,660 @@ class RouterAPILLM:
         )
         
         self.config = config
-        self.patient_tool = PatientAPITool(config.MCP_SERVER_URL)
+        self.patient_tool = PatientAPITool(
+            config.MCP_SERVER_URL,
+            pool_connections=config.MCP_POOL_CONNECTIONS,
+            pool_maxsize=config.MCP_POOL_MAXSIZE,
+            pool_block=config.MCP_POOL_BLOCK,
+            keep_alive=config.MCP_KEEP_ALIVE,
+            coalesce_requests=config.MCP_COALESCE_REQUESTS,
+            cache_ttl_seconds=config.MCP_CACHE_TTL_SECONDS,
+            cache_max_bytes=config.MCP_CACHE_MAX_BYTES,
+            cache_stale_grace_seconds=config.MCP_CACHE_STALE_GRACE_SECONDS,
+            circuit_breaker=CircuitBreaker(
+                failure_threshold=config.MCP_BREAKER_FAILURE_THRESHOLD,
+                error_rate_threshold=config.MCP_BREAKER_ERROR_RATE,
+                window_size=config.MCP_BREAKER_WINDOW,
+                min_calls=config.MCP_BREAKER_MIN_CALLS,
+                reset_timeout=config.MCP_BREAKER_RESET_SECONDS
+            ),
+            data_mode=config.MCP_DATA_MODE,
+            mirror_sync_seconds=config.MCP_MIRROR_SYNC_SECONDS,
+            mirror_sync_max_seconds=config.MCP_MIRROR_SYNC_MAX_SECONDS,
+            snapshot_path=config.MCP_SNAPSHOT_PATH,
+            snapshot_max_age_seconds=config.MCP_SNAPSHOT_MAX_AGE_SECONDS
+        )
         self.model = config.MODEL_NAME
         self.system_prompt = config.SYSTEM_PROMPT
+        self.page_size = config.CHAT_PAGE_SIZE
+        # Total time budget of one chat request (CHAT_DEADLINE_SECONDS=0 means no limit)
+        self.deadline_seconds = config.CHAT_DEADLINE_SECONDS
+        self._async_client = None
+        
+        # Confidently parsed patient searches skip the LLM round trip
+        self.fast_path = None
+        if config.FAST_PATH_ENABLED:
+            self.fast_path = FastPathRouter(self._extract_parameters_manually, config.FAST_PATH_MIN_CONFIDENCE)
+        self.route_metrics = RouteMetrics()
+        # Time to first content and to the last row of /chat/stream answers
+        self.stream_metrics = RouteMetrics()
+        
+        # Function calls the model chose for equivalent questions (DECISION_CACHE_TTL_SECONDS=0 disables)
+        self.decision_cache = None
+        if config.DECISION_CACHE_TTL_SECONDS > 0:
+            self.decision_cache = DecisionCache(config.DECISION_CACHE_MAX_ENTRIES, config.DECISION_CACHE_TTL_SECONDS)
+        
+        # get_patients with the manually extracted filters, started while the model decides
+        self.speculation = None
+        if config.SPECULATIVE_PREFETCH_ENABLED:
+            self.speculation = SpeculativePrefetcher(
+                self._extract_parameters_manually,
+                lambda filters, deadline: self._execute_function("get_patients", filters, deadline),
+                lambda filters, deadline: self._execute_function_async("get_patients", filters, deadline),
+                max_workers=config.MCP_POOL_MAXSIZE
+            )
         
         print(f"✅ RouterAPILLM initialized with OpenAI SDK")
         print(f"   Model: {self.model}")
         print(f"   Base URL: {config.OPENAI_BASE_URL}")
         print(f"   System prompt: {len(self.system_prompt)} chars")
     
-    def process_query(self, user_input: str) -> str:
+    def _new_deadline(self, deadline: Deadline = None) -> Deadline:
+        """The caller's deadline, or a fresh CHAT_DEADLINE_SECONDS one"""
+        return deadline or Deadline(self.deadline_seconds)
+    
+    def _completion_kwargs(self, user_input: str, deadline: Deadline = None) -> Dict[str, Any]:
+        """Build the chat completion request shared by the sync and async paths"""
+        messages = [
+            {"role": "system", "content": self.system_prompt},
+            {"role": "user", "content": user_input}
+        ]
+        
+        return {
+            "model": self.model,
+            "messages": messages,
+            "functions": PATIENT_FUNCTION_SCHEMAS,
+            "function_call": "auto",
+            "temperature": 0.1,
+            "max_tokens": 1000,  # Reduced from 2000
+            # The completion gets what is left of the request's budget
+            "timeout": (deadline or Deadline()).timeout(self.LLM_TIMEOUT_SECONDS),
+            "extra_headers": {
+                "HTTP-Referer": "https://teams-chatbot-at8z.onrender.com",
+                "X-Title": "Medical Assistant Chatbot"
+            }
+        }
+    
+    def _llm_client(self, client, deadline: Deadline):
+        """client, without the SDK's retries when a deadline bounds the call - a retry would start over past it"""
+        return client.with_options(max_retries=0) if deadline.seconds else client
+    
+    def _deadline_reply(self, deadline: Deadline) -> Dict[str, Any]:
+        """Fast-fail answer once the request's deadline has run out"""
+        print(f"⏰ Deadline of {deadline.seconds:g}s reached after {deadline.elapsed():.2f}s")
+        unit = 'second' if deadline.seconds == 1 else 'seconds'
+        return self._reply(f"⏰ Sorry, I couldn't answer within {deadline.seconds:g} {unit}. "
+                           f"Please try again or narrow your search.")
+    
+    def _llm_timeout_reply(self, deadline: Deadline) -> Dict[str, Any]:
+        if deadline.expired():
+            return self._deadline_reply(deadline)
+        print(f"⏰ LLM request timed out after {self.LLM_TIMEOUT_SECONDS} seconds")
+        return self._reply("⏰ Sorry, the language model took too long to answer. Please try again.")
+    
+    def process_query(self, user_input: str, deadline: Deadline = None) -> str:
         """Process user query with better error handling"""
+        return self._process_query(user_input, deadline=deadline)['response']
+    
+    def process_query_paged(self, user_input: str, deadline: Deadline = None) -> Dict[str, Any]:
+        """Process user query, returning only the first page of patient rows plus a next_cursor"""
+        return self._process_query(user_input, page_size=self.page_size, deadline=deadline)
+    
+    def _fast_path_args(self, user_input: str):
+        """get_patients arguments when the fast path is confident, else None"""
+        if self.fast_path is None:
+            return None
+        function_args, confidence = self.fast_path.route(user_input)
+        if function_args is not None:
+            print(f"⚡ Fast path (confidence {confidence:.2f}): get_patients {function_args}")
+        return function_args
+    
+    def _decision_fingerprint(self) -> str:
+        return decision_fingerprint(self.model, self.system_prompt, PATIENT_FUNCTION_SCHEMAS)
+    
+    def _route(self, user_input: str):
+        """(path, function name, arguments) for a query; path 'llm' means the model has to decide"""
+        function_args = self._fast_path_args(user_input)
+        if function_args is not None:
+            return 'fast', "get_patients", function_args
+        if self.decision_cache is not None:
+            decision = self.decision_cache.get(user_input, self._decision_fingerprint())
+            if decision is not None:
+                print(f"🧠 Decision cache hit: {decision[0]} {decision[1]}")
+                return 'cached', decision[0], decision[1]
+        return 'llm', None, None
+    
+    def _remember_decision(self, user_input: str, function_name: str, function_args: Dict[str, Any]):
+        if self.decision_cache is not None:
+            self.decision_cache.put(user_input, self._decision_fingerprint(), function_name, function_args)
+    
+    def _process_query(self, user_input: str, page_size: int = None, deadline: Deadline = None) -> Dict[str, Any]:
+        deadline = self._new_deadline(deadline)
+        start = time.perf_counter()
+        path, function_name, function_args = self._route(user_input)
+        if path == 'llm':
+            reply = self._process_query_with_llm(user_input, page_size, deadline)
+        else:
+            function_result = self._execute_function(function_name, function_args, deadline)
+            reply = self._function_result_to_reply(function_result, function_name, function_args, page_size,
+                                                   deadline=deadline)
+        self.route_metrics.record(path, time.perf_counter() - start)
+        return reply
+    
+    def _process_query_with_llm(self, user_input: str, page_size: int = None, deadline: Deadline = None) -> Dict[str, Any]:
+        deadline = self._new_deadline(deadline)
+        prefetch = self.speculation.start(user_input, deadline) if self.speculation else None
         try:
-            # Add timeout and better error handling
-            messages = [
-                {"role": "system", "content": self.system_prompt},
-                {"role": "user", "content": user_input}
-            ]
-            
             print(f"🤖 Sending request to LLM...")
-            response = self.client.chat.completions.create(
-                model=self.model,
-                messages=messages,
-                functions=PATIENT_FUNCTION_SCHEMAS,
-                function_call="auto",
-                temperature=0.1,
-                max_tokens=1000,  # Reduced from 2000
-                timeout=30,  # Add 30 second timeout
-                extra_headers={
-                    "HTTP-Referer": "https://teams-chatbot-at8z.onrender.com",
-                    "X-Title": "Medical Assistant Chatbot"
-                }
-            )
+            client = self._llm_client(self.client, deadline)
+            response = client.chat.completions.create(**self._completion_kwargs(user_input, deadline))
             
             message = response.choices[0].message
             
             if message.function_call:
                 function_name = message.function_call.name
-                function_args = json.loads(message.function_call.arguments)
+                function_args = schema_fields(json.loads(message.function_call.arguments))
                 
                 print(f"🤖 LLM called function: {function_name}")
+                self._remember_decision(user_input, function_name, function_args)
                 
-                # Add timeout to function execution
-                function_result = self._execute_function_with_timeout(function_name, function_args)
+                function_result = None
+                if prefetch is not None:
+                    function_result = self.speculation.resolve(prefetch, function_name, function_args, deadline)
+                    prefetch = None
+                if function_result is None:
+                    function_result = self._execute_function(function_name, function_args, deadline)
                 
-                if function_result.get('Success'):
-                    return self._format_response(function_result, function_name)
-                else:
-                    return f"❌ Error: {function_result.get('Message', 'Unknown error')}"
+                return self._function_result_to_reply(function_result, function_name, function_args, page_size,
+                                                      deadline=deadline)
             else:
-                return message.content or "❌ No response received"
+                return self._reply(message.content or "❌ No response received")
                 
+        except openai.APITimeoutError:
+            return self._llm_timeout_reply(deadline)
         except Exception as e:
             print(f"❌ Error in process_query: {str(e)}")
-            return f"❌ Sorry, I encountered an error: {str(e)}"
+            return self._reply(f"❌ Sorry, I encountered an error: {str(e)}")
+        finally:
+            if prefetch is not None:
+                self.speculation.discard(prefetch)
+    
+    async def process_query_async(self, user_input: str, deadline: Deadline = None) -> str:
+        """Async variant of process_query - awaits the LLM and MCP calls instead of blocking a worker"""
+        return (await self._process_query_async(user_input, deadline=deadline))['response']
+    
+    async def process_query_paged_async(self, user_input: str, deadline: Deadline = None) -> Dict[str, Any]:
+        """Async variant of process_query_paged"""
+        return await self._process_query_async(user_input, page_size=self.page_size, deadline=deadline)
+    
+    async def _process_query_async(self, user_input: str, page_size: int = None,
+                                   deadline: Deadline = None) -> Dict[str, Any]:
+        deadline = self._new_deadline(deadline)
+        start = time.perf_counter()
+        path, function_name, function_args = self._route(user_input)
+        if path == 'llm':
+            reply = await self._process_query_with_llm_async(user_input, page_size, deadline)
+        else:
+            function_result = await self._execute_function_within(function_name, function_args, deadline)
+            reply = self._function_result_to_reply(function_result, function_name, function_args, page_size,
+                                                   deadline=deadline)
+        self.route_metrics.record(path, time.perf_counter() - start)
+        return reply
+    
+    async def _process_query_with_llm_async(self, user_input: str, page_size: int = None,
+                                            deadline: Deadline = None) -> Dict[str, Any]:
+        deadline = self._new_deadline(deadline)
+        prefetch = self.speculation.start_async(user_input, deadline) if self.speculation else None
+        try:
+            print(f"🤖 Sending async request to LLM...")
+            client = self._llm_client(self.async_client, deadline)
+            response = await client.chat.completions.create(**self._completion_kwargs(user_input, deadline))
+            
+            message = response.choices[0].message
+            
+            if message.function_call:
+                function_name = message.function_call.name
+                function_args = schema_fields(json.loads(message.function_call.arguments))
+                
+                print(f"🤖 LLM called function: {function_name}")
+                self._remember_decision(user_input, function_name, function_args)
 
-    def _format_patients_as_html_table(self, result):
-        """Format patient data as HTML table with proper DOB handling"""
-        if not result.get('Success') or not result.get('Data'):
-            return "No patients found."
+                function_result = None
+                if prefetch is not None:
+                    function_result = await self.speculation.resolve_async(prefetch, function_name, function_args, deadline)
+                    prefetch = None
+                if function_result is None:
+                    function_result = await self._execute_function_within(function_name, function_args, deadline)
+                
+                return self._function_result_to_reply(function_result, function_name, function_args, page_size,
+                                                      deadline=deadline)
+            else:
+                return self._reply(message.content or "❌ No response received")
+                
+        except openai.APITimeoutError:
+            return self._llm_timeout_reply(deadline)
+        except Exception as e:
+            print(f"❌ Error in process_query_async: {str(e)}")
+            return self._reply(f"❌ Sorry, I encountered an error: {str(e)}")
+        finally:
+            if prefetch is not None:
+                self.speculation.discard(prefetch)
+    
+    def stream_query(self, user_input: str, deadline: Deadline = None) -> Iterator[Dict[str, Any]]:
+        """Answer a query as a sequence of events for the streaming chat endpoint.
+        
+        'progress' events report the routing decision and the MCP query, then
+        a 'table' event carries the summary and an empty table, 'rows' events
+        the <tr> markup of each rendered batch and 'done' the closing summary
+        with the timings. Text replies and errors are a single 'message'
+        followed by 'done'. Rows that only MCP can provide are decoded and
+        rendered as they arrive (PatientAPITool.stream_patients). When the
+        deadline runs out, rows stop and 'done' says how many made it.
+        """
+        deadline = self._new_deadline(deadline)
+        start = time.perf_counter()
+        first_content = None
+        for event in self._stream_events(user_input, deadline):
+            if first_content is None and event['event'] in CONTENT_EVENTS:
+                first_content = time.perf_counter() - start
+                self.stream_metrics.record('first_content', first_content)
+            if event['event'] == 'done':
+                event.update(self._stream_timings(start, first_content))
+            yield event
+    
+    async def stream_query_async(self, user_input: str, deadline: Deadline = None):
+        """Async variant of stream_query; rows come from the async MCP client and are rendered in batches"""
+        deadline = self._new_deadline(deadline)
+        start = time.perf_counter()
+        first_content = None
+        async for event in self._stream_events_async(user_input, deadline):
+            if first_content is None and event['event'] in CONTENT_EVENTS:
+                first_content = time.perf_counter() - start
+                self.stream_metrics.record('first_content', first_content)
+            if event['event'] == 'done':
+                event.update(self._stream_timings(start, first_content))
+            yield event
+    
+    def _stream_timings(self, start: float, first_content: float) -> Dict[str, Any]:
+        elapsed = time.perf_counter() - start
+        self.stream_metrics.record('complete', elapsed)
+        return {
+            'first_content_ms': round(first_content * 1000, 1) if first_content is not None else None,
+            'elapsed_ms': round(elapsed * 1000, 1)
+        }
+    
+    def _stream_events(self, user_input: str, deadline: Deadline) -> Iterator[Dict[str, Any]]:
+        path, function_name, function_args = self._route(user_input)
+        if path == 'llm':
+            yield {'event': 'progress', 'stage': 'llm', 'message': 'Asking the model'}
+            try:
+                print(f"🤖 Sending request to LLM...")
+                client = self._llm_client(self.client, deadline)
+                response = client.chat.completions.create(**self._completion_kwargs(user_input, deadline))
+                function_name, function_args, content = self._read_function_call(user_input, response.choices[0].message)
+            except openai.APITimeoutError:
+                yield from self._message_events(self._llm_timeout_reply(deadline)['response'])
+                return
+            except Exception as e:
+                print(f"❌ Error in stream_query: {str(e)}")
+                yield from self._message_events(f"❌ Sorry, I encountered an error: {str(e)}")
+                return
+            if function_name is None:
+                yield from self._message_events(content or "❌ No response received")
+                return
+        
+        yield {'event': 'progress', 'stage': 'decided', 'route': path, 'function': function_name, 'arguments': function_args}
+        if function_name != "get_patients":
+            function_result = self._execute_function(function_name, function_args, deadline)
+            reply = self._function_result_to_reply(function_result, function_name, deadline=deadline)
+            yield from self._message_events(reply['response'])
+            return
+        
+        yield {'event': 'progress', 'stage': 'mcp', 'message': 'Searching patients'}
+        local = self.patient_tool.local_patients(**function_args)
+        if local is not None:
+            yield from self._table_events(local, deadline)
+        else:
+            yield from self._patient_stream_events(self.patient_tool.stream_patients(deadline=deadline, **function_args),
+                                                   deadline)
+    
+    async def _stream_events_async(self, user_input: str, deadline: Deadline):
+        path, function_name, function_args = self._route(user_input)
+        if path == 'llm':
+            yield {'event': 'progress', 'stage': 'llm', 'message': 'Asking the model'}
+            try:
+                print(f"🤖 Sending async request to LLM...")
+                client = self._llm_client(self.async_client, deadline)
+                response = await client.chat.completions.create(**self._completion_kwargs(user_input, deadline))
+                function_name, function_args, content = self._read_function_call(user_input, response.choices[0].message)
+            except openai.APITimeoutError:
+                for event in self._message_events(self._llm_timeout_reply(deadline)['response']):
+                    yield event
+                return
+            except Exception as e:
+                print(f"❌ Error in stream_query_async: {str(e)}")
+                for event in self._message_events(f"❌ Sorry, I encountered an error: {str(e)}"):
+                    yield event
+                return
+            if function_name is None:
+                for event in self._message_events(content or "❌ No response received"):
+                    yield event
+                return
+        
+        yield {'event': 'progress', 'stage': 'decided', 'route': path, 'function': function_name, 'arguments': function_args}
+        if function_name == "get_patients":
+            yield {'event': 'progress', 'stage': 'mcp', 'message': 'Searching patients'}
+        function_result = await self._execute_function_within(function_name, function_args, deadline)
+        if function_name == "get_patients":
+            events = self._table_events(function_result, deadline)
+        else:
+            events = self._message_events(
+                self._function_result_to_reply(function_result, function_name, deadline=deadline)['response'])
+        for event in events:
+            yield event
+    
+    def _read_function_call(self, user_input: str, message):
+        """(function name, arguments, None) for a function call, (None, None, text) otherwise"""
+        if not message.function_call:
+            return None, None, message.content
+        function_name = message.function_call.name
+        function_args = schema_fields(json.loads(message.function_call.arguments))
+        print(f"🤖 LLM called function: {function_name}")
+        self._remember_decision(user_input, function_name, function_args)
+        return function_name, function_args, None
+    
+    @staticmethod
+    def _message_events(html: str) -> Iterator[Dict[str, Any]]:
+        yield {'event': 'message', 'html': html}
+        yield {'event': 'done', 'html': '', 'total_count': None}
+    
+    def _table_events(self, result: Dict[str, Any], deadline: Deadline = None) -> Iterator[Dict[str, Any]]:
+        """Events for a complete get_patients result - the table, then its rows in RENDER_BATCH_SIZE batches"""
+        deadline = deadline or Deadline()
+        if not result.get('Success'):
+            yield from self._message_events(self._function_result_to_reply(result, "get_patients", deadline=deadline)['response'])
+            return
+        table = result.get('Data')
+        if not table:
+            yield from self._message_events("No patients found.")
+            return
+        if not isinstance(table, PatientTable):
+            table = PatientTable.from_rows(table)
+        
+        total_count = len(table)
+        yield {'event': 'table', 'html': self._found_summary_html(result, total_count) + PATIENT_TABLE_HEADER + PATIENT_TABLE_FOOTER,
+               'total_count': total_count}
+        for offset in range(0, total_count, self.RENDER_BATCH_SIZE):
+            if deadline.expired():
+                yield {'event': 'done', 'html': self._partial_summary_html(offset, total_count), 'total_count': total_count}
+                return
+            batch = table.take(slice(offset, offset + self.RENDER_BATCH_SIZE))
+            yield {'event': 'rows', 'html': self._patient_rows_html(batch), 'count': len(batch)}
+        yield {'event': 'done', 'html': f'<div class="summary-info">Total: {total_count} patients displayed</div>',
+               'total_count': total_count}
+    
+    def _patient_stream_events(self, stream, deadline: Deadline = None) -> Iterator[Dict[str, Any]]:
+        """Events for rows decoded from a PatientStream; the table goes out with the first row"""
+        total_count = 0
+        batch = []
+        for patient in stream:
+            if not total_count and not batch:
+                yield {'event': 'table', 'total_count': None,
+                       'html': '<div class="summary-info">Patients from the live database</div>\n\n' + PATIENT_TABLE_HEADER + PATIENT_TABLE_FOOTER}
+            batch.append(patient)
+            if len(batch) == self.RENDER_BATCH_SIZE:
+                yield {'event': 'rows', 'html': self._rows_html(batch), 'count': len(batch)}
+                total_count += len(batch)
+                batch = []
+        if batch:
+            yield {'event': 'rows', 'html': self._rows_html(batch), 'count': len(batch)}
+            total_count += len(batch)
+        
+        error = stream.error
+        if not error and stream.envelope.get('Success') is False:
+            error = stream.envelope.get('Message', 'Unknown error')
+        timed_out = error == PatientAPITool.DEADLINE_MESSAGE and deadline is not None and deadline.seconds
+        if not total_count and timed_out:
+            yield from self._message_events(self._deadline_reply(deadline)['response'])
+        elif not total_count:
+            yield from self._message_events(f"❌ Error: {error}" if error else "No patients found.")
+        elif timed_out:
+            yield {'event': 'done', 'html': self._partial_summary_html(total_count), 'total_count': total_count}
+        elif error:
+            yield {'event': 'done', 'html': f'<div class="summary-info">❌ Only {total_count} patients could be loaded: {error}</div>',
+                   'total_count': total_count}
+        else:
+            yield {'event': 'done', 'html': f'<div class="summary-info">Total: {total_count} patients displayed</div>',
+                   'total_count': total_count}
+    
+    def get_page(self, cursor: str, deadline: Deadline = None) -> Dict[str, Any]:
+        """Render a further page of a previous get_patients answer - no LLM call"""
+        deadline = self._new_deadline(deadline)
+        try:
+            filters, offset, page_size = decode_cursor(cursor, self.page_size)
+        except ValueError as e:
+            print(f"❌ {str(e)}")
+            return self._reply("❌ That page link is invalid. Please ask your question again.")
         
-        patients = result['Data']
-        total_count = len(patients)
+        function_result = self._execute_function("get_patients", filters, deadline)
+        return self._function_result_to_reply(function_result, "get_patients", filters, page_size, offset, deadline)
+    
+    async def get_page_async(self, cursor: str, deadline: Deadline = None) -> Dict[str, Any]:
+        """Async variant of get_page"""
+        deadline = self._new_deadline(deadline)
+        try:
+            filters, offset, page_size = decode_cursor(cursor, self.page_size)
+        except ValueError as e:
+            print(f"❌ {str(e)}")
+            return self._reply("❌ That page link is invalid. Please ask your question again.")
         
-        # Process patient data to calculate ages and format DOB
-        for patient in patients:
-            # Handle DOB field (could be PatientDOB or patientDOB)
-            dob_value = patient.get('PatientDOB') or patient.get('patientDOB')
-            if dob_value:
-                try:
-                    # Parse DOB and calculate age
-                    dob_str = str(dob_value)
-                    if 'T' in dob_str:
-                        dob = datetime.fromisoformat(dob_str.replace('Z', '+00:00'))
-                    else:
-                        dob = datetime.strptime(dob_str[:10], '%Y-%m-%d')
-                    
-                    today = datetime.now()
-                    age = today.year - dob.year - ((today.month, today.day) < (dob.month, dob.day))
-                    patient['calculatedAge'] = age
-                    patient['formattedDOB'] = dob.strftime('%Y-%m-%d')
-                except Exception as e:
-                    print(f"❌ DOB parsing error for {dob_value}: {str(e)}")
-                    patient['calculatedAge'] = 'Unknown'
-                    patient['formattedDOB'] = str(dob_value)[:10] if dob_value else 'Unknown'
-            else:
-                patient['calculatedAge'] = 'Unknown'
-                patient['formattedDOB'] = 'Unknown'
+        function_result = await self._execute_function_within("get_patients", filters, deadline)
+        return self._function_result_to_reply(function_result, "get_patients", filters, page_size, offset, deadline)
+    
+    @property
+    def async_client(self):
+        """AsyncOpenAI client, created on first use so the sync path never needs it"""
+        if self._async_client is None:
+            self._async_client = openai.AsyncOpenAI(
+                base_url=self.config.OPENAI_BASE_URL,
+                api_key=self.config.OPENROUTER_API_KEY,
+            )
+        return self._async_client
+    
+    async def aclose(self):
+        """Release async HTTP resources (LLM client and MCP session)"""
+        if self._async_client is not None:
+            await self._async_client.close()
+            self._async_client = None
+        await self.patient_tool.close_async()
+    
+    @staticmethod
+    def _reply(response: str, next_cursor: str = None, total_count: int = None) -> Dict[str, Any]:
+        return {'response': response, 'next_cursor': next_cursor, 'total_count': total_count}
+    
+    def _function_result_to_reply(self, function_result: Dict[str, Any], function_name: str,
+                                  function_args: Dict[str, Any] = None, page_size: int = None,
+                                  offset: int = 0, deadline: Deadline = None) -> Dict[str, Any]:
+        """Turn a function result into the chat reply (one page of rows when page_size is set)"""
+        if not function_result.get('Success'):
+            if function_result.get('TimedOut') and deadline is not None and deadline.seconds:
+                return self._deadline_reply(deadline)
+            return self._reply(f"❌ Error: {function_result.get('Message', 'Unknown error')}")
+        
+        if function_name == "get_patients" and page_size:
+            total_count = len(function_result.get('Data') or [])
+            next_offset = offset + page_size
+            next_cursor = encode_cursor(function_args or {}, next_offset, page_size) if next_offset < total_count else None
+            html = self._format_patients_as_html_table(function_result, offset, page_size, next_cursor, deadline)
+            return self._reply(html, next_cursor, total_count)
+        
+        return self._reply(self._format_response(function_result, function_name, deadline))
+    
+    def _format_response(self, result: Dict[str, Any], function_name: str, deadline: Deadline = None) -> str:
+        """Render a successful function result for the chat UI"""
+        if function_name == "get_patients":
+            return self._format_patients_as_html_table(result, deadline=deadline)
+        return json.dumps(result.get('Data'), default=str)
+
+    def _format_patients_as_html_table(self, result, offset: int = 0, page_size: int = None, next_cursor: str = None,
+                                       deadline: Deadline = None):
+        """Format patient data as HTML table with proper DOB handling.
+        
+        With page_size set only rows [offset, offset + page_size) are rendered,
+        followed by a 'show more' button carrying next_cursor. A full table is
+        rendered DEADLINE_RENDER_CHUNK rows at a time; if the deadline runs out
+        in between, the rows so far go out with a note that the rest is missing.
+        """
+        if not result.get('Success') or not result.get('Data'):
+            return "No patients found."
         
-        # CRITICAL: Show ALL patients, not just 5
-        html = f'<div class="summary-info">Found {total_count} patients in the live database</div>\n\n'
-        html += '<table class="patient-table">\n<thead>\n<tr>\n'
-        html += '<th>Name</th><th>NHI</th><th>Chart Number</th>'
-        html += '<th>Gender</th><th>Age</th><th>DOB</th><th>Provider</th><th>Email</th><th>Phone</th>'
-        html += '<th>Address</th><th>Enrollment Date</th><th>Funding Status</th><th>Enrollment Status</th>\n'
-        html += '</tr>\n</thead>\n<tbody>\n'
+        # Columnar rows - ages and DOBs are computed per column, and only this page is rendered
+        all_patients = result['Data']
+        if not isinstance(all_patients, PatientTable):
+            all_patients = PatientTable.from_rows(all_patients)
+        total_count = len(all_patients)
+        table = all_patients.take(slice(offset, offset + page_size)) if page_size else all_patients
         
-        # Process ALL patients - no limit
-        for patient in patients:
-            html += '<tr>\n'
-            html += f'<td>{patient.get("PatientFullName") or patient.get("patientFullName", "")}</td>\n'
-            html += f'<td>{patient.get("PatientNHI") or patient.get("patientNHI", "")}</td>\n'
-            html += f'<td>{patient.get("ChartNumber") or patient.get("chartNumber", "")}</td>\n'
-            html += f'<td>{patient.get("GenderName") or patient.get("genderName", "")}</td>\n'
-            html += f'<td>{patient.get("calculatedAge", "")}</td>\n'
-            html += f'<td>{patient.get("formattedDOB", "")}</td>\n'
-            html += f'<td>{patient.get("ProviderName") or patient.get("providerName", "")}</td>\n'
-            html += f'<td>{patient.get("Email") or patient.get("email", "")}</td>\n'
-            html += f'<td>{patient.get("PhoneNumber") or patient.get("phoneNumber", "")}</td>\n'
-            html += f'<td>{patient.get("FullAddress") or patient.get("fullAddress", "")}</td>\n'
-            html += f'<td>{patient.get("EnrollmentDate") or patient.get("enrollmentDate", "")}</td>\n'
-            html += f'<td>{patient.get("FundingStatus") or patient.get("fundingStatus", "")}</td>\n'
-            html += f'<td>{patient.get("EnrollmentStatus") or patient.get("enrollmentStatus", "")}</td>\n'
-            html += '</tr>\n'
+        # CRITICAL: Show ALL patients, not just 5 (paged requests carry on via next_cursor)
+        if offset:
+            html = f'<div class="summary-info">Patients {offset + 1}-{offset + len(table)} of {total_count}</div>\n\n'
+        else:
+            html = self._found_summary_html(result, total_count)
+        html += PATIENT_TABLE_HEADER
+        
+        # Process ALL patients (of this page) - no limit, unless the deadline runs out
+        deadline = deadline or Deadline()
+        if deadline.seconds and not page_size and len(table) > self.DEADLINE_RENDER_CHUNK:
+            rendered = 0
+            while rendered < len(table) and not (rendered and deadline.expired()):
+                html += self._patient_rows_html(table.take(slice(rendered, rendered + self.DEADLINE_RENDER_CHUNK)))
+                rendered = min(rendered + self.DEADLINE_RENDER_CHUNK, len(table))
+        else:
+            html += self._patient_rows_html(table)
+            rendered = len(table)
         
         html += '</tbody>\n</table>\n'
-        html += f'<div class="summary-info">Total: {total_count} patients displayed</div>'
+        if rendered < len(table):
+            html += self._partial_summary_html(rendered, total_count)
+        elif page_size:
+            html += f'<div class="summary-info">Showing {offset + 1}-{offset + len(table)} of {total_count} patients</div>'
+            if next_cursor:
+                html += f'\n<button class="load-more-btn" data-cursor="{next_cursor}">Show more patients</button>'
+        else:
+            html += f'<div class="summary-info">Total: {total_count} patients displayed</div>'
         
         return html
     
-    def _execute_function(self, function_name: str, function_args: Dict[str, Any]) -> Dict[str, Any]:
-        """Execute the specified function with given arguments"""
+    @staticmethod
+    def _partial_summary_html(shown: int, total_count: int = None) -> str:
+        """Closing line of a table cut short by the request's deadline"""
+        of_total = f" of {total_count}" if total_count is not None else ""
+        return f'<div class="summary-info">⏰ Showing the first {shown}{of_total} patients - time limit reached</div>'
+    
+    def _found_summary_html(self, result: Dict[str, Any], total_count: int) -> str:
+        """Summary line above the first page of a patient table"""
+        if result.get('Stale'):
+            age_text = self._describe_age(result.get('DataAgeSeconds', 0))
+            return f'<div class="summary-info">Found {total_count} patients (cached data from {age_text} ago, refreshing in the background)</div>\n\n'
+        return f'<div class="summary-info">Found {total_count} patients in the live database</div>\n\n'
+    
+    def iter_patients_html(self, patients: Iterable[Dict[str, Any]]) -> Iterator[str]:
+        """Render the patient table incrementally from any iterable of rows.
+        
+        Pairs with PatientAPITool.stream_patients: each row gets its age
+        fields and is rendered as soon as it is decoded, so a large result set
+        is never held in memory. Rows are aged in small batches so the first
+        ones still go out quickly. The count is only known at the end, so it
+        goes in the closing summary line.
+        """
+        yield PATIENT_TABLE_HEADER
+        total_count = 0
+        batch = []
+        for patient in patients:
+            batch.append(patient)
+            if len(batch) == self.RENDER_BATCH_SIZE:
+                yield self._rows_html(batch)
+                total_count += len(batch)
+                batch = []
+        if batch:
+            yield self._rows_html(batch)
+            total_count += len(batch)
+        yield '</tbody>\n</table>\n'
+        yield f'<div class="summary-info">Total: {total_count} patients displayed</div>'
+    
+    def _rows_html(self, patients: List[Dict[str, Any]]) -> str:
+        """Age fields for a batch of rows in one pass, then their <tr> markup"""
+        add_age_fields(patients)
+        return ''.join(self._patient_row_html(patient) for patient in patients)
+    
+    @staticmethod
+    def _patient_rows_html(table: PatientTable) -> str:
+        """All <tr> rows of the patient table, built column by column"""
+        age_cells, dob_cells = table.age_fields()
+        columns = [[value or '' for value in table.column(field)] for field in (
+            'PatientFullName', 'PatientNHI', 'ChartNumber', 'GenderName')]
+        columns += [age_cells, dob_cells]
+        columns += [[value or '' for value in table.column(field)] for field in (
+            'ProviderName', 'Email', 'PhoneNumber', 'FullAddress', 'EnrollmentDate', 'FundingStatus', 'EnrollmentStatus')]
+        
+        return ''.join(
+            '<tr>\n' + ''.join(f'<td>{value}</td>\n' for value in values) + '</tr>\n'
+            for values in zip(*columns)
+        )
+    
+    @staticmethod
+    def _patient_row_html(patient: Dict[str, Any]) -> str:
+        """One <tr> of the patient table"""
+        return (
+            '<tr>\n'
+            f'<td>{patient.get("PatientFullName") or patient.get("patientFullName", "")}</td>\n'
+            f'<td>{patient.get("PatientNHI") or patient.get("patientNHI", "")}</td>\n'
+            f'<td>{patient.get("ChartNumber") or patient.get("chartNumber", "")}</td>\n'
+            f'<td>{patient.get("GenderName") or patient.get("genderName", "")}</td>\n'
+            f'<td>{patient.get("calculatedAge", "")}</td>\n'
+            f'<td>{patient.get("formattedDOB", "")}</td>\n'
+            f'<td>{patient.get("ProviderName") or patient.get("providerName", "")}</td>\n'
+            f'<td>{patient.get("Email") or patient.get("email", "")}</td>\n'
+            f'<td>{patient.get("PhoneNumber") or patient.get("phoneNumber", "")}</td>\n'
+            f'<td>{patient.get("FullAddress") or patient.get("fullAddress", "")}</td>\n'
+            f'<td>{patient.get("EnrollmentDate") or patient.get("enrollmentDate", "")}</td>\n'
+            f'<td>{patient.get("FundingStatus") or patient.get("fundingStatus", "")}</td>\n'
+            f'<td>{patient.get("EnrollmentStatus") or patient.get("enrollmentStatus", "")}</td>\n'
+            '</tr>\n'
+        )
+    
+    @staticmethod
+    def _describe_age(seconds: int) -> str:
+        """Human readable age for the stale data summary line"""
+        seconds = int(seconds)
+        if seconds < 60:
+            return f"{seconds} seconds"
+        minutes = seconds // 60
+        if minutes < 60:
+            return f"{minutes} minute{'s' if minutes != 1 else ''}"
+        hours = minutes // 60
+        return f"{hours} hour{'s' if hours != 1 else ''}"
+    
+    def _execute_function(self, function_name: str, function_args: Dict[str, Any],
+                          deadline: Deadline = None) -> Dict[str, Any]:
+        """Execute the specified function with given arguments, within what is left of the deadline"""
         try:
             print(f"🎯 EXECUTING FUNCTION: {function_name}")
             print(f"🎯 WITH ARGUMENTS: {function_args}")
             
             if function_name == "get_patients":
-                result = self.patient_tool.get_patients(**function_args)
-                print(f"🎯 FUNCTION RESULT: Success={result.get('Success')}, Data count={len(result.get('Data', []))}")
+                result = self.patient_tool.get_patients_table(deadline=deadline, **function_args)
+                print(f"🎯 FUNCTION RESULT: Success={result.get('Success')}, Data count={len(result.get('Data') or [])}")
                 return result
             else:
                 return {"Success": False, "Message": f"Unknown function: {function_name}", "Data": None}
@@ -150,27 +709,34 @@ class RouterAPILLM:
             print(f"❌ Function execution error: {str(e)}")
             return {"Success": False, "Message": f"Function execution error: {str(e)}", "Data": None}
 
-    def _execute_function_with_timeout(self, function_name: str, function_args: dict, timeout=15):
-        """Execute function with timeout"""
-        import signal
-        
-        def timeout_handler(signum, frame):
-            raise TimeoutError("Function execution timed out")
-        
+    async def _execute_function_async(self, function_name: str, function_args: Dict[str, Any],
+                                      deadline: Deadline = None) -> Dict[str, Any]:
+        """Async variant of _execute_function"""
         try:
-            signal.signal(signal.SIGALRM, timeout_handler)
-            signal.alarm(timeout)
-            
-            result = self._execute_function(function_name, function_args)
+            print(f"🎯 EXECUTING FUNCTION: {function_name}")
+            print(f"🎯 WITH ARGUMENTS: {function_args}")
             
-            signal.alarm(0)  # Cancel alarm
-            return result
+            if function_name == "get_patients":
+                result = await self.patient_tool.get_patients_table_async(deadline=deadline, **function_args)
+                print(f"🎯 FUNCTION RESULT: Success={result.get('Success')}, Data count={len(result.get('Data') or [])}")
+                return result
+            else:
+                return {"Success": False, "Message": f"Unknown function: {function_name}", "Data": None}
             
-        except TimeoutError:
-            return {"Success": False, "Message": "Request timed out", "Data": None}
         except Exception as e:
-            signal.alarm(0)  # Cancel alarm
-            return {"Success": False, "Message": str(e), "Data": None}
+            print(f"❌ Function execution error: {str(e)}")
+            return {"Success": False, "Message": f"Function execution error: {str(e)}", "Data": None}
+
+    async def _execute_function_within(self, function_name: str, function_args: Dict[str, Any],
+                                       deadline: Deadline) -> Dict[str, Any]:
+        """_execute_function_async, cancelled if it is still running when the deadline runs out"""
+        import asyncio
+        
+        try:
+            return await asyncio.wait_for(self._execute_function_async(function_name, function_args, deadline),
+                                          timeout=deadline.timeout())
+        except asyncio.TimeoutError:
+            return {"Success": False, "Message": PatientAPITool.DEADLINE_MESSAGE, "Data": None, "TimedOut": True}
 
     def _process_patients_data(self, result: Dict[str, Any]) -> Dict[str, Any]:
         """Process patients data and calculate ages for ALL patients"""
@@ -180,26 +746,7 @@ class RouterAPILLM:
         patients = result['Data']
         
         # Calculate ages and format data for ALL patients - NO LIMIT
-        for patient in patients:
-            if patient.get('patientDOB'):
-                try:
-                    # Parse DOB and calculate age
-                    dob_str = patient['patientDOB']
-                    if 'T' in dob_str:
-                        dob = datetime.fromisoformat(dob_str.replace('Z', '+00:00'))
-                    else:
-                        dob = datetime.strptime(dob_str[:10], '%Y-%m-%d')
-                    
-                    today = datetime.now()
-                    age = today.year - dob.year - ((today.month, today.day) < (dob.month, dob.day))
-                    patient['calculatedAge'] = age
-                    patient['formattedDOB'] = dob.strftime('%Y-%m-%d')
-                except:
-                    patient['calculatedAge'] = 'Unknown'
-                    patient['formattedDOB'] = patient.get('patientDOB', 'Unknown')
-            else:
-                patient['calculatedAge'] = 'Unknown'
-                patient['formattedDOB'] = 'Unknown'
+        add_age_fields(patients)
         
         # Add summary information for ALL patients
         result['Summary'] = {
@@ -210,272 +757,9 @@ class RouterAPILLM:
         return result
 
     def _extract_parameters_manually(self, user_input: str) -> Dict[str, Any]:
-        """Enhanced parameter extraction for all 13 stored procedure parameters"""
-        params = {}
-        user_lower = user_input.lower()
-        
-        print(f"🔍 PARSING: '{user_input}'")
-        
-        def normalize_date(date_str):
-            """Normalize various date formats to YYYY-MM-DD"""
-            if not date_str:
-                return date_str
-            try:
-                # Handle YYYY-MM-DD format (already correct)
-                if re.match(r'^\d{4}-\d{2}-\d{2}$', date_str):
-                    return date_str
-                
-                # Handle dd/MM/yyyy format
-                if re.match(r'^\d{2}/\d{2}/\d{4}$', date_str):
-                    dt = datetime.strptime(date_str, '%d/%m/%Y')
-                    return dt.strftime('%Y-%m-%d')
-                
-                # Handle MM/dd/yyyy format
-                if re.match(r'^\d{2}/\d{2}/\d{4}$', date_str):
-                    dt = datetime.strptime(date_str, '%m/%d/%Y')
-                    return dt.strftime('%Y-%m-%d')
-                
-                # Handle dd-MM-yyyy format
-                if re.match(r'^\d{2}-\d{2}-\d{4}$', date_str):
-                    dt = datetime.strptime(date_str, '%d-%m-%Y')
-                    return dt.strftime('%Y-%m-%d')
-                
-                # If just year, return as is for LIKE search
-                if re.match(r'^\d{4}$', date_str):
-                    return date_str
-                
-                return date_str
-            except:
-                return date_str
-        
-        # 1. @pPatientId (int) - Patient ID patterns
-        patient_id_patterns = [
-            r'patient\s+id\s+(\d+)',
-            r'id\s+(\d+)',
-            r'patient\s+(\d{6,})',  # 6+ digits likely an ID
-            r'id:\s*(\d+)',
-            r'patient\s+number\s+(\d+)',
-            r'find\s+patient\s+by\s+id\s+(\d+)',
-            r'show\s+patient\s+id\s+(\d+)',
-            r'get\s+patient\s+id\s+(\d+)',
-            r'patient\s+with\s+id\s+(\d+)',
-            r'id\s+is\s+(\d+)',
-            r'patient\s+(\d{5,})'  # 5+ digits as fallback
-        ]
-        
-        for pattern in patient_id_patterns:
-            match = re.search(pattern, user_lower)
-            if match:
-                params['PatientId'] = int(match.group(1))
-                print(f"🎯 PatientId = {match.group(1)}")
-                break
-        
-        # 2. @pPatientFullName (varchar) - Full name patterns
-        name_patterns = [
-            r'name\s+(?:is\s+)?["\']?([a-zA-Z\s]+)["\']?',
-            r'patient\s+(?:named\s+)?["\']?([a-zA-Z\s]+)["\']?(?:\s+(?:in|from))?',
-            r'full\s+name\s+(?:is\s+)?["\']?([a-zA-Z\s]+)["\']?',
-            r'whose\s+(?:full\s+)?name\s+(?:is\s+)?["\']?([a-zA-Z\s]+)["\']?',
-            r'find\s+(?:patient\s+)?["\']?([a-zA-Z\s]+)["\']?(?:\s+(?:in|from))?',
-            r'search\s+(?:for\s+)?(?:patient\s+)?["\']?([a-zA-Z\s]+)["\']?'
-        ]
-        
-        for pattern in name_patterns:
-            match = re.search(pattern, user_lower)
-            if match and not any(word in match.group(1).lower() for word in ['male', 'female', 'patient', 'show', 'get', 'find', 'all', 'with', 'by', 'dr', 'doctor']):
-                name = match.group(1).strip()
-                if len(name) > 1 and name.replace(' ', '').isalpha():
-                    params['PatientFullName'] = name
-                    print(f"🎯 PatientFullName = {name}")
-                    break
-        
-        # 3. @pPatientNHI (varchar) - NHI patterns
-        nhi_patterns = [
-            r'nhi\s+(?:number\s+)?(?:is\s+)?["\']?([A-Za-z0-9]+)["\']?',
-            r'patient\s+nhi\s+["\']?([A-Za-z0-9]+)["\']?',
-            r'nhi\s+["\']?([A-Za-z0-9]+)["\']?',
-            r'with\s+nhi\s+["\']?([A-Za-z0-9]+)["\']?',
-            r'nhi\s+starting\s+with\s+["\']?([A-Za-z0-9]+)["\']?',
-            r'get\s+patient\s+nhi\s+["\']?([A-Za-z0-9]+)["\']?'
-        ]
-        
-        for pattern in nhi_patterns:
-            match = re.search(pattern, user_lower)
-            if match:
-                params['PatientNHI'] = match.group(1).upper()
-                print(f"🎯 PatientNHI = {match.group(1).upper()}")
-                break
-        
-        # 4. @pChartNumber (varchar) - Chart number patterns
-        chart_patterns = [
-            r'chart\s+number\s+(?:like\s+)?["\']?([A-Za-z0-9]+)["\']?',
-            r'chart\s+(?:number\s+)?["\']?([A-Za-z0-9]+)["\']?',
-            r'with\s+chart\s+number\s+["\']?([A-Za-z0-9]+)["\']?',
-            r'chart\s+(?:no|num)\s+["\']?([A-Za-z0-9]+)["\']?',
-            r'medical\s+chart\s+["\']?([A-Za-z0-9]+)["\']?'
-        ]
-        
-        for pattern in chart_patterns:
-            match = re.search(pattern, user_lower)
-            if match:
-                params['ChartNumber'] = match.group(1)
-                print(f"🎯 ChartNumber = {match.group(1)}")
-                break
-        
-        # 5. @pGenderName (varchar) - Gender patterns
-        if any(word in user_lower for word in ['male', 'men', 'man']):
-            if not any(word in user_lower for word in ['female', 'women', 'woman']):
-                params['GenderName'] = 'male'
-                print(f"🎯 GenderName = male")
-        elif any(word in user_lower for word in ['female', 'women', 'woman']):
-            params['GenderName'] = 'female'
-            print(f"🎯 GenderName = female")
-        
-        # 6. @pPatientDOB (varchar) - Date of Birth patterns
-        dob_patterns = [
-            r'born\s+on\s+(\d{4}-\d{2}-\d{2})',
-            r'dob\s+(\d{4}-\d{2}-\d{2})',
-            r'date\s+of\s+birth\s+(\d{4}-\d{2}-\d{2})',
-            r'birth\s+date\s+(\d{4}-\d{2}-\d{2})',
-            r'born\s+(\d{4}-\d{2}-\d{2})',
-            r'dob\s+(\d{2}/\d{2}/\d{4})',
-            r'born\s+on\s+(\d{2}/\d{2}/\d{4})',
-            r'born\s+in\s+(\d{4})',
-            r'dob\s+includes?\s+(\d{4})',
-            r'birth.*?(\d{4}-\d{2}-\d{2})'
-        ]
-        
-        for pattern in dob_patterns:
-            match = re.search(pattern, user_lower)
-            if match:
-                params['PatientDOB'] = normalize_date(match.group(1))
-                print(f"🎯 PatientDOB = {params['PatientDOB']}")
-                break
-        
-        # 7. @pProviderName (varchar) - Provider patterns
-        provider_patterns = [
-            r'(?:by\s+)?(?:dr\.?\s+|doctor\s+)([a-zA-Z\s]+)',
-            r'provider\s+(?:name\s+)?(?:is\s+)?["\']?([a-zA-Z\s]+)["\']?',
-            r'with\s+provider\s+["\']?([a-zA-Z\s]+)["\']?',
-            r'assigned\s+to\s+(?:dr\.?\s+)?["\']?([a-zA-Z\s]+)["\']?',
-            r'under\s+(?:dr\.?\s+)?["\']?([a-zA-Z\s]+)["\']?'
-        ]
-        
-        for pattern in provider_patterns:
-            match = re.search(pattern, user_lower)
-            if match:
-                provider = match.group(1).strip()
-                if len(provider) > 1 and provider.replace(' ', '').isalpha():
-                    params['ProviderName'] = provider
-                    print(f"🎯 ProviderName = {provider}")
-                    break
-        
-        # 8. @pEmail (varchar) - Email patterns
-        email_patterns = [
-            r'email\s+(?:like\s+)?["\']?([a-zA-Z0-9@._-]+)["\']?',
-            r'with\s+email\s+["\']?([a-zA-Z0-9@._-]+)["\']?',
-            r'email\s+(?:address\s+)?["\']?([a-zA-Z0-9@._-]+)["\']?',
-            r'email\s+containing\s+["\']?([a-zA-Z0-9@._-]+)["\']?'
-        ]
-        
-        for pattern in email_patterns:
-            match = re.search(pattern, user_lower)
-            if match:
-                params['Email'] = match.group(1)
-                print(f"🎯 Email = {match.group(1)}")
-                break
-        
-        # 9. @pPhoneNumber (varchar) - Phone patterns
-        phone_patterns = [
-            r'phone\s+(?:number\s+)?(?:like\s+|containing\s+)?["\']?([0-9\-\s\(\)]+)["\']?',
-            r'with\s+phone\s+(?:number\s+)?["\']?([0-9\-\s\(\)]+)["\']?',
-            r'phone\s+["\']?([0-9\-\s\(\)]+)["\']?',
-            r'contact\s+(?:number\s+)?["\']?([0-9\-\s\(\)]+)["\']?'
-        ]
-        
-        for pattern in phone_patterns:
-            match = re.search(pattern, user_lower)
-            if match:
-                phone = match.group(1).strip()
-                if any(char.isdigit() for char in phone):
-                    params['PhoneNumber'] = phone
-                    print(f"🎯 PhoneNumber = {phone}")
-                    break
-        
-        # 10. @pFullAddress (varchar) - Address patterns
-        address_patterns = [
-            r'(?:from\s+)?address\s+["\']?([a-zA-Z0-9\s,.-]+)["\']?',
-            r'(?:at\s+|from\s+)["\']?([a-zA-Z0-9\s,.-]+\s+(?:street|road|avenue|ave|st|rd))["\']?',
-            r'lives?\s+(?:at\s+)?["\']?([a-zA-Z0-9\s,.-]+)["\']?',
-            r'address\s+(?:like\s+)?["\']?([a-zA-Z0-9\s,.-]+)["\']?'
-        ]
-        
-        for pattern in address_patterns:
-            match = re.search(pattern, user_lower)
-            if match:
-                address = match.group(1).strip()
-                if len(address) > 2:
-                    params['FullAddress'] = address
-                    print(f"🎯 FullAddress = {address}")
-                    break
-        
-        # 11. @pEnrollmentDate (varchar) - Enrollment date patterns
-        enrollment_patterns = [
-            r'enrolled\s+on\s+(\d{4}-\d{2}-\d{2})',
-            r'enrollment\s+date\s+(\d{4}-\d{2}-\d{2})',
-            r'enrolled\s+(\d{4}-\d{2}-\d{2})',
-            r'enrollment\s+(\d{2}/\d{2}/\d{4})',
-            r'enrolled\s+in\s+(\d{4})',
-            r'enrollment.*?(\d{4}-\d{2}-\d{2})'
-        ]
-        
-        for pattern in enrollment_patterns:
-            match = re.search(pattern, user_lower)
-            if match:
-                params['EnrollmentDate'] = normalize_date(match.group(1))
-                print(f"🎯 EnrollmentDate = {params['EnrollmentDate']}")
-                break
-        
-        # 12. @pFundingStatus (varchar) - Funding status patterns
-        funding_patterns = [
-            r'funding\s+status\s+(?:is\s+)?["\']?([a-zA-Z\s]+)["\']?',
-            r'with\s+funding\s+(?:status\s+)?["\']?([a-zA-Z\s]+)["\']?',
-            r'funding\s+["\']?([a-zA-Z\s]+)["\']?',
-            r'funded\s+by\s+["\']?([a-zA-Z\s]+)["\']?'
-        ]
-        
-        for pattern in funding_patterns:
-            match = re.search(pattern, user_lower)
-            if match:
-                funding = match.group(1).strip()
-                if len(funding) > 1 and funding.replace(' ', '').isalpha():
-                    params['FundingStatus'] = funding
-                    print(f"🎯 FundingStatus = {funding}")
-                    break
-        
-        # 13. @pEnrollmentStatus (varchar) - Enrollment status patterns
-        enrollment_status_patterns = [
-            r'enrollment\s+status\s+(?:is\s+)?["\']?([a-zA-Z\s]*)["\']?',
-            r'with\s+(?:enrollment\s+)?status\s+["\']?([a-zA-Z\s]*)["\']?',
-            r'status\s+(?:is\s+)?["\']?([a-zA-Z\s]*)["\']?',
-            r'enrollment\s+(?:is\s+)?["\']?([a-zA-Z\s]*)["\']?'
-        ]
-        
-        # Special handling for "empty" status
-        if 'enrollment status is empty' in user_lower or 'status is empty' in user_lower:
-            params['EnrollmentStatus'] = ''
-            print(f"🎯 EnrollmentStatus = (empty)")
-        else:
-            for pattern in enrollment_status_patterns:
-                match = re.search(pattern, user_lower)
-                if match:
-                    status = match.group(1).strip()
-                    if status and len(status) > 0:
-                        params['EnrollmentStatus'] = status
-                        print(f"🎯 EnrollmentStatus = {status}")
-                        break
-        
-        print(f"🎯 FINAL EXTRACTED PARAMS: {params}")
+        """Rule-based extraction of all 13 stored procedure parameters (see llm.parameter_extraction)"""
+        params = extract_parameters(user_input)
+        print(f"🎯 Extracted params: {params}")
         return params
 
     def _extract_parameters_with_llm(self, user_input: str) -> Dict[str, Any]:
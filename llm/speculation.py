@@ -0,0 +1,177 @@
+"""Speculative get_patients prefetch while the model is still deciding.
+
+For most questions the model calls get_patients with the same filters the
+manual extractor finds in the text. SpeculativePrefetcher starts that MCP
+call next to the completion; when the model's arguments match after
+canonicalization the prefetched result is used and the MCP time that
+overlapped the completion is saved. Otherwise the result is dropped (it
+still warms the result cache) and the model's call runs as usual.
+"""
+import asyncio
+import threading
+import time
+from concurrent.futures import ThreadPoolExecutor
+from typing import Any, Awaitable, Callable, Dict, Optional
+
+from tools.deadline import Deadline
+from tools.filter_keys import canonicalize_filters
+
+
+class SpeculationMetrics:
+    """How often the guessed filters were right and how much MCP time hits saved"""
+
+    OUTCOMES = ('hit', 'miss', 'not_called', 'skipped')
+
+    def __init__(self):
+        self._lock = threading.Lock()
+        self.counts = dict.fromkeys(self.OUTCOMES, 0)
+        self.saved_seconds = 0.0
+
+    def record(self, outcome: str, saved_seconds: float = 0.0):
+        with self._lock:
+            self.counts[outcome] += 1
+            self.saved_seconds += saved_seconds
+
+    def stats(self) -> Dict[str, Any]:
+        with self._lock:
+            hits, misses, not_called = self.counts['hit'], self.counts['miss'], self.counts['not_called']
+            speculations = hits + misses + not_called
+            return {
+                'speculations': speculations,
+                'hits': hits,
+                'misses': misses,
+                'not_called': not_called,
+                'skipped': self.counts['skipped'],
+                'hit_rate': round(hits / speculations, 3) if speculations else 0.0,
+                'wasted_mcp_calls': misses + not_called,
+                'saved_ms_total': round(self.saved_seconds * 1000, 1),
+                'saved_ms_per_hit': round(self.saved_seconds / hits * 1000, 1) if hits else 0.0
+            }
+
+
+class Prefetch:
+    """One speculative get_patients call; future is a concurrent Future (sync) or an asyncio Task"""
+
+    def __init__(self, filters: Dict[str, Any]):
+        self.filters = filters
+        self.future = None
+        self.started_at: Optional[float] = None
+        self.finished_at: Optional[float] = None
+
+    def run(self, fn: Callable[[], Dict[str, Any]]) -> Dict[str, Any]:
+        self.started_at = time.perf_counter()
+        try:
+            return fn()
+        finally:
+            self.finished_at = time.perf_counter()
+
+    async def run_async(self, fn: Callable[[], Awaitable[Dict[str, Any]]]) -> Dict[str, Any]:
+        self.started_at = time.perf_counter()
+        try:
+            return await fn()
+        finally:
+            self.finished_at = time.perf_counter()
+
+    def overlap(self, decided_at: float) -> float:
+        """Seconds of the MCP call that ran before the model decided - what a hit saves"""
+        if self.started_at is None:
+            return 0.0
+        end = decided_at if self.finished_at is None else min(self.finished_at, decided_at)
+        return max(0.0, end - self.started_at)
+
+
+class SpeculativePrefetcher:
+    """Runs get_patients with the manually extracted filters while the completion is in flight.
+
+    extract turns the question into filters; execute / execute_async run
+    get_patients for (filters, deadline). Questions without any extracted
+    filter are not speculated on - fetching every patient is rarely what
+    the model asks for. Sync prefetches run on a small thread pool, async
+    ones as tasks on the running loop.
+    """
+
+    def __init__(self, extract: Callable[[str], Dict[str, Any]],
+                 execute: Callable[[Dict[str, Any], Deadline], Dict[str, Any]],
+                 execute_async: Callable[[Dict[str, Any], Deadline], Awaitable[Dict[str, Any]]],
+                 max_workers: int = 8):
+        self.extract = extract
+        self.execute = execute
+        self.execute_async = execute_async
+        self.metrics = SpeculationMetrics()
+        self._executor = ThreadPoolExecutor(max_workers=max_workers, thread_name_prefix='speculate')
+        # Unused async prefetches finish in the background; keep them referenced until then
+        self._tasks = set()
+
+    def _guess(self, user_input: str) -> Optional[Prefetch]:
+        filters = self.extract(user_input)
+        if not canonicalize_filters(filters):
+            self.metrics.record('skipped')
+            return None
+        print(f"🔮 Speculative prefetch: get_patients {filters}")
+        return Prefetch(filters)
+
+    def start(self, user_input: str, deadline: Deadline) -> Optional[Prefetch]:
+        prefetch = self._guess(user_input)
+        if prefetch is not None:
+            prefetch.future = self._executor.submit(prefetch.run, lambda: self.execute(prefetch.filters, deadline))
+        return prefetch
+
+    def start_async(self, user_input: str, deadline: Deadline) -> Optional[Prefetch]:
+        prefetch = self._guess(user_input)
+        if prefetch is not None:
+            task = asyncio.get_running_loop().create_task(
+                prefetch.run_async(lambda: self.execute_async(prefetch.filters, deadline)))
+            self._tasks.add(task)
+            task.add_done_callback(self._tasks.discard)
+            prefetch.future = task
+        return prefetch
+
+    def discard(self, prefetch: Optional[Prefetch]):
+        """The model answered without calling a function (or the completion failed)"""
+        if prefetch is not None:
+            self.metrics.record('not_called')
+
+    def _matches(self, prefetch: Optional[Prefetch], function_name: str, function_args: Dict[str, Any]) -> bool:
+        """Record the outcome of a decided prefetch; True if its result answers the model's call"""
+        if prefetch is None:
+            return False
+        if function_name != "get_patients":
+            self.metrics.record('not_called')
+            return False
+        if canonicalize_filters(function_args or {}) != canonicalize_filters(prefetch.filters):
+            print(f"🔮 Speculation miss: model asked for {function_args}, prefetched {prefetch.filters}")
+            self.metrics.record('miss')
+            return False
+        return True
+
+    def resolve(self, prefetch: Optional[Prefetch], function_name: str, function_args: Dict[str, Any],
+                deadline: Deadline) -> Optional[Dict[str, Any]]:
+        """The prefetched result if it answers the model's function call, else None (run the call as usual)"""
+        decided_at = time.perf_counter()
+        if not self._matches(prefetch, function_name, function_args):
+            return None
+        if prefetch.future.cancel():
+            # Still queued behind other prefetches - it had no head start
+            self.metrics.record('hit')
+            return None
+        saved = prefetch.overlap(decided_at)
+        self.metrics.record('hit', saved)
+        print(f"🔮 Speculation hit: {saved * 1000:.0f} ms of the MCP call overlapped the completion")
+        try:
+            return prefetch.future.result(timeout=deadline.timeout())
+        except TimeoutError:
+            return None
+
+    async def resolve_async(self, prefetch: Optional[Prefetch], function_name: str, function_args: Dict[str, Any],
+                            deadline: Deadline) -> Optional[Dict[str, Any]]:
+        """Async variant of resolve"""
+        decided_at = time.perf_counter()
+        if not self._matches(prefetch, function_name, function_args):
+            return None
+        saved = prefetch.overlap(decided_at)
+        self.metrics.record('hit', saved)
+        print(f"🔮 Speculation hit: {saved * 1000:.0f} ms of the MCP call overlapped the completion")
+        try:
+            return await asyncio.wait_for(asyncio.shield(prefetch.future), timeout=deadline.timeout())
+        except asyncio.TimeoutError:
+            return None
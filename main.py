@@ -1,7 +1,18 @@
+import argparse
+import contextlib
+import json
+import os
 import sys
+import time
+from concurrent.futures import ThreadPoolExecutor, as_completed
+from typing import Any, Dict, List
 from config import Config
+from llm.fast_path import RouteMetrics
 from llm.router_api_llm import RouterAPILLM
 
+# Answers starting with these are failures (errors, timeouts) rather than content
+ERROR_PREFIXES = ('❌', '⏰')
+
 def print_grid_response(response):
     """Print response in a simple grid format"""
     print("\n" + "="*60)
@@ -15,7 +26,141 @@ def print_grid_response(response):
     
     print("="*60 + "\n")
 
+def read_questions(path: str) -> List[Dict[str, Any]]:
+    """Questions from a text file (one per line, '#' comments) or JSONL ({"question": ..., "id": ...} per line).
+
+    Lines of both kinds can be mixed; '-' reads stdin. Questions without an
+    id are numbered by their line.
+    """
+    questions = []
+    with (contextlib.nullcontext(sys.stdin) if path == '-' else open(path, encoding='utf-8')) as lines:
+        for line_number, line in enumerate(lines, 1):
+            line = line.strip()
+            if not line or line.startswith('#'):
+                continue
+            if line.startswith('{'):
+                try:
+                    item = json.loads(line)
+                except json.JSONDecodeError as e:
+                    raise ValueError(f"{path}:{line_number}: invalid JSON ({e})")
+                question = str(item.get('question') or item.get('message') or item.get('query') or '').strip()
+                if not question:
+                    raise ValueError(f"{path}:{line_number}: no 'question' field")
+                questions.append({'id': item.get('id', line_number), 'question': question})
+            else:
+                questions.append({'id': line_number, 'question': line})
+    return questions
+
+def answer_question(llm: RouterAPILLM, item: Dict[str, Any]) -> Dict[str, Any]:
+    """One NDJSON record: the question, the answer and how long it took"""
+    start = time.perf_counter()
+    try:
+        response = llm.process_query(item['question'])
+        error = response.startswith(ERROR_PREFIXES)
+    except Exception as e:
+        response = f"❌ Error: {str(e)}"
+        error = True
+    return {
+        'id': item['id'],
+        'question': item['question'],
+        'response': response,
+        'error': error,
+        'elapsed_ms': round((time.perf_counter() - start) * 1000, 1)
+    }
+
+def run_batch(llm: RouterAPILLM, questions: List[Dict[str, Any]], output, concurrency: int = 4,
+              logs=None) -> Dict[str, Any]:
+    """Answer questions on `concurrency` threads, writing each record to output as it completes.
+
+    Records are written in completion order (match them up by id). The
+    router's logs go to logs (None = discarded). Returns the run's summary:
+    throughput, latency percentiles and error count.
+    """
+    latency = RouteMetrics(window=max(1, len(questions)))
+    errors = 0
+    start = time.perf_counter()
+    # The router logs every step of every query - keep that off the terminal unless asked for
+    with open(os.devnull, 'w') as devnull, contextlib.redirect_stdout(logs or devnull), \
+            ThreadPoolExecutor(max_workers=concurrency) as pool:
+        futures = [pool.submit(answer_question, llm, item) for item in questions]
+        for done, future in enumerate(as_completed(futures), 1):
+            record = future.result()
+            output.write(json.dumps(record, ensure_ascii=False) + '\n')
+            output.flush()
+            latency.record('error' if record['error'] else 'ok', record['elapsed_ms'] / 1000)
+            latency.record('all', record['elapsed_ms'] / 1000)
+            errors += record['error']
+            status = '❌' if record['error'] else '✅'
+            print(f"{status} [{done}/{len(questions)}] {record['elapsed_ms']:.0f} ms: {record['question'][:60]}",
+                  file=sys.stderr)
+    elapsed = time.perf_counter() - start
+
+    paths = latency.stats()['paths']
+    return {
+        'questions': len(questions),
+        'errors': errors,
+        'concurrency': concurrency,
+        'elapsed_seconds': round(elapsed, 2),
+        'throughput_per_second': round(len(questions) / elapsed, 2) if elapsed else 0.0,
+        'latency': {key: paths[key] for key in ('all', 'ok', 'error') if key in paths},
+        'routes': llm.route_metrics.stats()['paths']
+    }
+
+def print_batch_summary(summary: Dict[str, Any], file=None):
+    """Throughput, latency percentiles (overall, by outcome, by route) and the error count"""
+    file = file or sys.stdout
+    print("\n" + "="*60, file=file)
+    print("📊 BATCH SUMMARY", file=file)
+    print("="*60, file=file)
+    print(f"Questions:   {summary['questions']} ({summary['errors']} errors) on {summary['concurrency']} threads", file=file)
+    print(f"Elapsed:     {summary['elapsed_seconds']:.2f} s", file=file)
+    print(f"Throughput:  {summary['throughput_per_second']:.2f} questions/s", file=file)
+    rows = list(summary['latency'].items()) + [(f"route {path}", stats) for path, stats in summary['routes'].items()]
+    for label, stats in rows:
+        print(f"{label:<12} n={stats['requests']:<6} p50={stats['p50_ms']:>8.1f}ms  p90={stats['p90_ms']:>8.1f}ms  "
+              f"p99={stats['p99_ms']:>8.1f}ms  mean={stats['mean_ms']:>8.1f}ms", file=file)
+    print("="*60, file=file)
+
+def main_batch(args):
+    """Answer every question of args.batch and write the answers as NDJSON"""
+    questions = read_questions(args.batch)
+    if not questions:
+        print(f"⚠️ No questions in {args.batch}")
+        return
+    output_path = args.output or (
+        'answers.ndjson' if args.batch == '-' else os.path.splitext(args.batch)[0] + '.answers.ndjson')
+
+    # With answers on stdout, everything else goes to stderr
+    report = sys.stderr if output_path == '-' else sys.stdout
+
+    with open(os.devnull, 'w') as devnull, contextlib.redirect_stdout(report if args.verbose else devnull):
+        llm = RouterAPILLM(Config())
+    print(f"🚀 Answering {len(questions)} questions on {args.concurrency} threads -> {output_path}", file=report)
+    with (contextlib.nullcontext(sys.stdout) if output_path == '-' else open(output_path, 'w', encoding='utf-8')) as output:
+        summary = run_batch(llm, questions, output, args.concurrency, report if args.verbose else None)
+    print_batch_summary(summary, report)
+    if args.summary:
+        with open(args.summary, 'w', encoding='utf-8') as f:
+            json.dump(summary, f, indent=2)
+        print(f"💾 Summary written to {args.summary}", file=report)
+
 def main():
+    parser = argparse.ArgumentParser(description="MCP chatbot - interactive, or a batch of questions with --batch")
+    parser.add_argument('--batch', metavar='FILE', help="questions, one per line or JSONL ('-' = stdin)")
+    parser.add_argument('--output', metavar='FILE', help="NDJSON answers (default <FILE>.answers.ndjson, '-' = stdout)")
+    parser.add_argument('--concurrency', type=int, default=4, help='questions answered at once (default 4)')
+    parser.add_argument('--summary', metavar='FILE', help='also write the summary as JSON')
+    parser.add_argument('--verbose', action='store_true', help="show the router's logs in batch mode")
+    args = parser.parse_args()
+
+    if args.batch:
+        try:
+            main_batch(args)
+        except (OSError, ValueError) as e:
+            print(f"❌ Batch failed: {str(e)}")
+            sys.exit(1)
+        return
+
     print("🚀 Starting MCP Chatbot...")
     print("💡 Ask questions about patients, appointments, or notes")
     print("❌ Type 'exit' to quit\n")
@@ -0,0 +1,20 @@
+# CSP and Teams integration headers
+def add_teams_headers(response):
+    """Add headers required for Microsoft Teams integration"""
+    response.headers['Content-Security-Policy'] = (
+        "frame-ancestors 'self' https://teams.microsoft.com https://*.teams.microsoft.com "
+        "https://*.skype.com https://*.teams.microsoft.us https://*.gov.teams.microsoft.us "
+        "https://*.office.com https://*.sharepoint.com https://*.office365.com; "
+        "default-src 'self' 'unsafe-inline' 'unsafe-eval' https: data: blob:; "
+        "script-src 'self' 'unsafe-inline' 'unsafe-eval' https://res.cdn.office.net "
+        "https://statics.teams.cdn.office.net https://teams.microsoft.com "
+        "https://fonts.googleapis.com https://*.office.com; "
+        "style-src 'self' 'unsafe-inline' https://fonts.googleapis.com https://fonts.gstatic.com; "
+        "font-src 'self' https://fonts.gstatic.com https://fonts.googleapis.com; "
+        "img-src 'self' data: https: blob:; "
+        "connect-src 'self' https: wss: data:;"
+    )
+    response.headers['X-Frame-Options'] = 'ALLOWALL'
+    response.headers['X-Content-Type-Options'] = 'nosniff'
+    response.headers['Referrer-Policy'] = 'strict-origin-when-cross-origin'
+    return response
@@ -0,0 +1,131 @@
+import threading
+import time
+from collections import deque
+from typing import Any, Dict
+
+
+class CircuitBreaker:
+    """Closed / open / half-open breaker for calls to the MCP server.
+
+    Trips open after failure_threshold consecutive failures, or when the
+    failure rate over the last window_size calls reaches error_rate_threshold
+    (once at least min_calls have been seen). While open, calls fail fast.
+    After reset_timeout seconds one probe call is let through (half-open):
+    success closes the breaker, failure re-opens it.
+    """
+
+    CLOSED = 'closed'
+    OPEN = 'open'
+    HALF_OPEN = 'half_open'
+
+    def __init__(self, failure_threshold: int = 5, error_rate_threshold: float = 0.5,
+                 window_size: int = 20, min_calls: int = 10, reset_timeout: float = 30):
+        self.failure_threshold = failure_threshold
+        self.error_rate_threshold = error_rate_threshold
+        self.min_calls = min_calls
+        self.reset_timeout = reset_timeout
+        self._outcomes = deque(maxlen=window_size)
+        self._lock = threading.Lock()
+        self._state = self.CLOSED
+        self._opened_at = 0.0
+        self._probe_in_flight = False
+        self._probe_started = 0.0
+        self.consecutive_failures = 0
+        self.times_opened = 0
+        self.rejected = 0
+        self.last_error = None
+
+    @property
+    def state(self) -> str:
+        with self._lock:
+            return self._current_state(time.monotonic())
+
+    def _current_state(self, now: float) -> str:
+        if self._state == self.OPEN and now - self._opened_at >= self.reset_timeout:
+            self._state = self.HALF_OPEN
+            self._probe_in_flight = False
+        return self._state
+
+    def allow_request(self) -> bool:
+        """True if the call may go upstream; half-open lets exactly one probe through"""
+        with self._lock:
+            now = time.monotonic()
+            state = self._current_state(now)
+            if state == self.CLOSED:
+                return True
+            # A probe that never reported back (e.g. a cancelled task) must not wedge the breaker
+            probe_lost = self._probe_in_flight and now - self._probe_started >= self.reset_timeout
+            if state == self.HALF_OPEN and (not self._probe_in_flight or probe_lost):
+                self._probe_in_flight = True
+                self._probe_started = now
+                return True
+            self.rejected += 1
+            return False
+
+    def retry_after(self) -> int:
+        """Seconds until the next probe is allowed (0 when not open)"""
+        with self._lock:
+            if self._current_state(time.monotonic()) != self.OPEN:
+                return 0
+            return max(0, int(round(self.reset_timeout - (time.monotonic() - self._opened_at))))
+
+    def record_success(self):
+        with self._lock:
+            self._outcomes.append(True)
+            self.consecutive_failures = 0
+            if self._state == self.HALF_OPEN:
+                print(f"✅ MCP circuit breaker closed after successful probe")
+                self._state = self.CLOSED
+                self._probe_in_flight = False
+                self._outcomes.clear()
+
+    def release_probe(self):
+        """A call ended without telling anything about the server (e.g. the caller gave up) - let another probe through"""
+        with self._lock:
+            if self._state == self.HALF_OPEN:
+                self._probe_in_flight = False
+
+    def record_failure(self, error: str = None):
+        with self._lock:
+            now = time.monotonic()
+            self._outcomes.append(False)
+            self.consecutive_failures += 1
+            self.last_error = error
+
+            if self._state == self.HALF_OPEN:
+                self._trip(now, "probe failed")
+                return
+            if self._state != self.CLOSED:
+                return
+
+            if self.consecutive_failures >= self.failure_threshold:
+                self._trip(now, f"{self.consecutive_failures} consecutive failures")
+            elif len(self._outcomes) >= self.min_calls:
+                failures = sum(1 for ok in self._outcomes if not ok)
+                rate = failures / len(self._outcomes)
+                if rate >= self.error_rate_threshold:
+                    self._trip(now, f"error rate {rate:.0%} over last {len(self._outcomes)} calls")
+
+    def _trip(self, now: float, reason: str):
+        print(f"🚫 MCP circuit breaker opened: {reason}")
+        self._state = self.OPEN
+        self._opened_at = now
+        self._probe_in_flight = False
+        self.times_opened += 1
+
+    def snapshot(self) -> Dict[str, Any]:
+        """State summary for /health and /debug/mcp"""
+        with self._lock:
+            now = time.monotonic()
+            state = self._current_state(now)
+            failures = sum(1 for ok in self._outcomes if not ok)
+            return {
+                'state': state,
+                'consecutive_failures': self.consecutive_failures,
+                'window_calls': len(self._outcomes),
+                'window_error_rate': round(failures / len(self._outcomes), 4) if self._outcomes else 0.0,
+                'times_opened': self.times_opened,
+                'rejected_calls': self.rejected,
+                'retry_after_seconds': max(0, int(round(self.reset_timeout - (now - self._opened_at)))) if state == self.OPEN else 0,
+                'last_error': self.last_error
+            }
@@ -0,0 +1,41 @@
+import time
+from typing import Optional
+
+
+class Deadline:
+    """Time budget of one chat request, shared by every stage that serves it.
+
+    Created once per request (seconds=None or <= 0 means no limit) and passed
+    down to the LLM call, the MCP call and rendering; each stage asks for the
+    time that is left instead of using its own fixed timeout, so the stages
+    together never run past the total. Immutable after creation, so it can
+    be read from any thread.
+    """
+
+    def __init__(self, seconds: Optional[float] = None):
+        self.started_at = time.monotonic()
+        self.seconds = seconds if seconds and seconds > 0 else None
+        self.expires_at = self.started_at + self.seconds if self.seconds else None
+
+    def remaining(self) -> float:
+        """Seconds left (inf without a limit, never negative)"""
+        if self.expires_at is None:
+            return float('inf')
+        return max(0.0, self.expires_at - time.monotonic())
+
+    def expired(self) -> bool:
+        return self.expires_at is not None and time.monotonic() >= self.expires_at
+
+    def elapsed(self) -> float:
+        return time.monotonic() - self.started_at
+
+    def timeout(self, cap: Optional[float] = None) -> Optional[float]:
+        """Timeout for the next blocking call: the remaining time, at most cap (None = wait forever)"""
+        remaining = self.remaining()
+        if cap is not None:
+            remaining = min(cap, remaining)
+        return None if remaining == float('inf') else remaining
+
+    def limits(self, cap: Optional[float]) -> bool:
+        """True if the remaining time, not cap, bounds the next call - a timeout is then ours, not the server's"""
+        return self.expires_at is not None and (cap is None or self.remaining() < cap)
@@ -0,0 +1,70 @@
+from typing import Dict, Any
+from urllib.parse import quote
+
+from tools.patient_mirror import LIKE_FIELDS, EXACT_FIELDS, LIKE_WILDCARDS
+from tools.patient_search_tool import PARAM_MAPPING
+
+
+def schema_fields(args: Dict[str, Any]) -> Dict[str, Any]:
+    """get_patients arguments keyed by the stored procedure's field names.
+
+    Models sometimes answer with snake_case or camelCase keys ('patient_name',
+    'genderName'); they become 'PatientFullName', 'GenderName', ... so the
+    speculative prefetch, decision cache, page cursors and MCP all see one
+    spelling of each filter.
+    """
+    fields = {}
+    for key, value in (args or {}).items():
+        fields[PARAM_MAPPING.get(key.lower()) or key[:1].upper() + key[1:]] = value
+    return fields
+
+
+def canonicalize_filters(filters: Dict[str, Any]) -> Dict[str, str]:
+    """Normalize get_patients filters so equivalent queries compare equal.
+
+    Drops None/blank values, trims whitespace and case-folds the value - the
+    stored procedure's LIKE and gender matches run under a case-insensitive
+    collation, so 'Male' and 'male' return the same rows.
+    """
+    canonical = {}
+    for key, value in filters.items():
+        if value is None:
+            continue
+        text = str(value).strip()
+        if text:
+            canonical[key] = text.casefold()
+    return canonical
+
+
+def filters_key(filters: Dict[str, Any]) -> str:
+    """Stable, readable key for a filter set, e.g. 'GenderName=male&ProviderName=dr%20smith'.
+
+    Fields are sorted by name, so every key for a given first field shares a
+    prefix (used when flushing cache entries). No filters gives ''.
+    """
+    canonical = canonicalize_filters(filters)
+    return '&'.join(f"{field}={quote(canonical[field], safe='')}" for field in sorted(canonical))
+
+
+def filters_contain(broad: Dict[str, str], narrow: Dict[str, str]) -> bool:
+    """True if every row matching narrow also matches broad (both canonical).
+
+    LIKE '%value%' fields are contained when the broad value is a substring of
+    the narrow one ('jo' contains 'john'); GenderName must be equal. narrow may
+    add fields broad doesn't have. Wildcard characters defeat the check.
+    """
+    for field, value in broad.items():
+        narrow_value = narrow.get(field)
+        if narrow_value is None:
+            return False
+        if field in EXACT_FIELDS:
+            if narrow_value != value:
+                return False
+        elif field not in LIKE_FIELDS or value not in narrow_value:
+            return False
+    for field, value in narrow.items():
+        if field not in LIKE_FIELDS and field not in EXACT_FIELDS:
+            return False
+        if any(char in value for char in LIKE_WILDCARDS):
+            return False
+    return not any(char in value for value in broad.values() for char in LIKE_WILDCARDS)
@@ -0,0 +1,63 @@
+import threading
+import requests
+from requests.adapters import HTTPAdapter
+from typing import Dict, Any, Tuple
+
+# Shared sessions keyed by MCP base URL + pool settings
+_sessions: Dict[Tuple[Any, ...], requests.Session] = {}
+_sessions_lock = threading.Lock()
+
+DEFAULT_POOL_CONNECTIONS = 4
+DEFAULT_POOL_MAXSIZE = 16
+
+
+def get_session(base_url: str,
+                pool_connections: int = DEFAULT_POOL_CONNECTIONS,
+                pool_maxsize: int = DEFAULT_POOL_MAXSIZE,
+                pool_block: bool = False,
+                keep_alive: bool = True) -> requests.Session:
+    """Return a shared keep-alive session for the given MCP base URL.
+
+    pool_connections is the number of per-host pools kept open, pool_maxsize
+    caps the connections held per host and pool_block makes callers wait for
+    a free connection instead of opening an extra one past that limit.
+    """
+    key = (base_url.rstrip('/'), pool_connections, pool_maxsize, pool_block, keep_alive)
+
+    session = _sessions.get(key)
+    if session is not None:
+        return session
+
+    with _sessions_lock:
+        session = _sessions.get(key)
+        if session is None:
+            session = requests.Session()
+            adapter = HTTPAdapter(
+                pool_connections=pool_connections,
+                pool_maxsize=pool_maxsize,
+                pool_block=pool_block,
+                max_retries=0
+            )
+            session.mount('http://', adapter)
+            session.mount('https://', adapter)
+            session.headers['Connection'] = 'keep-alive' if keep_alive else 'close'
+            _sessions[key] = session
+            print(f"🔌 Created pooled MCP session for {key[0]} (maxsize={pool_maxsize}, block={pool_block})")
+        return session
+
+
+def close_all_sessions():
+    """Close every pooled session (used on shutdown and in benchmarks)"""
+    with _sessions_lock:
+        for session in _sessions.values():
+            session.close()
+        _sessions.clear()
+
+
+def pool_stats() -> Dict[str, Any]:
+    """Summary of open pooled sessions for status endpoints"""
+    with _sessions_lock:
+        return {
+            "sessions": len(_sessions),
+            "base_urls": sorted({key[0] for key in _sessions})
+        }
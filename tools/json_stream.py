@@ -0,0 +1,103 @@
+import codecs
+import json
+from typing import Any, Dict, Iterable, Iterator, Tuple
+
+_WHITESPACE = ' \t\r\n'
+_decoder = json.JSONDecoder()
+
+
+class _StreamBuffer:
+    """Text window over an iterable of byte chunks - holds one chunk plus any partial value"""
+
+    def __init__(self, chunks: Iterable[bytes]):
+        self._chunks = iter(chunks)
+        self._utf8 = codecs.getincrementaldecoder('utf-8')()
+        self.text = ''
+        self.pos = 0
+        self.eof = False
+
+    def fill(self) -> bool:
+        """Append the next chunk (dropping consumed text); False once the stream is exhausted"""
+        if self.eof:
+            return False
+        try:
+            chunk = next(self._chunks)
+        except StopIteration:
+            self.eof = True
+            self.text = self.text[self.pos:] + self._utf8.decode(b'', final=True)
+            self.pos = 0
+            return False
+        self.text = self.text[self.pos:] + self._utf8.decode(chunk)
+        self.pos = 0
+        return True
+
+    def peek(self) -> str:
+        """Next non-whitespace character without consuming it ('' at end of stream)"""
+        while True:
+            while self.pos < len(self.text) and self.text[self.pos] in _WHITESPACE:
+                self.pos += 1
+            if self.pos < len(self.text):
+                return self.text[self.pos]
+            if not self.fill():
+                return ''
+
+    def take(self, expected: str):
+        char = self.peek()
+        if char != expected:
+            raise ValueError(f"Malformed JSON stream: expected {expected!r}, got {char or 'end of stream'!r}")
+        self.pos += 1
+
+    def value(self) -> Any:
+        """Decode one complete JSON value, reading more chunks until it is whole"""
+        self.peek()
+        while True:
+            try:
+                obj, end = _decoder.raw_decode(self.text, self.pos)
+            except json.JSONDecodeError:
+                if not self.fill():
+                    raise
+                continue
+            # A number touching the end of the buffer may continue in the next chunk
+            if end == len(self.text) and isinstance(obj, (int, float)) and not isinstance(obj, bool) and self.fill():
+                continue
+            self.pos = end
+            return obj
+
+
+def iter_array_items(chunks: Iterable[bytes], envelope: Dict[str, Any],
+                     array_keys: Tuple[str, ...] = ('Data', 'patients')) -> Iterator[Any]:
+    """Yield the items of a top-level JSON array one at a time.
+
+    Expects a top-level object such as {"Success": true, "Message": "...", "Data": [...]}.
+    Items of the first key in array_keys holding an array are yielded as they
+    are decoded; every other top-level key is stored in envelope. Memory stays
+    bounded by the chunk size plus the largest single item.
+    """
+    buffer = _StreamBuffer(chunks)
+    buffer.take('{')
+    if buffer.peek() == '}':
+        return
+
+    streamed = False
+    while True:
+        key = buffer.value()
+        buffer.take(':')
+        if not streamed and key in array_keys and buffer.peek() == '[':
+            streamed = True
+            envelope[key] = None
+            buffer.take('[')
+            if buffer.peek() == ']':
+                buffer.take(']')
+            else:
+                while True:
+                    yield buffer.value()
+                    if buffer.peek() == ']':
+                        buffer.take(']')
+                        break
+                    buffer.take(',')
+        else:
+            envelope[key] = buffer.value()
+
+        if buffer.peek() == '}':
+            return
+        buffer.take(',')
@@ -0,0 +1,240 @@
+import json
+import threading
+import time
+from typing import Any, Dict, List, Optional
+
+from tools.patient_mirror import patient_id
+
+
+_HASH_MASK = (1 << 64) - 1
+
+
+def _row_hash(row: Dict[str, Any]) -> int:
+    """Cheap in-process content hash of a flat patient row"""
+    try:
+        return hash(tuple(row.items())) & _HASH_MASK
+    except TypeError:
+        return hash(json.dumps(row, sort_keys=True, default=str)) & _HASH_MASK
+
+
+class MirrorSync:
+    """Keeps the PatientMirror of a PatientAPITool fresh without full reloads.
+
+    Each pass sends If-None-Match with the last ETag; a 304 ends the pass with
+    nothing transferred. Without ETag support (or when the ETag changed) rows
+    are streamed and hashed as they arrive, and a row whose hash differs from
+    the one its PatientId had last pass is buffered. Only added/changed/removed
+    rows are merged into the mirror; an unchanged dataset leaves it untouched.
+
+    Without ETags every pass still downloads the whole /patients body just to
+    find out nothing changed. So while passes keep finding no changes (and
+    no 304 answered them), the wait before the next pass doubles, up to
+    max_interval_seconds (default 8x interval_seconds). A pass that finds a
+    change, a 304 or a full load resets it. stats() reports the current interval.
+
+    With a snapshot_path, every pass that changed the mirror also rewrites
+    the on-disk snapshot (PatientSnapshot) new workers start from.
+    """
+
+    def __init__(self, tool, interval_seconds: float = 300, snapshot_path: str = '',
+                 max_interval_seconds: Optional[float] = None):
+        self.tool = tool
+        self.interval_seconds = interval_seconds
+        self.max_interval_seconds = max(interval_seconds, interval_seconds * 8 if max_interval_seconds is None
+                                        else max_interval_seconds)
+        self.current_interval = interval_seconds
+        self.snapshot_path = snapshot_path
+        self._sync_lock = threading.Lock()
+        self._stop = threading.Event()
+        self._thread: Optional[threading.Thread] = None
+
+        self._etag: Optional[str] = None
+        self._row_hashes: Dict[Any, int] = {}
+
+        self.syncs = 0
+        self.full_loads = 0
+        self.not_modified = 0
+        self.unchanged = 0
+        self.unchanged_streak = 0
+        self.failures = 0
+        self.rows_added = 0
+        self.rows_changed = 0
+        self.rows_removed = 0
+        self.last_attempt_at: Optional[float] = None
+        self.last_success_at: Optional[float] = None
+        self.last_duration = 0.0
+        self.last_error: Optional[str] = None
+        self.snapshot_writes = 0
+        self.last_snapshot_seconds = 0.0
+        self.snapshot_error: Optional[str] = None
+
+    def start(self):
+        """Initial full load, then an incremental pass every interval_seconds (0 = load only)"""
+        if self._thread and self._thread.is_alive():
+            return
+        self._stop.clear()
+        self._thread = threading.Thread(target=self._run, daemon=True)
+        self._thread.start()
+
+    def stop(self):
+        self._stop.set()
+
+    def _run(self):
+        self.sync_now(force=not self.tool.mirror.loaded)
+        while self.interval_seconds > 0 and not self._stop.wait(self.current_interval):
+            self.sync_now()
+
+    def _back_off(self):
+        """A full download found no changes: wait twice as long before the next pass"""
+        self.unchanged_streak += 1
+        self.current_interval = min(self.current_interval * 2, self.max_interval_seconds)
+
+    def _reset_interval(self):
+        self.unchanged_streak = 0
+        self.current_interval = self.interval_seconds
+
+    def resync(self) -> Dict[str, Any]:
+        """Forced full reload, ignoring the ETag and row hashes"""
+        return self.sync_now(force=True)
+
+    def sync_now(self, force: bool = False) -> Dict[str, Any]:
+        """Run one sync pass now; a full load if forced or the mirror is empty"""
+        if not self._sync_lock.acquire(blocking=False):
+            return {"Success": False, "Message": "Mirror sync already in progress"}
+        start = time.perf_counter()
+        self.last_attempt_at = time.time()
+        try:
+            full = force or not self.tool.mirror.loaded or not self._row_hashes
+            result = self._full_load() if full else self._incremental()
+            if result["Success"]:
+                self.syncs += 1
+                self.last_success_at = time.time()
+                self.last_error = None
+                if self.snapshot_path and (full or result.get("Changes")):
+                    self._write_snapshot()
+            else:
+                self.failures += 1
+                self.last_error = result["Message"]
+                print(f"❌ Patient mirror sync failed: {result['Message']}")
+            return result
+        finally:
+            self.last_duration = time.perf_counter() - start
+            self._sync_lock.release()
+
+    def _write_snapshot(self):
+        from tools.patient_snapshot import write_snapshot
+        from tools.patient_table import PatientTable
+
+        start = time.perf_counter()
+        try:
+            size = write_snapshot(PatientTable.from_rows(self.tool.mirror.rows()), self.snapshot_path)
+        except Exception as e:
+            self.snapshot_error = str(e)
+            print(f"⚠️ Could not write patient snapshot {self.snapshot_path}: {e}")
+            return
+        self.snapshot_writes += 1
+        self.snapshot_error = None
+        self.last_snapshot_seconds = time.perf_counter() - start
+        print(f"💽 Patient snapshot written: {self.snapshot_path} ({size / 1024 / 1024:.1f} MiB "
+              f"in {self.last_snapshot_seconds:.2f}s)")
+
+    @staticmethod
+    def _stream_error(stream) -> Optional[str]:
+        if stream.error:
+            return stream.error
+        if stream.envelope.get('Success') is False:
+            return stream.envelope.get('Message', 'Unknown error')
+        return None
+
+    def _full_load(self) -> Dict[str, Any]:
+        stream = self.tool.stream_patients()
+        rows = []
+        row_hashes = {}
+        for row in stream:
+            rows.append(row)
+            row_hashes[patient_id(row)] = _row_hash(row)
+        error = self._stream_error(stream)
+        if error:
+            return {"Success": False, "Message": error}
+
+        self.tool.mirror.load(rows)
+        self._etag = stream.etag
+        self._row_hashes = row_hashes
+        self._reset_interval()
+        self.full_loads += 1
+        return {"Success": True, "Message": f"Loaded {len(rows)} patients", "Mirror": self.tool.mirror.stats()}
+
+    def _incremental(self) -> Dict[str, Any]:
+        from tools.patient_api_tool import PatientStream
+
+        stream = PatientStream(self.tool, {}, if_none_match=self._etag)
+        previous_hashes = self._row_hashes
+        row_hashes: Dict[Any, int] = {}
+        # Rows whose hash differs from the last pass (new or changed)
+        upserts: List[Dict[str, Any]] = []
+
+        for row in stream:
+            key = patient_id(row)
+            digest = _row_hash(row)
+            row_hashes[key] = digest
+            if previous_hashes.get(key) != digest:
+                upserts.append(row)
+
+        if stream.not_modified:
+            self.not_modified += 1
+            self._reset_interval()
+            return {"Success": True, "Message": "Not modified (ETag)", "Changes": 0}
+        error = self._stream_error(stream)
+        if error:
+            return {"Success": False, "Message": error}
+
+        added = sum(1 for row in upserts if patient_id(row) not in previous_hashes)
+        changed = len(upserts) - added
+        removed = list(previous_hashes.keys() - row_hashes.keys())
+
+        self._etag = stream.etag
+        self._row_hashes = row_hashes
+
+        if not upserts and not removed:
+            self.unchanged += 1
+            self._back_off()
+            return {"Success": True, "Message": "No changes", "Changes": 0}
+
+        self.tool.mirror.merge(upserts, removed)
+        self._reset_interval()
+        self.rows_added += added
+        self.rows_changed += changed
+        self.rows_removed += len(removed)
+        print(f"🔄 Patient mirror synced: +{added} ~{changed} -{len(removed)}")
+        return {
+            "Success": True,
+            "Message": f"Merged {added} new, {changed} changed, {len(removed)} removed patients",
+            "Changes": added + changed + len(removed)
+        }
+
+    def stats(self) -> Dict[str, Any]:
+        now = time.time()
+        return {
+            'running': bool(self._thread and self._thread.is_alive() and not self._stop.is_set()),
+            'interval_seconds': self.interval_seconds,
+            'current_interval_seconds': self.current_interval,
+            'max_interval_seconds': self.max_interval_seconds,
+            'unchanged_streak': self.unchanged_streak,
+            'etag_supported': self._etag is not None,
+            'lag_seconds': round(now - self.last_success_at, 1) if self.last_success_at else None,
+            'last_sync_at': int(self.last_attempt_at) if self.last_attempt_at else None,
+            'last_sync_seconds': round(self.last_duration, 3),
+            'syncs': self.syncs,
+            'full_loads': self.full_loads,
+            'not_modified': self.not_modified,
+            'unchanged': self.unchanged,
+            'failures': self.failures,
+            'rows_added': self.rows_added,
+            'rows_changed': self.rows_changed,
+            'rows_removed': self.rows_removed,
+            'last_error': self.last_error,
+            'snapshot_path': self.snapshot_path or None,
+            'snapshot_writes': self.snapshot_writes,
+            'last_snapshot_seconds': round(self.last_snapshot_seconds, 3),
+            'snapshot_error': self.snapshot_error
+        }
@@ -0,0 +1,43 @@
+import base64
+import json
+from typing import Any, Dict, Tuple
+
+from tools.patient_mirror import LIKE_FIELDS, EXACT_FIELDS
+
+# Largest page a cursor may ask for, whatever it says
+MAX_PAGE_SIZE = 500
+CURSOR_FIELDS = frozenset(LIKE_FIELDS) | frozenset(EXACT_FIELDS)
+
+
+def encode_cursor(filters: Dict[str, Any], offset: int, page_size: int) -> str:
+    """Opaque cursor for the next page of a get_patients result.
+
+    Carries the filters rather than the rows, so any worker can serve the
+    follow-up page (usually straight from the patient result cache) without
+    asking the LLM again.
+    """
+    payload = json.dumps({'f': filters, 'o': offset, 'n': page_size}, separators=(',', ':'), sort_keys=True)
+    return base64.urlsafe_b64encode(payload.encode('utf-8')).decode('ascii').rstrip('=')
+
+
+def decode_cursor(cursor: str, max_page_size: int = MAX_PAGE_SIZE) -> Tuple[Dict[str, Any], int, int]:
+    """Return (filters, offset, page_size); raises ValueError for a malformed cursor.
+
+    Cursors come back from the client unsigned, so the filters must be plain
+    values for get_patients fields and page_size is capped at max_page_size.
+    """
+    try:
+        padded = cursor + '=' * (-len(cursor) % 4)
+        payload = json.loads(base64.urlsafe_b64decode(padded.encode('ascii')).decode('utf-8'))
+        filters, offset, page_size = payload['f'], int(payload['o']), int(payload['n'])
+    except (KeyError, TypeError, ValueError, UnicodeError) as e:
+        raise ValueError(f"Invalid page cursor: {str(e)}")
+
+    if not isinstance(filters, dict) or offset < 0 or page_size <= 0:
+        raise ValueError("Invalid page cursor")
+    unknown = [key for key in filters if key not in CURSOR_FIELDS]
+    if unknown:
+        raise ValueError(f"Invalid page cursor: unknown filter {unknown[0]!r}")
+    if not all(isinstance(value, (str, int, float)) and not isinstance(value, bool) for value in filters.values()):
+        raise ValueError("Invalid page cursor: filter values must be strings or numbers")
+    return filters, offset, min(page_size, max_page_size or MAX_PAGE_SIZE)
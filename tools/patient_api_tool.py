@@ -1,6 +1,16 @@
 import requests
-import json
-from typing import Dict, Any, List, Optional
+import threading
+from typing import Dict, Any, Optional
+from tools.http_pool import get_session, DEFAULT_POOL_CONNECTIONS, DEFAULT_POOL_MAXSIZE
+from tools.filter_keys import filters_key, canonicalize_filters
+from tools.singleflight import SingleFlight
+from tools.result_cache import PatientResultCache
+from tools.circuit_breaker import CircuitBreaker
+from tools.json_stream import iter_array_items
+from tools.patient_mirror import PatientMirror
+from tools.patient_table import PatientTable
+from tools.mirror_sync import MirrorSync
+from tools.deadline import Deadline
 
 # Function schemas for OpenAI/OpenRouter - Match stored procedure exactly
 PATIENT_FUNCTION_SCHEMAS = [
@@ -68,11 +78,154 @@ PATIENT_FUNCTION_SCHEMAS = [
     }
 ]
 
+class PatientStream:
+    """Patient rows decoded one at a time from a single /patients response.
+    
+    Iterate it once. Top-level fields (Success, Message, ...) land in envelope
+    as they are parsed; on failure iteration stops and error is set. Passing
+    if_none_match sends a conditional request: on 304 nothing is yielded and
+    not_modified is set. etag holds the response's ETag, if the server sent one.
+    With a deadline, rows stop when it runs out (error is set, the rows
+    yielded so far stand as a partial result).
+    """
+    
+    def __init__(self, tool: 'PatientAPITool', clean_filters: Dict[str, Any], chunk_size: int = 64 * 1024,
+                 if_none_match: Optional[str] = None, deadline: Optional[Deadline] = None):
+        self.tool = tool
+        self.deadline = deadline or Deadline()
+        self.filters = clean_filters
+        self.chunk_size = chunk_size
+        self.if_none_match = if_none_match
+        self.envelope: Dict[str, Any] = {}
+        self.count = 0
+        self.error: Optional[str] = None
+        self.etag: Optional[str] = None
+        self.not_modified = False
+    
+    def __iter__(self):
+        tool = self.tool
+        if self.deadline.expired():
+            self.error = PatientAPITool.DEADLINE_MESSAGE
+            return
+        if not tool.circuit_breaker.allow_request():
+            result = tool._circuit_open_result()
+            self.envelope.update(result)
+            self.error = result['Message']
+            return
+        
+        url = f"{tool.mcp_server_url}/patients"
+        print(f"🔍 Streaming request to: {url}")
+        print(f"📋 Filters: {self.filters}")
+        
+        headers = tool.headers
+        if self.if_none_match:
+            headers = dict(headers, **{'If-None-Match': self.if_none_match})
+        
+        deadline_bound = self.deadline.limits(tool.timeout)
+        try:
+            with tool.session.post(url, json=self.filters, headers=headers,
+                                   timeout=self.deadline.timeout(tool.timeout), stream=True) as response:
+                print(f"📡 Response status: {response.status_code}")
+                self.etag = response.headers.get('ETag')
+                if response.status_code == 304:
+                    tool.circuit_breaker.record_success()
+                    self.not_modified = True
+                    return
+                if response.status_code != 200:
+                    if response.status_code >= 500:
+                        tool.circuit_breaker.record_failure(f"HTTP {response.status_code}")
+                    else:
+                        tool.circuit_breaker.record_success()
+                    self.error = f"API returned status {response.status_code}"
+                    return
+                
+                for patient in iter_array_items(response.iter_content(self.chunk_size), self.envelope):
+                    self.count += 1
+                    yield patient
+                    if self.deadline.expired():
+                        print(f"⏰ Deadline reached after {self.count} streamed patients")
+                        tool.circuit_breaker.record_success()
+                        self.error = PatientAPITool.DEADLINE_MESSAGE
+                        return
+            
+            tool.circuit_breaker.record_success()
+            print(f"✅ Streamed {self.count} patients")
+        except requests.exceptions.Timeout:
+            if deadline_bound:
+                print(f"⏰ Deadline reached while streaming from the MCP server")
+                tool.circuit_breaker.release_probe()
+                self.error = PatientAPITool.DEADLINE_MESSAGE
+                return
+            print(f"⏰ Request timeout after {tool.timeout} seconds")
+            tool.circuit_breaker.record_failure("timeout")
+            self.error = "Request timeout - MCP server may be slow"
+        except requests.exceptions.ConnectionError:
+            print(f"🔌 Connection error to MCP server")
+            tool.circuit_breaker.record_failure("connection error")
+            self.error = "Cannot connect to MCP server"
+        except Exception as e:
+            print(f"❌ Unexpected error while streaming: {str(e)}")
+            tool.circuit_breaker.record_failure(str(e))
+            self.error = f"Unexpected error: {str(e)}"
+
 class PatientAPITool:
-    def __init__(self, mcp_server_url: str):
+    # Message of results cut short by the request's Deadline
+    DEADLINE_MESSAGE = "Request timed out"
+    
+    def __init__(self, mcp_server_url: str,
+                 pool_connections: int = DEFAULT_POOL_CONNECTIONS,
+                 pool_maxsize: int = DEFAULT_POOL_MAXSIZE,
+                 pool_block: bool = False,
+                 keep_alive: bool = True,
+                 coalesce_requests: bool = True,
+                 cache_ttl_seconds: float = 0,
+                 cache_max_bytes: int = 50 * 1024 * 1024,
+                 cache_stale_grace_seconds: float = 0,
+                 circuit_breaker: Optional[CircuitBreaker] = None,
+                 data_mode: str = 'passthrough',
+                 mirror_sync_seconds: float = 300,
+                 mirror_sync_max_seconds: Optional[float] = None,
+                 snapshot_path: str = '',
+                 snapshot_max_age_seconds: float = 86400):
         self.mcp_server_url = mcp_server_url.rstrip('/')
         self.timeout = 30
         
+        # Concurrent identical get_patients calls share one upstream request
+        self.coalesce_requests = coalesce_requests
+        self.singleflight = SingleFlight()
+        
+        # Optional TTL + LRU cache of successful results (cache_ttl_seconds=0 disables).
+        # Past the TTL, entries are served stale for the grace period while a background refresh runs.
+        self.result_cache = None
+        if cache_ttl_seconds > 0:
+            self.result_cache = PatientResultCache(cache_max_bytes, cache_ttl_seconds, cache_stale_grace_seconds)
+        self._refreshing = set()
+        self._refreshing_lock = threading.Lock()
+        self._refresh_tasks = set()
+        
+        # Fail fast while the MCP tunnel is down instead of waiting out every timeout
+        self.circuit_breaker = circuit_breaker or CircuitBreaker()
+        
+        # 'mirror' answers filters from a local indexed copy of all patients; 'passthrough' always asks MCP
+        self.mirror = PatientMirror()
+        self.data_mode = 'passthrough'
+        self.mirror_sync = MirrorSync(self, mirror_sync_seconds, snapshot_path, mirror_sync_max_seconds)
+        # A recent on-disk snapshot lets a fresh worker answer from the mirror before its first load
+        if snapshot_path:
+            self._attach_snapshot(snapshot_path, snapshot_max_age_seconds)
+        
+        # Shared keep-alive session - avoids a TCP/TLS handshake per chat message
+        self.session = get_session(
+            self.mcp_server_url,
+            pool_connections=pool_connections,
+            pool_maxsize=pool_maxsize,
+            pool_block=pool_block,
+            keep_alive=keep_alive
+        )
+        self.pool_maxsize = pool_maxsize
+        self.keep_alive = keep_alive
+        self._async_session = None
+        
         # Add headers for ngrok
         self.headers = {
             'Content-Type': 'application/json',
@@ -81,23 +234,252 @@ class PatientAPITool:
         }
         
         print(f"🔧 PatientAPITool initialized with URL: {self.mcp_server_url}")
+        
+        if data_mode != 'passthrough':
+            self.set_data_mode(data_mode)
+    
+    def get_patients(self, deadline: Optional[Deadline] = None, **filters) -> Dict[str, Any]:
+        """Get patients with optional filters (a timed-out result once deadline runs out)"""
+        return self._get_patients(filters, as_table=False, deadline=deadline)
+    
+    def get_patients_table(self, deadline: Optional[Deadline] = None, **filters) -> Dict[str, Any]:
+        """Like get_patients, but 'Data' is a read-only PatientTable (shared with the cache, no per-row copies)"""
+        return self._get_patients(filters, as_table=True, deadline=deadline)
+    
+    def _get_patients(self, filters: Dict[str, Any], as_table: bool, deadline: Optional[Deadline] = None) -> Dict[str, Any]:
+        deadline = deadline or Deadline()
+        # Clean filters - remove None/empty values
+        clean_filters = {k: v for k, v in filters.items() if v is not None and str(v).strip()}
+        
+        mirrored = self._mirror_result(clean_filters, as_table)
+        if mirrored is not None:
+            return mirrored
+        
+        key = filters_key(clean_filters)
+        cached, stale = self._cached_result(key, clean_filters, as_table)
+        if cached is not None:
+            if stale:
+                self._refresh_in_background(key, clean_filters)
+            return cached
+        
+        shared = False
+        if self.coalesce_requests:
+            try:
+                result, shared = self._coalesced_fetch(key, clean_filters, deadline)
+            except TimeoutError:
+                print(f"⏰ Deadline reached waiting on the in-flight request: {clean_filters}")
+                return self._deadline_result()
+        else:
+            result = self._fetch_and_store(key, clean_filters, deadline)
+        
+        if as_table:
+            return self._as_table(result)
+        # Shared and cached results must not see the caller's row annotations
+        if shared or self.result_cache is not None:
+            return self._copy_result(result)
+        return result
+    
+    def _cached_result(self, key: str, clean_filters: Dict[str, Any], as_table: bool = False):
+        """(copy of cached result, is_stale), or (None, False) on a miss"""
+        if self.result_cache is None:
+            return None, False
+        canonical = canonicalize_filters(clean_filters)
+        cached, state, age = self.result_cache.lookup(key, filters=canonical)
+        if cached is None:
+            return None, False
+        
+        if state == PatientResultCache.CONTAINED:
+            # Cached superset (e.g. 'jo' for 'john') - narrow it locally
+            table = cached['Data']
+            matched = table.filter(canonical)
+            rows = table.take(matched) if as_table else table.to_rows(matched)
+            print(f"💾 Containment cache hit for filters: {key} ({len(rows)} patients)")
+            return {"Success": True, "Message": f"{len(rows)} patients found", "Data": rows}, False
+        
+        result = self._as_table(cached) if as_table else self._copy_result(cached)
+        if state == PatientResultCache.STALE:
+            print(f"🕰️ Serving stale cache ({age:.0f}s old) for filters: {key or '(all patients)'}")
+            result['Stale'] = True
+            result['DataAgeSeconds'] = int(age)
+            return result, True
+        
+        print(f"💾 Cache hit for filters: {key or '(all patients)'}")
+        return result, False
+    
+    def _claim_refresh(self, key: str) -> bool:
+        """Only one background refresh per key at a time"""
+        with self._refreshing_lock:
+            if key in self._refreshing:
+                return False
+            self._refreshing.add(key)
+            return True
+    
+    def _release_refresh(self, key: str):
+        with self._refreshing_lock:
+            self._refreshing.discard(key)
+    
+    def _refresh_in_background(self, key: str, clean_filters: Dict[str, Any]):
+        """Revalidate a stale entry on a daemon thread"""
+        if not self._claim_refresh(key):
+            return
+        
+        def refresh():
+            try:
+                self.singleflight.do(key, lambda: self._fetch_and_store(key, clean_filters))
+            except Exception as e:
+                print(f"❌ Background cache refresh failed: {str(e)}")
+            finally:
+                self._release_refresh(key)
+        
+        threading.Thread(target=refresh, daemon=True).start()
+    
+    def _store_result(self, key: str, result: Dict[str, Any], clean_filters: Dict[str, Any]) -> Dict[str, Any]:
+        """Cache successful results only; returns the result as stored"""
+        if self.result_cache is None or not result.get('Success'):
+            return result
+        if self._has_rows(result.get('Data')):
+            # Rows are held column-wise (far smaller than dicts) and can be narrowed for containment hits
+            result = dict(result, Data=PatientTable.from_rows(result['Data']))
+            self.result_cache.put(key, result, filters=canonicalize_filters(clean_filters))
+        else:
+            self.result_cache.put(key, result)
+        return result
+    
+    @staticmethod
+    def _has_rows(data: Any) -> bool:
+        return isinstance(data, list) and all(isinstance(row, dict) for row in data)
+    
+    def _as_table(self, result: Dict[str, Any]) -> Dict[str, Any]:
+        """Result with 'Data' as a PatientTable (row lists are converted; tables are shared read-only)"""
+        if self._has_rows(result.get('Data')):
+            return dict(result, Data=PatientTable.from_rows(result['Data']))
+        return dict(result)
+    
+    def _coalesced_fetch(self, key: str, clean_filters: Dict[str, Any], deadline: Deadline):
+        """(result, shared) of the in-flight request for key, or of a new one run under this caller's deadline.
+
+        The leader's request runs under the leader's deadline. A follower that
+        gets the leader's timed-out result back while it still has time of its
+        own tries again, leading a request of its own or joining a newer one.
+        """
+        while True:
+            result, shared = self.singleflight.do(key, lambda: self._fetch_and_store(key, clean_filters, deadline),
+                                                  timeout=deadline.timeout())
+            if not shared:
+                return result, False
+            print(f"🔗 Coalesced get_patients call onto in-flight request: {clean_filters}")
+            if not (result.get('TimedOut') and not deadline.expired()):
+                return result, True
+            print(f"🔁 In-flight request ran out of its own deadline; retrying under ours: {clean_filters}")
+    
+    def _fetch_and_store(self, key: str, clean_filters: Dict[str, Any], deadline: Optional[Deadline] = None) -> Dict[str, Any]:
+        result = self._fetch_patients(clean_filters, deadline)
+        return self._store_result(key, result, clean_filters)
+    
+    def set_data_mode(self, mode: str):
+        """Switch between 'mirror' and 'passthrough'; mirror mode loads the mirror and keeps it synced in the background"""
+        if mode not in ('mirror', 'passthrough'):
+            raise ValueError(f"Unknown data mode: {mode}")
+        self.data_mode = mode
+        print(f"🪞 Patient data mode: {mode}")
+        if mode == 'mirror':
+            self.mirror_sync.start()
+        else:
+            self.mirror_sync.stop()
+    
+    def _attach_snapshot(self, path: str, max_age_seconds: float):
+        from tools.patient_snapshot import PatientSnapshot
+        
+        try:
+            snapshot = PatientSnapshot(path)
+        except FileNotFoundError:
+            return
+        except (OSError, ValueError) as e:
+            print(f"⚠️ Ignoring patient snapshot {path}: {e}")
+            return
+        if max_age_seconds > 0 and snapshot.age_seconds() > max_age_seconds:
+            print(f"⚠️ Ignoring patient snapshot {path}: {snapshot.age_seconds():.0f}s old")
+            return
+        self.mirror.attach_snapshot(snapshot)
+        print(f"💽 Patient snapshot mapped: {snapshot.rows} rows, {snapshot.age_seconds():.0f}s old")
+    
+    def load_mirror(self) -> Dict[str, Any]:
+        """Forced full reload of every patient from /patients into the local mirror"""
+        return self.mirror_sync.resync()
+    
+    def sync_mirror(self) -> Dict[str, Any]:
+        """Incremental sync of the local mirror (merges only changed rows)"""
+        return self.mirror_sync.sync_now()
+    
+    def _mirror_result(self, clean_filters: Dict[str, Any], as_table: bool = False) -> Optional[Dict[str, Any]]:
+        """Answer from the local mirror when in mirror mode and the filters allow it"""
+        if self.data_mode != 'mirror':
+            return None
+        rows = self.mirror.query(clean_filters)
+        if rows is None:
+            return None
+        print(f"🪞 Answered from local mirror: {len(rows)} patients for {clean_filters}")
+        return {
+            "Success": True,
+            "Message": f"{len(rows)} patients found",
+            "Data": PatientTable.from_rows(rows) if as_table else [dict(row) for row in rows],
+            "Source": "mirror"
+        }
+    
+    def stream_patients(self, deadline: Optional[Deadline] = None, **filters) -> PatientStream:
+        """Like get_patients, but rows are decoded incrementally from the HTTP body.
+        
+        Bypasses the result cache and request coalescing - meant for large
+        result sets that should never be held in memory as a whole.
+        """
+        clean_filters = {k: v for k, v in filters.items() if v is not None and str(v).strip()}
+        return PatientStream(self, clean_filters, deadline=deadline)
+
+    def local_patients(self, **filters) -> Optional[Dict[str, Any]]:
+        """get_patients_table answer from the mirror or the result cache, or None when only MCP can answer"""
+        clean_filters = {k: v for k, v in filters.items() if v is not None and str(v).strip()}
+
+        mirrored = self._mirror_result(clean_filters, as_table=True)
+        if mirrored is not None:
+            return mirrored
+
+        key = filters_key(clean_filters)
+        cached, stale = self._cached_result(key, clean_filters, as_table=True)
+        if stale:
+            self._refresh_in_background(key, clean_filters)
+        return cached
+
+    @staticmethod
+    def _copy_result(result: Dict[str, Any]) -> Dict[str, Any]:
+        """Per-caller copy of a shared result - formatting adds keys to each row"""
+        copied = dict(result)
+        for key in ('Data', 'patients'):
+            if isinstance(copied.get(key), PatientTable):
+                copied[key] = copied[key].to_rows()
+            elif isinstance(copied.get(key), list):
+                copied[key] = [dict(row) if isinstance(row, dict) else row for row in copied[key]]
+        return copied
     
-    def get_patients(self, **filters) -> Dict[str, Any]:
-        """Get patients with optional filters"""
+    def _fetch_patients(self, clean_filters: Dict[str, Any], deadline: Optional[Deadline] = None) -> Dict[str, Any]:
+        """POST the filters to the MCP /patients endpoint, waiting no longer than the deadline allows"""
+        deadline = deadline or Deadline()
+        if deadline.expired():
+            return self._deadline_result()
+        if not self.circuit_breaker.allow_request():
+            return self._circuit_open_result()
+        
+        deadline_bound = deadline.limits(self.timeout)
         try:
             url = f"{self.mcp_server_url}/patients"
             
-            # Clean filters - remove None/empty values
-            clean_filters = {k: v for k, v in filters.items() if v is not None and str(v).strip()}
-            
             print(f"🔍 Making request to: {url}")
             print(f"📋 Filters: {clean_filters}")
             
-            response = requests.post(
+            response = self.session.post(
                 url, 
                 json=clean_filters,
                 headers=self.headers,
-                timeout=self.timeout
+                timeout=deadline.timeout(self.timeout)
             )
             
             print(f"📡 Response status: {response.status_code}")
@@ -105,9 +487,15 @@ class PatientAPITool:
             if response.status_code == 200:
                 data = response.json()
                 print(f"✅ Successfully retrieved {len(data.get('patients', []))} patients")
+                self.circuit_breaker.record_success()
                 return data
             else:
                 print(f"❌ API Error: {response.status_code} - {response.text}")
+                # 4xx means a bad request, not an unhealthy server
+                if response.status_code >= 500:
+                    self.circuit_breaker.record_failure(f"HTTP {response.status_code}")
+                else:
+                    self.circuit_breaker.record_success()
                 return {
                     "patients": [],
                     "total_count": 0,
@@ -115,7 +503,12 @@ class PatientAPITool:
                 }
                 
         except requests.exceptions.Timeout:
+            if deadline_bound:
+                # Our own budget ran out - says nothing about the server's health
+                self.circuit_breaker.release_probe()
+                return self._deadline_result()
             print(f"⏰ Request timeout after {self.timeout} seconds")
+            self.circuit_breaker.record_failure("timeout")
             return {
                 "patients": [],
                 "total_count": 0,
@@ -123,6 +516,196 @@ class PatientAPITool:
             }
         except requests.exceptions.ConnectionError:
             print(f"🔌 Connection error to MCP server")
+            self.circuit_breaker.record_failure("connection error")
+            return {
+                "patients": [],
+                "total_count": 0,
+                "error": "Cannot connect to MCP server"
+            }
+        except Exception as e:
+            print(f"❌ Unexpected error: {str(e)}")
+            self.circuit_breaker.record_failure(str(e))
+            return {
+                "patients": [],
+                "total_count": 0,
+                "error": f"Unexpected error: {str(e)}"
+            }
+    
+    def _deadline_result(self) -> Dict[str, Any]:
+        """Fast-fail result once the request's deadline has run out"""
+        print(f"⏰ Deadline reached - not waiting for the MCP server")
+        return {"Success": False, "Message": self.DEADLINE_MESSAGE, "Data": None, "TimedOut": True}
+    
+    def _circuit_open_result(self) -> Dict[str, Any]:
+        """Fast-fail result while the breaker is open"""
+        retry_after = self.circuit_breaker.retry_after()
+        print(f"🚫 MCP circuit open - failing fast (retry in {retry_after}s)")
+        return {
+            "Success": False,
+            "Message": f"The patient database is temporarily unavailable. Please try again in {retry_after or 'a few'} seconds.",
+            "Data": None,
+            "CircuitOpen": True
+        }
+    
+    async def _get_async_session(self):
+        """Lazily create the aiohttp session (must happen inside the running event loop)"""
+        import aiohttp
+        
+        if self._async_session is None or self._async_session.closed:
+            connector = aiohttp.TCPConnector(
+                limit_per_host=self.pool_maxsize,
+                force_close=not self.keep_alive
+            )
+            self._async_session = aiohttp.ClientSession(
+                connector=connector,
+                headers=self.headers,
+                timeout=aiohttp.ClientTimeout(total=self.timeout)
+            )
+        return self._async_session
+    
+    async def close_async(self):
+        """Close the aiohttp session on event loop shutdown"""
+        if self._async_session is not None and not self._async_session.closed:
+            await self._async_session.close()
+        self._async_session = None
+    
+    async def get_patients_async(self, deadline: Optional[Deadline] = None, **filters) -> Dict[str, Any]:
+        """Async variant of get_patients - same filters and result shape"""
+        return await self._get_patients_async(filters, as_table=False, deadline=deadline)
+    
+    async def get_patients_table_async(self, deadline: Optional[Deadline] = None, **filters) -> Dict[str, Any]:
+        """Async variant of get_patients_table"""
+        return await self._get_patients_async(filters, as_table=True, deadline=deadline)
+    
+    async def _get_patients_async(self, filters: Dict[str, Any], as_table: bool,
+                                  deadline: Optional[Deadline] = None) -> Dict[str, Any]:
+        deadline = deadline or Deadline()
+        # Clean filters - remove None/empty values
+        clean_filters = {k: v for k, v in filters.items() if v is not None and str(v).strip()}
+        
+        mirrored = self._mirror_result(clean_filters, as_table)
+        if mirrored is not None:
+            return mirrored
+        
+        key = filters_key(clean_filters)
+        cached, stale = self._cached_result(key, clean_filters, as_table)
+        if cached is not None:
+            if stale:
+                self._refresh_in_background_async(key, clean_filters)
+            return cached
+        
+        shared = False
+        if self.coalesce_requests:
+            try:
+                result, shared = await self._coalesced_fetch_async(key, clean_filters, deadline)
+            except TimeoutError:
+                print(f"⏰ Deadline reached waiting on the in-flight request: {clean_filters}")
+                return self._deadline_result()
+        else:
+            result = await self._fetch_and_store_async(key, clean_filters, deadline)
+        
+        if as_table:
+            return self._as_table(result)
+        if shared or self.result_cache is not None:
+            return self._copy_result(result)
+        return result
+    
+    def _refresh_in_background_async(self, key: str, clean_filters: Dict[str, Any]):
+        """Revalidate a stale entry as a task on the running event loop"""
+        import asyncio
+        
+        if not self._claim_refresh(key):
+            return
+        
+        async def refresh():
+            try:
+                await self.singleflight.do_async(key, lambda: self._fetch_and_store_async(key, clean_filters))
+            except Exception as e:
+                print(f"❌ Background cache refresh failed: {str(e)}")
+            finally:
+                self._release_refresh(key)
+        
+        task = asyncio.get_running_loop().create_task(refresh())
+        self._refresh_tasks.add(task)
+        task.add_done_callback(self._refresh_tasks.discard)
+    
+    async def _coalesced_fetch_async(self, key: str, clean_filters: Dict[str, Any], deadline: Deadline):
+        """Async variant of _coalesced_fetch"""
+        while True:
+            result, shared = await self.singleflight.do_async(
+                key,
+                lambda: self._fetch_and_store_async(key, clean_filters, deadline),
+                timeout=deadline.timeout()
+            )
+            if not shared:
+                return result, False
+            print(f"🔗 Coalesced get_patients call onto in-flight request: {clean_filters}")
+            if not (result.get('TimedOut') and not deadline.expired()):
+                return result, True
+            print(f"🔁 In-flight request ran out of its own deadline; retrying under ours: {clean_filters}")
+    
+    async def _fetch_and_store_async(self, key: str, clean_filters: Dict[str, Any],
+                                     deadline: Optional[Deadline] = None) -> Dict[str, Any]:
+        result = await self._fetch_patients_async(clean_filters, deadline)
+        return self._store_result(key, result, clean_filters)
+    
+    async def _fetch_patients_async(self, clean_filters: Dict[str, Any],
+                                    deadline: Optional[Deadline] = None) -> Dict[str, Any]:
+        """POST the filters to the MCP /patients endpoint without blocking the event loop"""
+        import asyncio
+        import aiohttp
+        
+        deadline = deadline or Deadline()
+        if deadline.expired():
+            return self._deadline_result()
+        if not self.circuit_breaker.allow_request():
+            return self._circuit_open_result()
+        
+        deadline_bound = deadline.limits(self.timeout)
+        try:
+            url = f"{self.mcp_server_url}/patients"
+            
+            print(f"🔍 Making async request to: {url}")
+            print(f"📋 Filters: {clean_filters}")
+            
+            session = await self._get_async_session()
+            request_timeout = aiohttp.ClientTimeout(total=deadline.timeout(self.timeout))
+            async with session.post(url, json=clean_filters, timeout=request_timeout) as response:
+                print(f"📡 Response status: {response.status}")
+                
+                if response.status == 200:
+                    data = await response.json(content_type=None)
+                    print(f"✅ Successfully retrieved {len(data.get('patients', []))} patients")
+                    self.circuit_breaker.record_success()
+                    return data
+                else:
+                    text = await response.text()
+                    print(f"❌ API Error: {response.status} - {text}")
+                    # 4xx means a bad request, not an unhealthy server
+                    if response.status >= 500:
+                        self.circuit_breaker.record_failure(f"HTTP {response.status}")
+                    else:
+                        self.circuit_breaker.record_success()
+                    return {
+                        "patients": [],
+                        "total_count": 0,
+                        "error": f"API returned status {response.status}"
+                    }
+                    
+        except asyncio.TimeoutError:
+            if deadline_bound:
+                self.circuit_breaker.release_probe()
+                return self._deadline_result()
+            print(f"⏰ Request timeout after {self.timeout} seconds")
+            self.circuit_breaker.record_failure("timeout")
+            return {
+                "patients": [],
+                "total_count": 0,
+                "error": "Request timeout - MCP server may be slow"
+            }
+        except aiohttp.ClientConnectionError:
+            print(f"🔌 Connection error to MCP server")
+            self.circuit_breaker.record_failure("connection error")
             return {
                 "patients": [],
                 "total_count": 0,
@@ -130,6 +713,7 @@ class PatientAPITool:
             }
         except Exception as e:
             print(f"❌ Unexpected error: {str(e)}")
+            self.circuit_breaker.record_failure(str(e))
             return {
                 "patients": [],
                 "total_count": 0,
@@ -139,10 +723,10 @@ class PatientAPITool:
     def get_patient_details(self, patient_id: int) -> Dict[str, Any]:
         """Get specific patient details by ID - calls MCP server /patients/{id} endpoint"""
         try:
-            url = f"{self.base_url}/patients/{patient_id}"
+            url = f"{self.mcp_server_url}/patients/{patient_id}"
             print(f"🔍 Calling MCP server: {url}")
             
-            response = requests.get(url, timeout=30)
+            response = self.session.get(url, timeout=self.timeout)
             response.raise_for_status()
             
             result = response.json()
@@ -157,12 +741,12 @@ class PatientAPITool:
     def search_patients(self, search_params: Dict[str, Any]) -> Dict[str, Any]:
         """Search for patients with enhanced error handling"""
         try:
-            url = f"{self.base_url}/patients"
+            url = f"{self.mcp_server_url}/patients"
             print(f"🔍 Calling MCP server: {url}")
             print(f"📋 Search params: {search_params}")
             
             # Add timeout and better error handling
-            response = requests.get(url, params=search_params, timeout=30)
+            response = self.session.get(url, params=search_params, timeout=self.timeout)
             
             print(f"📡 Response status: {response.status_code}")
             print(f"📡 Response headers: {dict(response.headers)}")
@@ -187,77 +771,3 @@ class PatientAPITool:
         except Exception as e:
             print(f"❌ Unexpected error: {str(e)}")
             return {"Success": False, "Message": f"Unexpected error: {str(e)}", "Data": []}
-
-# Updated Function Schemas for OpenAI/OpenRouter
-PATIENT_FUNCTION_SCHEMAS = [
-    {
-        "name": "get_patients",
-        "description": "Search for patients using various criteria. All parameters are optional.",
-        "parameters": {
-            "type": "object",
-            "properties": {
-                "patient_name": {
-                    "type": "string",
-                    "description": "Patient full name to search for"
-                },
-                "patient_nhi": {
-                    "type": "string",
-                    "description": "Patient NHI number"
-                },
-                "patient_id": {
-                    "type": "integer",
-                    "description": "Specific patient ID"
-                },
-                "practice_id": {
-                    "type": "integer",
-                    "description": "Practice ID"
-                },
-                "provider_name": {
-                    "type": "string",
-                    "description": "Healthcare provider name"
-                },
-                "email": {
-                    "type": "string",
-                    "description": "Patient email"
-                },
-                "phone_number": {
-                    "type": "string",
-                    "description": "Patient phone number"
-                },
-                "gender": {
-                    "type": "string",
-                    "description": "Patient gender"
-                }
-            },
-            "required": []
-        }
-    }
-    # {
-    #     "name": "get_patient_details",
-    #     "description": "Get detailed information for a specific patient by ID",
-    #     "parameters": {
-    #         "type": "object",
-    #         "properties": {
-    #             "patient_id": {
-    #                 "type": "integer",
-    #                 "description": "The patient ID to retrieve details for"
-    #             }
-    #         },
-    #         "required": ["patient_id"]
-    #     }
-    # }
-]
-
-
-
-
-
-
-
-
-
-
-
-
-
-
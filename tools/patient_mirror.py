@@ -0,0 +1,279 @@
+import threading
+import time
+from array import array
+from typing import Any, Dict, Iterable, List, Optional
+
+# Columns [AI].[uspGetPatientDetailsMCP] matches with LIKE '%value%'
+LIKE_FIELDS = [
+    'PatientId', 'PatientNHI', 'PatientFullName', 'PatientDOB', 'FullAddress', 'ProviderName',
+    'Email', 'PhoneNumber', 'ChartNumber', 'EnrollmentDate', 'FundingStatus', 'EnrollmentStatus'
+]
+# Columns matched exactly
+EXACT_FIELDS = ['GenderName']
+# Date columns are compared in the yyyy-MM-dd form the stored procedure uses (any time part is ignored)
+DATE_FIELDS = {'PatientDOB', 'EnrollmentDate'}
+# Characters LIKE treats as wildcards - such filters are left to the MCP server
+LIKE_WILDCARDS = ('%', '_', '[')
+
+
+def like_text(field: str, value: Any) -> str:
+    """Casefolded column text as the stored procedure's LIKE sees it ('1990-05-01T00:00:00' -> '1990-05-01')"""
+    if value is None:
+        return ''
+    text = str(value)
+    if field in DATE_FIELDS:
+        text = text[:10]
+    return text.casefold()
+
+
+def _row_value(row: Dict[str, Any], field: str) -> str:
+    """like_text of a row's column (handles camelCase keys)"""
+    value = row.get(field)
+    if value is None:
+        value = row.get(field[0].lower() + field[1:])
+    return like_text(field, value)
+
+
+def patient_id(row: Dict[str, Any]) -> Any:
+    """Row key used to merge changes"""
+    value = row.get('PatientId')
+    return value if value is not None else row.get('patientId')
+
+
+class _ColumnIndex:
+    """Trigram substring index over the distinct values of one column.
+
+    Rows are grouped by distinct value first, so low-cardinality columns
+    (provider, gender, statuses) cost a handful of entries regardless of row
+    count. Needles shorter than three characters fall back to scanning the
+    distinct values. Row ids are kept in a set per value so merge() can move
+    a row between values in O(1).
+    """
+
+    def __init__(self, values: List[str]):
+        value_ids: Dict[str, int] = {}
+        rows_by_value: List[set] = []
+        for row_id, value in enumerate(values):
+            value_id = value_ids.get(value)
+            if value_id is None:
+                value_id = value_ids[value] = len(rows_by_value)
+                rows_by_value.append(set())
+            rows_by_value[value_id].add(row_id)
+
+        grams: Dict[str, List[int]] = {}
+        for value, value_id in value_ids.items():
+            for gram in {value[i:i + 3] for i in range(len(value) - 2)}:
+                grams.setdefault(gram, []).append(value_id)
+
+        self.value_ids = value_ids
+        self.values = list(value_ids)
+        self.rows_by_value = rows_by_value
+        self.grams = {gram: array('I', ids) for gram, ids in grams.items()}
+
+    def _rows_for(self, value_ids: Iterable[int]) -> set:
+        rows = set()
+        for value_id in value_ids:
+            rows.update(self.rows_by_value[value_id])
+        return rows
+
+    def contains(self, needle: str) -> set:
+        """Row ids whose value contains needle (already casefolded)"""
+        if len(needle) < 3:
+            return self._rows_for(i for i, value in enumerate(self.values) if needle in value)
+
+        postings = []
+        for gram in {needle[i:i + 3] for i in range(len(needle) - 2)}:
+            posting = self.grams.get(gram)
+            if posting is None:
+                return set()
+            postings.append(posting)
+        postings.sort(key=len)
+
+        candidates = set(postings[0])
+        for posting in postings[1:]:
+            candidates.intersection_update(posting)
+            if not candidates:
+                return set()
+        return self._rows_for(i for i in candidates if needle in self.values[i])
+
+    def equals(self, needle: str) -> set:
+        value_id = self.value_ids.get(needle)
+        return set(self.rows_by_value[value_id]) if value_id is not None else set()
+
+    def add(self, row_id: int, value: str):
+        value_id = self.value_ids.get(value)
+        if value_id is None:
+            value_id = self.value_ids[value] = len(self.values)
+            self.values.append(value)
+            self.rows_by_value.append(set())
+            for gram in {value[i:i + 3] for i in range(len(value) - 2)}:
+                self.grams.setdefault(gram, array('I')).append(value_id)
+        self.rows_by_value[value_id].add(row_id)
+
+    def discard(self, row_id: int, value: str):
+        value_id = self.value_ids.get(value)
+        if value_id is not None:
+            self.rows_by_value[value_id].discard(row_id)
+
+
+class PatientMirror:
+    """In-process copy of the patient dataset answering get_patients filters locally.
+
+    Mirrors the stored procedure's rules: LIKE '%value%' (case-insensitive)
+    on every column except GenderName, which must match exactly. Multiple
+    filters are ANDed and rows come back in load order. load() builds a new
+    index and swaps it in; merge() patches rows and indexes in place under the
+    lock, leaving removed rows as tombstones until the next full load.
+    Until the first load, an attached PatientSnapshot answers by scanning
+    its mapped columns instead.
+    """
+
+    # Rebuild from scratch once this share of row slots are tombstones
+    COMPACT_RATIO = 0.25
+
+    def __init__(self):
+        self._lock = threading.Lock()
+        self._rows: List[Dict[str, Any]] = []
+        self._indexes: Dict[str, _ColumnIndex] = {}
+        self._positions: Dict[Any, int] = {}
+        self._removed: set = set()
+        self._snapshot = None
+        self.merges = 0
+        self.loaded = False
+        self.loaded_at: Optional[float] = None
+        self.load_seconds = 0.0
+        self.queries = 0
+        self.fallbacks = 0
+
+    def load(self, rows: List[Dict[str, Any]]):
+        """Replace the mirror contents with a full patient list"""
+        start = time.perf_counter()
+        indexes = {field: _ColumnIndex([_row_value(row, field) for row in rows])
+                   for field in LIKE_FIELDS + EXACT_FIELDS}
+        positions = {patient_id(row): i for i, row in enumerate(rows)}
+        with self._lock:
+            self._rows = rows
+            self._indexes = indexes
+            self._positions = positions
+            self._removed = set()
+            self._snapshot = None
+            self.loaded = True
+            self.loaded_at = time.time()
+            self.load_seconds = time.perf_counter() - start
+        print(f"🪞 Patient mirror loaded: {len(rows)} rows in {self.load_seconds:.2f}s")
+
+    def merge(self, upserts: List[Dict[str, Any]], removed_ids: Iterable[Any]) -> int:
+        """Apply changed/new rows (matched by PatientId) and deletions; returns the new row count"""
+        fields = LIKE_FIELDS + EXACT_FIELDS
+        with self._lock:
+            rows, indexes, positions = self._rows, self._indexes, self._positions
+            for key in removed_ids:
+                position = positions.pop(key, None)
+                if position is None:
+                    continue
+                for field in fields:
+                    indexes[field].discard(position, _row_value(rows[position], field))
+                self._removed.add(position)
+
+            for row in upserts:
+                key = patient_id(row)
+                position = positions.get(key)
+                if position is None:
+                    # Patients not seen before go at the end, as the stored procedure returns them
+                    position = positions[key] = len(rows)
+                    rows.append(row)
+                    for field in fields:
+                        indexes[field].add(position, _row_value(row, field))
+                    continue
+                old = rows[position]
+                rows[position] = row
+                for field in fields:
+                    old_value, new_value = _row_value(old, field), _row_value(row, field)
+                    if old_value != new_value:
+                        indexes[field].discard(position, old_value)
+                        indexes[field].add(position, new_value)
+
+            self.merges += 1
+            live = len(rows) - len(self._removed)
+            compact = len(self._removed) > len(rows) * self.COMPACT_RATIO
+            if compact:
+                live_rows = [row for i, row in enumerate(rows) if i not in self._removed]
+
+        if compact:
+            self.load(live_rows)
+        return live
+
+    def attach_snapshot(self, snapshot):
+        """Serve queries from a mapped PatientSnapshot until the first full load"""
+        with self._lock:
+            if not self.loaded:
+                self._snapshot = snapshot
+
+    def rows(self) -> List[Dict[str, Any]]:
+        """Live rows in load order (shared dicts)"""
+        with self._lock:
+            return [row for i, row in enumerate(self._rows) if i not in self._removed]
+
+    def can_answer(self, filters: Dict[str, Any]) -> bool:
+        """True if every filter is a known column and free of LIKE wildcards"""
+        if not self.loaded and self._snapshot is None:
+            return False
+        for field, value in filters.items():
+            if field not in LIKE_FIELDS and field not in EXACT_FIELDS:
+                return False
+            if any(char in str(value) for char in LIKE_WILDCARDS):
+                return False
+        return True
+
+    def query(self, filters: Dict[str, Any]) -> Optional[List[Dict[str, Any]]]:
+        """Matching rows (shared dicts - copy before mutating), or None if the mirror can't answer"""
+        if not self.can_answer(filters):
+            with self._lock:
+                self.fallbacks += 1
+            return None
+
+        needles = {}
+        for field, value in filters.items():
+            needle = str(value).casefold()
+            if needle.strip():
+                # SQL Server '=' ignores trailing spaces
+                needles[field] = needle.rstrip() if field in EXACT_FIELDS else needle
+
+        with self._lock:
+            self.queries += 1
+            snapshot = self._snapshot
+            if snapshot is None:
+                return self._query_index(needles)
+        # Snapshots are immutable - scan without holding the lock
+        return snapshot.table.to_rows(snapshot.table.filter(needles))
+
+    def _query_index(self, needles: Dict[str, str]) -> List[Dict[str, Any]]:
+        rows, indexes = self._rows, self._indexes
+        matched = None
+        for field, needle in needles.items():
+            if field in EXACT_FIELDS:
+                row_ids = indexes[field].equals(needle)
+            else:
+                row_ids = indexes[field].contains(needle)
+            matched = row_ids if matched is None else matched & row_ids
+            if not matched:
+                return []
+
+        if matched is None:
+            return [row for i, row in enumerate(rows) if i not in self._removed]
+        return [rows[row_id] for row_id in sorted(matched)]
+
+    def stats(self) -> Dict[str, Any]:
+        with self._lock:
+            snapshot = self._snapshot
+            return {
+                'loaded': self.loaded,
+                'serving_from': 'index' if self.loaded else ('snapshot' if snapshot is not None else None),
+                'snapshot': snapshot.stats() if snapshot is not None else None,
+                'rows': snapshot.rows if snapshot is not None else len(self._rows) - len(self._removed),
+                'merges': self.merges,
+                'loaded_at': int(self.loaded_at) if self.loaded_at else None,
+                'load_seconds': round(self.load_seconds, 3),
+                'queries': self.queries,
+                'fallbacks': self.fallbacks
+            }
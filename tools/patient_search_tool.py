@@ -1,10 +1,34 @@
 import requests
-import json
-from typing import Dict, Any, Optional
+from typing import Dict, Any
+from tools.http_pool import get_session
+
+# Map common search terms to API parameters
+PARAM_MAPPING = {
+    'practice_id': 'PracticeId',
+    'patient_id': 'PatientId',
+    'patient_nhi': 'PatientNHI', 
+    'patient_name': 'PatientFullName',
+    'full_name': 'PatientFullName',
+    'name': 'PatientFullName',
+    'dob': 'PatientDOB',
+    'date_of_birth': 'PatientDOB',
+    'address': 'FullAddress',
+    'provider': 'ProviderName',
+    'provider_name': 'ProviderName',
+    'email': 'Email',
+    'phone': 'PhoneNumber',
+    'phone_number': 'PhoneNumber',
+    'chart_number': 'ChartNumber',
+    'enrollment_date': 'EnrollmentDate',
+    'funding_status': 'FundingStatus',
+    'enrollment_status': 'EnrollmentStatus',
+    'gender': 'GenderName'
+}
 
 class PatientSearchTool:
-    def __init__(self, base_url: str):
+    def __init__(self, base_url: str, **pool_options):
         self.base_url = base_url.rstrip('/')
+        self.session = get_session(self.base_url, **pool_options)
     
     def search_patients(self, **kwargs) -> Dict[str, Any]:
         """Search for patients using any combination of parameters"""
@@ -12,38 +36,15 @@ class PatientSearchTool:
             # Build parameters from kwargs
             params = {}
             
-            # Map common search terms to API parameters
-            param_mapping = {
-                'practice_id': 'PracticeId',
-                'patient_id': 'PatientId',
-                'patient_nhi': 'PatientNHI', 
-                'patient_name': 'PatientFullName',
-                'full_name': 'PatientFullName',
-                'name': 'PatientFullName',
-                'dob': 'PatientDOB',
-                'date_of_birth': 'PatientDOB',
-                'address': 'FullAddress',
-                'provider': 'ProviderName',
-                'provider_name': 'ProviderName',
-                'email': 'Email',
-                'phone': 'PhoneNumber',
-                'phone_number': 'PhoneNumber',
-                'chart_number': 'ChartNumber',
-                'enrollment_date': 'EnrollmentDate',
-                'funding_status': 'FundingStatus',
-                'enrollment_status': 'EnrollmentStatus',
-                'gender': 'GenderName'
-            }
-            
             # Convert kwargs to API parameters
             for key, value in kwargs.items():
                 if value is not None and value != '':
-                    api_param = param_mapping.get(key.lower(), key)
+                    api_param = PARAM_MAPPING.get(key.lower(), key)
                     params[api_param] = str(value)
             
             print(f"🔍 Searching patients with: {params}")
             
-            response = requests.get(f"{self.base_url}/patients", params=params)
+            response = self.session.get(f"{self.base_url}/patients", params=params)
             response.raise_for_status()
             return response.json()
             
@@ -0,0 +1,190 @@
+import json
+import mmap
+import os
+import struct
+import time
+from typing import Any, Dict, List, Optional, Tuple
+
+import numpy as np
+
+from tools.patient_table import PatientTable, HeapColumn, _Categories
+
+# File layout: header | directory (JSON) | padding | 64-byte aligned column blocks.
+# The directory lists every column with its kind and the (offset, nbytes) of
+# its blocks, relative to the start of the block section.
+SNAPSHOT_MAGIC = b'PTSNAP\0\0'
+SNAPSHOT_VERSION = 1
+_HEADER = struct.Struct('<8sIdQI')  # magic, version, created_at, row count, directory bytes
+_ALIGN = 64
+
+
+def _aligned(position: int) -> int:
+    return -(-position // _ALIGN) * _ALIGN
+
+
+class _BlockWriter:
+    """Collects column blocks and hands out their (offset, nbytes) in the block section"""
+
+    def __init__(self):
+        self.blocks: List[bytes] = []
+        self.size = 0
+
+    def add(self, data) -> Tuple[int, int]:
+        data = data.tobytes() if isinstance(data, np.ndarray) else bytes(data)
+        offset = self.size
+        self.blocks.append(data)
+        self.blocks.append(b'\0' * (_aligned(len(data)) - len(data)))
+        self.size += _aligned(len(data))
+        return offset, len(data)
+
+
+def _heap(texts: List[str]) -> Tuple[bytes, np.ndarray]:
+    """b'\\0'-terminated UTF-8 heap and its offsets (len(texts) + 1 entries)"""
+    encoded = [text.encode('utf-8') for text in texts]
+    offsets = np.zeros(len(encoded) + 1, dtype=np.int64)
+    np.cumsum([len(item) + 1 for item in encoded], out=offsets[1:])
+    return b''.join(item + b'\0' for item in encoded), offsets
+
+
+def _heap_entry(values: List[Any], blocks: _BlockWriter) -> Dict[str, Any]:
+    present = [value for value in values if value is not None]
+    if all(isinstance(value, str) for value in present):
+        kind, texts = 'str', ['' if value is None else value for value in values]
+    elif all(isinstance(value, int) and not isinstance(value, bool) for value in present):
+        kind, texts = 'int', ['' if value is None else str(value) for value in values]
+    else:
+        kind, texts = 'json', ['' if value is None else json.dumps(value) for value in values]
+
+    heap, offsets = _heap(texts)
+    entry = {
+        'kind': 'heap',
+        'type': kind,
+        'nulls': blocks.add(np.array([value is None for value in values], dtype=np.bool_)),
+        'offsets': blocks.add(offsets),
+        'heap': blocks.add(heap)
+    }
+    # Casefolded copy for substring search, only when folding changes something
+    folded = ['' if value is None else str(value).casefold() for value in values]
+    if folded != texts:
+        folded_heap, folded_offsets = _heap(folded)
+        entry['search_offsets'] = blocks.add(folded_offsets)
+        entry['search_heap'] = blocks.add(folded_heap)
+    return entry
+
+
+def write_snapshot(table: PatientTable, path: str, created_at: Optional[float] = None) -> int:
+    """Write table to path atomically (temp file + rename); returns the file size.
+
+    Processes that already mapped the previous file keep reading it until
+    they reopen the path.
+    """
+    blocks = _BlockWriter()
+    columns = []
+    for field in table.fields:
+        if field in table._dates:
+            suffixes = table._date_suffixes[field]
+            columns.append({
+                'field': field,
+                'kind': 'date',
+                'days': blocks.add(table._dates[field].astype('datetime64[D]').view(np.int64)),
+                'suffix_values': suffixes.values,
+                'suffix_codes': blocks.add(suffixes.codes.astype(np.int32)),
+                'exceptions': sorted(table._date_exceptions[field].items())
+            })
+            continue
+        column = table._columns.get(field)
+        if isinstance(column, _Categories):
+            columns.append({'field': field, 'kind': 'categorical', 'values': column.values,
+                            'codes': blocks.add(column.codes.astype(np.int32))})
+        else:
+            columns.append({'field': field, **_heap_entry(table.column(field), blocks)})
+
+    created_at = time.time() if created_at is None else created_at
+    directory = json.dumps({'fields': table.fields, 'columns': columns}, default=str).encode('utf-8')
+    header = _HEADER.pack(SNAPSHOT_MAGIC, SNAPSHOT_VERSION, created_at, len(table), len(directory))
+    padding = b'\0' * (_aligned(len(header) + len(directory)) - len(header) - len(directory))
+
+    directory_name = os.path.dirname(os.path.abspath(path))
+    os.makedirs(directory_name, exist_ok=True)
+    temp_path = f"{path}.{os.getpid()}.tmp"
+    try:
+        with open(temp_path, 'wb') as handle:
+            handle.write(header + directory + padding)
+            for block in blocks.blocks:
+                handle.write(block)
+            handle.flush()
+            os.fsync(handle.fileno())
+        os.replace(temp_path, path)
+    except BaseException:
+        if os.path.exists(temp_path):
+            os.remove(temp_path)
+        raise
+    return len(header) + len(directory) + len(padding) + blocks.size
+
+
+class PatientSnapshot:
+    """Read-only view of a snapshot file, mapped with mmap.
+
+    Opening only parses the header and directory: numeric columns are NumPy
+    views of the mapping and text columns are HeapColumns over it, so the
+    pages are shared through the OS page cache by every process that maps
+    the same file, and nothing is decoded until a lookup needs it.
+    """
+
+    def __init__(self, path: str):
+        self.path = path
+        with open(path, 'rb') as handle:
+            self._mmap = mmap.mmap(handle.fileno(), 0, access=mmap.ACCESS_READ)
+        buffer = self._mmap
+        if len(buffer) < _HEADER.size:
+            raise ValueError(f"Not a patient snapshot: {path}")
+        magic, self.version, self.created_at, self.rows, directory_size = _HEADER.unpack_from(buffer, 0)
+        if magic != SNAPSHOT_MAGIC:
+            raise ValueError(f"Not a patient snapshot: {path}")
+        if self.version != SNAPSHOT_VERSION:
+            raise ValueError(f"Unsupported patient snapshot version {self.version} (expected {SNAPSHOT_VERSION})")
+        directory = json.loads(buffer[_HEADER.size:_HEADER.size + directory_size])
+        self._data = _aligned(_HEADER.size + directory_size)
+        self.size = len(buffer)
+        self.table = self._build_table(directory)
+
+    def _array(self, block, dtype) -> np.ndarray:
+        offset, nbytes = block
+        return np.frombuffer(self._mmap, dtype=dtype, count=nbytes // np.dtype(dtype).itemsize,
+                             offset=self._data + offset)
+
+    def _build_table(self, directory: Dict[str, Any]) -> PatientTable:
+        columns: Dict[str, Any] = {}
+        dates: Dict[str, np.ndarray] = {}
+        date_suffixes: Dict[str, _Categories] = {}
+        date_exceptions: Dict[str, Dict[int, Any]] = {}
+        for entry in directory['columns']:
+            field = entry['field']
+            if entry['kind'] == 'date':
+                dates[field] = self._array(entry['days'], np.int64).view('datetime64[D]')
+                date_suffixes[field] = _Categories.from_codes(entry['suffix_values'],
+                                                              self._array(entry['suffix_codes'], np.int32))
+                date_exceptions[field] = {i: value for i, value in entry['exceptions']}
+            elif entry['kind'] == 'categorical':
+                columns[field] = _Categories.from_codes(entry['values'], self._array(entry['codes'], np.int32))
+            else:
+                search = None
+                if 'search_heap' in entry:
+                    search = (self._data + entry['search_heap'][0], self._array(entry['search_offsets'], np.int64))
+                columns[field] = HeapColumn(self._mmap, self._data + entry['heap'][0],
+                                            self._array(entry['offsets'], np.int64),
+                                            self._array(entry['nulls'], np.bool_), entry['type'], search)
+        return PatientTable(directory['fields'], columns, dates, date_suffixes, date_exceptions, self.rows)
+
+    def age_seconds(self) -> float:
+        return max(0.0, time.time() - self.created_at)
+
+    def stats(self) -> Dict[str, Any]:
+        return {
+            'path': self.path,
+            'version': self.version,
+            'rows': self.rows,
+            'bytes': self.size,
+            'created_at': int(self.created_at),
+            'age_seconds': round(self.age_seconds(), 1)
+        }
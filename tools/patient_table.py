@@ -0,0 +1,409 @@
+from datetime import date
+from typing import Any, Dict, Iterable, List, Optional, Sequence, Tuple
+
+import numpy as np
+
+from tools.patient_mirror import DATE_FIELDS, EXACT_FIELDS
+
+# Columns with a handful of distinct values - stored as int codes into a category list
+CATEGORICAL_FIELDS = ('ProviderName', 'GenderName', 'FundingStatus', 'EnrollmentStatus')
+# DATE_FIELDS are stored as datetime64[D]; the text after the date (e.g. 'T00:00:00') is kept as a
+# category for to_rows() and not matched by filter() (see patient_mirror.like_text)
+
+_NAT = np.datetime64('NaT', 'D')
+# Set by add_age_fields; these keep their camelCase names in canonical rows
+AGE_FIELDS = ('calculatedAge', 'formattedDOB')
+
+
+def canonical_field(key: str) -> str:
+    """'patientFullName' -> 'PatientFullName' (MCP rows may use either casing)"""
+    return key[:1].upper() + key[1:]
+
+
+def canonical_row(row: Dict[str, Any]) -> Dict[str, Any]:
+    """Copy of an MCP row with canonical keys (the calculated AGE_FIELDS are left as they are)"""
+    return {key if key in AGE_FIELDS else canonical_field(key): value for key, value in row.items()}
+
+
+def parse_iso_dates(values: Sequence[Any]) -> np.ndarray:
+    """Parse ISO date / datetime values in one pass; missing or malformed values become NaT.
+
+    Only the leading yyyy-MM-dd is read, so '1990-05-01', '1990-05-01T00:00:00'
+    and '1990-05-01T00:00:00Z' all give 1990-05-01.
+    """
+    text = np.array([str(value)[:10] if value else '' for value in values], dtype='U10')
+    try:
+        dates = text.astype('datetime64[D]')
+    except ValueError:
+        dates = np.array([_parse_one(item) for item in text], dtype='datetime64[D]')
+    # NumPy also accepts partial dates ('1990-05') and words ('today'); only exact yyyy-MM-dd counts
+    dates[dates.astype('U32') != text] = _NAT
+    return dates
+
+
+def _parse_one(text: str) -> np.datetime64:
+    try:
+        return np.datetime64(text, 'D')
+    except ValueError:
+        return _NAT
+
+
+def ages_on(dates: np.ndarray, today: Optional[date] = None) -> np.ndarray:
+    """Whole years between each date and today (one reference date); meaningless where the date is NaT"""
+    today = today or date.today()
+    years = dates.astype('datetime64[Y]').astype(np.int64) + 1970
+    months = dates.astype('datetime64[M]')
+    month_of_year = months.astype(np.int64) % 12 + 1
+    day_of_month = (dates - months.astype('datetime64[D]')).astype(np.int64) + 1
+    before_birthday = (month_of_year * 100 + day_of_month) > (today.month * 100 + today.day)
+    return today.year - years - before_birthday
+
+
+def _age_cells(values: Sequence[Any], dates: np.ndarray, today: Optional[date]) -> Tuple[List[Any], List[str]]:
+    ages = ages_on(dates, today).tolist()
+    formatted = dates.astype('U10').tolist()
+    ages_out, dobs_out = [], []
+    for value, age, day, bad in zip(values, ages, formatted, np.isnat(dates).tolist()):
+        if not value:
+            ages_out.append('Unknown')
+            dobs_out.append('Unknown')
+        elif bad:
+            ages_out.append('Unknown')
+            dobs_out.append(str(value)[:10])
+        else:
+            ages_out.append(age)
+            dobs_out.append(day)
+    return ages_out, dobs_out
+
+
+def age_fields(dob_values: Sequence[Any], today: Optional[date] = None) -> Tuple[List[Any], List[str]]:
+    """calculatedAge and formattedDOB for a whole column of DOB values in one pass.
+
+    Ages are computed against a single reference date. Missing DOBs give
+    'Unknown' for both; malformed ones give 'Unknown' and the first ten
+    characters of the raw value.
+    """
+    return _age_cells(dob_values, parse_iso_dates(dob_values), today)
+
+
+def add_age_fields(patients: List[Dict[str, Any]], today: Optional[date] = None) -> List[Dict[str, Any]]:
+    """Set calculatedAge and formattedDOB on every patient row (PatientDOB or patientDOB)"""
+    dobs = [patient.get('PatientDOB') or patient.get('patientDOB') for patient in patients]
+    ages, formatted = age_fields(dobs, today)
+    for patient, age, dob in zip(patients, ages, formatted):
+        patient['calculatedAge'] = age
+        patient['formattedDOB'] = dob
+    return patients
+
+
+class _Categories:
+    """Dictionary encoding: int32 codes into a list of distinct values (-1 = missing)"""
+
+    def __init__(self, values: Iterable[Any]):
+        lookup: Dict[Any, int] = {}
+        self.values: List[Any] = []
+        codes = []
+        for value in values:
+            if value is None:
+                codes.append(-1)
+                continue
+            code = lookup.get(value)
+            if code is None:
+                code = lookup[value] = len(self.values)
+                self.values.append(value)
+            codes.append(code)
+        self.codes = np.array(codes, dtype=np.int32)
+        # Trailing None so code -1 decodes to None with a single take()
+        self._lookup = np.empty(len(self.values) + 1, dtype=object)
+        self._lookup[:len(self.values)] = self.values
+
+    def decode(self, indices: np.ndarray) -> List[Any]:
+        return self._lookup[self.codes[indices]].tolist()
+
+    @classmethod
+    def from_codes(cls, values: List[Any], codes: np.ndarray) -> '_Categories':
+        """Wrap existing codes (e.g. a read-only array from a snapshot) without re-encoding"""
+        categories = cls.__new__(cls)
+        categories.values, categories.codes = values, codes
+        categories._lookup = np.empty(len(values) + 1, dtype=object)
+        categories._lookup[:len(values)] = values
+        return categories
+
+
+class HeapColumn:
+    """Text column stored as b'\\0'-terminated UTF-8 values back to back in a buffer (e.g. an mmap'd snapshot).
+
+    Values are decoded only when asked for, so the buffer stays shared
+    between processes. offsets are relative to base (offsets[i] is where
+    value i starts, offsets[-1] the end of the heap). kind says how the text
+    maps back to Python values: 'str', 'int' or 'json'. search is an optional
+    (base, offsets) heap of casefolded text in the same buffer for contains(),
+    needed only when folding changes something.
+    """
+
+    def __init__(self, buffer, base: int, offsets: np.ndarray, nulls: np.ndarray, kind: str = 'str',
+                 search: Optional[Tuple[int, np.ndarray]] = None):
+        self.buffer = buffer
+        self.base = base
+        self.offsets = offsets
+        self.nulls = nulls
+        self.kind = kind
+        self.search = search or (base, offsets)
+
+    def __len__(self) -> int:
+        return len(self.nulls)
+
+    def decode(self, indices: np.ndarray) -> List[Any]:
+        import json
+
+        buffer, base = self.buffer, self.base
+        convert = {'int': int, 'json': json.loads}.get(self.kind)
+        values = []
+        for start, end, null in zip(self.offsets[indices].tolist(), self.offsets[indices + 1].tolist(),
+                                    self.nulls[indices].tolist()):
+            if null:
+                values.append(None)
+                continue
+            text = str(buffer[base + start:base + end - 1], 'utf-8')
+            values.append(convert(text) if convert else text)
+        return values
+
+    def take(self, indices: np.ndarray) -> np.ndarray:
+        """Plain object array of the selected values"""
+        column = np.empty(len(indices), dtype=object)
+        column[:] = self.decode(indices)
+        return column
+
+    def contains(self, needle: str, indices: np.ndarray) -> np.ndarray:
+        """Mask over indices: casefolded value contains needle (already casefolded)"""
+        pattern = needle.encode('utf-8')
+        if not pattern or b'\0' in pattern or len(indices) * 8 < len(self):
+            # Few rows left (or an odd needle) - decoding them beats scanning the heap
+            folded = ['' if value is None else str(value).casefold() for value in self.decode(indices)]
+            return np.fromiter((needle in value for value in folded), dtype=bool, count=len(indices))
+
+        # One find() over the whole heap, skipping to the next value after each hit
+        buffer = self.buffer
+        base, offsets = self.search
+        end = base + int(offsets[-1])
+        hits = []
+        position = buffer.find(pattern, base, end)
+        while position >= 0:
+            hits.append(position - base)
+            terminator = buffer.find(b'\0', position + len(pattern), end)
+            if terminator < 0:
+                break
+            position = buffer.find(pattern, terminator + 1, end)
+        matched = np.zeros(len(self), dtype=bool)
+        matched[np.searchsorted(offsets, np.array(hits, dtype=np.int64), side='right') - 1] = True
+        return matched[indices]
+
+    @property
+    def nbytes(self) -> int:
+        """Heap, offset and null-mask bytes (shared page cache when mapped from a file)"""
+        total = self.offsets.nbytes + self.nulls.nbytes + int(self.offsets[-1])
+        if self.search[1] is not self.offsets:
+            total += self.search[1].nbytes + int(self.search[1][-1])
+        return total
+
+
+class PatientTable:
+    """Column-oriented, read-only patient result set.
+
+    Field casing is canonicalized once at ingest ('patientDOB' -> 'PatientDOB').
+    Low-cardinality columns are dictionary-encoded, PatientDOB and
+    EnrollmentDate are datetime64[D] arrays (their original text is still
+    reproducible by to_rows), everything else is an object array (or a
+    HeapColumn when loaded from a snapshot). Filtering
+    and age calculation work on whole columns; rows are only rebuilt as
+    dicts when a caller asks for them.
+    """
+
+    def __init__(self, fields: List[str], columns: Dict[str, Any], dates: Dict[str, np.ndarray],
+                 date_suffixes: Dict[str, _Categories], date_exceptions: Dict[str, Dict[int, Any]], length: int):
+        self.fields = fields
+        self._columns = columns
+        self._dates = dates
+        self._date_suffixes = date_suffixes
+        self._date_exceptions = date_exceptions
+        self._length = length
+        self._nbytes: Optional[int] = None
+
+    @classmethod
+    def from_rows(cls, rows: List[Dict[str, Any]]) -> 'PatientTable':
+        """Build a table from MCP 'Data' rows"""
+        fields: List[str] = []
+        keys = set()
+        for row in rows:
+            if row.keys() <= keys:
+                continue
+            for key in row:
+                if key not in keys:
+                    keys.add(key)
+                    field = canonical_field(key)
+                    if field not in fields:
+                        fields.append(field)
+
+        columns: Dict[str, Any] = {}
+        dates: Dict[str, np.ndarray] = {}
+        date_suffixes: Dict[str, _Categories] = {}
+        date_exceptions: Dict[str, Dict[int, Any]] = {}
+        for field in fields:
+            camel = field[:1].lower() + field[1:]
+            if camel in keys and camel != field:
+                values = [row.get(field) or row.get(camel, row.get(field)) for row in rows]
+            else:
+                values = [row.get(field) for row in rows]
+            if field in DATE_FIELDS:
+                parsed = parse_iso_dates(values)
+                dates[field] = parsed
+                # Anything that isn't '<yyyy-MM-dd><suffix>' text is kept verbatim
+                suffixes = [value[10:] if isinstance(value, str) else None for value in values]
+                exceptions = {}
+                for i in np.flatnonzero(np.isnat(parsed)).tolist():
+                    suffixes[i] = None
+                    if values[i] is not None:
+                        exceptions[i] = values[i]
+                for i, value in enumerate(values):
+                    if suffixes[i] is None and value is not None and i not in exceptions:
+                        exceptions[i] = value
+                date_suffixes[field] = _Categories(suffixes)
+                date_exceptions[field] = exceptions
+            elif field in CATEGORICAL_FIELDS:
+                columns[field] = _Categories(values)
+            else:
+                column = np.empty(len(values), dtype=object)
+                column[:] = values
+                columns[field] = column
+        return cls(fields, columns, dates, date_suffixes, date_exceptions, len(rows))
+
+    def __len__(self) -> int:
+        return self._length
+
+    def _indices(self, indices) -> np.ndarray:
+        if indices is None:
+            return np.arange(self._length)
+        if isinstance(indices, slice):
+            return np.arange(self._length)[indices]
+        return np.asarray(indices, dtype=np.int64)
+
+    def column(self, field: str, indices=None) -> List[Any]:
+        """Decoded values of one column (original text for date columns), None where missing"""
+        idx = self._indices(indices)
+        if field in self._dates:
+            text = self._dates[field][idx].astype('U10').tolist()
+            suffix_column = self._date_suffixes[field]
+            exceptions = self._date_exceptions[field]
+            if not exceptions and suffix_column.values == [''] and (suffix_column.codes >= 0).all():
+                return text
+            suffixes = suffix_column.decode(idx)
+            return [exceptions.get(i) if suffix is None else day + suffix
+                    for i, day, suffix in zip(idx.tolist(), text, suffixes)]
+        column = self._columns.get(field)
+        if column is None:
+            return [None] * len(idx)
+        if isinstance(column, (_Categories, HeapColumn)):
+            return column.decode(idx)
+        return column[idx].tolist()
+
+    def dates(self, field: str, indices=None) -> np.ndarray:
+        """datetime64[D] values of a date column (NaT where missing or malformed)"""
+        return self._dates[field][self._indices(indices)]
+
+    def take(self, indices) -> 'PatientTable':
+        """New table holding only the given rows (a slice or index array), in that order"""
+        idx = self._indices(indices)
+        columns = {}
+        for field, column in self._columns.items():
+            if isinstance(column, _Categories):
+                subset = _Categories.__new__(_Categories)
+                subset.values, subset._lookup, subset.codes = column.values, column._lookup, column.codes[idx]
+                columns[field] = subset
+            elif isinstance(column, HeapColumn):
+                columns[field] = column.take(idx)
+            else:
+                columns[field] = column[idx]
+        date_suffixes = {}
+        for field, suffixes in self._date_suffixes.items():
+            subset = _Categories.__new__(_Categories)
+            subset.values, subset._lookup, subset.codes = suffixes.values, suffixes._lookup, suffixes.codes[idx]
+            date_suffixes[field] = subset
+        date_exceptions = {}
+        for field, exceptions in self._date_exceptions.items():
+            date_exceptions[field] = {}
+            if exceptions:
+                for new, old in enumerate(idx.tolist()):
+                    if old in exceptions:
+                        date_exceptions[field][new] = exceptions[old]
+        dates = {field: parsed[idx] for field, parsed in self._dates.items()}
+        return PatientTable(self.fields, columns, dates, date_suffixes, date_exceptions, len(idx))
+
+    def to_rows(self, indices=None) -> List[Dict[str, Any]]:
+        """Rebuild row dicts (canonical keys) for the given row indices, or all rows"""
+        idx = self._indices(indices)
+        columns = [self.column(field, idx) for field in self.fields]
+        return [dict(zip(self.fields, values)) for values in zip(*columns)]
+
+    def _folded(self, field: str, indices: np.ndarray) -> List[str]:
+        if field in self._dates:
+            return ['' if text == 'NaT' else text for text in self._dates[field][indices].astype('U10').tolist()]
+        return ['' if value is None else str(value).casefold() for value in self.column(field, indices)]
+
+    def filter(self, filters: Dict[str, str], indices=None) -> np.ndarray:
+        """Row indices matching canonical filters (LIKE '%value%', exact GenderName)"""
+        idx = self._indices(indices)
+        for field, needle in filters.items():
+            if not len(idx):
+                break
+            column = self._columns.get(field)
+            if isinstance(column, _Categories):
+                # Match each distinct value once, then select rows by code
+                exact = field in EXACT_FIELDS
+                matching = [code for code, value in enumerate(column.values)
+                            if (str(value).casefold().rstrip() == needle if exact else needle in str(value).casefold())]
+                idx = idx[np.isin(column.codes[idx], matching)]
+            elif isinstance(column, HeapColumn):
+                idx = idx[column.contains(needle, idx)]
+            else:
+                mask = np.fromiter((needle in value for value in self._folded(field, idx)), dtype=bool, count=len(idx))
+                idx = idx[mask]
+        return idx
+
+    def age_fields(self, indices=None, today: Optional[date] = None) -> Tuple[List[Any], List[str]]:
+        """calculatedAge / formattedDOB columns (see age_fields), reusing the parsed DOB column"""
+        if 'PatientDOB' not in self._dates:
+            unknown = ['Unknown'] * len(self._indices(indices))
+            return unknown, list(unknown)
+        return _age_cells(self.column('PatientDOB', indices), self.dates('PatientDOB', indices), today)
+
+    def ages(self, indices=None, today: Optional[date] = None) -> List[Optional[int]]:
+        """Age in whole years from PatientDOB for each row (None where unknown)"""
+        if 'PatientDOB' not in self._dates:
+            return [None] * len(self._indices(indices))
+        dates = self.dates('PatientDOB', indices)
+        ages = ages_on(dates, today).tolist()
+        return [None if missing else age for age, missing in zip(ages, np.isnat(dates).tolist())]
+
+    @property
+    def nbytes(self) -> int:
+        """Approximate memory held by the table (arrays plus referenced objects)"""
+        if self._nbytes is None:
+            self._nbytes = self._measure()
+        return self._nbytes
+
+    def _measure(self) -> int:
+        import sys
+
+        total = 0
+        for column in self._columns.values():
+            if isinstance(column, _Categories):
+                total += column.codes.nbytes + sum(sys.getsizeof(value) for value in column.values)
+            elif isinstance(column, HeapColumn):
+                total += column.nbytes
+            else:
+                total += column.nbytes + sum(sys.getsizeof(value) for value in column if value is not None)
+        for field, parsed in self._dates.items():
+            suffixes = self._date_suffixes[field]
+            total += parsed.nbytes + suffixes.codes.nbytes + sum(sys.getsizeof(v) for v in suffixes.values)
+            total += sum(sys.getsizeof(v) for v in self._date_exceptions[field].values())
+        return total
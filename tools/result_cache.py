@@ -0,0 +1,169 @@
+import json
+import threading
+import time
+from collections import OrderedDict
+from typing import Any, Dict, Optional, Tuple
+
+from tools.filter_keys import filters_contain
+
+
+class _Entry:
+    __slots__ = ('value', 'filters', 'size', 'stored_at', 'expires_at', 'stale_until')
+
+    def __init__(self, value: Any, filters: Optional[Dict[str, str]], size: int, stored_at: float,
+                 expires_at: float, stale_until: float):
+        self.value = value
+        self.filters = filters
+        self.size = size
+        self.stored_at = stored_at
+        self.expires_at = expires_at
+        self.stale_until = stale_until
+
+
+class PatientResultCache:
+    """Bounded in-process cache for get_patients results.
+
+    Entries are fresh for a per-entry TTL, then kept as stale copies for
+    stale_grace_seconds (stale-while-revalidate) before they expire. The least
+    recently used entries are evicted once the total (JSON-encoded) payload
+    size passes max_bytes. Thread-safe; keys come from
+    tools.filter_keys.filters_key.
+
+    Entries stored with their canonical filters can also answer narrower
+    queries: on an exact miss, lookup() looks for a fresh entry whose filters
+    contain the requested ones (see filters_contain) and returns it as
+    CONTAINED - the caller narrows the rows locally.
+    """
+
+    FRESH = 'fresh'
+    STALE = 'stale'
+    CONTAINED = 'contained'
+
+    def __init__(self, max_bytes: int = 50 * 1024 * 1024, ttl_seconds: float = 120,
+                 stale_grace_seconds: float = 0):
+        self.max_bytes = max_bytes
+        self.ttl_seconds = ttl_seconds
+        self.stale_grace_seconds = stale_grace_seconds
+        self._entries: 'OrderedDict[str, _Entry]' = OrderedDict()
+        self._lock = threading.Lock()
+        self.total_bytes = 0
+        self.hits = 0
+        self.stale_hits = 0
+        self.containment_hits = 0
+        self.misses = 0
+        self.evictions = 0
+        self.expirations = 0
+
+    @staticmethod
+    def _payload_size(value: Any) -> int:
+        # Columnar row sets (PatientTable) report their own footprint
+        data = value.get('Data') if isinstance(value, dict) else None
+        if hasattr(data, 'nbytes'):
+            envelope = dict(value, Data=None)
+            return data.nbytes + len(json.dumps(envelope, default=str, separators=(',', ':')))
+        return len(json.dumps(value, default=str, separators=(',', ':')))
+
+    def get(self, key: str) -> Optional[Any]:
+        """Return the fresh cached value or None (refreshes LRU position)"""
+        value, state, _ = self.lookup(key, allow_stale=False)
+        return value
+
+    def lookup(self, key: str, allow_stale: bool = True,
+               filters: Optional[Dict[str, str]] = None) -> Tuple[Optional[Any], Optional[str], float]:
+        """Return (value, FRESH | STALE | CONTAINED | None, age in seconds) for a key.
+
+        Passing the canonical filters enables containment lookups on an exact miss.
+        """
+        now = time.monotonic()
+        with self._lock:
+            entry = self._entries.get(key)
+            if entry is not None and entry.stale_until <= now:
+                self._remove(key)
+                self.expirations += 1
+                entry = None
+            if entry is None:
+                return self._lookup_containing(filters, now)
+            age = now - entry.stored_at
+            if entry.expires_at <= now:
+                if not allow_stale:
+                    return self._lookup_containing(filters, now)
+                self._entries.move_to_end(key)
+                self.stale_hits += 1
+                return entry.value, self.STALE, age
+            self._entries.move_to_end(key)
+            self.hits += 1
+            return entry.value, self.FRESH, age
+
+    def _lookup_containing(self, filters: Optional[Dict[str, str]], now: float):
+        """Smallest fresh entry whose filters contain the requested ones (lock held)"""
+        best_key, best = None, None
+        if filters is not None:
+            for key, entry in self._entries.items():
+                if entry.filters is None or entry.expires_at <= now:
+                    continue
+                if (best is None or entry.size < best.size) and filters_contain(entry.filters, filters):
+                    best_key, best = key, entry
+        if best is None:
+            self.misses += 1
+            return None, None, 0.0
+        self._entries.move_to_end(best_key)
+        self.containment_hits += 1
+        return best.value, self.CONTAINED, now - best.stored_at
+
+    def put(self, key: str, value: Any, ttl_seconds: Optional[float] = None,
+            filters: Optional[Dict[str, str]] = None):
+        """Store a value, evicting least recently used entries to stay under max_bytes.
+
+        filters (canonical) lets the entry serve narrower queries.
+        """
+        size = self._payload_size(value)
+        if size > self.max_bytes:
+            return
+        ttl = self.ttl_seconds if ttl_seconds is None else ttl_seconds
+        now = time.monotonic()
+        with self._lock:
+            if key in self._entries:
+                self._remove(key)
+            self._entries[key] = _Entry(value, filters, size, now, now + ttl, now + ttl + self.stale_grace_seconds)
+            self.total_bytes += size
+            while self.total_bytes > self.max_bytes and self._entries:
+                oldest = next(iter(self._entries))
+                self._remove(oldest)
+                self.evictions += 1
+
+    def _remove(self, key: str):
+        entry = self._entries.pop(key)
+        self.total_bytes -= entry.size
+
+    def flush(self, prefix: Optional[str] = None) -> int:
+        """Drop every entry (prefix=None) or those whose key starts with prefix; returns count"""
+        with self._lock:
+            if prefix is None:
+                removed = len(self._entries)
+                self._entries.clear()
+                self.total_bytes = 0
+                return removed
+            doomed = [key for key in self._entries if key.startswith(prefix)]
+            for key in doomed:
+                self._remove(key)
+            return len(doomed)
+
+    def stats(self) -> Dict[str, Any]:
+        with self._lock:
+            lookups = self.hits + self.stale_hits + self.containment_hits + self.misses
+            return {
+                'entries': len(self._entries),
+                'bytes': self.total_bytes,
+                'max_bytes': self.max_bytes,
+                'ttl_seconds': self.ttl_seconds,
+                'stale_grace_seconds': self.stale_grace_seconds,
+                'hits': self.hits,
+                'stale_hits': self.stale_hits,
+                'containment_hits': self.containment_hits,
+                'misses': self.misses,
+                'hit_rate': round((self.hits + self.stale_hits + self.containment_hits) / lookups, 4) if lookups else 0.0,
+                'exact_hit_rate': round((self.hits + self.stale_hits) / lookups, 4) if lookups else 0.0,
+                'containment_hit_rate': round(self.containment_hits / lookups, 4) if lookups else 0.0,
+                'evictions': self.evictions,
+                'expirations': self.expirations
+            }
@@ -0,0 +1,131 @@
+import asyncio
+import threading
+from typing import Any, Awaitable, Callable, Dict, Hashable, Optional, Tuple
+
+
+class _Call:
+    """One in-flight upstream call and the threads waiting on it"""
+    def __init__(self):
+        self.done = threading.Event()
+        self.result = None
+        self.error = None
+
+
+class _LeaderCancelled(Exception):
+    """Set on a shared future when its leader coroutine is cancelled; followers retry instead"""
+
+
+class SingleFlight:
+    """Collapse concurrent calls with the same key into one upstream request.
+
+    The first caller for a key runs the function; callers arriving while it is
+    in flight block until it finishes and receive the same result (or error).
+    Works across threads, and separately for coroutines on one event loop.
+    """
+
+    def __init__(self):
+        self._lock = threading.Lock()
+        self._calls: Dict[Hashable, _Call] = {}
+        self._async_calls: Dict[Hashable, asyncio.Future] = {}
+        self.calls = 0
+        self.executions = 0
+        self.coalesced = 0
+
+    def do(self, key: Hashable, fn: Callable[[], Any], timeout: Optional[float] = None) -> Tuple[Any, bool]:
+        """Run fn once per in-flight key; returns (result, shared).
+
+        timeout bounds how long a caller waits on another caller's request
+        (TimeoutError when it runs out); the caller that runs fn is not limited.
+        """
+        with self._lock:
+            self.calls += 1
+            call = self._calls.get(key)
+            if call is not None:
+                self.coalesced += 1
+                leader = False
+            else:
+                call = _Call()
+                self._calls[key] = call
+                self.executions += 1
+                leader = True
+
+        if not leader:
+            if not call.done.wait(timeout):
+                raise TimeoutError(f"Gave up waiting on the in-flight call after {timeout:.1f}s")
+            if call.error is not None:
+                raise call.error
+            return call.result, True
+
+        try:
+            call.result = fn()
+        except BaseException as e:
+            call.error = e
+            raise
+        finally:
+            with self._lock:
+                self._calls.pop(key, None)
+            call.done.set()
+        return call.result, False
+
+    async def do_async(self, key: Hashable, fn: Callable[[], Awaitable[Any]],
+                       timeout: Optional[float] = None) -> Tuple[Any, bool]:
+        """Coroutine variant of do() for callers on the same event loop.
+
+        If the leader is cancelled (its client went away), its followers are
+        not: the first of them runs fn itself and the rest wait on it.
+        """
+        loop = asyncio.get_running_loop()
+        give_up_at = loop.time() + timeout if timeout is not None else None
+        with self._lock:
+            self.calls += 1
+        joined = False
+        while True:
+            with self._lock:
+                future = self._async_calls.get(key)
+                if future is not None:
+                    self.coalesced += not joined
+                    leader = False
+                else:
+                    future = loop.create_future()
+                    self._async_calls[key] = future
+                    self.executions += 1
+                    # A follower taking over from a cancelled leader is no longer coalesced
+                    self.coalesced -= joined
+                    leader = True
+            if leader:
+                break
+            joined = True
+
+            remaining = None if give_up_at is None else max(0.0, give_up_at - loop.time())
+            try:
+                # wait_for raises TimeoutError (asyncio.TimeoutError) when the timeout runs out
+                return await asyncio.wait_for(asyncio.shield(future), remaining), True
+            except _LeaderCancelled:
+                continue
+
+        try:
+            result = await fn()
+        except asyncio.CancelledError:
+            future.set_exception(_LeaderCancelled())
+            future.exception()
+            raise
+        except BaseException as e:
+            future.set_exception(e)
+            # Nobody may be waiting; don't warn about an unretrieved exception
+            future.exception()
+            raise
+        else:
+            future.set_result(result)
+        finally:
+            with self._lock:
+                self._async_calls.pop(key, None)
+        return result, False
+
+    def stats(self) -> Dict[str, int]:
+        with self._lock:
+            return {
+                'calls': self.calls,
+                'upstream_requests': self.executions,
+                'coalesced': self.coalesced,
+                'in_flight': len(self._calls) + len(self._async_calls)
+            }
@@ -1,6 +1,10 @@
-from flask import Flask, render_template, request, jsonify, make_response
+from flask import Flask, render_template, request, jsonify, make_response, Response, stream_with_context
 from config import Config
-from llm.router_api_llm import RouterAPILLM
+from llm.router_api_llm import RouterAPILLM, sse_frame
+from tools.http_pool import pool_stats
+from tools.deadline import Deadline
+from teams_headers import add_teams_headers
+from admin_auth import is_admin_request
 import logging
 import time
 import os
@@ -8,27 +12,6 @@ import os
 app = Flask(__name__)
 config = Config()
 
-# CSP and Teams integration headers
-def add_teams_headers(response):
-    """Add headers required for Microsoft Teams integration"""
-    response.headers['Content-Security-Policy'] = (
-        "frame-ancestors 'self' https://teams.microsoft.com https://*.teams.microsoft.com "
-        "https://*.skype.com https://*.teams.microsoft.us https://*.gov.teams.microsoft.us "
-        "https://*.office.com https://*.sharepoint.com https://*.office365.com; "
-        "default-src 'self' 'unsafe-inline' 'unsafe-eval' https: data: blob:; "
-        "script-src 'self' 'unsafe-inline' 'unsafe-eval' https://res.cdn.office.net "
-        "https://statics.teams.cdn.office.net https://teams.microsoft.com "
-        "https://fonts.googleapis.com https://*.office.com; "
-        "style-src 'self' 'unsafe-inline' https://fonts.googleapis.com https://fonts.gstatic.com; "
-        "font-src 'self' https://fonts.gstatic.com https://fonts.googleapis.com; "
-        "img-src 'self' data: https: blob:; "
-        "connect-src 'self' https: wss: data:;"
-    )
-    response.headers['X-Frame-Options'] = 'ALLOWALL'
-    response.headers['X-Content-Type-Options'] = 'nosniff'
-    response.headers['Referrer-Policy'] = 'strict-origin-when-cross-origin'
-    return response
-
 @app.after_request
 def after_request(response):
     return add_teams_headers(response)
@@ -62,6 +45,8 @@ def teams_tab():
 @app.route('/chat', methods=['POST'])
 def chat():
     """Handle chat messages with better error handling"""
+    # The whole answer - LLM, MCP and rendering - has to fit in CHAT_DEADLINE_SECONDS
+    deadline = Deadline(config.CHAT_DEADLINE_SECONDS)
     try:
         if not llm:
             return jsonify({
@@ -86,13 +71,14 @@ def chat():
         
         logger.info(f"📝 Processing user message: {user_message}")
         
-        # Add timeout to LLM processing
         try:
-            response = llm.process_query(user_message)
-            logger.info(f"✅ Generated response: {response[:100]}...")
+            reply = llm.process_query_paged(user_message, deadline=deadline)
+            logger.info(f"✅ Generated response: {reply['response'][:100]}...")
             
             return jsonify({
-                'response': response,
+                'response': reply['response'],
+                'next_cursor': reply['next_cursor'],
+                'total_count': reply['total_count'],
                 'error': False
             })
             
@@ -110,24 +96,90 @@ def chat():
             'error': True
         }), 500
 
+@app.route('/chat/stream', methods=['POST'])
+def chat_stream():
+    """Streaming /chat: Server-Sent Events with progress, then the table and its rows as they are rendered"""
+    deadline = Deadline(config.CHAT_DEADLINE_SECONDS)
+    data = request.get_json(silent=True) or {}
+    user_message = str(data.get('message', '')).strip()
+    
+    def events():
+        if not llm:
+            yield sse_frame({'event': 'message', 'html': '❌ Chatbot is not properly initialized. Please check the configuration.', 'error': True})
+        elif not user_message:
+            yield sse_frame({'event': 'message', 'html': '⚠️ Please enter a message.', 'error': True})
+        else:
+            logger.info(f"📝 Streaming response to user message: {user_message}")
+            try:
+                for event in llm.stream_query(user_message, deadline=deadline):
+                    yield sse_frame(event)
+                return
+            except Exception as e:
+                logger.error(f"❌ Error in chat stream: {str(e)}")
+                yield sse_frame({'event': 'message', 'html': '❌ Server error. Please try again.', 'error': True})
+        yield sse_frame({'event': 'done', 'html': '', 'total_count': None})
+    
+    return Response(stream_with_context(events()), mimetype='text/event-stream',
+                    headers={'Cache-Control': 'no-cache', 'X-Accel-Buffering': 'no'})
+
+@app.route('/chat/page', methods=['POST'])
+def chat_page():
+    """Fetch a further page of patient rows for an earlier answer (no LLM call)"""
+    deadline = Deadline(config.CHAT_DEADLINE_SECONDS)
+    try:
+        if not llm:
+            return jsonify({
+                'response': '❌ Chatbot is not properly initialized. Please check the configuration.',
+                'error': True
+            })
+        
+        data = request.get_json(silent=True) or {}
+        cursor = str(data.get('cursor', '')).strip()
+        if not cursor:
+            return jsonify({
+                'response': '❌ No page cursor received',
+                'error': True
+            })
+        
+        reply = llm.get_page(cursor, deadline=deadline)
+        return jsonify({
+            'response': reply['response'],
+            'next_cursor': reply['next_cursor'],
+            'total_count': reply['total_count'],
+            'error': reply['total_count'] is None
+        })
+        
+    except Exception as e:
+        logger.error(f"❌ Error in chat page endpoint: {str(e)}")
+        return jsonify({
+            'response': f'❌ Server error. Please try again.',
+            'error': True
+        }), 500
+
 @app.route('/health')
 def health():
     """Enhanced health check endpoint"""
     try:
-        # Test MCP server connection
+        breaker = llm.patient_tool.circuit_breaker if llm else None
+        
+        # Test MCP server connection (skip the probe while the breaker is open)
         mcp_status = "unknown"
-        try:
-            import requests
-            mcp_response = requests.get(f"{config.MCP_SERVER_URL}/health", timeout=5)
-            mcp_status = "healthy" if mcp_response.status_code == 200 else "unhealthy"
-        except:
-            mcp_status = "unreachable"
+        if breaker and breaker.state == breaker.OPEN:
+            mcp_status = "circuit_open"
+        else:
+            try:
+                import requests
+                mcp_response = requests.get(f"{config.MCP_SERVER_URL}/health", timeout=5)
+                mcp_status = "healthy" if mcp_response.status_code == 200 else "unhealthy"
+            except:
+                mcp_status = "unreachable"
         
         return jsonify({
             'status': 'healthy',
             'service': 'MCP Medical Assistant Chatbot',
             'mcp_server_url': config.MCP_SERVER_URL,
             'mcp_server_status': mcp_status,
+            'mcp_circuit_breaker': breaker.snapshot() if breaker else None,
             'llm_initialized': llm is not None,
             'environment': 'production' if os.getenv('RENDER_SERVICE_NAME') else 'development',
             'timestamp': int(time.time())
@@ -147,7 +199,68 @@ def status():
         'model': config.MODEL_NAME,
         'max_tokens': config.MAX_TOKENS,
         'temperature': config.TEMPERATURE,
-        'llm_ready': llm is not None
+        'llm_ready': llm is not None,
+        'mcp_connection_pool': pool_stats(),
+        'mcp_request_coalescing': llm.patient_tool.singleflight.stats() if llm else None,
+        'patient_result_cache': llm.patient_tool.result_cache.stats() if llm and llm.patient_tool.result_cache else None,
+        'patient_data_mode': llm.patient_tool.data_mode if llm else None,
+        'patient_mirror': llm.patient_tool.mirror.stats() if llm else None,
+        'patient_mirror_sync': llm.patient_tool.mirror_sync.stats() if llm else None,
+        'query_routing': llm.route_metrics.stats() if llm else None,
+        'decision_cache': llm.decision_cache.stats() if llm and llm.decision_cache else None,
+        'speculative_prefetch': llm.speculation.metrics.stats() if llm and llm.speculation else None,
+        'chat_stream': llm.stream_metrics.stats()['paths'] if llm else None
+    })
+
+@app.route('/admin/cache/flush', methods=['POST'])
+def flush_cache():
+    """Flush the patient result cache - all entries, or only keys starting with 'prefix'"""
+    if not is_admin_request(config, request.headers.get('X-Admin-Token')):
+        return jsonify({'error': 'Forbidden'}), 403
+    
+    if not llm or not llm.patient_tool.result_cache:
+        return jsonify({'flushed': 0, 'message': 'Patient result cache is disabled'})
+    
+    data = request.get_json(silent=True) or {}
+    prefix = data.get('prefix')
+    flushed = llm.patient_tool.result_cache.flush(prefix)
+    logger.info(f"🧹 Flushed {flushed} cache entries (prefix={prefix!r})")
+    
+    return jsonify({
+        'flushed': flushed,
+        'prefix': prefix,
+        'cache': llm.patient_tool.result_cache.stats()
+    })
+
+@app.route('/admin/mirror', methods=['POST'])
+def admin_mirror():
+    """Switch the patient data mode ('mirror' / 'passthrough'), run an incremental 'sync' or a forced full 'reload'"""
+    if not is_admin_request(config, request.headers.get('X-Admin-Token')):
+        return jsonify({'error': 'Forbidden'}), 403
+    
+    if not llm:
+        return jsonify({'error': 'Chatbot is not properly initialized'}), 503
+    
+    data = request.get_json(silent=True) or {}
+    mode = data.get('mode')
+    if mode:
+        try:
+            llm.patient_tool.set_data_mode(mode)
+        except ValueError as e:
+            return jsonify({'error': str(e)}), 400
+    
+    result = None
+    if data.get('reload'):
+        result = llm.patient_tool.load_mirror()
+    elif data.get('sync'):
+        result = llm.patient_tool.sync_mirror()
+    logger.info(f"🪞 Mirror admin: mode={llm.patient_tool.data_mode}, reload={bool(data.get('reload'))}, sync={bool(data.get('sync'))}")
+    
+    return jsonify({
+        'mode': llm.patient_tool.data_mode,
+        'result': result,
+        'mirror': llm.patient_tool.mirror.stats(),
+        'sync': llm.patient_tool.mirror_sync.stats()
     })
 
 @app.route('/privacy')
@@ -174,6 +287,7 @@ def debug_mcp():
             "mcp_server_url": config.MCP_SERVER_URL,
             "health_check": "unknown",
             "patients_endpoint": "unknown",
+            "circuit_breaker": llm.patient_tool.circuit_breaker.snapshot() if llm else None,
             "error": None
         }
         